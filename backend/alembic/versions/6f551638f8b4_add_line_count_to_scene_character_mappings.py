@@ -0,0 +1,54 @@
+"""add line_count to scene_character_mappings
+
+香盤表のマッピングをシーン別の出演インデックスとして使うため、各登場人物の
+セリフ数を保持する列を追加する。既存の自動マッピングは lines から集計して埋める。
+
+Revision ID: 6f551638f8b4
+Revises: a1b2c3d4e5f6, f0a1b2c3d4e5
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "6f551638f8b4"
+down_revision: str | None = ("a1b2c3d4e5f6", "f0a1b2c3d4e5")
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "scene_character_mappings",
+        sa.Column("line_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "ix_scene_character_mappings_scene_id",
+        "scene_character_mappings",
+        ["scene_id"],
+    )
+
+    # 既存データのバックフィル
+    op.execute("""
+        UPDATE scene_character_mappings scm
+        SET line_count = counts.line_count
+        FROM (
+            SELECT scene_id, character_id, COUNT(*) AS line_count
+            FROM lines
+            WHERE character_id IS NOT NULL
+            GROUP BY scene_id, character_id
+        ) counts
+        WHERE scm.scene_id = counts.scene_id
+          AND scm.character_id = counts.character_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_scene_character_mappings_scene_id", table_name="scene_character_mappings"
+    )
+    op.drop_column("scene_character_mappings", "line_count")
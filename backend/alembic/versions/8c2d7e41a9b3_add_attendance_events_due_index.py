@@ -0,0 +1,30 @@
+"""add index for due attendance reminders
+
+リマインダーの定時チェックで、未完了イベントを稽古日時で絞り込むための複合インデックス。
+
+Revision ID: 8c2d7e41a9b3
+Revises: 6f551638f8b4
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+revision: str = "8c2d7e41a9b3"
+down_revision: str | None = "6f551638f8b4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_attendance_events_completed_schedule_date",
+        "attendance_events",
+        ["completed", "schedule_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attendance_events_completed_schedule_date", table_name="attendance_events")
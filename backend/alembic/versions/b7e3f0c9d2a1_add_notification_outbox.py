@@ -0,0 +1,55 @@
+"""add notification_outbox
+
+Discord Webhook・メールの送信待ちを保持するアウトボックステーブル。
+
+Revision ID: b7e3f0c9d2a1
+Revises: 8c2d7e41a9b3
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "b7e3f0c9d2a1"
+down_revision: str | None = "8c2d7e41a9b3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+DENY_POLICY = "Explicitly deny all public access"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("kind", sa.String(length=30), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_notification_outbox_status_next_attempt_at",
+        "notification_outbox",
+        ["status", "next_attempt_at"],
+    )
+    # Webhook URL・予約者のメールアドレスを含むため、Data API 経由の公開アクセスを拒否する
+    op.execute("ALTER TABLE public.notification_outbox ENABLE ROW LEVEL SECURITY")
+    op.execute(
+        f'CREATE POLICY "{DENY_POLICY}" ON public.notification_outbox '
+        f"FOR ALL USING (false) WITH CHECK (false)"
+    )
+
+
+def downgrade() -> None:
+    op.execute(f'DROP POLICY IF EXISTS "{DENY_POLICY}" ON public.notification_outbox')
+    op.execute("ALTER TABLE public.notification_outbox DISABLE ROW LEVEL SECURITY")
+    op.drop_index("ix_notification_outbox_status_next_attempt_at", table_name="notification_outbox")
+    op.drop_table("notification_outbox")
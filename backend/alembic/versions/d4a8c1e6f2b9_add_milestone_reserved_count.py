@@ -0,0 +1,42 @@
+"""add milestone reserved_count
+
+予約作成時の定員チェックを予約の集計ではなく条件付き UPDATE で行うためのカウンター。
+既存の予約人数で初期化する。
+
+Revision ID: d4a8c1e6f2b9
+Revises: b7e3f0c9d2a1
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "d4a8c1e6f2b9"
+down_revision: str | None = "b7e3f0c9d2a1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "milestones",
+        sa.Column("reserved_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        UPDATE milestones
+        SET reserved_count = (
+            SELECT COALESCE(SUM(reservations.count), 0)
+            FROM reservations
+            WHERE reservations.milestone_id = milestones.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("milestones", "reserved_count")
@@ -135,3 +135,22 @@ async def send_event_reminders_timer(timer: func.TimerRequest) -> None:
     logging.info("Starting event reminder task...")
     stats = await check_todays_events()
     logging.info(f"Event reminder task completed: {stats}")
+
+
+@app.schedule(schedule="0 * * * * *", arg_name="timer", run_on_startup=False, use_monitor=False)
+async def drain_notification_outbox(timer: func.TimerRequest) -> None:
+    """毎分、送信待ちの通知（Discord Webhook・メール）を送信."""
+    try:
+        from src.config import settings
+        from src.services.notification_outbox import drain_outbox
+
+        # 取り出した件数がバッチサイズに満たなくなるまで続ける
+        while True:
+            stats = await drain_outbox()
+            if stats["claimed"]:
+                logging.info(f"Notification outbox drained: {stats}")
+            if stats["claimed"] < settings.notification_outbox_batch_size:
+                break
+
+    except Exception as e:
+        logging.error(f"Error in Notification Outbox Timer: {e}", exc_info=True)
@@ -0,0 +1,124 @@
+"""出欠リマインダー送信（check_deadlines）のベンチマーク.
+
+SQLite（インメモリ）に送信対象のイベントを作成し、応答に一定の遅延がある偽のDiscord
+トランスポートに対して check_deadlines を実行する。同時送信数を1にした逐次送信と、
+設定値による並行送信の所要時間を比較する。
+
+Usage:
+    python scripts/benchmark_attendance_reminders.py
+    python scripts/benchmark_attendance_reminders.py --events 1000 --channels 50 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+
+import httpx
+
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(backend_root)
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.config import settings
+from src.db.base import Base
+from src.db.models import AttendanceEvent, AttendanceTarget, TheaterProject, User
+from src.services.attendance_tasks import check_deadlines
+from src.services.discord import DiscordService
+
+TARGETS_PER_EVENT = 3
+
+
+class FakeDiscordTransport(httpx.AsyncBaseTransport):
+    """一定時間待ってから成功を返すDiscord APIの代わり."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        return httpx.Response(200, json={"id": str(self.requests)}, request=request)
+
+
+async def seed(session_maker: async_sessionmaker, event_count: int, channel_count: int) -> None:
+    """リマインダー送信対象（1回目）のイベントを作成する."""
+    async with session_maker() as db:
+        users = [
+            User(discord_id=f"{i}", discord_username=f"user{i}") for i in range(TARGETS_PER_EVENT)
+        ]
+        projects = [
+            TheaterProject(name=f"project{i}", discord_channel_id=f"{1000 + i}")
+            for i in range(channel_count)
+        ]
+        db.add_all(users + projects)
+        await db.flush()
+
+        schedule_date = datetime.now(UTC) + timedelta(hours=10)
+        for i in range(event_count):
+            project = projects[i % channel_count]
+            event = AttendanceEvent(
+                project_id=project.id,
+                message_id=f"{i}",
+                channel_id=project.discord_channel_id,
+                title=f"稽古{i}",
+                schedule_date=schedule_date,
+                deadline=schedule_date - timedelta(hours=1),
+            )
+            db.add(event)
+            await db.flush()
+            db.add_all(AttendanceTarget(event_id=event.id, user_id=user.id) for user in users)
+        await db.commit()
+
+
+async def run_once(args: argparse.Namespace, concurrency: int, per_channel: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(session_maker, args.events, args.channels)
+
+    transport = FakeDiscordTransport(args.latency)
+    settings.reminder_dispatch_concurrency = concurrency
+    settings.reminder_dispatch_per_channel = per_channel
+    async with httpx.AsyncClient(transport=transport) as client:
+        start = time.perf_counter()
+        stats = await check_deadlines(session_maker, DiscordService(http_client=client))
+        elapsed = time.perf_counter() - start
+
+    await engine.dispose()
+    print(
+        f"{concurrency:>11} {per_channel:>11} {elapsed:>9.2f} "
+        f"{stats['schedule_reminders_sent']:>6} {transport.max_in_flight:>9}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="1リクエストの応答時間（秒）")
+    args = parser.parse_args()
+
+    settings.discord_bot_token = "benchmark"
+    print(f"events={args.events} channels={args.channels} latency={args.latency}s")
+    print(f"{'concurrency':>11} {'per_channel':>11} {'total (s)':>9} {'sent':>6} {'in-flight':>9}")
+    concurrency = settings.reminder_dispatch_concurrency
+    per_channel = settings.reminder_dispatch_per_channel
+    await run_once(args, concurrency=1, per_channel=1)
+    await run_once(args, concurrency=concurrency, per_channel=per_channel)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""日程調整レコメンドのベンチマーク.
+
+合成した候補日程・シーン・メンバーで PollRecommendationEngine の計算時間を計測する。
+DBアクセスは含まない（エンジンの初期化と評価、1人の回答の差分更新のみ）。
+
+Usage:
+    python scripts/benchmark_poll_recommendation.py
+    python scripts/benchmark_poll_recommendation.py --candidates 60 --scenes 120 --members 80
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(backend_root)
+
+from src.services.poll_recommendation import PollRecommendationEngine, RecommendationScene
+
+CHARACTERS_PER_SCENE = 6
+STATUSES = ["ok", "ok", "maybe", "ng"]
+
+
+def build_inputs(candidate_count: int, scene_count: int, member_count: int, seed: int) -> tuple:
+    """エンジンの入力を組み立てる（メンバーの半数を配役、1割をスタッフとする）."""
+    rng = random.Random(seed)
+    members = [uuid.uuid4() for _ in range(member_count)]
+    actors = members[: member_count // 2]
+    staff = members[member_count // 2 : member_count // 2 + max(1, member_count // 10)]
+
+    # 役者1人につき1役、1割はダブルキャスト
+    characters = [uuid.uuid4() for _ in actors]
+    character_users = {
+        character_id: [actor] + ([rng.choice(actors)] if rng.random() < 0.1 else [])
+        for character_id, actor in zip(characters, actors, strict=True)
+    }
+    scenes = [
+        RecommendationScene(id=uuid.uuid4(), act_number=1, scene_number=i + 1, heading=f"S{i}")
+        for i in range(scene_count)
+    ]
+    scene_characters = {
+        scene.id: rng.sample(characters, min(CHARACTERS_PER_SCENE, len(characters)))
+        for scene in scenes
+    }
+    candidates = [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            start_datetime=None,
+            end_datetime=None,
+            answers=[
+                SimpleNamespace(user_id=user_id, status=rng.choice(STATUSES))
+                for user_id in members
+                if rng.random() < 0.9
+            ],
+        )
+        for _ in range(candidate_count)
+    ]
+    return scenes, scene_characters, character_users, {"演出": staff}, set(staff), candidates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=60)
+    parser.add_argument("--scenes", type=int, default=120)
+    parser.add_argument("--members", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    scenes, scene_characters, character_users, role_users, priority, candidates = build_inputs(
+        args.candidates, args.scenes, args.members, args.seed
+    )
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        engine = PollRecommendationEngine(
+            scenes, scene_characters, character_users, role_users, priority
+        )
+        recommendations = engine.recommend(candidates)
+        timings.append(time.perf_counter() - start)
+
+    print(
+        f"candidates={args.candidates} scenes={args.scenes} members={args.members} "
+        f"repeat={args.repeat}"
+    )
+    print(
+        f"best: {min(timings) * 1000:.2f} ms  median: {sorted(timings)[len(timings) // 2] * 1000:.2f} ms"
+    )
+    print(f"top score: {recommendations[0]['score'] if recommendations else '-'}")
+
+    # 1人の回答を変更して、その候補日程のレコメンドを作り直す
+    rng = random.Random(args.seed)
+    states = [engine.build(candidate) for candidate in candidates]
+    users = [user_id for user_ids in character_users.values() for user_id in user_ids]
+    updates = [(rng.choice(states), rng.choice(users), rng.choice(STATUSES)) for _ in range(1000)]
+    start = time.perf_counter()
+    for state, user_id, status in updates:
+        if engine.apply_answer(state, user_id, status):
+            engine.evaluate_state(state)
+    elapsed = time.perf_counter() - start
+    print(f"answer update: {elapsed / len(updates) * 1_000_000:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""予約作成（POST /api/public/reservations）の同時実行ベンチマーク.
+
+SQLite（一時ファイル）に定員付きのマイルストーンを作成し、チケット販売開始直後を想定して
+多数の予約を同時に送る。定員を超えて予約されていないこと（超過0件）、予約済み人数の
+カウンターが予約の合計と一致すること、応答時間（p50 / p99）を確認する。
+
+Usage:
+    python scripts/benchmark_reservations.py
+    python scripts/benchmark_reservations.py --requests 500 --capacity 300 --max-p99-ms 10000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+
+import httpx
+
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(backend_root)
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.db import get_db
+from src.db.base import Base
+from src.db.models import Milestone, Reservation, TheaterProject
+from src.main import app
+
+
+async def seed(session_maker: async_sessionmaker, capacity: int) -> Milestone:
+    """定員付きのマイルストーンを作成する."""
+    async with session_maker() as db:
+        project = TheaterProject(name="benchmark", is_public=True)
+        db.add(project)
+        await db.flush()
+        milestone = Milestone(
+            project_id=project.id,
+            title="本番",
+            start_date=datetime.now(UTC) + timedelta(days=7),
+            reservation_capacity=capacity,
+        )
+        db.add(milestone)
+        await db.commit()
+        return milestone
+
+
+async def book(client: httpx.AsyncClient, milestone: Milestone, i: int) -> tuple[int, float]:
+    payload = {
+        "milestone_id": str(milestone.id),
+        "name": f"guest{i}",
+        "email": f"guest{i}@example.com",
+        "count": 1 + i % 2,
+    }
+    start = time.perf_counter()
+    response = await client.post("/api/public/reservations", json=payload)
+    return response.status_code, time.perf_counter() - start
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="同時に送る予約の件数")
+    parser.add_argument("--capacity", type=int, default=300, help="マイルストーンの定員")
+    parser.add_argument("--max-p99-ms", type=float, default=10000.0, help="p99の上限（ミリ秒）")
+    args = parser.parse_args()
+
+    # リクエストごとのログを抑止する
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        milestone = await seed(session_maker, args.capacity)
+
+        async def override_get_db():
+            async with session_maker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                start = time.perf_counter()
+                results = await asyncio.gather(
+                    *(book(client, milestone, i) for i in range(args.requests))
+                )
+                elapsed = time.perf_counter() - start
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+        async with session_maker() as db:
+            total = await db.scalar(
+                select(func.coalesce(func.sum(Reservation.count), 0)).where(
+                    Reservation.milestone_id == milestone.id
+                )
+            )
+            counter = await db.scalar(
+                select(Milestone.reserved_count).where(Milestone.id == milestone.id)
+            )
+        await engine.dispose()
+
+    statuses = [status for status, _ in results]
+    latencies = sorted(latency * 1000 for _, latency in results)
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    oversold = max(total - args.capacity, 0)
+
+    print(f"requests={args.requests} capacity={args.capacity} total={elapsed:.2f}s")
+    print(
+        f"accepted={statuses.count(200)} rejected={statuses.count(400)} "
+        f"errors={len(statuses) - statuses.count(200) - statuses.count(400)}"
+    )
+    print(f"reserved={total} counter={counter} oversold={oversold}")
+    print(f"p50={p50:.1f}ms p99={p99:.1f}ms")
+
+    ok = oversold == 0 and counter == total and p99 <= args.max_p99_ms
+    ok = ok and statuses.count(200) + statuses.count(400) == len(statuses)
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
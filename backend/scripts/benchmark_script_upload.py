@@ -0,0 +1,120 @@
+"""脚本アップロード時のDB書き込みベンチマーク.
+
+合成した解析結果（ParsedScript）を使い、登場人物・シーン・セリフ・香盤表マッピングの
+書き込みにかかる時間を、一括INSERTとORMの両モードで計測する。
+Fountainのパースは含まない（書き込み経路のみの比較）。
+
+Usage:
+    python scripts/benchmark_script_upload.py
+    python scripts/benchmark_script_upload.py --database-url postgresql+asyncpg://... --lines 500 5000
+
+PostgreSQLを指定した場合はスキーマが作成済みであること。計測用の行は毎回ロールバックする。
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(backend_root)
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.db import _prepare_asyncpg_url
+from src.db.base import Base
+from src.db.models import Script, TheaterProject, User
+from src.services.fountain_parser import parse_fountain_and_create_models
+from src.services.parsed_script import ParsedCharacter, ParsedLine, ParsedScene, ParsedScript
+from src.services.scene_chart_generator import generate_scene_chart
+
+LINES_PER_SCENE = 40
+CHARACTER_COUNT = 12
+
+
+def build_parsed_script(line_count: int) -> ParsedScript:
+    """指定行数の合成脚本を組み立てる."""
+    characters = [
+        ParsedCharacter(name=f"人物{i}", order=i + 1, description="説明")
+        for i in range(CHARACTER_COUNT)
+    ]
+    scenes: list[ParsedScene] = []
+    for index in range(line_count):
+        if index % LINES_PER_SCENE == 0:
+            scenes.append(
+                ParsedScene(scene_number=len(scenes) + 1, act_number=1, heading=f"シーン{index}")
+            )
+        order = index % LINES_PER_SCENE + 1
+        # 4行に1行はト書き
+        character = characters[index % CHARACTER_COUNT] if order % 4 else None
+        scenes[-1].lines.append(
+            ParsedLine(
+                content="これはベンチマーク用のセリフです。" * 2, order=order, character=character
+            )
+        )
+    return ParsedScript(
+        content_hash=f"bench-{line_count}",
+        elements=[],
+        metadata={},
+        characters=characters,
+        scenes=scenes,
+    )
+
+
+async def run_once(session_maker: async_sessionmaker, parsed: ParsedScript, bulk: bool) -> float:
+    """1回分の書き込み時間（秒）を計測し、書き込んだ行はロールバックする."""
+    async with session_maker() as db:
+        user = User(discord_id=f"bench-{time.time_ns()}", discord_username="bench")
+        project = TheaterProject(name="benchmark")
+        db.add_all([user, project])
+        await db.flush()
+        script = Script(project_id=project.id, uploaded_by=user.id, title="benchmark", content="")
+        db.add(script)
+        await db.flush()
+
+        start = time.perf_counter()
+        scene_line_counts = await parse_fountain_and_create_models(
+            script, "", db, parsed=parsed, bulk=bulk
+        )
+        await generate_scene_chart(script, db, scene_line_counts=scene_line_counts, bulk=bulk)
+        elapsed = time.perf_counter() - start
+
+        await db.rollback()
+        return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--lines", type=int, nargs="+", default=[500, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    url, connect_args = _prepare_asyncpg_url(args.database_url)
+    if not url.startswith("postgresql"):
+        connect_args = {}
+    engine = create_async_engine(url, connect_args=connect_args)
+    if url.startswith("sqlite"):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"database: {engine.dialect.name} ({engine.dialect.driver})")
+    print(f"{'lines':>8} {'orm (ms)':>10} {'bulk (ms)':>10} {'speedup':>8}")
+    for line_count in args.lines:
+        parsed = build_parsed_script(line_count)
+        results = {}
+        for bulk in (False, True):
+            timings = [await run_once(session_maker, parsed, bulk) for _ in range(args.repeat)]
+            results[bulk] = min(timings) * 1000
+        print(
+            f"{line_count:>8} {results[False]:>10.1f} {results[True]:>10.1f} "
+            f"{results[False] / results[True]:>7.1f}x"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,7 +2,7 @@
 
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -19,7 +19,7 @@ from src.db.models import (
 )
 from src.dependencies.permissions import get_project_editor_dep, get_project_member_dep
 from src.schemas.character import CastingCreate, CastingUser, CharacterCreate, CharacterResponse
-from src.services.discord import DiscordService, get_discord_service
+from src.services.notification_outbox import enqueue_discord_notification
 
 router = APIRouter()
 
@@ -92,10 +92,8 @@ async def add_casting(
     project_id: UUID,
     character_id: UUID,
     casting_data: CastingCreate,
-    background_tasks: BackgroundTasks,
     editor_member: ProjectMember = Depends(get_project_editor_dep),  # 編集権限以上
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> list[CastingUser]:
     """キャラクターにキャストを追加.
 
@@ -172,6 +170,14 @@ async def add_casting(
     )
     db.add(audit)
 
+    # 通知
+    project = await db.get(TheaterProject, project_id)
+    enqueue_discord_notification(
+        db,
+        content=f"🎭 **配役決定**\nプロジェクト: {project.name}\nキャラクター: {character.name}\nキャスト: {target_username}",
+        webhook_url=project.discord_webhook_url,
+    )
+
     await db.commit()
 
     # 更新後のリストを返すためにリフレッシュ
@@ -183,14 +189,6 @@ async def add_casting(
     )
     character = result.scalar_one()
 
-    # 通知
-    project = await db.get(TheaterProject, project_id)
-    background_tasks.add_task(
-        discord_service.send_notification,
-        content=f"🎭 **配役決定**\nプロジェクト: {project.name}\nキャラクター: {character.name}\nキャスト: {target_username}",
-        webhook_url=project.discord_webhook_url,
-    )
-
     return [
         CastingUser(user_id=c.user.id, discord_username=c.user.display_name, cast_name=c.cast_name)
         for c in character.castings
@@ -204,10 +202,8 @@ async def remove_casting(
     project_id: UUID,
     character_id: UUID,
     user_id: UUID,
-    background_tasks: BackgroundTasks,
     editor_member: ProjectMember = Depends(get_project_editor_dep),  # 編集権限以上
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> list[CastingUser]:
     """配役を解除.
 
@@ -261,6 +257,14 @@ async def remove_casting(
     )
     db.add(audit)
 
+    # 通知
+    project = await db.get(TheaterProject, project_id)
+    enqueue_discord_notification(
+        db,
+        content=f"🚫 **配役解除**\nプロジェクト: {project.name}\nキャラクター: {character.name}\n対象: {user_name}",
+        webhook_url=project.discord_webhook_url,
+    )
+
     await db.commit()
 
     # 更新後のリスト
@@ -271,14 +275,6 @@ async def remove_casting(
     )
     character = result.scalar_one()
 
-    # 通知
-    project = await db.get(TheaterProject, project_id)
-    background_tasks.add_task(
-        discord_service.send_notification,
-        content=f"🚫 **配役解除**\nプロジェクト: {project.name}\nキャラクター: {character.name}\n対象: {user_name}",
-        webhook_url=project.discord_webhook_url,
-    )
-
     return [
         CastingUser(user_id=c.user.id, discord_username=c.user.display_name, cast_name=c.cast_name)
         for c in character.castings
@@ -207,6 +207,7 @@ async def handle_poll_interaction(user, candidate_id: UUID, status: str, db: Asy
     from sqlalchemy.orm import selectinload
 
     from src.db.models import ProjectMember, SchedulePollAnswer, SchedulePollCandidate
+    from src.services.poll_analysis import apply_poll_answer
 
     # 候補から日程調整とプロジェクトIDを取得
     stmt = (
@@ -248,6 +249,7 @@ async def handle_poll_interaction(user, candidate_id: UUID, status: str, db: Asy
         db.add(answer)
 
     await db.commit()
+    await apply_poll_answer(db, candidate.poll_id, candidate_id, user.id, status)
 
     logger.info("Updated poll answer", user_id=user.id, candidate_id=candidate_id, status=status)
 
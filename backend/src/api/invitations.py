@@ -1,7 +1,7 @@
 import secrets
 from datetime import UTC, datetime, timedelta
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -10,7 +10,7 @@ from src.db import get_db
 from src.db.models import ProjectInvitation, ProjectMember, TheaterProject, User
 from src.dependencies.auth import get_current_user_dep
 from src.schemas.invitation import InvitationAcceptResponse, InvitationCreate, InvitationResponse
-from src.services.discord import DiscordService, get_discord_service
+from src.services.notification_outbox import enqueue_discord_notification
 
 router = APIRouter()
 
@@ -161,10 +161,8 @@ async def get_invitation(
 @router.post("/invitations/{token}/accept", response_model=InvitationAcceptResponse)
 async def accept_invitation(
     token: str,
-    background_tasks: BackgroundTasks,
     current_user: User | None = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ):
     """招待を受諾してプロジェクトに参加する。"""
     if not current_user:
@@ -207,15 +205,15 @@ async def accept_invitation(
     # カウント更新
     invitation.used_count += 1
 
-    await db.commit()
-
     # Discord通知
-    background_tasks.add_task(
-        discord_service.send_notification,
+    enqueue_discord_notification(
+        db,
         content=f"👋 **新しいメンバーが参加しました**\nプロジェクト: {project.name}\nユーザー: {current_user.display_name}",
         webhook_url=project.discord_webhook_url,
     )
 
+    await db.commit()
+
     return InvitationAcceptResponse(
         project_id=project.id, project_name=project.name, message="プロジェクトに参加しました"
     )
@@ -4,9 +4,10 @@ from uuid import UUID
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 from structlog import get_logger
 
+from src.auth.cache import invalidate_member, invalidate_project_members
 from src.db import get_db
 from src.db.models import AuditLog, Milestone, ProjectMember, Reservation, TheaterProject, User
 from src.dependencies.auth import get_current_user_dep
@@ -23,7 +24,12 @@ from src.schemas.project import (
 )
 from src.services.attendance import AttendanceService
 from src.services.discord import DiscordService, get_discord_service
-from src.services.project_limit import get_user_restricted_project_ids, is_project_restricted
+from src.services.notification_outbox import enqueue_discord_notification
+from src.services.project_limit import (
+    get_user_restricted_project_ids,
+    invalidate_restricted_projects,
+    is_project_restricted,
+)
 
 logger = get_logger(__name__)
 
@@ -33,19 +39,15 @@ router = APIRouter()
 @router.post("/", response_model=ProjectResponse)
 async def create_project(
     project_data: ProjectCreate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> ProjectResponse:
     """プロジェクトを作成.
 
     Args:
         project_data: プロジェクト作成データ
-        background_tasks: バックグラウンドタスク
         current_user: 認証ユーザー
         db: データベースセッション
-        discord_service: Discordサービス
 
     Returns:
         ProjectResponse: 作成されたプロジェクト
@@ -103,9 +105,9 @@ async def create_project(
 
         # 公開脚本を取得
         source_script_res = await db.execute(
-            select(Script).where(
-                Script.id == project_data.source_public_script_id, Script.is_public == True
-            )
+            select(Script)
+            .where(Script.id == project_data.source_public_script_id, Script.is_public == True)
+            .options(undefer(Script.content))
         )
         source_script = source_script_res.scalar_one_or_none()
 
@@ -152,16 +154,17 @@ async def create_project(
         await db.flush()
         await ensure_scene_chart(empty_script, db)
 
-    await db.commit()
-    await db.refresh(project)
-
     # Discord通知
-    background_tasks.add_task(
-        discord_service.send_notification,
+    enqueue_discord_notification(
+        db,
         content=f"🎉 **新しいプロジェクトが作成されました**\nプロジェクト: {project.name}\n作成者: {current_user.display_name}",
         webhook_url=project.discord_webhook_url,  # 現状はNoneだが将来的に設定可能
     )
 
+    await db.commit()
+    invalidate_restricted_projects(current_user.id)
+    await db.refresh(project)
+
     return await _build_project_response(project, "owner", db)
 
 
@@ -384,10 +387,8 @@ async def update_member_role(
     project_id: UUID,
     user_id: UUID,
     role_update: MemberRoleUpdate,
-    background_tasks: BackgroundTasks,
     owner_member: ProjectMember = Depends(get_project_owner_dep),  # オーナーのみ
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> ProjectMemberResponse:
     """メンバーのロールを更新 (オーナーのみ).
 
@@ -395,10 +396,8 @@ async def update_member_role(
         project_id: プロジェクトID
         user_id: 対象ユーザーID
         role_update: 更新データ
-        background_tasks: バックグラウンドタスク
         owner_member: 実行者（オーナー）
         db: データベースセッション
-        discord_service: Discordサービス
 
     Returns:
         ProjectMemberResponse: 更新後のメンバー情報
@@ -442,18 +441,19 @@ async def update_member_role(
     )
     db.add(audit)
 
-    await db.commit()
-    await db.refresh(target_member)
-
     # Discord通知
     # Project取得 (webhook_urlのため)
     project = await db.get(TheaterProject, project_id)
-    background_tasks.add_task(
-        discord_service.send_notification,
+    enqueue_discord_notification(
+        db,
         content=f"👮 **メンバー権限が変更されました**\nプロジェクト: {project.name}\nメンバー: {user.display_name}\n変更: {old_role} -> {role_update.role}",
         webhook_url=project.discord_webhook_url,
     )
 
+    await db.commit()
+    invalidate_member(project_id, user_id)
+    await db.refresh(target_member)
+
     return ProjectMemberResponse(
         user_id=user.id,
         discord_username=user.display_name,
@@ -469,20 +469,16 @@ async def update_member_role(
 async def remove_member(
     project_id: UUID,
     user_id: UUID,
-    background_tasks: BackgroundTasks,
     current_member: ProjectMember = Depends(get_project_member_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> dict[str, str]:
     """メンバーを削除 (オーナーまたは本人).
 
     Args:
         project_id: プロジェクトID
         user_id: 対象ユーザーID
-        background_tasks: バックグラウンドタスク
         current_member: 実行者
         db: データベースセッション
-        discord_service: Discordサービス
 
     Returns:
         dict: メッセージ
@@ -537,36 +533,33 @@ async def remove_member(
     )
     db.add(audit)
 
-    await db.commit()
-
     # Discord通知
     project = await db.get(TheaterProject, project_id)
     action_text = "脱退しました" if is_self else "削除されました"
-    background_tasks.add_task(
-        discord_service.send_notification,
+    enqueue_discord_notification(
+        db,
         content=f"👋 **メンバーが{action_text}**\nプロジェクト: {project.name}\nユーザー: {user_name}",
         webhook_url=project.discord_webhook_url,
     )
 
+    await db.commit()
+    invalidate_member(project_id, user_id)
+
     return {"message": "メンバーを削除しました"}
 
 
 @router.delete("/{project_id}")
 async def delete_project(
     project_id: UUID,
-    background_tasks: BackgroundTasks,
     current_member: ProjectMember = Depends(get_project_owner_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> dict[str, str]:
     """プロジェクトを削除 (オーナーのみ).
 
     Args:
         project_id: プロジェクトID
-        background_tasks: バックグラウンドタスク
         current_member: 実行者（オーナー）
         db: データベースセッション
-        discord_service: Discordサービス
 
     Returns:
         dict: メッセージ
@@ -579,6 +572,7 @@ async def delete_project(
     # Discord通知のための情報を保存
     project_name = project.name
     webhook_url = project.discord_webhook_url
+    creator_id = project.created_by_id
     owner_username = current_member.user.display_name
 
     # 削除 (cascadeにより関連データも削除されるはず)
@@ -587,16 +581,18 @@ async def delete_project(
     # 注: プロジェクト削除に伴い、AuditLogも削除される設定にしているため、
     # データベース上には痕跡が残らない。
 
-    await db.commit()
-
     # Discord通知
     if webhook_url:
-        background_tasks.add_task(
-            discord_service.send_notification,
+        enqueue_discord_notification(
+            db,
             content=f"🗑️ **プロジェクトが削除されました**\nプロジェクト: {project_name}\n実行者: {owner_username}",
             webhook_url=webhook_url,
         )
 
+    await db.commit()
+    invalidate_project_members(project_id)
+    invalidate_restricted_projects(creator_id, project_id)
+
     return {"message": "プロジェクトを削除しました"}
 
 
@@ -604,7 +600,6 @@ async def delete_project(
 async def create_milestone(
     project_id: UUID,
     milestone_data: MilestoneCreate,
-    background_tasks: BackgroundTasks,
     current_member: ProjectMember = Depends(get_project_member_dep),
     db: AsyncSession = Depends(get_db),
     discord_service: DiscordService = Depends(get_discord_service),
@@ -635,9 +630,29 @@ async def create_milestone(
         is_public=milestone_data.is_public,  # 🆕 公開設定
     )
     db.add(milestone)
-    await db.commit()
+    # 通知と同じトランザクションでコミットするため、ここでは書き込みのみ
+    await db.flush()
     await db.refresh(milestone)
 
+    # Discord通知 (Webhook)
+    # マイルストーンと通知を同じトランザクションで確定する（出席確認の作成より前にコミットする）
+    project = await db.get(TheaterProject, project_id)
+    if project.discord_webhook_url:
+        # Discord Timestamp format (Date only)
+        start_ts = int(milestone.start_date.replace(tzinfo=UTC).timestamp())
+        date_str = f"<t:{start_ts}:d>"
+        if milestone.end_date:
+            end_ts = int(milestone.end_date.replace(tzinfo=UTC).timestamp())
+            date_str += f" - <t:{end_ts}:d>"
+
+        enqueue_discord_notification(
+            db,
+            content=f"📅 **新しいマイルストーンが作成されました**\nプロジェクト: {project.name}\nタイトル: {milestone.title}\n日程: {date_str}\n場所: {milestone.location or '未定'}\n詳細: {milestone.description or 'なし'}",
+            webhook_url=project.discord_webhook_url,
+        )
+
+    await db.commit()
+
     # 出席確認作成（オプション）
     # 出席確認作成（オプション）
     logger.info(f"Attendance check request: {milestone_data.create_attendance_check}")
@@ -669,22 +684,6 @@ async def create_milestone(
         else:
             logger.warning("Project not found")
 
-    # Discord通知 (Webhook)
-    project = await db.get(TheaterProject, project_id)
-    if project.discord_webhook_url:
-        # Discord Timestamp format (Date only)
-        start_ts = int(milestone.start_date.replace(tzinfo=UTC).timestamp())
-        date_str = f"<t:{start_ts}:d>"
-        if milestone.end_date:
-            end_ts = int(milestone.end_date.replace(tzinfo=UTC).timestamp())
-            date_str += f" - <t:{end_ts}:d>"
-
-        background_tasks.add_task(
-            discord_service.send_notification,
-            content=f"📅 **新しいマイルストーンが作成されました**\nプロジェクト: {project.name}\nタイトル: {milestone.title}\n日程: {date_str}\n場所: {milestone.location or '未定'}\n詳細: {milestone.description or 'なし'}",
-            webhook_url=project.discord_webhook_url,
-        )
-
     return MilestoneResponse(
         id=milestone.id,
         project_id=milestone.project_id,
@@ -790,10 +789,8 @@ async def update_milestone(
 async def delete_milestone(
     project_id: UUID,
     milestone_id: UUID,
-    background_tasks: BackgroundTasks,
     current_member: ProjectMember = Depends(get_project_member_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> None:
     """マイルストーンを削除."""
     if current_member.role == "viewer":
@@ -810,34 +807,31 @@ async def delete_milestone(
     milestone_title = milestone.title
 
     await db.delete(milestone)
-    await db.commit()
 
     # Discord通知
     project = await db.get(TheaterProject, project_id)
     if project.discord_webhook_url:
-        background_tasks.add_task(
-            discord_service.send_notification,
+        enqueue_discord_notification(
+            db,
             content=f"🗑️ **マイルストーンが削除されました**\nプロジェクト: {project.name}\nタイトル: {milestone_title}",
             webhook_url=project.discord_webhook_url,
         )
 
+    await db.commit()
+
 
 @router.post("/import-script/{script_id}", response_model=ProjectResponse)
 async def import_script(
     script_id: UUID,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> ProjectResponse:
     """公開スクリプトからプロジェクトを作成（インポート）.
 
     Args:
         script_id: 元となる公開スクリプトID
-        background_tasks: バックグラウンドタスク
         current_user: 認証ユーザー
         db: データベースセッション
-        discord_service: Discordサービス
 
     Returns:
         ProjectResponse: 作成されたプロジェクト
@@ -864,7 +858,7 @@ async def import_script(
         Script,
     )
 
-    source_script = await db.get(Script, script_id)
+    source_script = await db.get(Script, script_id, options=[undefer(Script.content)])
     if not source_script:
         raise HTTPException(status_code=404, detail="脚本が見つかりません")
 
@@ -977,6 +971,8 @@ async def import_script(
                     chart_id=new_chart.id,
                     scene_id=scene_map[sm.scene_id].id,
                     character_id=char_map[sm.character_id].id,
+                    is_manual=sm.is_manual,
+                    line_count=sm.line_count,
                 )
                 db.add(nm)
 
@@ -989,16 +985,17 @@ async def import_script(
     )
     db.add(audit)
 
-    await db.commit()
-    await db.refresh(new_project)
-
     # Discord通知（必要であれば）
-    background_tasks.add_task(
-        discord_service.send_notification,
+    enqueue_discord_notification(
+        db,
         content=f"📥 **脚本がインポートされました**\n新プロジェクト: {new_project.name}\nユーザー: {current_user.display_name}\n元脚本: {source_script.title}",
         webhook_url=new_project.discord_webhook_url,  # 現在はNone
     )
 
+    await db.commit()
+    invalidate_restricted_projects(current_user.id)
+    await db.refresh(new_project)
+
     return ProjectResponse(
         id=new_project.id,
         name=new_project.name,
@@ -2,14 +2,15 @@
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from src.db import get_db
 from src.db.models import Character, Line, Scene, Script
-from src.schemas.script import ScriptListResponse, ScriptResponse
+from src.schemas.script import ScenePageResponse, ScriptListResponse, ScriptResponse
+from src.services.script_pages import load_scene_page
 
 router = APIRouter()
 
@@ -56,6 +57,47 @@ async def get_public_script(
     return ScriptResponse.model_validate(script)
 
 
+@router.get(
+    "/scripts/{script_id}/scenes",
+    response_model=ScenePageResponse,
+    response_model_exclude_unset=True,
+)
+async def get_public_scene_page(
+    script_id: UUID,
+    cursor: str | None = Query(None, description="前のページの next_cursor"),
+    limit: int = Query(20, ge=1, le=100, description="取得するシーン数"),
+    fields: str | None = Query(
+        None, description="返す項目（カンマ区切り）。lines を含めるとセリフも返す"
+    ),
+    db: AsyncSession = Depends(get_db),
+) -> ScenePageResponse:
+    """公開されている脚本のシーンをページ単位で取得（認証不要）.
+
+    Args:
+        script_id: 脚本ID
+        cursor: 前のページの next_cursor
+        limit: 取得するシーン数
+        fields: 返す項目
+        db: データベースセッション
+
+    Returns:
+        ScenePageResponse: シーンと次のページのカーソル
+
+    Raises:
+        HTTPException: 脚本が見つからない、または公開されていない場合
+    """
+    result = await db.execute(select(Script.is_public).where(Script.id == script_id))
+    is_public = result.scalar_one_or_none()
+
+    if is_public is None:
+        raise HTTPException(status_code=404, detail="脚本が見つかりません")
+
+    if not is_public:
+        raise HTTPException(status_code=403, detail="この脚本は公開されていません")
+
+    return await load_scene_page(db, script_id, cursor=cursor, limit=limit, fields=fields)
+
+
 @router.get("/scripts", response_model=ScriptListResponse)
 async def list_public_scripts(
     limit: int = 20,
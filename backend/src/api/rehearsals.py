@@ -3,7 +3,7 @@
 from datetime import UTC, timedelta, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -13,7 +13,6 @@ from src.db import get_db
 from src.db.models import (
     Character,
     CharacterCasting,
-    Line,
     ProjectMember,
     Rehearsal,
     RehearsalCast,
@@ -39,6 +38,8 @@ from src.schemas.rehearsal import (
 from src.services.attendance import AttendanceService
 from src.services.calendar_url import build_google_calendar_url
 from src.services.discord import DiscordService, get_discord_service
+from src.services.notification_outbox import enqueue_discord_notification
+from src.services.scene_chart_generator import get_scene_characters
 
 router = APIRouter()
 project_router = APIRouter()
@@ -47,21 +48,17 @@ project_router = APIRouter()
 @project_router.post("/{project_id}/rehearsal-schedule", response_model=RehearsalScheduleResponse)
 async def create_rehearsal_schedule(
     project_id: UUID,
-    background_tasks: BackgroundTasks,
     script_id: UUID = Query(...),
     current_user: User | None = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> RehearsalScheduleResponse:
     """稽古スケジュールを作成.
 
     Args:
         project_id: プロジェクトID
-        background_tasks: バックグラウンドタスク
         script_id: 脚本ID
         current_user: 認証ユーザー
         db: データベースセッション
-        discord_service: Discordサービス
 
     Returns:
         RehearsalScheduleResponse: 作成されたスケジュール
@@ -98,17 +95,18 @@ async def create_rehearsal_schedule(
         script_id=script_id,
     )
     db.add(schedule)
-    await db.commit()
-    await db.refresh(schedule)
 
     # Discord通知
     project = await db.get(TheaterProject, project_id)
-    background_tasks.add_task(
-        discord_service.send_notification,
+    enqueue_discord_notification(
+        db,
         content=f"📅 **新しい稽古スケジュールが作成されました**\nプロジェクト: {project.name}\n対象脚本: {script.title}",
         webhook_url=project.discord_webhook_url,
     )
 
+    await db.commit()
+    await db.refresh(schedule)
+
     return RehearsalScheduleResponse(
         id=schedule.id,
         project_id=schedule.project_id,
@@ -170,22 +168,18 @@ async def get_rehearsal_schedule(
     # 重複データがある場合、有効な（脚本が存在する）スケジュールを探す
     schedules = result.scalars().all()
 
-    schedule = None
-    script = None
-
-    for s in schedules:
-        script_res = await db.execute(select(Script).where(Script.id == s.script_id))
-        found_script = script_res.scalar_one_or_none()
-        if found_script:
-            schedule = s
-            script = found_script
-            break
+    script_titles: dict[UUID, str] = {}
+    if schedules:
+        script_ids = {s.script_id for s in schedules}
+        script_res = await db.execute(
+            select(Script.id, Script.title).where(Script.id.in_(script_ids))
+        )
+        script_titles = dict(script_res.tuples().all())
 
+    schedule = next((s for s in schedules if s.script_id in script_titles), None)
     if schedule is None:
         raise HTTPException(status_code=404, detail="稽古スケジュールが見つかりません")
 
-    # scriptはループ内で既に取得済み
-
     # プロジェクトメンバー情報を取得して、user_id -> display_name のマップを作成
     member_result = await db.execute(
         select(ProjectMember).where(ProjectMember.project_id == project_id)
@@ -193,6 +187,18 @@ async def get_rehearsal_schedule(
     members = member_result.scalars().all()
     display_name_map = {m.user_id: m.display_name for m in members}
 
+    # 稽古対象シーンと、その登場人物（香盤表のマッピング）・デフォルト配役をまとめて取得
+    scene_ids = {r.scene_id for r in schedule.rehearsals if r.scene_id}
+    scene_map: dict[UUID, Scene] = {}
+    scene_characters: dict[UUID, list[Character]] = {}
+    if scene_ids:
+        scene_result = await db.execute(select(Scene).where(Scene.id.in_(scene_ids)))
+        scene_map = {scene.id: scene for scene in scene_result.scalars().all()}
+
+        scene_characters = await get_scene_characters(
+            scene_ids, db, selectinload(Character.castings)
+        )
+
     # User Map creation to avoid MissingGreenlet on p.user.discord_username access
     all_user_ids = set()
     for rehearsal in schedule.rehearsals:
@@ -200,23 +206,11 @@ async def get_rehearsal_schedule(
             all_user_ids.add(p.user_id)
         for c in rehearsal.casts:
             all_user_ids.add(c.user_id)
-        # Default casts users
-        if rehearsal.scene_id:
-            result = await db.execute(
-                select(Scene)
-                .where(Scene.id == rehearsal.scene_id)
-                .options(
-                    selectinload(Scene.lines).options(
-                        selectinload(Line.character).options(selectinload(Character.castings))
-                    )
-                )
-            )
-            scene = result.scalar_one_or_none()
-            if scene:
-                for line in scene.lines:
-                    if line.character:
-                        for casting in line.character.castings:
-                            all_user_ids.add(casting.user_id)
+    # Default casts users
+    for characters in scene_characters.values():
+        for character in characters:
+            for casting in character.castings:
+                all_user_ids.add(casting.user_id)
 
     user_map = {}
     if all_user_ids:
@@ -229,24 +223,14 @@ async def get_rehearsal_schedule(
     for rehearsal in schedule.rehearsals:
         # シーン情報
         scene_heading = None
-        if rehearsal.scene_id:
-            result = await db.execute(
-                select(Scene)
-                .where(Scene.id == rehearsal.scene_id)
-                .options(
-                    selectinload(Scene.lines).options(
-                        selectinload(Line.character).options(selectinload(Character.castings))
-                    )
-                )
+        scene = scene_map.get(rehearsal.scene_id) if rehearsal.scene_id else None
+        if scene:
+            act_scene = (
+                f"{scene.act_number}-{scene.scene_number}"
+                if scene.act_number
+                else str(scene.scene_number)
             )
-            scene = result.scalar_one_or_none()
-            if scene:
-                act_scene = (
-                    f"{scene.act_number}-{scene.scene_number}"
-                    if scene.act_number
-                    else str(scene.scene_number)
-                )
-                scene_heading = f"#{act_scene} {scene.heading}"
+            scene_heading = f"#{act_scene} {scene.heading}"
 
         # 参加者
         participants = []
@@ -281,34 +265,22 @@ async def get_rehearsal_schedule(
                 )
 
         # 2. Add default casts for characters NOT in explicit list
-        if rehearsal.scene_id:
-            # シーン情報は上で取得済み (scene変数)
-            if scene:
-                # 登場人物をユニークにする
-                unique_characters = {}
-                for line in scene.lines:
-                    if (
-                        line.character_id
-                        and line.character
-                        and line.character_id not in unique_characters
-                    ):
-                        unique_characters[line.character_id] = line.character
-
-                for char_id, char in unique_characters.items():
-                    if char_id not in rehearsal_cast_map:
-                        # デフォルト配役を追加
-                        for casting in char.castings:
-                            cast_user = user_map.get(casting.user_id)
-                            if cast_user:
-                                casts_response_list.append(
-                                    RehearsalCastResponse(
-                                        character_id=char.id,
-                                        character_name=char.name,
-                                        user_id=casting.user_id,
-                                        user_name=cast_user.display_name,
-                                        display_name=display_name_map.get(casting.user_id),
-                                    )
+        if scene:
+            for char in scene_characters.get(scene.id, []):
+                if char.id not in rehearsal_cast_map:
+                    # デフォルト配役を追加
+                    for casting in char.castings:
+                        cast_user = user_map.get(casting.user_id)
+                        if cast_user:
+                            casts_response_list.append(
+                                RehearsalCastResponse(
+                                    character_id=char.id,
+                                    character_name=char.name,
+                                    user_id=casting.user_id,
+                                    user_name=cast_user.display_name,
+                                    display_name=display_name_map.get(casting.user_id),
                                 )
+                            )
 
         rehearsal_responses.append(
             RehearsalResponse(
@@ -330,7 +302,7 @@ async def get_rehearsal_schedule(
         id=schedule.id,
         project_id=schedule.project_id,
         script_id=schedule.script_id,
-        script_title=script.title,
+        script_title=script_titles[schedule.script_id],
         created_at=schedule.created_at,
         rehearsals=rehearsal_responses,
     )
@@ -340,7 +312,6 @@ async def get_rehearsal_schedule(
 async def add_rehearsal(
     schedule_id: UUID,
     rehearsal_data: RehearsalCreate,
-    background_tasks: BackgroundTasks,
     current_user: User | None = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
     discord_service: DiscordService = Depends(get_discord_service),
@@ -350,7 +321,6 @@ async def add_rehearsal(
     Args:
         schedule_id: スケジュールID
         rehearsal_data: 稽古データ
-        background_tasks: バックグラウンドタスク
         current_user: 認証ユーザー
         db: データベースセッション
         discord_service: Discordサービス
@@ -458,8 +428,8 @@ async def add_rehearsal(
             db.add(new_cast)
             target_user_ids.add(c.user_id)
 
-    # Commit changes
-    await db.commit()
+    # 通知と同じトランザクションでコミットするため、ここでは書き込みのみ
+    await db.flush()
 
     # Re-fetch rehearsal with full options for response and notifications
     result = await db.execute(
@@ -482,6 +452,47 @@ async def add_rehearsal(
         scene_headings.append(f"#{act_scene} {s.heading}")
     scene_text = ", ".join(scene_headings) if scene_headings else None
 
+    # Webhook通知（既存機能の維持）
+    # 稽古と通知を同じトランザクションで確定する（出席確認の作成より前にコミットする）
+    project = await db.get(TheaterProject, schedule.project_id)
+
+    # Timestamp conversion (ensure it's treated as UTC before getting timestamp)
+    rehearsal_ts = int(rehearsal.date.replace(tzinfo=UTC).timestamp())
+    date_str = f"<t:{rehearsal_ts}:f>"  # User local time
+    content = f"📅 **稽古が追加されました**\n日時: {date_str}\n場所: {rehearsal.location or '未定'}"
+    if scene_text:
+        content += f"\nシーン: {scene_text}"
+
+    # メンションの追加
+    mention_ids = set()
+    # Participants
+    for p in rehearsal.participants:
+        if p.user and p.user.discord_id:
+            mention_ids.add(p.user.discord_id)
+    # Casts
+    for c in rehearsal.casts:
+        if c.user and c.user.discord_id:
+            mention_ids.add(c.user.discord_id)
+
+    if mention_ids:
+        mentions = " ".join([f"<@{uid}>" for uid in mention_ids])
+        content += f"\n\n{mentions}"
+
+    if project.discord_webhook_url:
+        start_dt = rehearsal.date.astimezone(UTC)
+        end_dt = start_dt + timedelta(minutes=rehearsal.duration_minutes)
+        gcal_url = build_google_calendar_url(
+            title=f"稽古 - {project.name}",
+            start_dt=start_dt,
+            end_dt=end_dt,
+            description=f"{'シーン: ' + scene_text if scene_text else '稽古'}\n場所: {rehearsal.location or '未定'}",
+            location=rehearsal.location or "",
+        )
+        content += f"\n📎 Googleカレンダーに追加: {gcal_url}"
+
+        enqueue_discord_notification(db, content=content, webhook_url=project.discord_webhook_url)
+    await db.commit()
+
     # Attendance Check
     if rehearsal_data.create_attendance_check:
         # 期限設定（未指定なら稽古日の24時間前）
@@ -577,49 +588,6 @@ async def add_rehearsal(
             )
         )
 
-    # Webhook通知（既存機能の維持）
-    project = await db.get(TheaterProject, schedule.project_id)
-
-    # Timestamp conversion (ensure it's treated as UTC before getting timestamp)
-    rehearsal_ts = int(rehearsal.date.replace(tzinfo=UTC).timestamp())
-    date_str = f"<t:{rehearsal_ts}:f>"  # User local time
-    content = f"📅 **稽古が追加されました**\n日時: {date_str}\n場所: {rehearsal.location or '未定'}"
-    if scene_text:
-        content += f"\nシーン: {scene_text}"
-
-    # メンションの追加
-    mention_ids = set()
-    # Participants
-    for p in rehearsal.participants:
-        if p.user and p.user.discord_id:
-            mention_ids.add(p.user.discord_id)
-    # Casts
-    for c in rehearsal.casts:
-        if c.user and c.user.discord_id:
-            mention_ids.add(c.user.discord_id)
-
-    if mention_ids:
-        mentions = " ".join([f"<@{uid}>" for uid in mention_ids])
-        content += f"\n\n{mentions}"
-
-    if project.discord_webhook_url:
-        start_dt = rehearsal.date.astimezone(UTC)
-        end_dt = start_dt + timedelta(minutes=rehearsal.duration_minutes)
-        gcal_url = build_google_calendar_url(
-            title=f"稽古 - {project.name}",
-            start_dt=start_dt,
-            end_dt=end_dt,
-            description=f"{'シーン: ' + scene_text if scene_text else '稽古'}\n場所: {rehearsal.location or '未定'}",
-            location=rehearsal.location or "",
-        )
-        content += f"\n📎 Googleカレンダーに追加: {gcal_url}"
-
-        background_tasks.add_task(
-            discord_service.send_notification,
-            content=content,
-            webhook_url=project.discord_webhook_url,
-        )
-
     return RehearsalResponse(
         id=rehearsal.id,
         schedule_id=rehearsal.schedule_id,
@@ -641,10 +609,8 @@ async def add_rehearsal(
 async def update_rehearsal(
     rehearsal_id: UUID,
     rehearsal_data: RehearsalUpdate,
-    background_tasks: BackgroundTasks,
     current_user: User | None = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> RehearsalResponse:
     """稽古を更新.
 
@@ -746,7 +712,8 @@ async def update_rehearsal(
                 )
             )
 
-    await db.commit()
+    # 通知と同じトランザクションでコミットするため、ここでは書き込みのみ
+    await db.flush()
     # Re-fetch rehearsal with full options to ensure relationships are loaded for response
     result = await db.execute(
         select(Rehearsal)
@@ -797,20 +764,7 @@ async def update_rehearsal(
         )
 
     if rehearsal.scene_id:
-        result = await db.execute(
-            select(Scene)
-            .where(Scene.id == rehearsal.scene_id)
-            .options(
-                selectinload(Scene.lines).options(
-                    selectinload(Line.character).options(
-                        selectinload(Character.castings).options(
-                            selectinload(CharacterCasting.user)
-                        )
-                    )
-                )
-            )
-        )
-        scene = result.scalar_one_or_none()
+        scene = await db.get(Scene, rehearsal.scene_id)
         if scene:
             act_scene = (
                 f"{scene.act_number}-{scene.scene_number}"
@@ -820,17 +774,14 @@ async def update_rehearsal(
             scene_heading = f"#{act_scene} {scene.heading}"
 
             # デフォルト配役の取得 (Missing characters only)
-            unique_characters = {}
-            for line in scene.lines:
-                if (
-                    line.character_id
-                    and line.character
-                    and line.character_id not in unique_characters
-                ):
-                    unique_characters[line.character_id] = line.character
-
-            for char_id, char in unique_characters.items():
-                if char_id not in rehearsal_cast_map:
+            # 登場人物は香盤表の出演インデックスから求める（セリフは読み込まない）
+            scene_characters = await get_scene_characters(
+                [scene.id],
+                db,
+                selectinload(Character.castings).selectinload(CharacterCasting.user),
+            )
+            for char in scene_characters.get(scene.id, []):
+                if char.id not in rehearsal_cast_map:
                     for casting in char.castings:
                         cast_user_name = "Unknown"
                         if casting.user:
@@ -882,11 +833,10 @@ async def update_rehearsal(
         content += f"\n📎 Googleカレンダーに追加: {gcal_url}"
         content += "\n⚠ カレンダーを更新した場合は、前回登録した予定を手動で削除してください"
 
-        background_tasks.add_task(
-            discord_service.send_notification,
-            content=content,
-            webhook_url=project.discord_webhook_url,
-        )
+        enqueue_discord_notification(db, content=content, webhook_url=project.discord_webhook_url)
+
+    # 稽古の更新と通知を同じトランザクションで確定する
+    await db.commit()
 
     return RehearsalResponse(
         id=rehearsal.id,
@@ -978,10 +928,8 @@ async def add_participant(
 @router.delete("/rehearsals/{rehearsal_id}")
 async def delete_rehearsal(
     rehearsal_id: UUID,
-    background_tasks: BackgroundTasks,
     current_user: User | None = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
-    discord_service: DiscordService = Depends(get_discord_service),
 ) -> dict[str, str]:
     """稽古を削除.
 
@@ -1053,7 +1001,6 @@ async def delete_rehearsal(
 
     # 削除
     await db.delete(rehearsal)
-    await db.commit()
 
     # Discord通知
     project = await db.get(TheaterProject, schedule.project_id)
@@ -1064,11 +1011,9 @@ async def delete_rehearsal(
         if mention_str:
             content += f"\n関係者: {mention_str}"
 
-        background_tasks.add_task(
-            discord_service.send_notification,
-            content=content,
-            webhook_url=project.discord_webhook_url,
-        )
+        enqueue_discord_notification(db, content=content, webhook_url=project.discord_webhook_url)
+
+    await db.commit()
 
     return {"message": "稽古を削除しました"}
 
@@ -1,13 +1,14 @@
 import csv
 import io
+from collections.abc import Iterable
 from datetime import UTC, datetime, timedelta, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy import func, select
+from sqlalchemy import case, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
 from src.db import get_db
 from src.db.models import (
@@ -27,17 +28,100 @@ from src.schemas.reservation import (
     ReservationResponse,
     ReservationUpdate,
 )
-from src.services.email import email_service
+from src.services.notification_outbox import enqueue_discord_notification, enqueue_email
 
 router = APIRouter()
 
+# CSVエクスポートで一度に読み込み・送信する行数
+EXPORT_CHUNK_ROWS = 500
+
+
+async def _reserve_seats(db: AsyncSession, milestone_id: UUID, count: int) -> bool:
+    """予約済み人数を定員の範囲内で加算する.
+
+    条件付き UPDATE の1文で判定と加算を行うため、同時に予約が来ても定員を超えない
+    （同じマイルストーンへの更新は行ロックで直列化される）。
+
+    Returns:
+        bool: 加算できた場合は True、定員を超える場合は False
+    """
+    reserved = await db.scalar(
+        update(Milestone)
+        .where(
+            Milestone.id == milestone_id,
+            or_(
+                Milestone.reservation_capacity.is_(None),
+                Milestone.reserved_count + count <= Milestone.reservation_capacity,
+            ),
+        )
+        .values(reserved_count=Milestone.reserved_count + count)
+        .returning(Milestone.reserved_count)
+        .execution_options(synchronize_session=False)
+    )
+    return reserved is not None
+
+
+def _referral_name(
+    member_display_name: str | None, screen_name: str | None, discord_username: str
+) -> str:
+    """紹介者の表示名を決める（プロジェクト内表示名 > スクリーンネーム > Discordユーザー名）."""
+    return member_display_name or screen_name or discord_username
+
+
+async def _resolve_referral_names(
+    db: AsyncSession, project_id: UUID, user_ids: Iterable[UUID | None]
+) -> dict[UUID, str]:
+    """紹介者の表示名をまとめて取得する.
+
+    ユーザーとそのプロジェクトのメンバー情報を1回のクエリで読み込むため、
+    予約の件数によらずクエリ数は一定になる。
+
+    Args:
+        db: データベースセッション
+        project_id: プロジェクトID（プロジェクト内表示名の解決に使う）
+        user_ids: 紹介者のユーザーID（None は無視する）
+
+    Returns:
+        dict[UUID, str]: ユーザーIDごとの表示名（存在しないユーザーは含まない）
+    """
+    ids = {user_id for user_id in user_ids if user_id is not None}
+    if not ids:
+        return {}
+
+    result = await db.execute(
+        select(User.id, ProjectMember.display_name, User.screen_name, User.discord_username)
+        .outerjoin(
+            ProjectMember,
+            (ProjectMember.user_id == User.id) & (ProjectMember.project_id == project_id),
+        )
+        .where(User.id.in_(ids))
+    )
+    return {
+        user_id: _referral_name(member_display_name, screen_name, discord_username)
+        for user_id, member_display_name, screen_name, discord_username in result
+    }
+
+
+async def _release_seats(db: AsyncSession, milestone_id: UUID, count: int) -> None:
+    """キャンセルした人数を予約済み人数から減算する."""
+    await db.execute(
+        update(Milestone)
+        .where(Milestone.id == milestone_id)
+        .values(
+            reserved_count=case(
+                (Milestone.reserved_count > count, Milestone.reserved_count - count), else_=0
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
 # --- Public API ---
 
 
 @router.post("/public/reservations", response_model=ReservationResponse)
 async def create_reservation(
     reservation: ReservationCreate,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
 ):
@@ -47,19 +131,21 @@ async def create_reservation(
     if not milestone:
         raise HTTPException(status_code=404, detail="Milestone not found")
 
-    # 定員チェック
-    if milestone.reservation_capacity is not None:
-        result = await db.scalar(
-            select(func.sum(Reservation.count)).where(
-                Reservation.milestone_id == reservation.milestone_id
+    # 定員チェック（予約済み人数の加算と同時に行う）
+    if not await _reserve_seats(db, milestone.id, reservation.count):
+        current = (
+            await db.execute(
+                select(Milestone.reservation_capacity, Milestone.reserved_count).where(
+                    Milestone.id == milestone.id
+                )
             )
+        ).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Milestone not found")
+        remaining = max((current.reservation_capacity or 0) - current.reserved_count, 0)
+        raise HTTPException(
+            status_code=400, detail=f"Capacity exceeded. Only {remaining} tickets remaining."
         )
-        current_count = result or 0
-        remaining = milestone.reservation_capacity - current_count
-        if current_count + reservation.count > milestone.reservation_capacity:
-            raise HTTPException(
-                status_code=400, detail=f"Capacity exceeded. Only {remaining} tickets remaining."
-            )
 
     # 予約作成
     db_reservation = Reservation(
@@ -71,8 +157,7 @@ async def create_reservation(
         count=reservation.count,
     )
     db.add(db_reservation)
-    await db.commit()
-    await db.refresh(db_reservation)
+    await db.flush()
 
     # プロジェクト取得
     project = await db.scalar(
@@ -89,8 +174,9 @@ async def create_reservation(
     start_date_jst = start_date_utc.astimezone(jst)
     date_str = start_date_jst.strftime("%Y/%m/%d %H:%M")
 
-    background_tasks.add_task(
-        email_service.send_reservation_confirmation,
+    enqueue_email(
+        db,
+        "reservation_confirmation",
         to_email=reservation.email,
         name=reservation.name,
         milestone_title=milestone.title,
@@ -105,38 +191,11 @@ async def create_reservation(
     # Discord通知 (Webhook)
     # プロジェクトに設定されたWebhookを使用
     if project and project.discord_webhook_url:
-        from src.services.discord import get_discord_service
-
-        discord_service = get_discord_service()
-
         # 扱い（紹介者）の取得
         referral_name = "なし"
         if reservation.referral_user_id:
-            # ここでは簡易的にUserテーブル等から取得（あるいはProjectMember）
-            # get_project_members_public のロジックと同様に解決するのが理想だが、
-            # バックグラウンドタスク内でそこまで重い処理をしたくないため、
-            # 一旦ID解決せず、もしあればキャッシュ等... ないので、
-            # クエリ発行して名前取得
-            try:
-                ref_user = await db.scalar(
-                    select(User).where(User.id == reservation.referral_user_id)
-                )
-                if ref_user:
-                    # ProjectMemberも見てdisplay_nameがあればそれを使う
-                    ref_pm = await db.scalar(
-                        select(ProjectMember).where(
-                            ProjectMember.user_id == reservation.referral_user_id,
-                            ProjectMember.project_id == project.id,
-                        )
-                    )
-                    referral_name = (
-                        (ref_pm.display_name if ref_pm and ref_pm.display_name else None)
-                        or ref_user.display_name
-                        or "不明"
-                    )
-            except Exception:
-                # 失敗しても通知は送る
-                pass
+            names = await _resolve_referral_names(db, project.id, [reservation.referral_user_id])
+            referral_name = names.get(reservation.referral_user_id, "なし")
 
         notification_content = f"""🎫 **チケット予約完了**
 公演日時: {discord_date_str}
@@ -144,12 +203,14 @@ async def create_reservation(
 予約枚数: {reservation.count}枚
 扱い: {referral_name}
 """
-        background_tasks.add_task(
-            discord_service.send_notification,
-            content=notification_content,
-            webhook_url=project.discord_webhook_url,
+        enqueue_discord_notification(
+            db, content=notification_content, webhook_url=project.discord_webhook_url
         )
 
+    # 予約と通知を同じトランザクションで確定する
+    await db.commit()
+    await db.refresh(db_reservation)
+
     return db_reservation
 
 
@@ -169,29 +230,23 @@ async def get_public_milestone(
             status_code=400, detail="Invalid milestone ID format. Must be a valid UUID."
         )
 
-    # マイルストーンと予約数を同時に取得
-    from sqlalchemy import func
-    # ✅ Reservationは既にファイル先頭でインポート済み
-
+    # マイルストーンを取得（予約数は予約済み人数のカウンターを使う）
     stmt = (
-        select(Milestone, func.coalesce(func.sum(Reservation.count), 0).label("total_reserved"))
-        .outerjoin(Reservation, Milestone.id == Reservation.milestone_id)
+        select(Milestone)
         .join(TheaterProject, Milestone.project_id == TheaterProject.id)
         .options(selectinload(Milestone.project))
         .where(
             Milestone.id == id,
             Milestone.is_public == True,  # マイルストーンのis_publicのみチェック
         )
-        .group_by(Milestone.id)
     )
 
-    result = await db.execute(stmt)
-    row = result.first()
+    milestone = await db.scalar(stmt)
 
-    if not row:
+    if not milestone:
         raise HTTPException(status_code=404, detail="Milestone not found")
 
-    milestone, total_reserved = row
+    total_reserved = milestone.reserved_count
 
     # Pydanticモデルのために辞書化して project_name と current_reservation_count を追加
     response = MilestoneResponse.model_validate(milestone)
@@ -247,7 +302,6 @@ async def get_project_members_public(
 @router.post("/public/reservations/cancel", status_code=204)
 async def cancel_reservation(
     cancel_data: ReservationCancel,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ):
     """予約キャンセル (Public)."""
@@ -269,34 +323,16 @@ async def cancel_reservation(
 
     # 削除
     await db.delete(reservation)
-    await db.commit()
+    await _release_seats(db, reservation.milestone_id, res_count)
 
     # 通知 (Discord)
     project = await db.scalar(select(TheaterProject).where(TheaterProject.id == project_id))
     if project and project.discord_webhook_url:
-        from src.services.discord import get_discord_service
-
-        discord_service = get_discord_service()
-
         # 扱い（紹介者）の取得
         referral_name = "なし"
         if res_ref_id:
-            try:
-                ref_user = await db.scalar(select(User).where(User.id == res_ref_id))
-                if ref_user:
-                    ref_pm = await db.scalar(
-                        select(ProjectMember).where(
-                            ProjectMember.user_id == res_ref_id,
-                            ProjectMember.project_id == project.id,
-                        )
-                    )
-                    referral_name = (
-                        (ref_pm.display_name if ref_pm and ref_pm.display_name else None)
-                        or ref_user.display_name
-                        or "不明"
-                    )
-            except:
-                pass
+            names = await _resolve_referral_names(db, project.id, [res_ref_id])
+            referral_name = names.get(res_ref_id, "なし")
 
         # Discord Timestamp for notifications
         milestone_ts = int(start_date.replace(tzinfo=UTC).timestamp())
@@ -313,12 +349,12 @@ async def cancel_reservation(
 予約枚数: {res_count}枚
 扱い: {referral_name}
 """
-        background_tasks.add_task(
-            discord_service.send_notification,
-            content=notification_content,
-            webhook_url=project.discord_webhook_url,
+        enqueue_discord_notification(
+            db, content=notification_content, webhook_url=project.discord_webhook_url
         )
 
+    await db.commit()
+
 
 @router.get("/public/schedule", response_model=list[MilestoneResponse])
 async def get_public_schedule(
@@ -376,40 +412,22 @@ async def get_reservations(
     if milestone_id:
         stmt = stmt.where(Reservation.milestone_id == milestone_id)
 
-    stmt = stmt.options(
-        selectinload(Reservation.milestone), selectinload(Reservation.referral_user)
-    ).order_by(Reservation.created_at.desc())
+    stmt = stmt.options(selectinload(Reservation.milestone)).order_by(Reservation.created_at.desc())
 
     result = await db.scalars(stmt)
     reservations = result.all()
 
-    # Response整形
-    # 紹介者の情報を取得するために、Reservation -> ReferralUser -> ProjectMember(そのプロジェクトの) を取得したいが、
-    # Eager Loadingでそこまで絞り込むのは複雑なため、単純にReservation取得後に都度解決するか、
-    # あるいは ProjectMember も join して fetch する。
-    # ここではループ内で取得するコストを避けるため、プロジェクトメンバー辞書を作成しておく。
-
-    # 全プロジェクトメンバー取得
-    pm_stmt = select(ProjectMember).where(ProjectMember.project_id == project_id)
-    pm_result = await db.scalars(pm_stmt)
-    pm_map = {pm.user_id: pm for pm in pm_result.all()}
+    # 紹介者名は予約の件数によらず1回のクエリでまとめて解決する
+    referral_names = await _resolve_referral_names(
+        db, project_id, (r.referral_user_id for r in reservations)
+    )
 
     # Response整形
     results = []
     for r in reservations:
         res_dict = r.__dict__.copy()
         res_dict["milestone_title"] = r.milestone.title
-
-        referral_name = None
-        if r.referral_user:
-            # プロジェクトメンバーとしての情報を優先
-            pm = pm_map.get(r.referral_user_id)
-            if pm and pm.display_name:
-                referral_name = pm.display_name
-            else:
-                referral_name = r.referral_user.display_name
-
-        res_dict["referral_name"] = referral_name
+        res_dict["referral_name"] = referral_names.get(r.referral_user_id)
         results.append(res_dict)
 
     return results
@@ -443,24 +461,12 @@ async def get_milestone_reservations(
     result = await db.execute(stmt)
     reservations = result.scalars().all()
 
+    referral_names = await _resolve_referral_names(
+        db, milestone.project_id, (r.referral_user_id for r in reservations)
+    )
+
     response_list = []
     for reservation in reservations:
-        referral_name = None
-        if reservation.referral_user_id:
-            ref_user = await db.scalar(select(User).where(User.id == reservation.referral_user_id))
-            if ref_user:
-                ref_pm = await db.scalar(
-                    select(ProjectMember).where(
-                        ProjectMember.user_id == reservation.referral_user_id,
-                        ProjectMember.project_id == milestone.project_id,
-                    )
-                )
-                referral_name = (
-                    (ref_pm.display_name if ref_pm and ref_pm.display_name else None)
-                    or ref_user.display_name
-                    or "不明"
-                )
-
         response_list.append(
             ReservationResponse(
                 id=str(reservation.id),
@@ -471,7 +477,7 @@ async def get_milestone_reservations(
                 count=reservation.count,
                 attended=reservation.attended,
                 created_at=reservation.created_at,
-                referral_name=referral_name,
+                referral_name=referral_names.get(reservation.referral_user_id),
             )
         )
 
@@ -530,84 +536,83 @@ async def export_reservations(
     if not member:
         raise HTTPException(status_code=403, detail="Not a project member")
 
-    stmt = select(Reservation).join(Milestone).where(Milestone.project_id == project_id)
+    # 紹介者名はプロジェクト内表示名を優先し、なければユーザーの表示名を使う
+    referral_member = aliased(ProjectMember)
+    stmt = (
+        select(
+            Reservation.id,
+            Milestone.title,
+            Milestone.start_date,
+            Reservation.name,
+            Reservation.email,
+            Reservation.count,
+            Reservation.attended,
+            Reservation.created_at,
+            referral_member.display_name,
+            User.screen_name,
+            User.discord_username,
+        )
+        .join(Milestone, Reservation.milestone_id == Milestone.id)
+        .outerjoin(User, Reservation.referral_user_id == User.id)
+        .outerjoin(
+            referral_member,
+            (referral_member.project_id == project_id)
+            & (referral_member.user_id == Reservation.referral_user_id),
+        )
+        .where(Milestone.project_id == project_id)
+    )
     if milestone_id:
         stmt = stmt.where(Reservation.milestone_id == milestone_id)
-
-    stmt = stmt.options(
-        selectinload(Reservation.milestone), selectinload(Reservation.referral_user)
-    ).order_by(Reservation.milestone_id, Reservation.created_at)
-
-    result = await db.scalars(stmt)
-    reservations = result.all()
-
-    # CSV生成
-    output = io.StringIO()
-    writer = csv.writer(output)
+    stmt = stmt.order_by(Reservation.milestone_id, Reservation.created_at).execution_options(
+        yield_per=EXPORT_CHUNK_ROWS
+    )
 
     # Viewer権限の場合、メールアドレスを非表示
     is_viewer = member.role == "viewer"
 
-    if is_viewer:
-        writer.writerow(["ID", "公演名", "日時", "予約者名", "人数", "紹介者", "出席", "予約日時"])
-    else:
-        writer.writerow(
-            ["ID", "公演名", "日時", "予約者名", "Email", "人数", "紹介者", "出席", "予約日時"]
-        )
-
-    # 全プロジェクトメンバー取得（名前解決用）
-    pm_stmt = select(ProjectMember).where(ProjectMember.project_id == project_id)
-    pm_result = await db.scalars(pm_stmt)
-    pm_map = {pm.user_id: pm for pm in pm_result.all()}
-
-    for r in reservations:
-        referral = ""
-        if r.referral_user:
-            pm = pm_map.get(r.referral_user_id)
-            if pm and pm.display_name:
-                referral = pm.display_name
-            else:
-                referral = r.referral_user.display_name
-
-        date_str = r.milestone.start_date.strftime("%Y/%m/%d %H:%M")
-        created_str = r.created_at.strftime("%Y/%m/%d %H:%M:%S")
+    async def generate_csv():
+        # 読み込んだ行から順にCSVにして送る（全件をメモリに載せない）
+        output = io.StringIO()
+        writer = csv.writer(output)
 
         if is_viewer:
             writer.writerow(
-                [
-                    str(r.id),
-                    r.milestone.title,
-                    date_str,
-                    r.name,
-                    r.count,
-                    referral,
-                    "済" if r.attended else "未",
-                    created_str,
-                ]
+                ["ID", "公演名", "日時", "予約者名", "人数", "紹介者", "出席", "予約日時"]
             )
         else:
             writer.writerow(
-                [
-                    str(r.id),
-                    r.milestone.title,
-                    date_str,
-                    r.name,
-                    r.email,
-                    r.count,
-                    referral,
-                    "済" if r.attended else "未",
-                    created_str,
-                ]
+                ["ID", "公演名", "日時", "予約者名", "Email", "人数", "紹介者", "出席", "予約日時"]
             )
 
-    output.seek(0)
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            for r in rows:
+                referral = ""
+                if r.discord_username is not None:
+                    referral = _referral_name(r.display_name, r.screen_name, r.discord_username)
+
+                date_str = r.start_date.strftime("%Y/%m/%d %H:%M")
+                created_str = r.created_at.strftime("%Y/%m/%d %H:%M:%S")
+
+                row = [str(r.id), r.title, date_str, r.name]
+                if not is_viewer:
+                    row.append(r.email)
+                row += [r.count, referral, "済" if r.attended else "未", created_str]
+                writer.writerow(row)
+
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+
+        if output.tell():
+            yield output.getvalue()
 
     # ファイル名用の日時
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"reservations_{timestamp}.csv"
 
     return StreamingResponse(
-        iter([output.getvalue()]),
+        generate_csv(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
@@ -335,6 +335,7 @@ async def _build_scene_chart_response(
                 order=mapping.character.order,
                 is_custom=mapping.character.is_custom,
                 is_manual=mapping.is_manual,
+                line_count=mapping.line_count,
             )
         )
 
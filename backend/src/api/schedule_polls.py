@@ -3,7 +3,7 @@
 from datetime import UTC, timedelta, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
@@ -39,6 +39,8 @@ from src.schemas.schedule_poll import (
 from src.services.attendance import AttendanceService
 from src.services.calendar_url import build_google_calendar_url
 from src.services.discord import DiscordService, get_discord_service
+from src.services.notification_outbox import enqueue_discord_notification
+from src.services.poll_analysis import invalidate_poll_analysis
 from src.services.schedule_poll_service import get_schedule_poll_service
 
 router = APIRouter()
@@ -86,7 +88,6 @@ async def _finalize_poll_candidate(
     project_id: UUID,
     poll_id: UUID,
     payload: SchedulePollFinalize,
-    background_tasks: BackgroundTasks,
     db: AsyncSession,
     discord_service: DiscordService,
     schedule: RehearsalSchedule,
@@ -164,12 +165,8 @@ async def _finalize_poll_candidate(
     for sid in scene_ids:
         db.add(RehearsalScene(rehearsal_id=rehearsal.id, scene_id=sid))
 
-    await db.commit()
-
-    attendance_targets = None  # 全員対象
-    if payload.attendance_target == "voters_only":
-        answered_users = [a.user_id for a in candidate.answers if a.status in ("ok", "maybe")]
-        attendance_targets = answered_users if answered_users else []
+    # 通知と同じトランザクションでコミットするため、ここでは書き込みのみ
+    await db.flush()
 
     scenes_db = await db.execute(select(Scene).where(Scene.id.in_(scene_ids)))
     scenes = scenes_db.scalars().all()
@@ -179,26 +176,6 @@ async def _finalize_poll_candidate(
         scene_headings.append(f"#{act_scene} {s.heading}")
     scene_text = ", ".join(scene_headings) if scene_headings else None
 
-    if attendance_targets is None or attendance_targets:
-        attendance_service = AttendanceService(db, discord_service)
-        deadline = rehearsal.date - timedelta(hours=24)
-        attendance_title = (
-            f"稽古: {rehearsal.title}"
-            if rehearsal.title
-            else f"稽古: {rehearsal.date.replace(tzinfo=UTC).astimezone(timezone(timedelta(hours=9))).strftime('%m/%d %H:%M')}"
-            + (f" ({scene_text})" if scene_text else "")
-        )
-
-        await attendance_service.create_attendance_event(
-            project=project,
-            title=attendance_title,
-            deadline=deadline,
-            schedule_date=rehearsal.date,
-            location=rehearsal.location,
-            description=rehearsal.notes,
-            target_user_ids=attendance_targets,
-        )
-
     gcal_url = None
     if project:
         start_dt = rehearsal.date.astimezone(UTC)
@@ -221,10 +198,34 @@ async def _finalize_poll_candidate(
             content += f"\nシーン: {scene_text}"
         content += f"\n📎 Googleカレンダーに追加: {gcal_url}"
 
-        background_tasks.add_task(
-            discord_service.send_notification,
-            content=content,
-            webhook_url=project.discord_webhook_url,
+        enqueue_discord_notification(db, content=content, webhook_url=project.discord_webhook_url)
+
+    # 稽古と通知を同じトランザクションで確定する（出席確認の作成より前にコミットする）
+    await db.commit()
+
+    attendance_targets = None  # 全員対象
+    if payload.attendance_target == "voters_only":
+        answered_users = [a.user_id for a in candidate.answers if a.status in ("ok", "maybe")]
+        attendance_targets = answered_users if answered_users else []
+
+    if attendance_targets is None or attendance_targets:
+        attendance_service = AttendanceService(db, discord_service)
+        deadline = rehearsal.date - timedelta(hours=24)
+        attendance_title = (
+            f"稽古: {rehearsal.title}"
+            if rehearsal.title
+            else f"稽古: {rehearsal.date.replace(tzinfo=UTC).astimezone(timezone(timedelta(hours=9))).strftime('%m/%d %H:%M')}"
+            + (f" ({scene_text})" if scene_text else "")
+        )
+
+        await attendance_service.create_attendance_event(
+            project=project,
+            title=attendance_title,
+            deadline=deadline,
+            schedule_date=rehearsal.date,
+            location=rehearsal.location,
+            description=rehearsal.notes,
+            target_user_ids=attendance_targets,
         )
 
     return {"status": "created", "rehearsal_id": rehearsal.id, "gcal_url": gcal_url}
@@ -385,9 +386,8 @@ async def get_poll_calendar_analysis(
     """カレンダー表示用の詳細分析（正引き・リーチ判定込）を取得."""
     poll_service = get_schedule_poll_service(db, None)
 
-    # 権限チェックは get_poll_with_details 等の中で行われるか、個別に必要なら追加
-    # ここでは既存の get_poll と同様のチェックを行う
-    poll = await poll_service.get_poll_with_details(poll_id)
+    # 権限チェック（分析データはスナップショットから取得するため、ここでは日程調整のみ読む）
+    poll = await db.get(SchedulePoll, poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="日程調整が見つかりません")
 
@@ -436,7 +436,6 @@ async def finalize_poll(
     project_id: UUID,
     poll_id: UUID,
     payload: SchedulePollFinalize,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
     discord_service: DiscordService = Depends(get_discord_service),
@@ -459,7 +458,6 @@ async def finalize_poll(
         project_id=project_id,
         poll_id=poll_id,
         payload=payload,
-        background_tasks=background_tasks,
         db=db,
         discord_service=discord_service,
         schedule=schedule,
@@ -475,7 +473,6 @@ async def finalize_poll_batch(
     project_id: UUID,
     poll_id: UUID,
     payload: SchedulePollFinalizeBatchRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user_dep),
     db: AsyncSession = Depends(get_db),
     discord_service: DiscordService = Depends(get_discord_service),
@@ -508,7 +505,6 @@ async def finalize_poll_batch(
                 project_id=project_id,
                 poll_id=poll_id,
                 payload=item,
-                background_tasks=background_tasks,
                 db=db,
                 discord_service=discord_service,
                 schedule=schedule,
@@ -656,5 +652,6 @@ async def delete_poll(
 
     await db.delete(poll)
     await db.commit()
+    invalidate_poll_analysis(poll_id)
 
     return {"status": "ok"}
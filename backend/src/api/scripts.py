@@ -16,12 +16,10 @@ from fastapi import (
 )
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from src.db import get_db
 from src.db.models import (
     Character,
-    Line,
     ProjectMember,
     Scene,
     Script,
@@ -30,13 +28,26 @@ from src.db.models import (
 )
 from src.dependencies.auth import get_current_user_dep
 from src.dependencies.permissions import (
+    SCRIPT_LOAD_CONTENT,
+    SCRIPT_LOAD_FULL,
     get_project_editor_dep,
     get_project_member_dep,
+    get_script_member,
     get_script_member_dep,
 )
-from src.schemas.script import ScriptListResponse, ScriptResponse
+from src.schemas.script import (
+    ScenePageResponse,
+    ScriptListResponse,
+    ScriptResponse,
+    ScriptSummary,
+)
 from src.services.discord import DiscordService, get_discord_service
-from src.services.pdf_generator import generate_script_pdf
+from src.services.pdf_executor import (
+    PdfRenderQueueFullError,
+    PdfRenderTimeoutError,
+    render_script_pdf,
+)
+from src.services.script_pages import load_scene_page
 
 router = APIRouter(tags=["scripts"])
 
@@ -53,25 +64,14 @@ async def get_scripts(
     member: ProjectMember = Depends(get_project_member_dep),
     db: AsyncSession = Depends(get_db),
 ) -> ScriptListResponse:
-    """プロジェクトの脚本一覧を取得."""
+    """プロジェクトの脚本一覧を取得（概要のみ。シーン・セリフは含まない）."""
     # 権限チェックはDepends(get_project_member_dep)で完了済み
 
-    # 脚本取得
-    stmt = (
-        select(Script)
-        .where(Script.project_id == project_id)
-        .options(
-            selectinload(Script.characters).selectinload(Character.castings),
-            selectinload(Script.scenes).options(
-                selectinload(Scene.lines).options(
-                    selectinload(Line.character).selectinload(Character.castings)
-                )
-            ),
-        )
-    )
+    # 脚本取得（本文は一覧に不要なため読み込まない）
+    stmt = select(Script).where(Script.project_id == project_id)
     result = await db.execute(stmt)
     scripts = result.scalars().all()
-    return ScriptListResponse(scripts=[ScriptResponse.model_validate(s) for s in scripts])
+    return ScriptListResponse(scripts=[ScriptSummary.model_validate(s) for s in scripts])
 
 
 @router.post("/{project_id}/upload", response_model=ScriptResponse)
@@ -160,7 +160,7 @@ async def upload_script(
 
 @router.get("/{project_id}/{script_id}", response_model=ScriptResponse)
 async def get_script(
-    tuple_data: tuple[ProjectMember, Script] = Depends(get_script_member_dep),
+    tuple_data: tuple[ProjectMember, Script] = Depends(get_script_member(SCRIPT_LOAD_FULL)),
 ) -> ScriptResponse:
     """指定した脚本の詳細を取得."""
     # 権限チェックはDepends(get_project_member_dep)で完了済み
@@ -171,14 +171,14 @@ async def get_script(
 
 @router.get("/{project_id}/{script_id}/pdf")
 async def download_script_pdf(
-    tuple_data: tuple[ProjectMember, Script] = Depends(get_script_member_dep),
+    tuple_data: tuple[ProjectMember, Script] = Depends(get_script_member(SCRIPT_LOAD_CONTENT)),
     orientation: str | None = Query(None, description="Paper orientation: landscape or portrait"),
     writing_direction: str | None = Query(
         None, description="Writing direction: vertical or horizontal"
     ),
 ):
     """脚本のPDFをダウンロード."""
-    # 権限チェックはDepends(get_script_member_dep)内で完了済み
+    # 権限チェックはDepends(get_script_member)内で完了済み
     member, script = tuple_data
 
     # パラメータバリデーション（指定がない場合はScriptの保存設定を使用）
@@ -192,13 +192,17 @@ async def download_script_pdf(
     if writing_direction not in ("vertical", "horizontal"):
         writing_direction = "vertical"
 
-    # PDF生成
+    # PDF生成（描画プールで実行し、イベントループをブロックしない）
     try:
-        pdf_bytes = generate_script_pdf(
+        pdf_bytes = await render_script_pdf(
             script.content,
             orientation=orientation,
             writing_direction=writing_direction,
         )
+    except PdfRenderQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except PdfRenderTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
 
@@ -275,6 +279,26 @@ async def get_scenes(
     return {"scenes": scenes}
 
 
+@router.get(
+    "/{project_id}/{script_id}/scenes/page",
+    response_model=ScenePageResponse,
+    response_model_exclude_unset=True,
+)
+async def get_scene_page(
+    tuple_data: tuple[ProjectMember, Script] = Depends(get_script_member_dep),
+    cursor: str | None = Query(None, description="前のページの next_cursor"),
+    limit: int = Query(20, ge=1, le=100, description="取得するシーン数"),
+    fields: str | None = Query(
+        None, description="返す項目（カンマ区切り）。lines を含めるとセリフも返す"
+    ),
+    db: AsyncSession = Depends(get_db),
+) -> ScenePageResponse:
+    """脚本のシーンを並び順にページ単位で取得（スクロールに合わせた遅延読み込み用）."""
+    # 権限チェックはDepends(get_script_member_dep)内で完了済み
+    member, script = tuple_data
+    return await load_scene_page(db, script.id, cursor=cursor, limit=limit, fields=fields)
+
+
 # ===========================
 # Characters
 # ===========================
@@ -7,6 +7,7 @@ from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.auth.cache import invalidate_user
 from src.auth.jwt import get_current_user
 from src.db import get_db
 from src.db.models import (
@@ -90,6 +91,7 @@ async def patch_current_user_info(
         user.screen_name = user_update.screen_name
 
     await db.commit()
+    invalidate_user(user.id)
     await db.refresh(user)
 
     # 更新後のランク判定
@@ -0,0 +1,158 @@
+"""認証・権限チェック用のユーザー／メンバーシップキャッシュ.
+
+認証済みリクエストは毎回 JWT のユーザーと ProjectMember を読み込むため、列の値を
+プロセス内の LRU に短時間保持し、キャッシュにあればクエリを発行しない。
+
+キャッシュから返すオブジェクトは呼び出し元のセッションに属する（通常どおり更新・
+リレーションの読み込みができる）。変更した箇所では invalidate_* を呼び出す。
+他のワーカープロセスのキャッシュは消せないため、変更の反映は最大で
+auth_cache_ttl_seconds 遅れる。見つからなかった結果はキャッシュしない。
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from src.config import settings
+from src.db.base import Base
+from src.db.models import ProjectMember, User
+
+_CACHE_SIZE = 1024
+# user_id → (読み込み時刻, 列の値)
+_users: OrderedDict[uuid.UUID, tuple[float, dict[str, Any]]] = OrderedDict()
+# (project_id, user_id) → (読み込み時刻, 列の値)
+_members: OrderedDict[tuple[uuid.UUID, uuid.UUID], tuple[float, dict[str, Any]]] = OrderedDict()
+# 無効化のたびに進める。読み込み中に無効化された場合は古い可能性があるため保存しない
+_generation = 0
+
+
+def _column_values(obj: Base) -> dict[str, Any]:
+    """読み込み済みの列の値（遅延読み込みは発生させない）."""
+    state = inspect(obj)
+    return {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict
+    }
+
+
+def _lookup(cache: OrderedDict, key: Any) -> dict[str, Any] | None:
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    if time.monotonic() - cached[0] >= settings.auth_cache_ttl_seconds:
+        cache.pop(key, None)
+        return None
+    cache.move_to_end(key)
+    return cached[1]
+
+
+def _store(cache: OrderedDict, key: Any, obj: Base, loaded_at: float, generation: int) -> None:
+    if settings.auth_cache_ttl_seconds <= 0 or generation != _generation:
+        return
+    cache[key] = (loaded_at, _column_values(obj))
+    cache.move_to_end(key)
+    while len(cache) > _CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _in_session(db: AsyncSession, model: type[Base], pk: uuid.UUID) -> Any:
+    """セッションに読み込み済み（期限切れでない）のオブジェクト."""
+    obj = db.identity_map.get(identity_key(model, pk))
+    if obj is None or inspect(obj).expired_attributes:
+        return None
+    return obj
+
+
+async def _attach(db: AsyncSession, model: type[Base], values: dict[str, Any]) -> Any:
+    """キャッシュした列の値からセッションに属するオブジェクトを作る（クエリは発行しない）."""
+    existing = _in_session(db, model, values["id"])
+    if existing is not None:
+        return existing
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return await db.merge(obj, load=False)
+
+
+async def get_cached_user(db: AsyncSession, user_id: uuid.UUID) -> User | None:
+    """ユーザーを取得する（キャッシュ優先）.
+
+    Args:
+        db: データベースセッション
+        user_id: ユーザーID
+
+    Returns:
+        User | None: ユーザー（存在しない場合は None）
+    """
+    values = _lookup(_users, user_id)
+    if values is not None:
+        return await _attach(db, User, values)
+
+    loaded_at = time.monotonic()
+    generation = _generation
+    user = _in_session(db, User, user_id)
+    if user is None:
+        user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if user is not None:
+        _store(_users, user_id, user, loaded_at, generation)
+    return user
+
+
+async def get_cached_member(
+    db: AsyncSession, project_id: uuid.UUID, user_id: uuid.UUID
+) -> ProjectMember | None:
+    """プロジェクトメンバーを取得する（キャッシュ優先）.
+
+    Args:
+        db: データベースセッション
+        project_id: プロジェクトID
+        user_id: ユーザーID
+
+    Returns:
+        ProjectMember | None: メンバー（参加していない場合は None）
+    """
+    key = (project_id, user_id)
+    values = _lookup(_members, key)
+    if values is not None:
+        return await _attach(db, ProjectMember, values)
+
+    loaded_at = time.monotonic()
+    generation = _generation
+    result = await db.execute(
+        select(ProjectMember).where(
+            ProjectMember.project_id == project_id,
+            ProjectMember.user_id == user_id,
+        )
+    )
+    member = result.scalar_one_or_none()
+    if member is not None:
+        _store(_members, key, member, loaded_at, generation)
+    return member
+
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    """ユーザーのキャッシュを破棄する（ユーザー情報の更新時に呼び出す）."""
+    global _generation
+    _generation += 1
+    _users.pop(user_id, None)
+
+
+def invalidate_member(project_id: uuid.UUID, user_id: uuid.UUID) -> None:
+    """メンバーのキャッシュを破棄する（ロール変更・脱退時に呼び出す）."""
+    global _generation
+    _generation += 1
+    _members.pop((project_id, user_id), None)
+
+
+def invalidate_project_members(project_id: uuid.UUID) -> None:
+    """プロジェクトの全メンバーのキャッシュを破棄する（プロジェクト削除時に呼び出す）."""
+    global _generation
+    _generation += 1
+    for key in [key for key in _members if key[0] == project_id]:
+        del _members[key]
@@ -5,6 +5,7 @@ from authlib.integrations.starlette_client import OAuth
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cache import invalidate_user
 from src.config import settings
 from src.db.models import User
 
@@ -74,6 +75,7 @@ async def get_or_create_user_from_discord(
         db.add(user)
 
     await db.commit()
+    invalidate_user(user.id)
 
     # Refresh to get ID and other fields populated from DB
     # Using execute/scalar to avoid potential greenlet/asyncio conflicts with implicit refresh
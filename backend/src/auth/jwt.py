@@ -2,9 +2,9 @@ from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
 from jose import JWTError, jwt
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cache import get_cached_user
 from src.config import settings
 from src.db.models import User
 
@@ -29,6 +29,8 @@ def create_access_token(data: dict[str, str | int]) -> str:
 async def get_current_user(token: str, db: AsyncSession) -> User | None:
     """JWTトークンから現在のユーザーを取得.
 
+    ユーザーは短時間キャッシュされる（src.auth.cache）。
+
     Args:
         token: JWT トークン
         db: データベースセッション
@@ -48,5 +50,4 @@ async def get_current_user(token: str, db: AsyncSession) -> User | None:
     except (JWTError, ValueError):
         return None
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+    return await get_cached_user(db, user_id)
@@ -13,12 +13,52 @@ class Settings(BaseSettings):
 
     # データベース
     database_url: str = "sqlite+aiosqlite:///test.db"
+    db_pool_size: int = 5  # プロセスごとに保持する接続数
+    db_max_overflow: int = 10  # 混雑時に一時的に追加できる接続数
+    db_pool_timeout_seconds: float = 30.0  # 空き接続を待つ上限
+    db_pool_recycle_seconds: int = 1800  # これより古い接続は作り直す（-1で無効）
+    # Supabase Transaction Pooler (PgBouncer) 経由ではプリペアドステートメントを使えない。
+    # DBへ直接（またはセッションモードで）接続する場合は False にしてキャッシュを有効にする
+    db_behind_pgbouncer: bool = True
+    db_statement_cache_size: int = 100  # db_behind_pgbouncer=False の場合のキャッシュ件数
 
     # Azure Storage
     azure_storage_connection_string: str | None = None
     premium_config_container: str = "config"
     premium_config_blob_name: str = "premium_settings.json"
 
+    # PDFレンダリングキャッシュ
+    pdf_cache_memory_max_bytes: int = 64 * 1024 * 1024  # プロセス内LRUの上限（バイト）
+    pdf_cache_dir: str | None = None  # ディスク共有キャッシュのディレクトリ
+    pdf_cache_container: str | None = None  # Blob共有キャッシュのコンテナ名
+
+    # PDFレンダリングプール
+    pdf_render_workers: int = 2  # 描画プロセス数（0の場合はスレッドで実行）
+    pdf_render_max_queue: int = 8  # 実行中に加えて待機できる描画の件数
+    pdf_render_timeout_seconds: float = 120.0
+
+    # 脚本アップロード
+    script_bulk_insert: bool = True  # シーン・セリフ等を一括INSERT (COPY) で書き込む
+    script_incremental_update: bool = True  # 再アップロード時は差分のみ反映する
+
+    # 日程調整の分析
+    # 分析用スナップショットの保持時間（0で無効）。回答の変更は読み出し時に版を確認して
+    # 全ワーカーで即時反映されるが、配役・香盤表などの変更はこの時間まで反映されない
+    poll_analysis_cache_ttl_seconds: float = 60.0
+
+    # リマインダー送信
+    reminder_dispatch_concurrency: int = 16  # 同時に送信するリマインダーの上限
+    reminder_dispatch_per_channel: int = 2  # 同じDiscordチャンネルへの同時送信数
+
+    # 通知アウトボックス
+    notification_outbox_worker_enabled: bool = True  # アプリ内で送信ワーカーを動かす
+    notification_outbox_poll_seconds: float = 2.0  # 送信待ちがない場合の確認間隔
+    notification_outbox_batch_size: int = 50  # 1回に取り出す件数
+    notification_outbox_concurrency: int = 8  # 同時送信数
+    notification_outbox_max_attempts: int = 6  # これを超えたら dead とする
+    notification_outbox_retry_base_seconds: float = 10.0  # 再試行間隔（指数バックオフの初期値）
+    notification_outbox_lease_seconds: float = 300.0  # 取り出した行を他のワーカーから隠す時間
+
     # Discord OAuth
     discord_client_id: str = "test_client_id"
     discord_client_secret: str = "test_client_secret"
@@ -34,6 +74,8 @@ class Settings(BaseSettings):
     jwt_secret_key: str = "test-secret-key-for-testing"
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 10080  # 7日間
+    # 認証ユーザー・プロジェクトメンバーのプロセス内キャッシュの保持時間（0で無効）
+    auth_cache_ttl_seconds: float = 30.0
 
     # 環境
     environment: str = "development"
@@ -47,6 +89,8 @@ class Settings(BaseSettings):
     premium_password_tier1: str | None = None
     premium_password_tier2: str | None = None
     premium_password_test: str | None = "test_only_password"
+    # 制限モード判定に使う作成者ごとの非公開プロジェクト一覧の保持時間（0で無効）
+    project_restriction_cache_ttl_seconds: float = 60.0
 
 
 settings = Settings()
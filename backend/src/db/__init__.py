@@ -6,6 +6,7 @@ from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from src.config import settings
+from src.db.pool_metrics import InstrumentedAsyncQueuePool
 
 
 def _prepare_asyncpg_url(url: str) -> tuple[str, dict]:
@@ -16,7 +17,9 @@ def _prepare_asyncpg_url(url: str) -> tuple[str, dict]:
     """
     import ssl as _ssl
 
-    connect_args: dict = {"statement_cache_size": 0}
+    # Supabase Transaction Pooler (PgBouncer) does not support prepared statements
+    statement_cache_size = 0 if settings.db_behind_pgbouncer else settings.db_statement_cache_size
+    connect_args: dict = {"statement_cache_size": statement_cache_size}
     if "sslmode" not in url:
         return url, connect_args
     parsed = urlparse(url)
@@ -31,15 +34,31 @@ def _prepare_asyncpg_url(url: str) -> tuple[str, dict]:
     return urlunparse(parsed._replace(query=new_query)), connect_args
 
 
-_db_url, _connect_args = _prepare_asyncpg_url(settings.database_url)
+def _engine_options(url: str) -> tuple[str, dict]:
+    """エンジンの接続先と、接続・プールの設定を作る."""
+    if url.startswith("sqlite"):
+        # 開発用のSQLiteはドライバ既定のプールを使う
+        return url, {}
+
+    url, connect_args = _prepare_asyncpg_url(url)
+    return url, {
+        "connect_args": connect_args,
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+
+
+_db_url, _engine_kwargs = _engine_options(settings.database_url)
 
 # 非同期エンジンの作成
 engine = create_async_engine(
     _db_url,
     echo=settings.environment == "development",
     pool_pre_ping=True,
-    # Supabase Transaction Pooler (PgBouncer) does not support prepared statements
-    connect_args=_connect_args,
+    **_engine_kwargs,
 )
 
 # 非同期セッションファクトリ
@@ -53,6 +72,9 @@ async_session_maker = async_sessionmaker(
 async def get_db() -> AsyncGenerator[AsyncSession]:
     """データベースセッションの依存性注入.
 
+    FastAPI は1リクエスト内の同じ依存関係を1回だけ解決するため、認証・権限チェックの
+    依存関係とエンドポイントはこのセッションを共有する（use_cache=False で別に取得しないこと）。
+
     Yields:
         AsyncSession: データベースセッション
     """
@@ -0,0 +1,61 @@
+"""一括INSERTユーティリティ.
+
+数千件規模の行をORMオブジェクトを介さずに書き込む。PostgreSQL (asyncpg) では
+``COPY`` (``copy_records_to_table``) を、それ以外のDBではCore の executemany
+（SQLAlchemy の insertmanyvalues による複数行 ``INSERT ... VALUES``）を使う。
+
+ORMのデフォルト値やイベントは適用されないため、必要な列はすべて呼び出し側で
+指定すること。また、書き込んだ行はセッションのIDマップに載らないので、
+必要に応じて呼び出し側で再読込すること。
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import Table, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def bulk_insert_rows(
+    db: AsyncSession,
+    table: Table,
+    columns: Sequence[str],
+    rows: Sequence[tuple[Any, ...]],
+) -> int:
+    """タプルのリストをテーブルへ一括で書き込む.
+
+    ``COPY`` の前に必ずトランザクションを開始させるため、ロールバックすれば
+    通常のINSERTと同様に取り消される。外部キー先の行は事前にflushしておくこと。
+
+    Args:
+        db: データベースセッション
+        table: 書き込み先のテーブル
+        columns: 列名（rows の各タプルの並びに対応）
+        rows: 書き込む行
+
+    Returns:
+        int: 書き込んだ行数
+    """
+    if not rows:
+        return 0
+
+    # 保留中のORM変更（親行など）を先に反映する
+    await db.flush()
+    conn = await db.connection()
+
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        # asyncpg アダプタは最初の文の実行時に BEGIN を発行するため、flush する変更が
+        # なかった場合に生接続で COPY すると自動コミットされてしまう。先に文を流しておく
+        await conn.exec_driver_sql("SELECT 1")
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name,
+            records=rows,
+            columns=list(columns),
+            schema_name=table.schema,
+        )
+        return len(rows)
+
+    # executemany 形式で渡し、ドライバ側のバッチ処理（insertmanyvalues）に任せる
+    await conn.execute(insert(table), [dict(zip(columns, row, strict=True)) for row in rows])
+    return len(rows)
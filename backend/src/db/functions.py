@@ -0,0 +1,35 @@
+"""DBごとに書き方が異なるSQL関数.
+
+PostgreSQL（本番）と SQLite（テスト）で同じクエリを使えるよう、方言ごとにSQLを出し分ける。
+"""
+
+from typing import Any
+
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class hours_before(FunctionElement):  # noqa: N801
+    """日時から指定時間（列可）を引いた日時.
+
+    Example:
+        hours_before(AttendanceEvent.schedule_date, TheaterProject.attendance_reminder_1_hours)
+    """
+
+    type = DateTime(timezone=True)
+    inherit_cache = True
+    name = "hours_before"
+
+
+@compiles(hours_before)
+def _compile_hours_before(element: hours_before, compiler: Any, **kw: Any) -> str:
+    timestamp, hours = (compiler.process(arg, **kw) for arg in element.clauses)
+    return f"({timestamp} - ({hours}) * INTERVAL '1 hour')"
+
+
+@compiles(hours_before, "sqlite")
+def _compile_hours_before_sqlite(element: hours_before, compiler: Any, **kw: Any) -> str:
+    # SQLAlchemy は SQLite の日時を "YYYY-MM-DD HH:MM:SS.ffffff" の文字列で保存する
+    timestamp, hours = (compiler.process(arg, **kw) for arg in element.clauses)
+    return f"strftime('%Y-%m-%d %H:%M:%f000', {timestamp}, '-' || ({hours}) || ' hours')"
@@ -4,7 +4,17 @@ import uuid
 from datetime import UTC, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text, UniqueConstraint, Uuid
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    UniqueConstraint,
+    Uuid,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db.base import Base
@@ -183,7 +193,8 @@ class Script(Base):
     project_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("theater_projects.id"))
     uploaded_by: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"))  # アップロードユーザー
     title: Mapped[str] = mapped_column(String(200))
-    content: Mapped[str] = mapped_column(Text)  # Fountain脚本の内容を直接保存
+    # Fountain脚本の内容を直接保存（大きいため既定では読み込まない。必要な処理で undefer する）
+    content: Mapped[str] = mapped_column(Text, deferred=True)
     is_public: Mapped[bool] = mapped_column(default=False)  # 全体公開フラグ
     public_terms: Mapped[str | None] = mapped_column(Text, nullable=True)  # 公開時の使用条件
     public_contact: Mapped[str | None] = mapped_column(String(200), nullable=True)  # 公開時の連絡先
@@ -306,15 +317,21 @@ class SceneChart(Base):
 
 
 class SceneCharacterMapping(Base):
-    """香盤表のシーン-登場人物マッピング."""
+    """香盤表のシーン-登場人物マッピング.
+
+    自動マッピングはセリフ数とともに解析時に作成され、シーン別の出演インデックスを兼ねる。
+    「シーンXに誰が出るか」はこのテーブルだけで答えられ、lines を読む必要はない。
+    """
 
     __tablename__ = "scene_character_mappings"
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
     chart_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("scene_charts.id"))
-    scene_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("scenes.id"))
+    scene_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("scenes.id"), index=True)
     character_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("characters.id"))
     is_manual: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
+    # シーン内のセリフ数（解析時に算出。手動マッピングでセリフがない場合は0）
+    line_count: Mapped[int] = mapped_column(default=0, server_default="0")
 
     # リレーション
     chart: Mapped["SceneChart"] = relationship(back_populates="mappings")
@@ -519,6 +536,8 @@ class Milestone(Base):
         String(7), nullable=True
     )  # HEX colorカレンダー表示用の色コード (e.g. "#FF0000")
     reservation_capacity: Mapped[int | None] = mapped_column(default=None)  # 予約定員 (None=無制限)
+    # 予約済みの人数（予約作成・キャンセル時に UPDATE で加減し、定員チェックに使う）
+    reserved_count: Mapped[int] = mapped_column(default=0, server_default="0")
     is_public: Mapped[bool] = mapped_column(Boolean, default=True)  # 公開設定
 
     # リレーション
@@ -562,6 +581,10 @@ class AttendanceEvent(Base):
     """出欠確認イベント."""
 
     __tablename__ = "attendance_events"
+    # リマインダー送信対象（未完了・稽古日時順）の検索用
+    __table_args__ = (
+        Index("ix_attendance_events_completed_schedule_date", "completed", "schedule_date"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
     project_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("theater_projects.id"))
@@ -692,3 +715,31 @@ class SchedulePollAnswer(Base):
 
     # ユニーク制約
     __table_args__ = (UniqueConstraint("candidate_id", "user_id", name="uq_poll_candidate_user"),)
+
+
+class NotificationOutbox(Base):
+    """送信待ちの通知（Discord Webhook・メール）.
+
+    ドメインの変更と同じトランザクションで書き込み、送信ワーカーが取り出して送る。
+    送信に成功した行は削除し、再試行の上限に達した行は status="dead" として残す。
+    """
+
+    __tablename__ = "notification_outbox"
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, default=uuid.uuid4)
+    kind: Mapped[str] = mapped_column(String(30))  # "discord_webhook", "email"
+    payload: Mapped[dict] = mapped_column(JSON)
+    status: Mapped[str] = mapped_column(String(20), default="pending")  # "pending", "dead"
+    attempts: Mapped[int] = mapped_column(default=0)
+    # 次に送信を試みる日時（送信中は処理中のワーカーの期限）
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC)
+    )
+
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
@@ -0,0 +1,102 @@
+"""コネクションプールの取得待ち時間の計測.
+
+プールからの接続取得（空きがない場合の待機、pre-ping、新規接続を含む）にかかった時間を
+プロセス全体とリクエストごとに集計する。プロセス全体の値は /api/health/db-pool で、
+リクエストごとの値はリクエストログ（db_pool_wait_ms）で確認できる。
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+
+class PoolWaitStats:
+    """接続取得の回数と待ち時間."""
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+
+# プロセス全体の集計
+pool_wait_stats = PoolWaitStats()
+
+# 処理中のリクエストの集計（RequestLoggingMiddleware が設定する）
+_request_pool_wait: ContextVar[PoolWaitStats | None] = ContextVar("request_pool_wait", default=None)
+
+
+def track_request_pool_wait() -> PoolWaitStats:
+    """現在のリクエストの集計を開始する.
+
+    Returns:
+        PoolWaitStats: このリクエストで発生した接続取得の集計
+    """
+    stats = PoolWaitStats()
+    _request_pool_wait.set(stats)
+    return stats
+
+
+def record_pool_wait(seconds: float) -> None:
+    """接続取得1回分の待ち時間を記録する."""
+    pool_wait_stats.record(seconds)
+    request_stats = _request_pool_wait.get()
+    if request_stats is not None:
+        request_stats.record(seconds)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """接続取得の待ち時間を記録する AsyncAdaptedQueuePool."""
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_wait_stats.timeouts += 1
+            raise
+        finally:
+            record_pool_wait(time.perf_counter() - start)
+
+
+def get_pool_stats(pool: Any) -> dict[str, Any]:
+    """プールの状態と取得待ち時間のメトリクスを取得する.
+
+    Args:
+        pool: エンジンのコネクションプール
+
+    Returns:
+        dict: メトリクス
+    """
+    stats: dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "idle": pool.checkedin(),
+            }
+        )
+    stats.update(
+        {
+            "checkouts": pool_wait_stats.checkouts,
+            "timeouts": pool_wait_stats.timeouts,
+            "avg_wait_ms": (
+                round(pool_wait_stats.total_wait_seconds * 1000 / pool_wait_stats.checkouts, 2)
+                if pool_wait_stats.checkouts
+                else None
+            ),
+            "max_wait_ms": round(pool_wait_stats.max_wait_seconds * 1000, 2),
+        }
+    )
+    return stats
@@ -5,8 +5,9 @@ from uuid import UUID
 from fastapi import Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
+from src.auth.cache import get_cached_member
 from src.db import get_db
 from src.db.models import Character, Line, ProjectMember, Scene, Script, User
 from src.dependencies.auth import get_current_user_dep
@@ -34,13 +35,7 @@ async def get_project_member_dep(
     if current_user is None:
         raise HTTPException(status_code=401, detail="認証が必要です")
 
-    result = await db.execute(
-        select(ProjectMember).where(
-            ProjectMember.project_id == project_id,
-            ProjectMember.user_id == current_user.id,
-        )
-    )
-    member = result.scalar_one_or_none()
+    member = await get_cached_member(db, project_id, current_user.id)
 
     if member is None:
         raise HTTPException(status_code=403, detail="このプロジェクトへのアクセス権がありません")
@@ -93,51 +88,75 @@ async def get_project_editor_dep(
     return member
 
 
-async def get_script_member_dep(
-    script_id: UUID,
-    current_user: User = Depends(get_current_user_dep),
-    db: AsyncSession = Depends(get_db),
-) -> tuple[ProjectMember, Script]:
-    """脚本IDからアクセス権を確認し、メンバー情報と脚本を返す.
+# 脚本の読み込み範囲（エンドポイントごとに必要な分だけ指定する）
+SCRIPT_LOAD_METADATA = "metadata"  # 脚本の列のみ（本文 content を除く）
+SCRIPT_LOAD_CONTENT = "content"  # 脚本の列と本文
+SCRIPT_LOAD_FULL = "full"  # 本文を除く列と、登場人物・シーン・セリフ・キャスティング
+
+# Script.content は既定で遅延読み込みのため、本文が必要な場合のみ undefer する
+_SCRIPT_LOAD_OPTIONS = {
+    SCRIPT_LOAD_METADATA: (),
+    SCRIPT_LOAD_CONTENT: (undefer(Script.content),),
+    SCRIPT_LOAD_FULL: (),
+}
+
+# SCRIPT_LOAD_FULL で権限チェック後に読み込むリレーション
+_SCRIPT_GRAPH_OPTIONS = (
+    selectinload(Script.characters).selectinload(Character.castings),
+    selectinload(Script.scenes)
+    .selectinload(Scene.lines)
+    .selectinload(Line.character)
+    .selectinload(Character.castings),
+)
+
+
+def get_script_member(load: str = SCRIPT_LOAD_METADATA) -> callable:
+    """脚本IDからアクセス権を確認し、メンバー情報と脚本を返す依存関係ジェネレータ.
+
+    権限チェックは脚本1行とメンバー情報だけで行い、リレーションは権限チェック後に
+    load で指定した範囲だけ読み込む。
 
     Args:
-        script_id: 脚本ID (Path parameter)
-        current_user: 認証ユーザー
-        db: データベースセッション
+        load: 脚本の読み込み範囲 (SCRIPT_LOAD_METADATA / SCRIPT_LOAD_CONTENT / SCRIPT_LOAD_FULL)
 
     Returns:
-        tuple[ProjectMember, Script]: メンバー情報と脚本
+        Callable: 依存関係関数
     """
-    if current_user is None:
-        raise HTTPException(status_code=401, detail="認証が必要です")
+    options = _SCRIPT_LOAD_OPTIONS[load]
 
-    # 脚本取得
-    result = await db.execute(
-        select(Script)
-        .options(
-            selectinload(Script.characters).selectinload(Character.castings),
-            selectinload(Script.scenes)
-            .selectinload(Scene.lines)
-            .selectinload(Line.character)
-            .selectinload(Character.castings),
-        )
-        .where(Script.id == script_id)
-    )
-    script = result.scalar_one_or_none()
-
-    if script is None:
-        raise HTTPException(status_code=404, detail="脚本が見つかりません")
-
-    # 権限チェック
-    result = await db.execute(
-        select(ProjectMember).where(
-            ProjectMember.project_id == script.project_id,
-            ProjectMember.user_id == current_user.id,
-        )
-    )
-    member = result.scalar_one_or_none()
+    async def dependency(
+        script_id: UUID,
+        current_user: User = Depends(get_current_user_dep),
+        db: AsyncSession = Depends(get_db),
+    ) -> tuple[ProjectMember, Script]:
+        if current_user is None:
+            raise HTTPException(status_code=401, detail="認証が必要です")
+
+        # 脚本取得
+        result = await db.execute(select(Script).options(*options).where(Script.id == script_id))
+        script = result.scalar_one_or_none()
+
+        if script is None:
+            raise HTTPException(status_code=404, detail="脚本が見つかりません")
+
+        # 権限チェック
+        member = await get_cached_member(db, script.project_id, current_user.id)
+
+        if member is None:
+            raise HTTPException(
+                status_code=403, detail="このプロジェクトへのアクセス権がありません"
+            )
+
+        if load == SCRIPT_LOAD_FULL:
+            # 読み込み済みの脚本に、登場人物・シーン以下のリレーションを追加で読み込む
+            await db.execute(
+                select(Script).options(*_SCRIPT_GRAPH_OPTIONS).where(Script.id == script_id)
+            )
+
+        return member, script
+
+    return dependency
 
-    if member is None:
-        raise HTTPException(status_code=403, detail="このプロジェクトへのアクセス権がありません")
 
-    return member, script
+# 権限チェックと脚本のメタデータのみ（香盤表など本文・セリフを使わないエンドポイント用）
+get_script_member_dep = get_script_member(SCRIPT_LOAD_METADATA)
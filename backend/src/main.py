@@ -76,6 +76,35 @@ async def startup_event():
         logger.error("Startup migration crashed", error=str(exc), exc_info=True)
 
 
+# 通知アウトボックスの送信ワーカー（マイグレーションの後に起動する）
+_outbox_worker_stop = asyncio.Event()
+_outbox_worker_task: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def start_outbox_worker():
+    global _outbox_worker_task
+    if not settings.notification_outbox_worker_enabled:
+        return
+
+    from src.services.notification_outbox import run_outbox_worker
+
+    _outbox_worker_stop.clear()
+    _outbox_worker_task = asyncio.create_task(run_outbox_worker(_outbox_worker_stop))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from src.services.discord import close_discord_http_client
+    from src.services.pdf_executor import get_pdf_render_executor
+
+    get_pdf_render_executor().shutdown()
+    if _outbox_worker_task is not None:
+        _outbox_worker_stop.set()
+        await _outbox_worker_task
+    await close_discord_http_client()
+
+
 @app.get("/api/fix-system")
 async def manual_fix_system():
     """システム修復用エンドポイント (Migration & Data Fix)."""
@@ -187,4 +216,29 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/api/health/pdf-render")
+async def pdf_render_health() -> dict:
+    """PDF描画プールのメトリクス（待ち行列長・描画時間など）.
+
+    Returns:
+        dict: メトリクス
+    """
+    from src.services.pdf_executor import get_pdf_render_executor
+
+    return get_pdf_render_executor().get_stats()
+
+
+@app.get("/api/health/db-pool")
+async def db_pool_health() -> dict:
+    """DBコネクションプールのメトリクス（使用中の接続数・取得待ち時間など）.
+
+    Returns:
+        dict: メトリクス
+    """
+    from src.db import engine
+    from src.db.pool_metrics import get_pool_stats
+
+    return get_pool_stats(engine.pool)
+
+
 # Force reload for DB schema update
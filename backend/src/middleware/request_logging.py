@@ -11,6 +11,7 @@ from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
 from src.core.logger import get_logger
+from src.db.pool_metrics import track_request_pool_wait
 
 logger = get_logger(__name__)
 
@@ -35,6 +36,7 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         structlog.contextvars.bind_contextvars(request_id=request_id)
 
         start_time = time.time()
+        pool_wait = track_request_pool_wait()
 
         logger.info(
             "Request started",
@@ -53,6 +55,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 "Request processed",
                 status_code=response.status_code,
                 process_time_ms=round(process_time * 1000, 2),
+                db_checkouts=pool_wait.checkouts,
+                db_pool_wait_ms=round(pool_wait.total_wait_seconds * 1000, 2),
             )
 
             # レスポンスヘッダーにリクエストIDを含める（デバッグ用）
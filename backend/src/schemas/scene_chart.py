@@ -14,6 +14,7 @@ class CharacterInScene(BaseModel):
     order: int = Field(0, description="表示順")
     is_custom: bool = Field(False, description="カスタムキャラクター")
     is_manual: bool = Field(False, description="手動追加のマッピング")
+    line_count: int = Field(0, description="このシーンでのセリフ数")
 
     model_config = {"from_attributes": True}
 
@@ -102,3 +102,31 @@ class ScriptListResponse(BaseModel):
     """脚本一覧レスポンスWrapper."""
 
     scripts: list[ScriptSummary] = Field(..., description="脚本リスト")
+
+
+class ScenePageLine(BaseModel):
+    """シーン単位の取得で返すセリフ（登場人物は名前のみ）."""
+
+    id: UUID = Field(..., description="セリフID")
+    character_id: UUID | None = Field(None, description="登場人物ID")
+    character_name: str | None = Field(None, description="登場人物名")
+    content: str = Field(..., description="セリフ内容")
+    order: int = Field(..., description="順番")
+
+
+class ScenePageItem(BaseModel):
+    """シーン単位の取得で返すシーン（fields で指定した項目のみ含む）."""
+
+    id: UUID | None = Field(None, description="シーンID")
+    act_number: int | None = Field(None, description="幕番号")
+    scene_number: int | None = Field(None, description="シーン番号")
+    heading: str | None = Field(None, description="見出し")
+    description: str | None = Field(None, description="説明")
+    lines: list[ScenePageLine] | None = Field(None, description="セリフリスト")
+
+
+class ScenePageResponse(BaseModel):
+    """シーン単位の取得レスポンス."""
+
+    scenes: list[ScenePageItem] = Field(..., description="シーンリスト")
+    next_cursor: str | None = Field(..., description="次のページのカーソル（最後の場合は null）")
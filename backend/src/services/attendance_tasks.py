@@ -1,21 +1,47 @@
 """定時実行タスク：出欠確認のリマインダー."""
 
+import asyncio
 import logging
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import or_, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import contains_eager, selectinload
 
+from src.config import settings
 from src.db import async_session_maker
+from src.db.functions import hours_before
 from src.db.models import AttendanceEvent, AttendanceTarget, TheaterProject
-from src.services.discord import get_discord_service
+from src.services.discord import DiscordService, get_discord_service
 
 logger = logging.getLogger(__name__)
 
 
-async def check_deadlines() -> dict[str, int]:
+@dataclass
+class _ReminderJob:
+    """送信するリマインダー."""
+
+    event: AttendanceEvent
+    reminder_type: str
+    channel_id: str
+    content: str
+    stat_key: str
+
+
+async def check_deadlines(
+    session_maker: async_sessionmaker[AsyncSession] | None = None,
+    discord_service: DiscordService | None = None,
+) -> dict[str, int]:
     """期限切れおよびリマインド設定時間に応じた開始前リマインドをチェックし、送信する.
 
+    送信するリマインダーを先に洗い出し、Discordへの送信は並行して行う（同じチャンネルへの
+    同時送信数は制限する）。送信結果をまとめてイベントに反映し、最後に1回だけコミットする。
+
+    Args:
+        session_maker: セッションファクトリ（省略時はアプリケーション共通のもの）
+        discord_service: Discordサービス（省略時は get_discord_service()）
+
     Returns:
         dict[str, int]: 処理結果の統計
     """
@@ -27,23 +53,22 @@ async def check_deadlines() -> dict[str, int]:
         "errors": 0,
     }
 
-    async with async_session_maker() as db:
+    async with (session_maker or async_session_maker)() as db:
         now = datetime.now(UTC)
 
-        # 全ての未完了イベントを取得（プロジェクトのリマインド設定を考慮するため一旦広く取る）
+        # 送信時刻を迎えたリマインダーがある未完了イベントのみ取得する
+        # （プロジェクトごとのリマインド設定時間はSQL側で稽古日時から引いて比較する）
         stmt = (
             select(AttendanceEvent)
+            .join(AttendanceEvent.project)
             .where(
                 AttendanceEvent.completed == False,  # noqa: E712
-                or_(
-                    AttendanceEvent.reminder_1_sent_at.is_(None),
-                    AttendanceEvent.reminder_2_sent_at.is_(None),
-                    AttendanceEvent.reminder_3_sent_at.is_(None),
-                ),
+                AttendanceEvent.schedule_date.is_not(None),
+                _due_reminder_condition(now),
             )
             .options(
+                contains_eager(AttendanceEvent.project),
                 selectinload(AttendanceEvent.targets).selectinload(AttendanceTarget.user),
-                selectinload(AttendanceEvent.project),
             )
         )
 
@@ -51,124 +76,223 @@ async def check_deadlines() -> dict[str, int]:
         events = result.scalars().all()
         stats["checked_events"] = len(events)
 
+        # 1. 送信するリマインダーの洗い出し（送信不要なものは送信済みとしてマーク）
+        jobs = []
         for event in events:
             try:
-                if not event.project:
-                    logger.warning(f"Project not found for event {event.id}")
-                    stats["errors"] += 1
-                    continue
-
-                project = event.project
-                reminded_this_run = False
-
-                # 未回答(pending)のターゲットを抽出
-                pending_targets = [t for t in event.targets if t.status == "pending"]
-                # 不参加(ng)以外のターゲットを抽出
-                not_absent_targets = [t for t in event.targets if t.status != "ng"]
-
-                if not pending_targets:
-                    # 未回答者がいない場合は1回目・2回目は送信済みとしてマーク
-                    if event.reminder_1_sent_at is None:
-                        event.reminder_1_sent_at = now
-                    if event.reminder_2_sent_at is None:
-                        event.reminder_2_sent_at = now
-
-                if not not_absent_targets:
-                    # 不参加以外がいない場合は3回目も送信済みとしてマーク
-                    if event.reminder_3_sent_at is None:
-                        event.reminder_3_sent_at = now
-
-                # 稽古日未定ならスキップ
-                if event.schedule_date is None:
-                    continue
-
-                # 稽古日が過去ならリマインダー不要 → 送信済みマークして次へ
-                if now >= event.schedule_date:
-                    if event.reminder_1_sent_at is None:
-                        event.reminder_1_sent_at = now
-                    if event.reminder_2_sent_at is None:
-                        event.reminder_2_sent_at = now
-                    if event.reminder_3_sent_at is None:
-                        event.reminder_3_sent_at = now
-                    stats["past_events_skipped"] += 1
-                    logger.info(
-                        f"Skipped past event {event.id} "
-                        f"(schedule_date={event.schedule_date})"
-                    )
-                    continue
-
-                # 1. 1回目のリマインダー判定
-                if event.reminder_1_sent_at is None:
-                    trigger_time = event.schedule_date - timedelta(
-                        hours=project.attendance_reminder_1_hours
-                    )
-                    if now >= trigger_time:
-                        sent = await _send_reminder(
-                            event, pending_targets, project, reminder_type="1"
-                        )
-                        event.reminder_1_sent_at = now
-                        if sent:
-                            stats["schedule_reminders_sent"] += 1
-                            reminded_this_run = True
-
-                # 2. 2回目のリマインダー判定
-                if event.reminder_2_sent_at is None and not reminded_this_run:
-                    trigger_time = event.schedule_date - timedelta(
-                        hours=project.attendance_reminder_2_hours
-                    )
-                    if now >= trigger_time and pending_targets:
-                        sent = await _send_reminder(
-                            event, pending_targets, project, reminder_type="2"
-                        )
-                        event.reminder_2_sent_at = now
-                        if sent:
-                            stats["deadline_reminders_sent"] += 1
-                            reminded_this_run = True
-
-                # 3. 3回目のリマインダー判定（不参加以外全員）
-                if event.reminder_3_sent_at is None and not reminded_this_run:
-                    trigger_time = event.schedule_date - timedelta(
-                        hours=project.attendance_reminder_3_hours
-                    )
-                    if now >= trigger_time and not_absent_targets:
-                        sent = await _send_reminder(
-                            event, not_absent_targets, project, reminder_type="3"
-                        )
-                        event.reminder_3_sent_at = now
-                        if sent:
-                            stats["schedule_reminders_sent"] += 1
-                            reminded_this_run = True
-
+                job = _plan_reminder(event, now, stats)
+                if job:
+                    jobs.append(job)
             except Exception as e:
                 logger.error(f"Error processing event {event.id}: {e}", exc_info=True)
                 stats["errors"] += 1
 
+        # 2. 並行送信
+        results = await _dispatch_reminders(
+            jobs,
+            discord_service or get_discord_service(),
+            concurrency=settings.reminder_dispatch_concurrency,
+            per_channel=settings.reminder_dispatch_per_channel,
+        )
+
+        # 3. 送信結果の反映（失敗したものは次回再送する）
+        for job, error in zip(jobs, results, strict=True):
+            if error is not None:
+                logger.error(
+                    f"Error sending reminder for event {job.event.id}: {error}",
+                    exc_info=error,
+                )
+                stats["errors"] += 1
+                continue
+            setattr(job.event, f"reminder_{job.reminder_type}_sent_at", now)
+            stats[job.stat_key] += 1
+
         await db.commit()
 
     return stats
 
 
-async def _send_reminder(
+def _due_reminder_condition(now: datetime):
+    """未送信のリマインダーのうち、送信時刻（稽古日時 - 設定時間）を過ぎたものがある条件.
+
+    稽古日時を過ぎたイベントも（設定時間は0以上のため）対象になり、残りのリマインダーは
+    送信済みとしてマークされる。
+    """
+    return or_(
+        *(
+            and_(sent_at.is_(None), hours_before(AttendanceEvent.schedule_date, hours) <= now)
+            for sent_at, hours in (
+                (AttendanceEvent.reminder_1_sent_at, TheaterProject.attendance_reminder_1_hours),
+                (AttendanceEvent.reminder_2_sent_at, TheaterProject.attendance_reminder_2_hours),
+                (AttendanceEvent.reminder_3_sent_at, TheaterProject.attendance_reminder_3_hours),
+            )
+        )
+    )
+
+
+def _plan_reminder(
+    event: AttendanceEvent, now: datetime, stats: dict[str, int]
+) -> _ReminderJob | None:
+    """イベントに送信するリマインダーを決める（1回の実行で送るのは1通まで）.
+
+    送信対象がいない・Discordチャンネル未設定などで送れないリマインダーは、
+    送信済みとしてマークして次のリマインダーを判定する。
+
+    Returns:
+        _ReminderJob | None: 送信するリマインダー（なければ None）
+    """
+    if not event.project:
+        logger.warning(f"Project not found for event {event.id}")
+        stats["errors"] += 1
+        return None
+
+    project = event.project
+
+    # 未回答(pending)のターゲットを抽出
+    pending_targets = [t for t in event.targets if t.status == "pending"]
+    # 不参加(ng)以外のターゲットを抽出
+    not_absent_targets = [t for t in event.targets if t.status != "ng"]
+
+    if not pending_targets:
+        # 未回答者がいない場合は1回目・2回目は送信済みとしてマーク
+        if event.reminder_1_sent_at is None:
+            event.reminder_1_sent_at = now
+        if event.reminder_2_sent_at is None:
+            event.reminder_2_sent_at = now
+
+    if not not_absent_targets:
+        # 不参加以外がいない場合は3回目も送信済みとしてマーク
+        if event.reminder_3_sent_at is None:
+            event.reminder_3_sent_at = now
+
+    # 稽古日未定ならスキップ
+    if event.schedule_date is None:
+        return None
+    # タイムゾーンを保持しないDB（SQLite）ではUTCとして扱う
+    schedule_date = event.schedule_date
+    if schedule_date.tzinfo is None:
+        schedule_date = schedule_date.replace(tzinfo=UTC)
+
+    # 稽古日が過去ならリマインダー不要 → 送信済みマークして次へ
+    if now >= schedule_date:
+        if event.reminder_1_sent_at is None:
+            event.reminder_1_sent_at = now
+        if event.reminder_2_sent_at is None:
+            event.reminder_2_sent_at = now
+        if event.reminder_3_sent_at is None:
+            event.reminder_3_sent_at = now
+        stats["past_events_skipped"] += 1
+        logger.info(f"Skipped past event {event.id} (schedule_date={event.schedule_date})")
+        return None
+
+    # (回数, 送信済み日時, 設定時間, 対象者, 統計キー)
+    reminders = [
+        (
+            "1",
+            event.reminder_1_sent_at,
+            project.attendance_reminder_1_hours,
+            pending_targets,
+            "schedule_reminders_sent",
+        ),
+        (
+            "2",
+            event.reminder_2_sent_at,
+            project.attendance_reminder_2_hours,
+            pending_targets,
+            "deadline_reminders_sent",
+        ),
+        # 3回目は不参加以外全員
+        (
+            "3",
+            event.reminder_3_sent_at,
+            project.attendance_reminder_3_hours,
+            not_absent_targets,
+            "schedule_reminders_sent",
+        ),
+    ]
+    for reminder_type, sent_at, hours, targets, stat_key in reminders:
+        if sent_at is not None:
+            continue
+        # 2回目以降は対象者がいる場合のみ
+        if now < schedule_date - timedelta(hours=hours) or (reminder_type != "1" and not targets):
+            continue
+
+        content = _build_reminder_content(event, targets, project, reminder_type)
+        if content is None:
+            # 送信できない場合も送信済みとして扱い、次のリマインダーを判定する
+            setattr(event, f"reminder_{reminder_type}_sent_at", now)
+            continue
+        return _ReminderJob(
+            event=event,
+            reminder_type=reminder_type,
+            channel_id=project.discord_channel_id,
+            content=content,
+            stat_key=stat_key,
+        )
+    return None
+
+
+async def _dispatch_reminders(
+    jobs: list[_ReminderJob],
+    discord_service: DiscordService,
+    concurrency: int,
+    per_channel: int,
+) -> list[BaseException | None]:
+    """リマインダーを並行して送信する.
+
+    Args:
+        jobs: 送信するリマインダー
+        discord_service: Discordサービス
+        concurrency: 全体の同時送信数
+        per_channel: 同じチャンネルへの同時送信数
+
+    Returns:
+        list[BaseException | None]: リマインダーごとの結果（成功は None、失敗は例外）
+            send_channel_message は失敗を例外ではなく None で返すため、None も失敗として扱う
+    """
+    limit = asyncio.Semaphore(max(concurrency, 1))
+    channel_limits: dict[str, asyncio.Semaphore] = {}
+
+    async def send(job: _ReminderJob) -> None:
+        channel_limit = channel_limits.setdefault(
+            job.channel_id, asyncio.Semaphore(max(per_channel, 1))
+        )
+        # チャンネルの枠を待つ間は全体の枠を占有しない
+        async with channel_limit, limit:
+            message = await discord_service.send_channel_message(
+                channel_id=job.channel_id, content=job.content
+            )
+        if message is None:
+            raise RuntimeError(f"Failed to send Discord channel message to {job.channel_id}")
+        logger.info(
+            f"Sent {job.reminder_type} reminder to {job.channel_id} for event {job.event.id}"
+        )
+
+    results = await asyncio.gather(*(send(job) for job in jobs), return_exceptions=True)
+    return [result if isinstance(result, BaseException) else None for result in results]
+
+
+def _build_reminder_content(
     event: AttendanceEvent,
     targets: list[AttendanceTarget],
     project: TheaterProject,
     reminder_type: str = "1",
-) -> bool:
-    """Discordリマインダー送信.
+) -> str | None:
+    """Discordリマインダーのメッセージを作成.
 
     Args:
         reminder_type: "1" (1回目), "2" (2回目), or "3" (3回目)
 
     Returns:
-        bool: 送信成功の場合True
+        str | None: メッセージ（チャンネル未設定・メンション対象なしの場合は None）
     """
     if not project.discord_channel_id:
-        return False
+        return None
 
     mentions = [f"<@{t.user.discord_id}>" for t in targets if t.user and t.user.discord_id]
 
     if not mentions:
-        return False
+        return None
 
     deadline_ts = int(event.deadline.replace(tzinfo=UTC).timestamp())
     deadline_str = f"<t:{deadline_ts}:f>"
@@ -204,11 +328,4 @@ async def _send_reminder(
         f"{footer}"
     )
 
-    discord_service = get_discord_service()
-    await discord_service.send_channel_message(
-        channel_id=project.discord_channel_id, content=message_content
-    )
-    logger.info(
-        f"Sent {reminder_type} reminder to {project.discord_channel_id} for event {event.id}"
-    )
-    return True
+    return message_content
@@ -1,77 +1,126 @@
 """Discord通知サービス."""
 
+import asyncio
+import importlib.util
 from typing import Any
 
 import httpx
 from structlog import get_logger
 
 from src.config import settings
+from src.services.discord_rate_limit import DiscordRateLimiter, route_key
 
 logger = get_logger(__name__)
 
+# h2 がインストールされていれば HTTP/2 で1本の接続に多重化する
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+_CLIENT_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0
+)
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+# プロセス内で共有するレート制限バケット
+rate_limiter = DiscordRateLimiter()
+
+
+def get_discord_http_client() -> httpx.AsyncClient:
+    """Discord API用の共有クライアントを取得（イベントループごとに1つ）.
+
+    リクエストごとにクライアントを作るとTCP/TLSのハンドシェイクが毎回発生するため、
+    接続プールを保持したクライアントを使い回す。
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        # ファイルアップロードが含まれる場合があるため、タイムアウトを長めに設定（60秒）
+        _client = httpx.AsyncClient(timeout=60.0, http2=_HTTP2_AVAILABLE, limits=_CLIENT_LIMITS)
+        _client_loop = loop
+    return _client
+
+
+async def close_discord_http_client() -> None:
+    """共有クライアントを閉じる（アプリケーション終了時）."""
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = _client_loop = None
+
 
 class DiscordService:
     """Discord通知を送信するサービス."""
 
-    def __init__(self) -> None:
-        """初期化."""
+    def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
+        """初期化.
+
+        Args:
+            http_client: 使用するHTTPクライアント（省略時はプロセス共有のクライアント）
+        """
+        self.http_client = http_client
         self.default_webhook_url = settings.discord_webhook_url
         self.bot_token = settings.discord_bot_token
         self.api_base = "https://discord.com/api/v10"
 
     async def _request_with_retry(self, method: str, url: str, **kwargs) -> httpx.Response:
-        """指数バックオフ付きでリクエストを実行し、429エラー時はRetry-Afterに従って待機する."""
+        """レート制限に従ってリクエストを実行する.
+
+        送信前にルートのバケットの残り回数を確認し、使い切っている場合はリセットまで待機する。
+        429エラー時はバケットを更新して同様に待機し、通信エラー時は指数バックオフで再試行する。
+        """
         max_retries = 3
         retry_count = 0
+        key = route_key(method, url)
+        client = self.http_client or get_discord_http_client()
 
-        # ファイルアップロードが含まれる場合があるため、タイムアウトを長めに設定（60秒）
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            while True:
-                try:
-                    response = await client.request(method, url, **kwargs)
-
-                    if response.status_code == 429:
-                        retry_count += 1
-                        if retry_count > max_retries:
-                            logger.error(
-                                "Max retries exceeded for Discord API", url=url, status_code=429
-                            )
-                            return response
-
-                        # レート制限の詳細をロギング
-                        retry_after = response.headers.get("Retry-After")
-                        logger.warning(
-                            "Discord API Rate Limited (429)",
-                            url=url,
-                            retry_after=retry_after,
-                            retry_count=retry_count,
-                            response_body=response.text,
-                            headers=dict(response.headers),
-                        )
-
-                        # 待機時間の決定
-                        import asyncio
+        while True:
+            try:
+                await rate_limiter.acquire(key)
+                response = await client.request(method, url, **kwargs)
+                rate_limiter.update(key, response)
 
-                        wait_seconds = float(retry_after) if retry_after else (2**retry_count)
-                        logger.info(f"Waiting for {wait_seconds}s before retry...", url=url)
-                        await asyncio.sleep(wait_seconds)
-                        continue
-
-                    return response
-
-                except httpx.HTTPError as e:
+                if response.status_code == 429:
                     retry_count += 1
                     if retry_count > max_retries:
-                        raise e
-                    wait_seconds = 2**retry_count
+                        logger.error(
+                            "Max retries exceeded for Discord API", url=url, status_code=429
+                        )
+                        return response
+
+                    # レート制限の詳細をロギング
+                    retry_after = response.headers.get("Retry-After")
                     logger.warning(
-                        f"HTTP Error occurred, retrying in {wait_seconds}s...",
-                        error=str(e),
+                        "Discord API Rate Limited (429)",
                         url=url,
+                        retry_after=retry_after,
+                        retry_count=retry_count,
+                        response_body=response.text,
+                        headers=dict(response.headers),
                     )
-                    import asyncio
 
-                    await asyncio.sleep(wait_seconds)
+                    # 待機はバケットに記録したリセット時刻に従う（次の acquire で待つ）
+                    wait_seconds = rate_limiter.delay(key)
+                    logger.info(
+                        f"Waiting for {wait_seconds or 2**retry_count}s before retry...", url=url
+                    )
+                    if wait_seconds <= 0:
+                        # レート制限ヘッダーがない場合は指数バックオフ
+                        await asyncio.sleep(2**retry_count)
+                    continue
+
+                return response
+
+            except httpx.HTTPError as e:
+                retry_count += 1
+                if retry_count > max_retries:
+                    raise e
+                wait_seconds = 2**retry_count
+                logger.warning(
+                    f"HTTP Error occurred, retrying in {wait_seconds}s...",
+                    error=str(e),
+                    url=url,
+                )
+                await asyncio.sleep(wait_seconds)
 
     async def send_notification(
         self,
@@ -121,6 +170,28 @@ class DiscordService:
         except Exception as e:
             logger.error("Failed to send Discord notification", error=str(e), url=target_url)
 
+    async def post_webhook(
+        self, content: str, webhook_url: str, embeds: list[dict] | None = None
+    ) -> None:
+        """Webhookに1回だけ送信する.
+
+        send_notification と異なり再試行・待機はせず、失敗時は例外を送出する
+        （通知アウトボックスのワーカーが再試行を管理する）。
+
+        Raises:
+            httpx.HTTPError: 送信に失敗した場合（429を含む）
+        """
+        payload: dict[str, Any] = {"content": content}
+        if embeds:
+            payload["embeds"] = embeds
+
+        key = route_key("POST", webhook_url)
+        client = self.http_client or get_discord_http_client()
+        await rate_limiter.acquire(key)
+        response = await client.request("POST", webhook_url, json=payload)
+        rate_limiter.update(key, response)
+        response.raise_for_status()
+
     async def send_channel_message(
         self,
         channel_id: str,
@@ -0,0 +1,142 @@
+"""Discord APIのレート制限管理.
+
+Discordはレスポンスヘッダー（X-RateLimit-*）でルートごとのバケットの残り回数と
+リセットまでの秒数を返す。これを記録しておき、残り回数を使い切ったバケットへの
+リクエストはリセットまで送信前に待機する（429を受けてから待つのではなく先回りする）。
+
+ルートはメソッドとパスで識別し、主要パラメータ（channel・guild・webhook のID）以外の
+IDはまとめる。同じバケットを共有するルートは X-RateLimit-Bucket で対応付ける。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+
+import httpx
+
+# バケットを分ける主要パラメータ（この直後のIDはルートに含める）
+_MAJOR_PARAMETERS = ("channels", "guilds", "webhooks")
+
+
+def route_key(method: str, url: str | httpx.URL) -> str:
+    """レート制限のルートキーを作る.
+
+    Args:
+        method: HTTPメソッド
+        url: リクエストURL
+
+    Returns:
+        str: 例 "POST /api/v10/channels/123/messages/:id"
+    """
+    segments = httpx.URL(url).path.split("/")
+    parts = []
+    for index, segment in enumerate(segments):
+        previous = segments[index - 1] if index > 0 else ""
+        before_previous = segments[index - 2] if index > 1 else ""
+        # webhook はIDとトークンの組で1つのバケット
+        if previous in _MAJOR_PARAMETERS or before_previous == "webhooks":
+            parts.append(segment)
+        elif segment.isdigit():
+            parts.append(":id")
+        else:
+            parts.append(segment)
+    return f"{method.upper()} {'/'.join(parts)}"
+
+
+@dataclass
+class _Bucket:
+    """1つのバケットの状態."""
+
+    remaining: int
+    reset_at: float  # time.monotonic() 基準
+
+
+class DiscordRateLimiter:
+    """ルートごとのレート制限バケットを管理する."""
+
+    def __init__(self) -> None:
+        # ルートキー → バケットID（X-RateLimit-Bucket、未受信の場合はルートキー）
+        self._routes: dict[str, str] = {}
+        self._buckets: dict[str, _Bucket] = {}
+        self._global_reset_at = 0.0
+
+    def _bucket(self, key: str) -> _Bucket | None:
+        return self._buckets.get(self._routes.get(key, key))
+
+    def delay(self, key: str) -> float:
+        """ルートにリクエストを送信できるまでの秒数（0なら即時）."""
+        now = time.monotonic()
+        wait = self._global_reset_at - now
+        bucket = self._bucket(key)
+        if bucket is not None and bucket.remaining <= 0:
+            wait = max(wait, bucket.reset_at - now)
+        return max(wait, 0.0)
+
+    async def acquire(self, key: str) -> None:
+        """ルートの残り回数を1つ確保する（使い切っている場合はリセットまで待機）.
+
+        Args:
+            key: ルートキー
+        """
+        while (wait := self.delay(key)) > 0:
+            await asyncio.sleep(wait)
+        bucket = self._bucket(key)
+        if bucket is None:
+            return
+        if time.monotonic() >= bucket.reset_at:
+            # リセット済み（次のレスポンスで正しい値に更新される）
+            del self._buckets[self._routes.get(key, key)]
+        else:
+            # 同時に送信するリクエストで残り回数を超えないよう先に減らす
+            bucket.remaining -= 1
+
+    def update(self, key: str, response: httpx.Response) -> None:
+        """レスポンスのレート制限ヘッダーを記録する.
+
+        Args:
+            key: ルートキー
+            response: Discord APIのレスポンス
+        """
+        headers = response.headers
+        now = time.monotonic()
+
+        if response.status_code == 429:
+            retry_after = _parse_float(headers.get("Retry-After"))
+            if retry_after is not None and (
+                headers.get("X-RateLimit-Global", "").lower() == "true"
+                or headers.get("X-RateLimit-Scope") == "global"
+            ):
+                self._global_reset_at = max(self._global_reset_at, now + retry_after)
+                return
+
+        remaining = _parse_float(headers.get("X-RateLimit-Remaining"))
+        reset_after = _parse_float(headers.get("X-RateLimit-Reset-After"))
+        if response.status_code == 429:
+            # 429の場合はバケットを使い切ったものとして、長い方の待ち時間に合わせる
+            retry_after = _parse_float(headers.get("Retry-After"))
+            waits = [w for w in (reset_after, retry_after) if w is not None]
+            remaining, reset_after = 0, max(waits) if waits else None
+        if remaining is None or reset_after is None:
+            return
+
+        bucket_id = headers.get("X-RateLimit-Bucket") or key
+        self._routes[key] = bucket_id
+        reset_at = now + reset_after
+        remaining_count = int(remaining)
+        bucket = self._buckets.get(bucket_id)
+        if bucket is None or reset_at > bucket.reset_at + 1.0:
+            # 新しいウィンドウ
+            self._buckets[bucket_id] = _Bucket(remaining_count, reset_at)
+        else:
+            # 同じウィンドウのレスポンスが前後して届いても少ない方を信用する
+            bucket.remaining = min(bucket.remaining, remaining_count)
+            bucket.reset_at = max(bucket.reset_at, reset_at)
+
+
+def _parse_float(value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
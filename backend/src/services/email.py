@@ -1,11 +1,29 @@
+import asyncio
 import logging
 import os
+from dataclasses import dataclass
 
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from sendgrid.helpers.mail import Mail, Personalization, Substitution, To
 
 logger = logging.getLogger(__name__)
 
+# SendGrid の1リクエストあたりの personalizations 上限
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+# 一括送信で宛先ごとに差し替える値（SendGrid の substitutions）
+_NAME_TAG = "-name-"
+_COUNT_TAG = "-count-"
+
+
+@dataclass(frozen=True)
+class EventReminderRecipient:
+    """公演当日リマインダーの宛先."""
+
+    to_email: str
+    name: str
+    count: int
+
 
 class EmailService:
     def __init__(self):
@@ -134,21 +152,16 @@ class EmailService:
             logger.error(f"Failed to send email to {to_email}: {e}")
             return False
 
-    def send_event_reminder(
-        self,
-        to_email: str,
+    @staticmethod
+    def _render_event_reminder(
         name: str,
         milestone_title: str,
         date_str: str,
-        count: int,
+        count: int | str,
         project_name: str,
-        location: str | None = None,
-    ) -> bool:
-        """公演当日のリマインダーメールを送信する."""
-        if not self.client:
-            logger.warning("SendGrid API Client is not initialized. Skip sending email.")
-            return False
-
+        location: str | None,
+    ) -> tuple[str, str, str]:
+        """公演当日リマインダーの件名・テキスト・HTMLを作る."""
         subject = f"【本日開催】{project_name} - {milestone_title} のご案内"
 
         location_info = f"■ 会場: {location}\n" if location else ""
@@ -217,6 +230,27 @@ class EmailService:
 </html>
 """
 
+        return subject, text_content, html_content
+
+    def send_event_reminder(
+        self,
+        to_email: str,
+        name: str,
+        milestone_title: str,
+        date_str: str,
+        count: int,
+        project_name: str,
+        location: str | None = None,
+    ) -> bool:
+        """公演当日のリマインダーメールを送信する."""
+        if not self.client:
+            logger.warning("SendGrid API Client is not initialized. Skip sending email.")
+            return False
+
+        subject, text_content, html_content = self._render_event_reminder(
+            name, milestone_title, date_str, count, project_name, location
+        )
+
         message = Mail(
             from_email=(self.from_email, self.from_name),
             to_emails=to_email,
@@ -236,5 +270,70 @@ class EmailService:
             logger.error(f"Failed to send event reminder email to {to_email}: {e}")
             return False
 
+    async def send_event_reminders(
+        self,
+        recipients: list[EventReminderRecipient],
+        milestone_title: str,
+        date_str: str,
+        project_name: str,
+        location: str | None = None,
+    ) -> list[bool]:
+        """同じ公演の予約者へ当日リマインダーをまとめて送信する.
+
+        本文は1回だけ組み立て、宛先ごとの名前と枚数は SendGrid の personalizations
+        （substitutions）で差し替える。宛先は SENDGRID_MAX_PERSONALIZATIONS 件ずつ
+        1リクエストにまとめ、送信はスレッドで行うためイベントループを止めない。
+
+        Args:
+            recipients: 宛先
+            milestone_title: 公演名
+            date_str: 日時（表示用）
+            project_name: 劇団名
+            location: 会場
+
+        Returns:
+            list[bool]: recipients と同じ順の送信結果
+        """
+        if not self.client:
+            logger.warning("SendGrid API Client is not initialized. Skip sending email.")
+            return [False] * len(recipients)
+
+        subject, text_content, html_content = self._render_event_reminder(
+            _NAME_TAG, milestone_title, date_str, _COUNT_TAG, project_name, location
+        )
+
+        results: list[bool] = []
+        for start in range(0, len(recipients), SENDGRID_MAX_PERSONALIZATIONS):
+            batch = recipients[start : start + SENDGRID_MAX_PERSONALIZATIONS]
+            message = Mail(
+                from_email=(self.from_email, self.from_name),
+                subject=subject,
+                plain_text_content=text_content,
+                html_content=html_content,
+            )
+            message.reply_to = self.reply_to_email
+            for recipient in batch:
+                personalization = Personalization()
+                personalization.add_to(To(recipient.to_email))
+                personalization.add_substitution(Substitution(_NAME_TAG, recipient.name))
+                personalization.add_substitution(Substitution(_COUNT_TAG, str(recipient.count)))
+                message.add_personalization(personalization)
+
+            try:
+                response = await asyncio.to_thread(self.client.send, message)
+                sent = str(response.status_code).startswith("2")
+                logger.info(
+                    f"Event reminder emails sent to {len(batch)} recipients. "
+                    f"Status Code: {response.status_code}"
+                )
+            except Exception as e:
+                logger.error(
+                    f"Failed to send event reminder emails to {len(batch)} recipients: {e}"
+                )
+                sent = False
+            results.extend([sent] * len(batch))
+
+        return results
+
 
 email_service = EmailService()
@@ -1,27 +1,35 @@
-import logging
-import re
 import uuid
+from typing import Any
 
-from fountain.fountain import Fountain
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import settings
+from src.db.base import Base
+from src.db.bulk import bulk_insert_rows
 from src.db.models import Character, Line, Scene, Script
-from src.utils.fountain_utils import preprocess_fountain
-
-logger = logging.getLogger("uvicorn")
-
-
-async def parse_fountain_and_create_models(
-    script: Script, fountain_content: str, db: AsyncSession
-) -> None:
-    # Pre-process
-    fountain_content_raw = preprocess_fountain(fountain_content)
-    f = Fountain(fountain_content_raw)
-    logger.info(f"Parsed {len(f.elements)} elements from Fountain content.")
-
-    # メタデータの抽出と保存
-    metadata = f.metadata
-
+from src.services.parsed_script import ParsedCharacter, ParsedScript, parse_script
+
+# 一括INSERT時の列の並び（行タプルの順序に対応）
+CHARACTER_COLUMNS = ("id", "script_id", "name", "description", "order", "is_custom")
+SCENE_COLUMNS = (
+    "id",
+    "script_id",
+    "scene_number",
+    "act_number",
+    "heading",
+    "description",
+    "is_custom",
+)
+LINE_COLUMNS = ("id", "scene_id", "character_id", "content", "order")
+
+
+def apply_script_metadata(script: Script, metadata: dict[str, list[str]]) -> None:
+    """Fountainのタイトルページ情報を脚本に反映する.
+
+    Args:
+        script: 脚本モデル
+        metadata: 解析結果のメタデータ
+    """
     if "date" in metadata:
         script.draft_date = "\n".join(metadata["date"])
     elif "draft date" in metadata:
@@ -50,502 +58,101 @@ async def parse_fountain_and_create_models(
         # 今回はファイル内の情報を優先して反映させる
         script.author = "\n".join(metadata["author"])
 
-    # 登場人物を抽出してマップを作成
-
-    character_map: dict[str, Character] = {}
-    current_order_index = 1
-
-    # 1. カスタムセクション「# 登場人物」または「# Character」を探して明示的な順序と詳細情報を抽出
-    in_character_section = False
-
-    for element in f.elements:
-        content = element.original_content.strip()
-
-        # セクション見出しの検出
-        if element.element_type == "Section Heading":
-            if "登場人物" in content or "Character" in content:
-                in_character_section = True
-                logger.info("Found Character Definition Section")
-            else:
-                in_character_section = False
-        elif element.element_type == "Scene Heading":
-            in_character_section = False
-
-        # セクション内の要素を解析
-        elif in_character_section and element.element_type in ["Action", "Character", "Dialogue"]:
-            lines = (element.element_text or content).splitlines()
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                # ! で始まる場合は除去する (前処理で追加された場合)
-                if line.startswith("!"):
-                    line = line[1:].strip()
-
-                # "Name: Description" 形式を探す (コロン区切り)。なければ名前のみ
-                if ":" in line:
-                    parts = line.split(":", 1)
-                    name_part = parts[0].strip()
-                    desc_part = parts[1].strip()
-                else:
-                    name_part = line.strip()
-                    desc_part = ""
-
-                if name_part.startswith("@"):
-                    name_part = name_part[1:].strip()
-
-                # 既存キャラクターがなければ新規作成
-                if name_part and name_part not in character_map:
-                    character = Character(
-                        id=uuid.uuid4(),
-                        script_id=script.id,
-                        name=name_part,
-                        description=desc_part,
-                        order=current_order_index,
-                    )
-                    db.add(character)
-                    character_map[name_part] = character
-                    current_order_index += 1
-                    logger.info(
-                        f"Added character from section: [{name_part}] (order: {current_order_index - 1})"
-                    )
-
-        else:
-            pass
-
-    # 2. 本文からその他のキャラクターを登場順に抽出
-    in_character_section = False
-
-    for element in f.elements:
-        content = element.original_content.strip()
-
-        if element.element_type == "Section Heading":
-            if "登場人物" in content or "Character" in content:
-                in_character_section = True
-            else:
-                in_character_section = False
-        elif element.element_type == "Scene Heading":
-            in_character_section = False
-
-        if in_character_section:
-            continue
-
-        if element.element_type == "Character":
-            char_name = content
-            if char_name.startswith("@"):
-                char_name = char_name[1:]
-
-            if char_name and char_name not in character_map:
-                character = Character(
-                    id=uuid.uuid4(), script_id=script.id, name=char_name, order=current_order_index
-                )
-                db.add(character)
-                character_map[char_name] = character
-                current_order_index += 1
-
-    # シーンとセリフを抽出
-    current_scene: Scene | None = None
-    scene_number = 0
-    current_act_number: int | None = None
-    line_order = 0
-    current_character: Character | None = None
-    collecting_description = False
-    last_scene_was_section = False  # 節（Section Heading）でシーンが作成されたかのフラグ
-    in_ignored_section = False
-    synopsis_scene_already_exists = False
-
-    for element in f.elements:
-        content_stripped = element.original_content.strip()
-        # Act検出
-        # 1. Section Heading level 1 (starts with #, not ##)
-        # 2. Forced Scene Heading level 1 (starts with .1)
-
-        # NOTE: 本来Fountainでは # はSection Heading (Act相当) だが、
-        # ユーザーが "# シーン1" のように書くケース救済のため、キーワードが含まれる場合はシーンとして扱う
-        SCENE_KEYWORDS = [
-            "Scene",
-            "scene",
-            "シーン",
-            "씬",
-            "场",
-            "場",
-            "あらすじ",
-            "Synopsis",
-            "synopsis",
-            "SYNOPSIS",
-            "줄거리",
-            "梗概",
-        ]
-        has_scene_keyword = any(k in content_stripped for k in SCENE_KEYWORDS)
-
-        if "登場人物" in content_stripped or "Character" in content_stripped:
-            has_scene_keyword = False
-
-        is_section_act = (
-            element.element_type == "Section Heading"
-            and content_stripped.startswith("#")
-            and not content_stripped.startswith("##")
-            and not has_scene_keyword
-        )  # キーワードがあればActではない
-
-        is_dot_act = element.element_type == "Scene Heading" and content_stripped.startswith(".1")
-
-        # .1の場合でも、シーンキーワードが含まれていれば幕としては扱わない（シーンとして扱い、Actカウンタを上げないため）
-        # ただし、.1 はもともと Scene Heading なので、ここでの除外は Act としての扱いを除外する意味になる。
-        if is_dot_act and has_scene_keyword:
-            is_dot_act = False
-
-        if is_section_act or is_dot_act:
-            # Level 1 Heading detected (Act)
-            heading_content = content_stripped
-
-            # 幕が変わったら収集を停止（前のシーンのあらすじに継続させない）
-            collecting_description = False
-            current_scene = None  # Ensure text before first scene of new act doesn't append to previous act's scene
-            current_character = None
-            last_scene_was_section = False
-
-            # "登場人物" や "Character" は幕としてカウントしない
-            if "登場人物" in heading_content or "Character" in heading_content:
-                pass
-            else:
-                # 幕番号作成
-                if current_act_number is None:
-                    current_act_number = 1
-                else:
-                    current_act_number += 1
-                scene_number = 0  # 幕が変わったらシーン番号をリセット
-                logger.info(f"Found Act #{current_act_number}: {heading_content}")
-
-            # .1 の場合はSceneとして処理しないようにcontinueする
-            # ただし、Section Headingの場合はcontinueしなくても下のis_scene_heading等で弾かれる(Section Headingだから)
-            # is_dot_actの場合はScene Headingなので、ここでcontinueしないと下でSceneとして作られてしまう
-            if is_dot_act:
-                continue
-
-        # Scene検出
-        # 1. Standard Scene Heading (INT./EXT. etc or Forced . but NOT .1)
-        # 2. Section Heading level 2 (starts with ##)
-        # 3. Forced Scene Heading level 2 (starts with .2)
-        # 4. Level 1 with scene keyword (# Scene...) [NEW]
-
-        is_scene_heading_type = element.element_type == "Scene Heading"
 
-        # .1 は上でActとして処理済み。それ以外のScene Headingはシーン
-        # つまり、通常のINT.や、.2 (Level 2), . (Forced) はシーン
-        # ただし、.1 でもキーワードがあればシーンとして扱う (is_dot_actがFalseになっているはず)
-        is_valid_scene_heading = is_scene_heading_type and (
-            not content_stripped.startswith(".1") or has_scene_keyword
+async def parse_fountain_and_create_models(
+    script: Script,
+    fountain_content: str,
+    db: AsyncSession,
+    parsed: ParsedScript | None = None,
+    bulk: bool | None = None,
+) -> dict[uuid.UUID, dict[uuid.UUID, int]]:
+    """Fountainテキストの解析結果から登場人物・シーン・セリフを作成する.
+
+    Args:
+        script: 脚本モデル
+        fountain_content: Fountainテキスト
+        db: データベースセッション
+        parsed: 解析済みの中間表現（省略時は fountain_content を解析する）
+        bulk: 一括INSERTで書き込むか（省略時は設定値 script_bulk_insert に従う）。
+            一括INSERTした行はセッションに載らないため、利用側で再読込すること
+
+    Returns:
+        dict[UUID, dict[UUID, int]]: シーンID → {登場人物ID: セリフ数}（あらすじを除く、香盤表生成用）
+    """
+    if parsed is None:
+        parsed = parse_script(fountain_content)
+
+    apply_script_metadata(script, parsed.metadata)
+
+    if bulk is None:
+        bulk = settings.script_bulk_insert
+
+    # 登場人物
+    character_ids: dict[ParsedCharacter, uuid.UUID] = {}
+    character_rows: list[tuple[Any, ...]] = []
+    for parsed_character in parsed.characters:
+        character_id = uuid.uuid4()
+        character_ids[parsed_character] = character_id
+        character_rows.append(
+            (
+                character_id,
+                script.id,
+                parsed_character.name,
+                parsed_character.description,
+                parsed_character.order,
+                False,
+            )
         )
 
-        is_section_scene = element.element_type == "Section Heading" and (
-            content_stripped.startswith("##")
-            or (content_stripped.startswith("#") and has_scene_keyword)
+    # シーンとセリフ
+    scene_rows: list[tuple[Any, ...]] = []
+    line_rows: list[tuple[Any, ...]] = []
+    scene_line_counts: dict[uuid.UUID, dict[uuid.UUID, int]] = {}
+    for parsed_scene in parsed.scenes:
+        scene_id = uuid.uuid4()
+        scene_rows.append(
+            (
+                scene_id,
+                script.id,
+                parsed_scene.scene_number,
+                parsed_scene.act_number,
+                parsed_scene.heading,
+                parsed_scene.description,
+                False,
+            )
         )
 
-        if "登場人物" in content_stripped or "Character" in content_stripped:
-            is_valid_scene_heading = False
-            is_section_scene = False
-            collecting_description = False
-            in_ignored_section = True
-            current_scene = None
-            continue
-
-        # 見出し（Section Heading）だが、ActでもSceneでもない場合は収集を停止
-        if element.element_type == "Section Heading" and not (is_section_act or is_section_scene):
-            collecting_description = False
-            current_scene = None
-            # ActかSceneでない Section Heading が来たら、ignored_section を継続するか検討
-            # 通常はここでも in_ignored_section = False で良い（登場人物以外のセクション）
-            in_ignored_section = False
-
-        if is_valid_scene_heading or is_section_scene:
-            # 新しいシーン
-            in_ignored_section = False
-
-            # Check for Synopsis
-            SYNOPSIS_KEYWORDS = ["あらすじ", "Synopsis", "synopsis", "SYNOPSIS", "줄거리", "梗概"]
-            is_synopsis = any(k in content_stripped for k in SYNOPSIS_KEYWORDS)
-
-            # 既存のSection Sceneのすぐ後にScene Headingが来た場合の結合処理
-            if (
-                is_valid_scene_heading
-                and last_scene_was_section
-                and current_scene
-                and current_scene.scene_number != 0
-                and not is_synopsis
-            ):
-                heading_text = content_stripped
-                if heading_text.startswith("."):
-                    if heading_text.startswith(".2"):
-                        heading_text = heading_text[2:].strip()
-                    else:
-                        heading_text = heading_text.lstrip(".").strip()
-
-                # 前のSection名と新しいScene Headingを結合
-                current_scene.heading = f"{current_scene.heading} ({heading_text})"
-                logger.info(f"Merged Scene Heading into previous Section: {current_scene.heading}")
-
-                # シーン番号は増やさない
-                last_scene_was_section = False  # 結合したのでリセット
-                line_order = 0
-                collecting_description = True
-                current_character = None
-                continue
-
-            if is_synopsis:
-                if synopsis_scene_already_exists and current_scene and current_scene.scene_number == 0:
-                    logger.info(f"Continuing existing Synopsis (Scene #0) for: {content_stripped}")
-                    collecting_description = True
-                    current_character = None
-                    last_scene_was_section = is_section_scene
-                    continue
-                
-                # すでに別の（以前の）Synopsisがある場合は、それに追加したいが、
-                # ここでは新しく作らずに既存のものを探すか、後続で処理。
-                # 基本的に一つにまとめる。
-                if synopsis_scene_already_exists:
-                    # 既に作られているならそれを使う
-                     current_scene_number = 0
-                     # Re-use existing synopsis_scene object if we had it, but here we just continue
-                     # we need the object. But let's just create a new one for now if not current,
-                     # or better, just always use scene_number 0.
-                     pass 
-                
-                current_scene_number = 0
-                synopsis_scene_already_exists = True
-                # current_act_number = None  <-- DO NOT set to None here if we want to preserve it for next scenes
-                # Actually, Synopsis shouldn't belong to an Act, but it shouldn't CLEAR the counter either.
-                logger.info(f"Found Synopsis (Scene #0): {content_stripped}")
-            else:
-                scene_number += 1
-                current_scene_number = scene_number
-                logger.info(f"Found Scene Heading #{scene_number}: {content_stripped}")
-
-            line_order = 0
-
-            heading_text = content_stripped
-
-            # Clean up heading text
-            if element.element_type == "Section Heading":
-                # Remove ##...
-                heading_text = heading_text.lstrip("#").strip()
-
-            if heading_text.startswith("."):
-                # Remove . or .2 etc
-                # If .2, remove .2
-                # If ., remove .
-                if heading_text.startswith(".2"):
-                    heading_text = heading_text[2:].strip()
-                else:
-                    heading_text = heading_text.lstrip(".").strip()
-
-            current_scene = Scene(
-                id=uuid.uuid4(),
-                script_id=script.id,
-                scene_number=current_scene_number,
-                act_number=current_act_number,
-                heading=heading_text,
-                description="",  # Initialize description
+        line_counts: dict[uuid.UUID, int] = {}
+        for parsed_line in parsed_scene.lines:
+            character_id = character_ids[parsed_line.character] if parsed_line.character else None
+            if character_id is not None:
+                line_counts[character_id] = line_counts.get(character_id, 0) + 1
+            line_rows.append(
+                (uuid.uuid4(), scene_id, character_id, parsed_line.content, parsed_line.order)
             )
-            db.add(current_scene)
-
-            # Reset description collection state
-            collecting_description = True
-            current_character = None
-            last_scene_was_section = is_section_scene
-
-        elif element.element_type == "Character":
-            if in_ignored_section:
-                continue
-                
-            char_name = content_stripped
-            if char_name.startswith("@"):
-                char_name = char_name[1:]
-            
-            if current_scene and current_scene.scene_number != 0:
-                collecting_description = False
 
-            current_character = character_map.get(char_name)
-            last_scene_was_section = False
-            continue
+        # 香盤表の自動生成対象（あらすじ以外）
+        if parsed_scene.scene_number > 0:
+            scene_line_counts[scene_id] = line_counts
 
-        elif element.element_type in [
-            "Action",
-            "Synopsis",
-            "Parenthetical",
-            "Transition",
-            "Centered Text",
-            "Empty Line", 
-        ]:
-            # ト書き、あらすじ、括弧書き、移行、中央揃え
-            content = element.original_content.rstrip()
-
-            # マーカーの除去
-            marker_removed_content = content
-            if element.element_type == "Action" and marker_removed_content.startswith("!"):
-                marker_removed_content = marker_removed_content[1:]
-            elif element.element_type == "Synopsis" and marker_removed_content.startswith("="):
-                marker_removed_content = marker_removed_content[1:].lstrip()
-            elif element.element_type == "Centered Text":
-                if marker_removed_content.startswith(">") and marker_removed_content.endswith("<"):
-                    marker_removed_content = marker_removed_content[1:-1].strip()
-                elif marker_removed_content.startswith(">"):
-                    marker_removed_content = marker_removed_content[1:].strip()
-            
-            # Parenthetical等の余計な空白を除去 (元の実装との互換性のため、保存内容はstripする)
-            if element.element_type in ["Parenthetical", "Transition"]:
-                marker_removed_content = marker_removed_content.strip()
-
-            stripped_content = marker_removed_content.strip()
-
-            # 空行であっても、あらすじ収集中の場合は改行として扱いたい（ただし連続改行は防ぐ）
-            if not stripped_content:
-                if current_scene and current_scene.scene_number == 0 and current_scene.description and not current_scene.description.endswith("\n"):
-                     current_scene.description += "\n"
-                continue
-
-            if not current_scene and element.element_type != "Empty Line":
-                if in_ignored_section or synopsis_scene_already_exists:
-                    continue
-                    
-                current_scene = Scene(
-                    id=uuid.uuid4(),
-                    script_id=script.id,
-                    scene_number=0,
-                    act_number=None,
-                    heading="Synopsis",
-                    description="",
-                )
-                db.add(current_scene)
-                synopsis_scene_already_exists = True
-                collecting_description = True
-                logger.info(f"Automatically created Synopsis (Scene #0) for {element.element_type} before heading.")
-
-            # 一行セリフの判定 (@Name Dialogue) - Action の場合のみ
-            if (
-                element.element_type == "Action"
-                and stripped_content.startswith("@")
-                and (" " in stripped_content or "　" in stripped_content)
-            ):
-                if current_scene and current_scene.scene_number != 0:
-                    collecting_description = False
-                last_scene_was_section = False
-
-                # Split by first whitespace (half or full width)
-                parts = re.split(
-                    r"[ 　]", stripped_content, maxsplit=1
-                )  # Split by space or full-width space
-
-                if len(parts) >= 2:
-                    char_name_raw = parts[0][1:]  # Remove @
-                    dialogue_content = parts[1]
-
-                    # Get or create character
-                    if char_name_raw not in character_map:
-                        new_char = Character(
-                            id=uuid.uuid4(),
-                            script_id=script.id,
-                            name=char_name_raw,
-                            order=current_order_index,
-                        )
-                        db.add(new_char)
-                        character_map[char_name_raw] = new_char
-                        current_order_index += 1
-
-                    char_obj = character_map[char_name_raw]
-
-                    if current_scene:
-                        # あらすじシーンなら説明にも追加
-                        if current_scene.scene_number == 0:
-                            if current_scene.description:
-                                separator = "" if current_scene.description.endswith("\n") else "\n"
-                                current_scene.description += (
-                                    f"{separator}{char_name_raw}: {dialogue_content}"
-                                )
-                            else:
-                                current_scene.description = (
-                                    f"{char_name_raw}: {dialogue_content}"
-                                )
-
-                        line_order += 1
-                        line = Line(
-                            scene_id=current_scene.id,
-                            character_id=char_obj.id,
-                            content=dialogue_content,
-                            order=line_order,
-                        )
-                        db.add(line)
-                else:
-                    # Fallback
-                    if current_scene:
-                        line_order += 1
-                        line = Line(
-                            scene_id=current_scene.id,
-                            character_id=None,
-                            content=marker_removed_content,
-                            order=line_order,
-                        )
-                        db.add(line)
-
-            else:
-                # 通常のト書き、またはその他の要素
-                if current_scene:
-                    if current_scene.scene_number == 0:
-                        if current_scene.description:
-                            current_scene.description += "\n" + marker_removed_content
-                        else:
-                            current_scene.description = marker_removed_content
-                    elif collecting_description and element.element_type in ["Action", "Synopsis"]:
-                        if current_scene.description:
-                            current_scene.description += "\n" + stripped_content
-                        else:
-                            current_scene.description = stripped_content
-                    else:
-                        collecting_description = False
-
-                    line_order += 1
-                    line_character_id = None
-                    if element.element_type == "Parenthetical" and current_character:
-                        line_character_id = current_character.id
-
-                    db.add(Line(
-                        scene_id=current_scene.id,
-                        character_id=line_character_id,
-                        content=marker_removed_content,
-                        order=line_order,
-                    ))
-                
-                # Check for merge break
-                if element.element_type not in ["Empty Line", "Action"]:
-                    last_scene_was_section = False
-                pass
+    # セリフは登場人物・シーンを参照するため最後に書き込む
+    await _write_rows(db, Character, CHARACTER_COLUMNS, character_rows, bulk)
+    await _write_rows(db, Scene, SCENE_COLUMNS, scene_rows, bulk)
+    await _write_rows(db, Line, LINE_COLUMNS, line_rows, bulk)
+    await db.flush()
 
-        elif element.element_type == "Dialogue":
-            if in_ignored_section:
-                continue
-                
-            dialogue_text = content_stripped
-            if current_scene and current_scene.scene_number == 0:
-                # Format as "Name: Text"
-                name = current_character.name if current_character else "CHARACTER"
-                formatted = f"{name}: {dialogue_text}"
-                if current_scene.description:
-                    current_scene.description += "\n" + formatted
-                else:
-                    current_scene.description = formatted
-            elif current_scene:
-                collecting_description = False
+    return scene_line_counts
 
-            if current_scene:
-                line_order += 1
-                db.add(Line(
-                    scene_id=current_scene.id,
-                    character_id=current_character.id if current_character else None,
-                    content=dialogue_text,
-                    order=line_order
-                ))
-            last_scene_was_section = False
-            continue
 
-    await db.flush()
+async def _write_rows(
+    db: AsyncSession,
+    model: type[Base],
+    columns: tuple[str, ...],
+    rows: list[tuple[Any, ...]],
+    bulk: bool,
+) -> None:
+    """行タプルを一括INSERT、またはORMオブジェクトとして書き込む."""
+    if bulk:
+        await bulk_insert_rows(db, model.__table__, columns, rows)
+    else:
+        db.add_all(model(**dict(zip(columns, row, strict=True))) for row in rows)
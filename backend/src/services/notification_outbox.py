@@ -0,0 +1,260 @@
+"""通知アウトボックス.
+
+Discord Webhook・メールはリクエスト処理中に送らず、ドメインの変更と同じトランザクションで
+notification_outbox に書き込む（enqueue_*）。送信はワーカー（drain_outbox）が行い、
+失敗した通知は指数バックオフで再試行し、上限に達したら dead として残す。
+
+これにより API のレイテンシに外部サービスの応答時間が含まれず、Discord の障害時にも
+リクエストごとに待機中のコルーチンが溜まらない。
+
+ワーカーは複数プロセスで動かしてよい。取り出した行は next_attempt_at を
+リース期限まで進めてから送信するため、他のワーカーには期限まで見えない
+（PostgreSQL では FOR UPDATE SKIP LOCKED で取り出しも競合しない）。
+"""
+
+import asyncio
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from structlog import get_logger
+
+from src.config import settings
+from src.db import async_session_maker
+from src.db.models import NotificationOutbox
+from src.services.discord import DiscordService, get_discord_service
+from src.services.email import EmailService, email_service
+
+logger = get_logger(__name__)
+
+KIND_DISCORD_WEBHOOK = "discord_webhook"
+KIND_EMAIL = "email"
+
+# メールのテンプレート名 → EmailService のメソッド名
+_EMAIL_TEMPLATES = {
+    "reservation_confirmation": "send_reservation_confirmation",
+    "event_reminder": "send_event_reminder",
+}
+
+
+class OutboxDeliveryError(Exception):
+    """通知の送信に失敗した."""
+
+
+def enqueue_discord_notification(
+    db: AsyncSession,
+    content: str,
+    webhook_url: str | None = None,
+    embeds: list[dict] | None = None,
+) -> NotificationOutbox | None:
+    """Discord Webhook への通知を送信待ちに追加する（コミットは呼び出し側で行う）.
+
+    Args:
+        db: データベースセッション
+        content: メッセージ本文
+        webhook_url: Webhook URL（省略時は既定のWebhook）
+        embeds: 埋め込み
+
+    Returns:
+        NotificationOutbox | None: 追加した行（Webhook URL が不正な場合は None）
+    """
+    target_url = webhook_url or settings.discord_webhook_url
+    if not target_url or "discord.com/api/webhooks" not in target_url:
+        logger.warning("Invalid or missing Discord Webhook URL", url=target_url)
+        return None
+
+    payload: dict[str, Any] = {"content": content, "webhook_url": target_url}
+    if embeds:
+        payload["embeds"] = embeds
+    row = NotificationOutbox(kind=KIND_DISCORD_WEBHOOK, payload=payload)
+    db.add(row)
+    return row
+
+
+def enqueue_email(db: AsyncSession, template: str, **params: Any) -> NotificationOutbox:
+    """メールを送信待ちに追加する（コミットは呼び出し側で行う）.
+
+    Args:
+        db: データベースセッション
+        template: テンプレート名（"reservation_confirmation", "event_reminder"）
+        **params: EmailService の送信メソッドの引数（JSONに変換できる値のみ）
+
+    Returns:
+        NotificationOutbox: 追加した行
+    """
+    if template not in _EMAIL_TEMPLATES:
+        raise ValueError(f"Unknown email template: {template}")
+    row = NotificationOutbox(kind=KIND_EMAIL, payload={"template": template, "params": params})
+    db.add(row)
+    return row
+
+
+@dataclass(frozen=True)
+class _ClaimedNotification:
+    """取り出した通知（セッションから切り離した値）."""
+
+    id: uuid.UUID
+    kind: str
+    payload: dict
+    attempts: int
+
+
+async def _deliver(
+    notification: _ClaimedNotification, discord_service: DiscordService, email: EmailService
+) -> None:
+    """通知を1回送信する（失敗時は例外を送出）."""
+    payload = notification.payload
+    if notification.kind == KIND_DISCORD_WEBHOOK:
+        await discord_service.post_webhook(
+            content=payload["content"],
+            webhook_url=payload["webhook_url"],
+            embeds=payload.get("embeds"),
+        )
+    elif notification.kind == KIND_EMAIL:
+        if not email.client:
+            # 未設定の環境では送信しない（EmailService と同じ扱い）
+            logger.warning("SendGrid API Client is not initialized. Skip sending email.")
+            return
+        method = getattr(email, _EMAIL_TEMPLATES[payload["template"]])
+        if not await asyncio.to_thread(method, **payload["params"]):
+            raise OutboxDeliveryError("SendGrid did not accept the email")
+    else:
+        raise OutboxDeliveryError(f"Unknown notification kind: {notification.kind}")
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    """attempts 回目の失敗後、次に試すまでの時間."""
+    return timedelta(seconds=settings.notification_outbox_retry_base_seconds * 2 ** (attempts - 1))
+
+
+async def drain_outbox(
+    session_maker: async_sessionmaker[AsyncSession] | None = None,
+    discord_service: DiscordService | None = None,
+    email: EmailService | None = None,
+) -> dict[str, int]:
+    """送信時刻を迎えた通知を1バッチ分取り出して送信する.
+
+    Args:
+        session_maker: セッションファクトリ（省略時はアプリケーション共通のもの）
+        discord_service: Discordサービス（省略時は get_discord_service()）
+        email: メールサービス（省略時は共通のインスタンス）
+
+    Returns:
+        dict[str, int]: 取り出した件数（claimed）と、送信成功・再試行・dead の件数
+    """
+    session_maker = session_maker or async_session_maker
+    discord_service = discord_service or get_discord_service()
+    email = email or email_service
+    stats = {"claimed": 0, "sent": 0, "retried": 0, "dead": 0}
+
+    # 1. 取り出し（リース期限まで他のワーカーから隠す）
+    now = datetime.now(UTC)
+    async with session_maker() as db:
+        rows = (
+            (
+                await db.execute(
+                    select(NotificationOutbox)
+                    .where(
+                        NotificationOutbox.status == "pending",
+                        NotificationOutbox.next_attempt_at <= now,
+                    )
+                    .order_by(NotificationOutbox.next_attempt_at)
+                    .limit(settings.notification_outbox_batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        lease_until = now + timedelta(seconds=settings.notification_outbox_lease_seconds)
+        claimed = []
+        for row in rows:
+            row.attempts += 1
+            row.next_attempt_at = lease_until
+            claimed.append(_ClaimedNotification(row.id, row.kind, row.payload, row.attempts))
+        await db.commit()
+
+    stats["claimed"] = len(claimed)
+    if not claimed:
+        return stats
+
+    # 2. 並行送信
+    limit = asyncio.Semaphore(max(settings.notification_outbox_concurrency, 1))
+
+    async def deliver(notification: _ClaimedNotification) -> None:
+        async with limit:
+            await _deliver(notification, discord_service, email)
+
+    results = await asyncio.gather(*(deliver(n) for n in claimed), return_exceptions=True)
+
+    # 3. 結果の反映（成功は削除、失敗は再試行または dead）
+    now = datetime.now(UTC)
+    sent_ids = []
+    async with session_maker() as db:
+        for notification, result in zip(claimed, results, strict=True):
+            if not isinstance(result, BaseException):
+                sent_ids.append(notification.id)
+                continue
+
+            error = f"{type(result).__name__}: {result}"
+            if notification.attempts >= settings.notification_outbox_max_attempts:
+                values: dict[str, Any] = {"status": "dead", "last_error": error}
+                stats["dead"] += 1
+                logger.error(
+                    "Notification moved to dead letter",
+                    notification_id=str(notification.id),
+                    kind=notification.kind,
+                    attempts=notification.attempts,
+                    error=error,
+                )
+            else:
+                values = {
+                    "next_attempt_at": now + _retry_delay(notification.attempts),
+                    "last_error": error,
+                }
+                stats["retried"] += 1
+                logger.warning(
+                    "Notification delivery failed, will retry",
+                    notification_id=str(notification.id),
+                    kind=notification.kind,
+                    attempts=notification.attempts,
+                    error=error,
+                )
+            await db.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == notification.id)
+                .values(**values)
+            )
+
+        if sent_ids:
+            await db.execute(delete(NotificationOutbox).where(NotificationOutbox.id.in_(sent_ids)))
+        await db.commit()
+
+    stats["sent"] = len(sent_ids)
+    return stats
+
+
+async def run_outbox_worker(stop: asyncio.Event) -> None:
+    """stop がセットされるまで送信待ちの通知を送り続ける.
+
+    取り出した件数がバッチサイズに達した場合はすぐに次のバッチを処理し、
+    それ以外は notification_outbox_poll_seconds ごとに確認する。
+    """
+    logger.info("Notification outbox worker started")
+    while not stop.is_set():
+        claimed = 0
+        try:
+            claimed = (await drain_outbox())["claimed"]
+        except Exception as e:
+            logger.error("Notification outbox worker failed", error=str(e), exc_info=True)
+
+        if claimed >= settings.notification_outbox_batch_size:
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.notification_outbox_poll_seconds)
+        except TimeoutError:
+            pass
+    logger.info("Notification outbox worker stopped")
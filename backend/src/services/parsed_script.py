@@ -0,0 +1,636 @@
+"""脚本の解析結果（中間表現）.
+
+1つのリビジョンにつき Fountain のパースを1回だけ行い、その結果をDB保存
+（``fountain_parser``）、香盤表生成、PDF生成の各処理で共有するための中間表現。
+
+中間表現は生成後に変更しないこと（``parse_script`` がプロセス内でキャッシュし、
+複数の処理から同じインスタンスを参照するため）。
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from fountain.fountain import Fountain
+from playscript import PSc, PScLine, PScLineType
+
+from src.utils.fountain_utils import preprocess_fountain
+
+logger = logging.getLogger("uvicorn")
+
+# シーンとして扱う見出しキーワード
+# NOTE: 本来Fountainでは # はSection Heading (Act相当) だが、
+# ユーザーが "# シーン1" のように書くケース救済のため、キーワードが含まれる場合はシーンとして扱う
+SCENE_KEYWORDS = [
+    "Scene",
+    "scene",
+    "シーン",
+    "씬",
+    "场",
+    "場",
+    "あらすじ",
+    "Synopsis",
+    "synopsis",
+    "SYNOPSIS",
+    "줄거리",
+    "梗概",
+]
+SYNOPSIS_KEYWORDS = ["あらすじ", "Synopsis", "synopsis", "SYNOPSIS", "줄거리", "梗概"]
+
+# PDF（playscript）変換で登場人物見出しとみなす文字列
+PSC_CHARS_HEADLINE = ["登場人物"]
+PSC_DEFAULT_NAME = "*"
+
+
+@dataclass(eq=False)
+class ParsedCharacter:
+    """登場人物."""
+
+    name: str
+    order: int
+    description: str | None = None
+
+
+@dataclass(eq=False)
+class ParsedLine:
+    """セリフ・ト書き."""
+
+    content: str
+    order: int
+    character: ParsedCharacter | None = None
+
+
+@dataclass(eq=False)
+class ParsedScene:
+    """シーン（scene_number=0 はあらすじ）."""
+
+    scene_number: int
+    act_number: int | None
+    heading: str
+    description: str = ""
+    lines: list[ParsedLine] = field(default_factory=list)
+
+    def character_line_counts(self) -> dict[str, int]:
+        """このシーンに登場する人物名ごとの行数（登場順）."""
+        counts: dict[str, int] = {}
+        for line in self.lines:
+            if line.character is not None:
+                counts[line.character.name] = counts.get(line.character.name, 0) + 1
+        return counts
+
+
+@dataclass(eq=False)
+class ParsedScript:
+    """1リビジョン分の解析結果."""
+
+    content_hash: str
+    elements: list[Any]
+    metadata: dict[str, list[str]]
+    characters: list[ParsedCharacter]
+    scenes: list[ParsedScene]
+
+    def to_psc(self) -> PSc:
+        """PDF生成用の台本オブジェクトを生成する.
+
+        ``playscript.conv.fountain.psc_from_fountain`` と同じ変換を、パース済みの
+        要素から行う（再パースしない）。呼び出し側で変更されるため毎回新しく生成する。
+        """
+        title = ""
+        author = ""
+        chars: list[str] = []
+        lines: list[PScLine] = []
+
+        if "title" in self.metadata:
+            for title_ in self.metadata["title"]:
+                lines.append(PScLine(line_type=PScLineType.TITLE, text=title_))
+            title = "\n".join(self.metadata["title"])
+
+        if "author" in self.metadata:
+            for author_ in self.metadata["author"]:
+                lines.append(PScLine(line_type=PScLineType.AUTHOR, text=author_))
+            author = "\n".join(self.metadata["author"])
+
+        # 登場人物一覧の状態（ト書きと登場人物行を区別するため）
+        not_in_list, list_started, chars_listed = 0, 1, 2
+        char_list_status = not_in_list
+        last_char_name = PSC_DEFAULT_NAME
+
+        for e in self.elements:
+            if e.element_type == "Empty Line":
+                if char_list_status == chars_listed:
+                    char_list_status = not_in_list
+
+            elif e.element_type == "Section Heading":
+                text = e.element_text
+                if text in PSC_CHARS_HEADLINE:
+                    lines.append(PScLine(line_type=PScLineType.CHARSHEADLINE, text=text))
+                    char_list_status = list_started
+                else:
+                    if e.section_depth <= 1:
+                        line_type = PScLineType.H1
+                    elif e.section_depth == 2:
+                        line_type = PScLineType.H2
+                    else:
+                        line_type = PScLineType.H3
+                    lines.append(PScLine(line_type=line_type, text=text))
+                    char_list_status = not_in_list
+
+            elif e.element_type == "Action":
+                text = e.element_text
+                if char_list_status == not_in_list:
+                    lines.append(PScLine(line_type=PScLineType.DIRECTION, text=text))
+                else:
+                    for charline in text.splitlines():
+                        lines.append(
+                            PScLine.from_text(line_type=PScLineType.CHARACTER, text=charline)
+                        )
+                    char_list_status = chars_listed
+
+            elif e.element_type == "Character":
+                text = e.element_text
+                if text not in chars:
+                    chars.append(text)
+                last_char_name = text
+
+            elif e.element_type == "Dialogue":
+                lines.append(
+                    PScLine(
+                        line_type=PScLineType.DIALOGUE, name=last_char_name, text=e.element_text
+                    )
+                )
+                last_char_name = PSC_DEFAULT_NAME
+
+            elif e.element_type == "Transition":
+                lines.append(PScLine(line_type=PScLineType.ENDMARK, text=e.element_text))
+
+        return PSc(title=title, author=author, chars=chars, lines=lines)
+
+
+def _is_character_section(content: str) -> bool:
+    return "登場人物" in content or "Character" in content
+
+
+def _extract_characters(elements: list[Any]) -> list[ParsedCharacter]:
+    """登場人物表を抽出する.
+
+    「# 登場人物」セクションで定義された人物を定義順に先頭に並べ、
+    本文の Character 要素にのみ現れる人物を登場順にその後ろへ続ける。
+    """
+    section_characters: dict[str, ParsedCharacter] = {}
+    body_names: list[str] = []
+    in_character_section = False
+
+    for element in elements:
+        content = element.original_content.strip()
+
+        # セクション見出しの検出
+        if element.element_type == "Section Heading":
+            in_character_section = _is_character_section(content)
+            if in_character_section:
+                logger.info("Found Character Definition Section")
+            continue
+        if element.element_type == "Scene Heading":
+            in_character_section = False
+            continue
+
+        if in_character_section:
+            # セクション内の要素を解析
+            if element.element_type not in ["Action", "Character", "Dialogue"]:
+                continue
+            for line in (element.element_text or content).splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                # ! で始まる場合は除去する (前処理で追加された場合)
+                if line.startswith("!"):
+                    line = line[1:].strip()
+
+                # "Name: Description" 形式を探す (コロン区切り)。なければ名前のみ
+                if ":" in line:
+                    name_part, desc_part = (part.strip() for part in line.split(":", 1))
+                else:
+                    name_part = line.strip()
+                    desc_part = ""
+
+                if name_part.startswith("@"):
+                    name_part = name_part[1:].strip()
+
+                if name_part and name_part not in section_characters:
+                    section_characters[name_part] = ParsedCharacter(
+                        name=name_part, description=desc_part, order=len(section_characters) + 1
+                    )
+                    logger.info(
+                        f"Added character from section: [{name_part}] (order: {len(section_characters)})"
+                    )
+
+        elif element.element_type == "Character":
+            # 本文からその他のキャラクターを登場順に抽出
+            char_name = content
+            if char_name.startswith("@"):
+                char_name = char_name[1:]
+            if char_name and char_name not in body_names:
+                body_names.append(char_name)
+
+    characters = list(section_characters.values())
+    for char_name in body_names:
+        if char_name not in section_characters:
+            characters.append(ParsedCharacter(name=char_name, order=len(characters) + 1))
+    return characters
+
+
+def _clean_scene_heading(heading_text: str) -> str:
+    # Remove . or .2 etc
+    if heading_text.startswith("."):
+        if heading_text.startswith(".2"):
+            return heading_text[2:].strip()
+        return heading_text.lstrip(".").strip()
+    return heading_text
+
+
+def _extract_scenes(elements: list[Any], characters: list[ParsedCharacter]) -> list[ParsedScene]:
+    """幕・シーン・セリフを抽出する.
+
+    一行セリフ（@Name Dialogue）で初めて登場した人物は ``characters`` に追加される。
+    """
+    character_map = {c.name: c for c in characters}
+    scenes: list[ParsedScene] = []
+
+    current_scene: ParsedScene | None = None
+    scene_number = 0
+    current_act_number: int | None = None
+    line_order = 0
+    current_character: ParsedCharacter | None = None
+    collecting_description = False
+    last_scene_was_section = False  # 節（Section Heading）でシーンが作成されたかのフラグ
+    in_ignored_section = False
+    synopsis_scene_already_exists = False
+
+    for element in elements:
+        content_stripped = element.original_content.strip()
+        # Act検出
+        # 1. Section Heading level 1 (starts with #, not ##)
+        # 2. Forced Scene Heading level 1 (starts with .1)
+        has_scene_keyword = any(k in content_stripped for k in SCENE_KEYWORDS)
+
+        if _is_character_section(content_stripped):
+            has_scene_keyword = False
+
+        is_section_act = (
+            element.element_type == "Section Heading"
+            and content_stripped.startswith("#")
+            and not content_stripped.startswith("##")
+            and not has_scene_keyword
+        )  # キーワードがあればActではない
+
+        is_dot_act = element.element_type == "Scene Heading" and content_stripped.startswith(".1")
+
+        # .1の場合でも、シーンキーワードが含まれていれば幕としては扱わない（シーンとして扱い、Actカウンタを上げないため）
+        if is_dot_act and has_scene_keyword:
+            is_dot_act = False
+
+        if is_section_act or is_dot_act:
+            # 幕が変わったら収集を停止（前のシーンのあらすじに継続させない）
+            collecting_description = False
+            current_scene = None  # Ensure text before first scene of new act doesn't append to previous act's scene
+            current_character = None
+            last_scene_was_section = False
+
+            # "登場人物" や "Character" は幕としてカウントしない
+            if not _is_character_section(content_stripped):
+                if current_act_number is None:
+                    current_act_number = 1
+                else:
+                    current_act_number += 1
+                scene_number = 0  # 幕が変わったらシーン番号をリセット
+                logger.info(f"Found Act #{current_act_number}: {content_stripped}")
+
+            # .1 はScene Headingなので、ここでcontinueしないと下でSceneとして作られてしまう
+            if is_dot_act:
+                continue
+
+        # Scene検出
+        # 1. Standard Scene Heading (INT./EXT. etc or Forced . but NOT .1)
+        # 2. Section Heading level 2 (starts with ##)
+        # 3. Forced Scene Heading level 2 (starts with .2)
+        # 4. Level 1 with scene keyword (# Scene...)
+        is_scene_heading_type = element.element_type == "Scene Heading"
+
+        # .1 でもキーワードがあればシーンとして扱う (is_dot_actがFalseになっているはず)
+        is_valid_scene_heading = is_scene_heading_type and (
+            not content_stripped.startswith(".1") or has_scene_keyword
+        )
+
+        is_section_scene = element.element_type == "Section Heading" and (
+            content_stripped.startswith("##")
+            or (content_stripped.startswith("#") and has_scene_keyword)
+        )
+
+        if _is_character_section(content_stripped):
+            collecting_description = False
+            in_ignored_section = True
+            current_scene = None
+            continue
+
+        # 見出し（Section Heading）だが、ActでもSceneでもない場合は収集を停止
+        if element.element_type == "Section Heading" and not (is_section_act or is_section_scene):
+            collecting_description = False
+            current_scene = None
+            in_ignored_section = False
+
+        if is_valid_scene_heading or is_section_scene:
+            # 新しいシーン
+            in_ignored_section = False
+
+            is_synopsis = any(k in content_stripped for k in SYNOPSIS_KEYWORDS)
+
+            # 既存のSection Sceneのすぐ後にScene Headingが来た場合の結合処理
+            if (
+                is_valid_scene_heading
+                and last_scene_was_section
+                and current_scene
+                and current_scene.scene_number != 0
+                and not is_synopsis
+            ):
+                heading_text = _clean_scene_heading(content_stripped)
+
+                # 前のSection名と新しいScene Headingを結合
+                current_scene.heading = f"{current_scene.heading} ({heading_text})"
+                logger.info(f"Merged Scene Heading into previous Section: {current_scene.heading}")
+
+                # シーン番号は増やさない
+                last_scene_was_section = False  # 結合したのでリセット
+                line_order = 0
+                collecting_description = True
+                current_character = None
+                continue
+
+            if is_synopsis:
+                if (
+                    synopsis_scene_already_exists
+                    and current_scene
+                    and current_scene.scene_number == 0
+                ):
+                    logger.info(f"Continuing existing Synopsis (Scene #0) for: {content_stripped}")
+                    collecting_description = True
+                    current_character = None
+                    last_scene_was_section = is_section_scene
+                    continue
+
+                # Synopsisは幕に属さないが、幕カウンタはクリアしない
+                current_scene_number = 0
+                synopsis_scene_already_exists = True
+                logger.info(f"Found Synopsis (Scene #0): {content_stripped}")
+            else:
+                scene_number += 1
+                current_scene_number = scene_number
+                logger.info(f"Found Scene Heading #{scene_number}: {content_stripped}")
+
+            line_order = 0
+
+            heading_text = content_stripped
+            if element.element_type == "Section Heading":
+                # Remove ##...
+                heading_text = heading_text.lstrip("#").strip()
+            heading_text = _clean_scene_heading(heading_text)
+
+            current_scene = ParsedScene(
+                scene_number=current_scene_number,
+                act_number=current_act_number,
+                heading=heading_text,
+            )
+            scenes.append(current_scene)
+
+            # Reset description collection state
+            collecting_description = True
+            current_character = None
+            last_scene_was_section = is_section_scene
+
+        elif element.element_type == "Character":
+            if in_ignored_section:
+                continue
+
+            char_name = content_stripped
+            if char_name.startswith("@"):
+                char_name = char_name[1:]
+
+            if current_scene and current_scene.scene_number != 0:
+                collecting_description = False
+
+            current_character = character_map.get(char_name)
+            last_scene_was_section = False
+            continue
+
+        elif element.element_type in [
+            "Action",
+            "Synopsis",
+            "Parenthetical",
+            "Transition",
+            "Centered Text",
+            "Empty Line",
+        ]:
+            # ト書き、あらすじ、括弧書き、移行、中央揃え
+            content = element.original_content.rstrip()
+
+            # マーカーの除去
+            marker_removed_content = content
+            if element.element_type == "Action" and marker_removed_content.startswith("!"):
+                marker_removed_content = marker_removed_content[1:]
+            elif element.element_type == "Synopsis" and marker_removed_content.startswith("="):
+                marker_removed_content = marker_removed_content[1:].lstrip()
+            elif element.element_type == "Centered Text":
+                if marker_removed_content.startswith(">") and marker_removed_content.endswith("<"):
+                    marker_removed_content = marker_removed_content[1:-1].strip()
+                elif marker_removed_content.startswith(">"):
+                    marker_removed_content = marker_removed_content[1:].strip()
+
+            # Parenthetical等の余計な空白を除去 (元の実装との互換性のため、保存内容はstripする)
+            if element.element_type in ["Parenthetical", "Transition"]:
+                marker_removed_content = marker_removed_content.strip()
+
+            stripped_content = marker_removed_content.strip()
+
+            # 空行であっても、あらすじ収集中の場合は改行として扱いたい（ただし連続改行は防ぐ）
+            if not stripped_content:
+                if (
+                    current_scene
+                    and current_scene.scene_number == 0
+                    and current_scene.description
+                    and not current_scene.description.endswith("\n")
+                ):
+                    current_scene.description += "\n"
+                continue
+
+            if not current_scene and element.element_type != "Empty Line":
+                if in_ignored_section or synopsis_scene_already_exists:
+                    continue
+
+                current_scene = ParsedScene(scene_number=0, act_number=None, heading="Synopsis")
+                scenes.append(current_scene)
+                synopsis_scene_already_exists = True
+                collecting_description = True
+                logger.info(
+                    f"Automatically created Synopsis (Scene #0) for {element.element_type} before heading."
+                )
+
+            # 一行セリフの判定 (@Name Dialogue) - Action の場合のみ
+            if (
+                element.element_type == "Action"
+                and stripped_content.startswith("@")
+                and (" " in stripped_content or "　" in stripped_content)
+            ):
+                if current_scene and current_scene.scene_number != 0:
+                    collecting_description = False
+                last_scene_was_section = False
+
+                # Split by first whitespace (half or full width)
+                parts = re.split(r"[ 　]", stripped_content, maxsplit=1)
+
+                if len(parts) >= 2:
+                    char_name_raw = parts[0][1:]  # Remove @
+                    dialogue_content = parts[1]
+
+                    # Get or create character
+                    if char_name_raw not in character_map:
+                        new_char = ParsedCharacter(name=char_name_raw, order=len(characters) + 1)
+                        characters.append(new_char)
+                        character_map[char_name_raw] = new_char
+
+                    char_obj = character_map[char_name_raw]
+
+                    if current_scene:
+                        # あらすじシーンなら説明にも追加
+                        if current_scene.scene_number == 0:
+                            if current_scene.description:
+                                separator = "" if current_scene.description.endswith("\n") else "\n"
+                                current_scene.description += (
+                                    f"{separator}{char_name_raw}: {dialogue_content}"
+                                )
+                            else:
+                                current_scene.description = f"{char_name_raw}: {dialogue_content}"
+
+                        line_order += 1
+                        current_scene.lines.append(
+                            ParsedLine(
+                                content=dialogue_content, order=line_order, character=char_obj
+                            )
+                        )
+                else:
+                    # Fallback
+                    if current_scene:
+                        line_order += 1
+                        current_scene.lines.append(
+                            ParsedLine(content=marker_removed_content, order=line_order)
+                        )
+
+            else:
+                # 通常のト書き、またはその他の要素
+                if current_scene:
+                    if current_scene.scene_number == 0:
+                        if current_scene.description:
+                            current_scene.description += "\n" + marker_removed_content
+                        else:
+                            current_scene.description = marker_removed_content
+                    elif collecting_description and element.element_type in ["Action", "Synopsis"]:
+                        if current_scene.description:
+                            current_scene.description += "\n" + stripped_content
+                        else:
+                            current_scene.description = stripped_content
+                    else:
+                        collecting_description = False
+
+                    line_order += 1
+                    line_character = None
+                    if element.element_type == "Parenthetical" and current_character:
+                        line_character = current_character
+
+                    current_scene.lines.append(
+                        ParsedLine(
+                            content=marker_removed_content,
+                            order=line_order,
+                            character=line_character,
+                        )
+                    )
+
+                # Check for merge break
+                if element.element_type not in ["Empty Line", "Action"]:
+                    last_scene_was_section = False
+
+        elif element.element_type == "Dialogue":
+            if in_ignored_section:
+                continue
+
+            dialogue_text = content_stripped
+            if current_scene and current_scene.scene_number == 0:
+                # Format as "Name: Text"
+                name = current_character.name if current_character else "CHARACTER"
+                formatted = f"{name}: {dialogue_text}"
+                if current_scene.description:
+                    current_scene.description += "\n" + formatted
+                else:
+                    current_scene.description = formatted
+            elif current_scene:
+                collecting_description = False
+
+            if current_scene:
+                line_order += 1
+                current_scene.lines.append(
+                    ParsedLine(content=dialogue_text, order=line_order, character=current_character)
+                )
+            last_scene_was_section = False
+            continue
+
+    return scenes
+
+
+def _build_parsed_script(content: str, content_hash: str) -> ParsedScript:
+    # Pre-process
+    f = Fountain(preprocess_fountain(content))
+    logger.info(f"Parsed {len(f.elements)} elements from Fountain content.")
+
+    characters = _extract_characters(f.elements)
+    scenes = _extract_scenes(f.elements, characters)
+
+    return ParsedScript(
+        content_hash=content_hash,
+        elements=f.elements,
+        metadata=f.metadata,
+        characters=characters,
+        scenes=scenes,
+    )
+
+
+_PARSE_CACHE_SIZE = 4
+_parse_cache: OrderedDict[str, ParsedScript] = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def parse_script(content: str) -> ParsedScript:
+    """Fountainテキストを解析して中間表現を取得する.
+
+    同じ本文の解析結果はプロセス内で再利用されるため、アップロード処理・香盤表生成・
+    通知用PDF生成から呼び出してもパースは1回で済む。
+
+    Args:
+        content: Fountain形式の台本テキスト（前処理前）
+
+    Returns:
+        ParsedScript: 解析結果
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    with _parse_cache_lock:
+        parsed = _parse_cache.get(content_hash)
+        if parsed is not None:
+            _parse_cache.move_to_end(content_hash)
+            return parsed
+
+    parsed = _build_parsed_script(content, content_hash)
+
+    with _parse_cache_lock:
+        _parse_cache[content_hash] = parsed
+        while len(_parse_cache) > _PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return parsed
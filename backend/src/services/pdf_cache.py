@@ -0,0 +1,227 @@
+"""PDFレンダリングキャッシュ.
+
+``generate_script_pdf`` の出力は脚本本文・用紙の向き・文字方向・生成ロジックの
+バージョンだけで決まるため、それらのハッシュをキーに生成済みPDFを再利用する。
+
+キャッシュは2層構成:
+- プロセス内LRU（合計バイト数で上限を管理）
+- 共有層（ディスクまたはAzure Blob Storage）: コールドスタートしたワーカーも
+  共有層からメモリ層を温められる
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+
+from src.config import settings
+from src.services.pdf_generator import PDF_GENERATOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+def make_pdf_cache_key(content: str, orientation: str, writing_direction: str) -> str:
+    """PDFキャッシュのキーを生成する.
+
+    Args:
+        content: Fountain形式の台本テキスト
+        orientation: 用紙の向き
+        writing_direction: 文字方向
+
+    Returns:
+        str: SHA-256の16進ダイジェスト
+    """
+    digest = hashlib.sha256()
+    for part in (PDF_GENERATOR_VERSION, orientation, writing_direction):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PdfCacheBackend(ABC):
+    """PDFキャッシュバックエンドの基底クラス."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """キーに対応するPDFを取得する（存在しなければNone）."""
+
+    @abstractmethod
+    def set(self, key: str, data: bytes) -> None:
+        """PDFを保存する."""
+
+
+class MemoryPdfCache(PdfCacheBackend):
+    """合計バイト数を上限とするプロセス内LRUキャッシュ."""
+
+    def __init__(self, max_bytes: int) -> None:
+        """初期化.
+
+        Args:
+            max_bytes: 保持するPDFの合計バイト数の上限
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        """キーに対応するPDFを取得し、最近使用したものとして扱う."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def set(self, key: str, data: bytes) -> None:
+        """PDFを保存し、上限を超えた分を古い順に破棄する."""
+        size = len(data)
+        if size > self.max_bytes:
+            # 単体で上限を超えるものは保持しない
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+
+            self._entries[key] = data
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def __len__(self) -> int:
+        """保持しているエントリ数."""
+        return len(self._entries)
+
+
+class DiskPdfCache(PdfCacheBackend):
+    """ディスク上のディレクトリを共有層として使用するキャッシュ."""
+
+    def __init__(self, directory: str | Path) -> None:
+        """初期化.
+
+        Args:
+            directory: キャッシュファイルを保存するディレクトリ
+        """
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pdf"
+
+    def get(self, key: str) -> bytes | None:
+        """ファイルからPDFを読み込む."""
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read PDF cache file: {e}")
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        """PDFをファイルに書き込む（一時ファイル経由で置き換え、読み込み中の破損を防ぐ）."""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write PDF cache file: {e}")
+
+
+class BlobPdfCache(PdfCacheBackend):
+    """Azure Blob Storageを共有層として使用するキャッシュ."""
+
+    def __init__(self, connection_string: str, container: str) -> None:
+        """初期化.
+
+        Args:
+            connection_string: Azure Storage接続文字列
+            container: キャッシュ用コンテナ名
+        """
+        from azure.storage.blob import BlobServiceClient
+
+        self._container_client = BlobServiceClient.from_connection_string(
+            connection_string
+        ).get_container_client(container)
+
+    def get(self, key: str) -> bytes | None:
+        """BlobからPDFをダウンロードする."""
+        from azure.core.exceptions import ResourceNotFoundError
+
+        try:
+            return self._container_client.get_blob_client(f"{key}.pdf").download_blob().readall()
+        except ResourceNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read PDF cache blob: {e}")
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        """PDFをBlobにアップロードする."""
+        try:
+            self._container_client.get_blob_client(f"{key}.pdf").upload_blob(data, overwrite=True)
+        except Exception as e:
+            logger.warning(f"Failed to write PDF cache blob: {e}")
+
+
+class TieredPdfCache(PdfCacheBackend):
+    """メモリ層と共有層を組み合わせたキャッシュ."""
+
+    def __init__(self, memory: MemoryPdfCache, shared: PdfCacheBackend | None = None) -> None:
+        """初期化.
+
+        Args:
+            memory: プロセス内LRU
+            shared: 共有層（ディスク/Blob）。Noneの場合はメモリ層のみ
+        """
+        self.memory = memory
+        self.shared = shared
+
+    def get(self, key: str) -> bytes | None:
+        """メモリ層→共有層の順に探し、共有層でヒットした場合はメモリ層に載せる."""
+        data = self.memory.get(key)
+        if data is not None:
+            return data
+
+        if self.shared is None:
+            return None
+
+        data = self.shared.get(key)
+        if data is not None:
+            self.memory.set(key, data)
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        """両方の層に保存する."""
+        self.memory.set(key, data)
+        if self.shared is not None:
+            self.shared.set(key, data)
+
+
+_pdf_cache: TieredPdfCache | None = None
+
+
+def get_pdf_cache() -> TieredPdfCache:
+    """設定に基づいて構築したPDFキャッシュを取得する（プロセス内で共有）."""
+    global _pdf_cache
+    if _pdf_cache is None:
+        shared: PdfCacheBackend | None = None
+        if settings.pdf_cache_container and settings.azure_storage_connection_string:
+            shared = BlobPdfCache(
+                settings.azure_storage_connection_string, settings.pdf_cache_container
+            )
+        elif settings.pdf_cache_dir:
+            shared = DiskPdfCache(settings.pdf_cache_dir)
+
+        _pdf_cache = TieredPdfCache(MemoryPdfCache(settings.pdf_cache_memory_max_bytes), shared)
+    return _pdf_cache
@@ -0,0 +1,248 @@
+"""PDFレンダリング実行基盤.
+
+``generate_script_pdf`` は同期的かつCPU負荷の高い処理のため、非同期ハンドラから
+直接呼ぶとuvicornワーカー全体が停止する。本モジュールはプロセスプールで描画を
+行い、待ち行列の上限とタイムアウトを設けてイベントループを解放する。
+
+すべてのPDF生成呼び出しは ``render_script_pdf`` を経由させること。
+"""
+
+import asyncio
+import functools
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from structlog import get_logger
+
+from src.config import settings
+from src.services.parsed_script import ParsedScript
+from src.services.pdf_cache import PdfCacheBackend, get_pdf_cache, make_pdf_cache_key
+from src.services.pdf_generator import generate_script_pdf
+
+logger = get_logger(__name__)
+
+
+class PdfRenderQueueFullError(Exception):
+    """描画待ちが上限に達している場合の例外."""
+
+
+class PdfRenderTimeoutError(Exception):
+    """描画がタイムアウトした場合の例外."""
+
+
+class PdfRenderExecutor:
+    """待ち行列上限とタイムアウト付きのPDF描画プール.
+
+    ``max_workers`` が0の場合はプロセスを使わずスレッドで描画する
+    （プロセス生成が制限された環境やテスト用）。
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        timeout_seconds: float,
+        cache: PdfCacheBackend | None = None,
+        render_func: Callable[..., bytes] = generate_script_pdf,
+    ) -> None:
+        """初期化.
+
+        Args:
+            max_workers: 描画プロセス数（0ならスレッドで実行）
+            max_queue: 実行中の描画に加えて待機できる件数
+            timeout_seconds: 1件あたりの描画タイムアウト（秒）
+            cache: PDFキャッシュ（省略時は設定に基づく共有キャッシュ）
+            render_func: 描画関数（プロセスプールで実行するためトップレベル関数であること）
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+        self.render_func = render_func
+        self._cache = cache
+        self._pool: ProcessPoolExecutor | None = None
+
+        # メトリクス
+        self.in_flight = 0
+        self.rendered_count = 0
+        self.cache_hit_count = 0
+        self.rejected_count = 0
+        self.timeout_count = 0
+        self.total_render_ms = 0.0
+        self.last_render_ms: float | None = None
+
+    @property
+    def cache(self) -> PdfCacheBackend:
+        """使用するPDFキャッシュ."""
+        if self._cache is None:
+            self._cache = get_pdf_cache()
+        return self._cache
+
+    @property
+    def queue_length(self) -> int:
+        """空きワーカーを待っている描画の件数."""
+        return max(0, self.in_flight - max(self.max_workers, 1))
+
+    def _get_pool(self) -> ProcessPoolExecutor | None:
+        if self.max_workers <= 0:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def render(
+        self,
+        content: str,
+        orientation: str = "landscape",
+        writing_direction: str = "vertical",
+        parsed: ParsedScript | None = None,
+    ) -> bytes:
+        """キャッシュを確認し、ミスした場合のみプールで描画する.
+
+        Args:
+            content: Fountain形式の台本テキスト
+            orientation: 用紙の向き ("landscape" or "portrait")
+            writing_direction: 文字方向 ("vertical" or "horizontal")
+            parsed: 解析済みの中間表現（あればワーカーでの再パースを省略できる）
+
+        Returns:
+            PDF バイナリデータ
+
+        Raises:
+            PdfRenderQueueFullError: 描画待ちが上限に達している場合
+            PdfRenderTimeoutError: 描画がタイムアウトした場合
+        """
+        key = make_pdf_cache_key(content, orientation, writing_direction)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            self.cache_hit_count += 1
+            return cached
+
+        if self.in_flight >= max(self.max_workers, 1) + self.max_queue:
+            self.rejected_count += 1
+            logger.warning("PDF render queue is full", in_flight=self.in_flight)
+            raise PdfRenderQueueFullError(
+                "PDF生成が混み合っています。しばらくしてから再度お試しください"
+            )
+
+        start = time.perf_counter()
+        future = self._submit(content, orientation, writing_direction, parsed)
+        try:
+            # タイムアウト・キャンセル時も描画自体は取り消さない（in_flight は描画完了時に減らす）
+            pdf_bytes = await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout_seconds)
+        except TimeoutError:
+            # プロセス側の処理は中断できないため、結果を待たずに呼び出し元へ返す
+            self.timeout_count += 1
+            logger.error("PDF render timed out", timeout_seconds=self.timeout_seconds)
+            raise PdfRenderTimeoutError("PDF生成がタイムアウトしました")
+        except BrokenProcessPool:
+            # ワーカーが異常終了した場合はプールを作り直す
+            logger.error("PDF render pool is broken. Recreating.")
+            self.shutdown()
+            raise
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.rendered_count += 1
+        self.total_render_ms += elapsed_ms
+        self.last_render_ms = elapsed_ms
+        logger.info(
+            "PDF rendered",
+            render_ms=round(elapsed_ms, 2),
+            size_bytes=len(pdf_bytes),
+            queue_length=self.queue_length,
+        )
+
+        await asyncio.to_thread(self.cache.set, key, pdf_bytes)
+        return pdf_bytes
+
+    def _submit(
+        self,
+        content: str,
+        orientation: str,
+        writing_direction: str,
+        parsed: ParsedScript | None,
+    ) -> asyncio.Future[bytes]:
+        """描画をプール（ワーカー数0の場合はスレッド）に投入する.
+
+        in_flight は投入時に増やし、呼び出し元の待機ではなく描画の完了時に減らす
+        （タイムアウト後も実行中の描画を上限の計算に含めるため）。
+        """
+        call = functools.partial(self.render_func, content, orientation, writing_direction)
+        if parsed is not None:
+            call = functools.partial(call, parsed=parsed)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_pool(), call)
+        self.in_flight += 1
+        future.add_done_callback(self._on_render_done)
+        return future
+
+    def _on_render_done(self, future: asyncio.Future[bytes]) -> None:
+        self.in_flight -= 1
+        # タイムアウトで誰も待っていない場合も、例外を取得済みにして警告を出さない
+        if not future.cancelled():
+            future.exception()
+
+    def get_stats(self) -> dict[str, Any]:
+        """メトリクスを取得する."""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_length": self.queue_length,
+            "rendered_count": self.rendered_count,
+            "cache_hit_count": self.cache_hit_count,
+            "rejected_count": self.rejected_count,
+            "timeout_count": self.timeout_count,
+            "avg_render_ms": (
+                round(self.total_render_ms / self.rendered_count, 2)
+                if self.rendered_count
+                else None
+            ),
+            "last_render_ms": round(self.last_render_ms, 2) if self.last_render_ms else None,
+        }
+
+    def shutdown(self) -> None:
+        """プロセスプールを停止する."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_executor: PdfRenderExecutor | None = None
+
+
+def get_pdf_render_executor() -> PdfRenderExecutor:
+    """設定に基づいて構築したPDF描画プールを取得する（プロセス内で共有）."""
+    global _executor
+    if _executor is None:
+        _executor = PdfRenderExecutor(
+            max_workers=settings.pdf_render_workers,
+            max_queue=settings.pdf_render_max_queue,
+            timeout_seconds=settings.pdf_render_timeout_seconds,
+        )
+    return _executor
+
+
+async def render_script_pdf(
+    content: str,
+    orientation: str = "landscape",
+    writing_direction: str = "vertical",
+    parsed: ParsedScript | None = None,
+) -> bytes:
+    """共有のPDF描画プールで脚本PDFを取得する.
+
+    Args:
+        content: Fountain形式の台本テキスト
+        orientation: 用紙の向き ("landscape" or "portrait")
+        writing_direction: 文字方向 ("vertical" or "horizontal")
+        parsed: 解析済みの中間表現
+
+    Returns:
+        PDF バイナリデータ
+    """
+    return await get_pdf_render_executor().render(
+        content, orientation, writing_direction, parsed=parsed
+    )
@@ -3,7 +3,6 @@ import os
 from collections import namedtuple
 
 from playscript import PScLineType
-from playscript.conv import fountain
 from reportlab.lib.pagesizes import A4, A5, landscape, portrait
 from reportlab.lib.units import cm
 from reportlab.pdfbase import pdfmetrics
@@ -11,7 +10,11 @@ from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
-from src.utils.fountain_utils import preprocess_fountain
+from src.services.parsed_script import ParsedScript, parse_script
+
+# 生成ロジックのバージョン。レイアウトや描画処理を変更した場合は必ず更新すること
+# (PDFレンダリングキャッシュのキーに含まれ、古いレイアウトのPDFが返されるのを防ぐ)
+PDF_GENERATOR_VERSION = "1"
 
 # Font registration logic (kept from previous version)
 try:
@@ -946,7 +949,10 @@ def horizontal_psc_to_pdf(
 
 
 def generate_script_pdf(
-    fountain_content: str, orientation: str = "landscape", writing_direction: str = "vertical"
+    fountain_content: str,
+    orientation: str = "landscape",
+    writing_direction: str = "vertical",
+    parsed: ParsedScript | None = None,
 ) -> bytes:
     """Fountain形式のテキストからPDFを生成する.
 
@@ -954,20 +960,17 @@ def generate_script_pdf(
         fountain_content: Fountain形式の台本テキスト
         orientation: 用紙の向き ("landscape" or "portrait")
         writing_direction: 文字方向 ("vertical" or "horizontal")
+        parsed: 解析済みの中間表現（省略時は fountain_content を解析する）
 
     Returns:
         PDF バイナリデータ
     """
-    from fountain.fountain import Fountain
-
-    # Pre-process
-    fountain_content = preprocess_fountain(fountain_content)
-
-    # Standard parsing
-    f_parser = Fountain(fountain_content)
-    metadata = f_parser.metadata
+    # パース（1回のみ。メタデータと台本オブジェクトは同じ解析結果から得る）
+    if parsed is None:
+        parsed = parse_script(fountain_content)
+    metadata = parsed.metadata
 
-    script = fountain.psc_from_fountain(fountain_content)
+    script = parsed.to_psc()
 
     # --- Metadata Injection Logic (Refined) ---
     metadata_parts = []
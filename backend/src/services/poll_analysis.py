@@ -0,0 +1,522 @@
+"""日程調整の分析用スナップショット.
+
+おすすめ日程（get_recommendations）とカレンダー分析（get_calendar_analysis）は
+同じデータ（候補日程と回答、メンバー、最新脚本のシーン・香盤表・配役）を使うため、
+1回の読み込みでまとめて取得し、日程調整ごとにプロセス内でキャッシュする。
+
+キャッシュには候補日程ごとの出席状況（CandidateAvailability）と分析結果も保持する。
+回答の変更（upsert_answer）は apply_poll_answer で該当する候補日程のみ差分更新し、
+次の読み出しではその候補日程の結果だけを作り直す。必須役職の変更ではキャッシュを破棄する。
+キャッシュはプロセスごとのため、読み出しのたびに回答の件数と最終更新日時（回答の版）を
+1回の集計クエリで確認し、他のワーカーで回答が変わっていれば読み直す。
+配役や香盤表の変更、他プロセスでの必須役職の変更は検出しないため、TTLで一定時間後に読み直す。
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.config import settings
+from src.db.models import (
+    Character,
+    CharacterCasting,
+    ProjectMember,
+    Scene,
+    SceneCharacterMapping,
+    SchedulePoll,
+    SchedulePollAnswer,
+    SchedulePollCandidate,
+    Script,
+)
+from src.services.poll_recommendation import (
+    AVAILABLE_STATUSES,
+    CandidateAvailability,
+    PollRecommendationEngine,
+    RecommendationScene,
+    iter_bits,
+    recommend_by_attendance,
+    top_recommendations,
+)
+
+# 優先メンバーとみなす役職（必須役職が未指定の場合）
+DEFAULT_PRIORITY_ROLES = ("演出", "演出助手", "制作")
+
+
+@dataclass(frozen=True)
+class PollAnswerSnapshot:
+    """回答."""
+
+    user_id: uuid.UUID
+    status: str
+
+
+@dataclass(frozen=True)
+class PollCandidateSnapshot:
+    """候補日程と回答."""
+
+    id: uuid.UUID
+    start_datetime: datetime
+    end_datetime: datetime
+    answers: tuple[PollAnswerSnapshot, ...]
+
+
+@dataclass(frozen=True)
+class PollMemberSnapshot:
+    """プロジェクトメンバー."""
+
+    user_id: uuid.UUID
+    display_name: str | None
+    default_staff_role: str | None
+
+
+@dataclass(frozen=True)
+class PollCastingSnapshot:
+    """配役."""
+
+    character_id: uuid.UUID
+    character_name: str
+    user_id: uuid.UUID
+
+
+@dataclass(frozen=True)
+class PollAnalysisSnapshot:
+    """日程調整の分析に必要なデータ一式（セッションから切り離した値のみ）."""
+
+    poll_id: uuid.UUID
+    project_id: uuid.UUID
+    required_roles: tuple[str, ...]
+    candidates: tuple[PollCandidateSnapshot, ...]
+    members: tuple[PollMemberSnapshot, ...]
+    # 最新脚本がない場合は None（シーン・香盤表・配役は空）
+    script_id: uuid.UUID | None
+    scenes: tuple[RecommendationScene, ...]
+    scene_characters: dict[uuid.UUID, list[uuid.UUID]]
+    castings: tuple[PollCastingSnapshot, ...]
+
+    @cached_property
+    def character_users(self) -> dict[uuid.UUID, list[uuid.UUID]]:
+        """登場人物ID → キャストのユーザーID."""
+        character_users: dict[uuid.UUID, list[uuid.UUID]] = {}
+        for casting in self.castings:
+            character_users.setdefault(casting.character_id, []).append(casting.user_id)
+        return character_users
+
+    @cached_property
+    def role_users(self) -> dict[str, list[uuid.UUID]]:
+        """役職 → その役職のユーザーID."""
+        role_users: dict[str, list[uuid.UUID]] = {}
+        for member in self.members:
+            if member.default_staff_role:
+                role_users.setdefault(member.default_staff_role, []).append(member.user_id)
+        return role_users
+
+    @cached_property
+    def engine(self) -> PollRecommendationEngine:
+        """この日程調整用のレコメンドエンジン."""
+        if self.required_roles:
+            priority_user_ids = {
+                user_id for role in self.required_roles for user_id in self.role_users.get(role, [])
+            }
+        else:
+            priority_user_ids = {
+                m.user_id for m in self.members if m.default_staff_role in DEFAULT_PRIORITY_ROLES
+            }
+        return PollRecommendationEngine(
+            self.scenes,
+            self.scene_characters,
+            self.character_users,
+            {role: self.role_users.get(role, []) for role in self.required_roles},
+            priority_user_ids,
+        )
+
+
+def parse_required_roles(required_roles: str | None) -> tuple[str, ...]:
+    """カンマ区切りの必須役職を分割する."""
+    if not required_roles:
+        return ()
+    return tuple(role.strip() for role in required_roles.split(",") if role.strip())
+
+
+async def _load_snapshot(db: AsyncSession, poll_id: uuid.UUID) -> PollAnalysisSnapshot | None:
+    """分析用データをDBから読み込む."""
+    poll = (
+        await db.execute(
+            select(SchedulePoll)
+            .where(SchedulePoll.id == poll_id)
+            .options(
+                selectinload(SchedulePoll.candidates).selectinload(SchedulePollCandidate.answers)
+            )
+            # セッションに読み込み済みの回答があっても最新の値で上書きする
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one_or_none()
+    if poll is None:
+        return None
+
+    members = (
+        await db.execute(
+            select(
+                ProjectMember.user_id,
+                ProjectMember.display_name,
+                ProjectMember.default_staff_role,
+            ).where(ProjectMember.project_id == poll.project_id)
+        )
+    ).all()
+
+    script_id = await db.scalar(
+        select(Script.id)
+        .where(Script.project_id == poll.project_id)
+        .order_by(Script.revision.desc())
+        .limit(1)
+    )
+
+    scenes: list[RecommendationScene] = []
+    scene_characters: dict[uuid.UUID, list[uuid.UUID]] = {}
+    castings: list[PollCastingSnapshot] = []
+    if script_id is not None:
+        scene_result = await db.execute(
+            select(Scene.id, Scene.act_number, Scene.scene_number, Scene.heading)
+            .where(Scene.script_id == script_id)
+            .order_by(Scene.act_number, Scene.scene_number)
+        )
+        scenes = [RecommendationScene(*row) for row in scene_result.all()]
+
+        mapping_result = await db.execute(
+            select(SceneCharacterMapping.scene_id, SceneCharacterMapping.character_id)
+            .join(SceneCharacterMapping.scene)
+            .where(Scene.script_id == script_id)
+        )
+        for scene_id, character_id in mapping_result.all():
+            scene_characters.setdefault(scene_id, []).append(character_id)
+
+        casting_result = await db.execute(
+            select(CharacterCasting.character_id, Character.name, CharacterCasting.user_id)
+            .join(Character)
+            .where(Character.script_id == script_id)
+        )
+        castings = [PollCastingSnapshot(*row) for row in casting_result.all()]
+
+    return PollAnalysisSnapshot(
+        poll_id=poll.id,
+        project_id=poll.project_id,
+        required_roles=parse_required_roles(poll.required_roles),
+        candidates=tuple(
+            PollCandidateSnapshot(
+                id=candidate.id,
+                start_datetime=candidate.start_datetime,
+                end_datetime=candidate.end_datetime,
+                answers=tuple(
+                    PollAnswerSnapshot(user_id=answer.user_id, status=answer.status)
+                    for answer in candidate.answers
+                ),
+            )
+            for candidate in poll.candidates
+        ),
+        members=tuple(PollMemberSnapshot(*row) for row in members),
+        script_id=script_id,
+        scenes=tuple(scenes),
+        scene_characters=scene_characters,
+        castings=tuple(castings),
+    )
+
+
+def _scene_info(scene: RecommendationScene) -> dict:
+    return {
+        "scene_id": str(scene.id),
+        "act_number": scene.act_number,
+        "scene_number": scene.scene_number,
+        "heading": f"{scene.act_number or 0}-{scene.scene_number}: {scene.heading}",
+    }
+
+
+class PollAnalysis:
+    """日程調整の分析（おすすめ日程・カレンダー分析）.
+
+    スナップショットから候補日程ごとの出席状況を作り、分析結果を候補日程ごとに保持する。
+    回答が変わった候補日程は出席状況の version が進むため、その候補日程だけ作り直す。
+    """
+
+    def __init__(self, snapshot: PollAnalysisSnapshot) -> None:
+        self.snapshot = snapshot
+        self.engine = snapshot.engine
+        self.states: dict[uuid.UUID, CandidateAvailability] = {
+            candidate.id: self.engine.build(candidate) for candidate in snapshot.candidates
+        }
+        # 候補日程ID → (version, 結果)
+        self._evaluations: dict[uuid.UUID, tuple[int, dict | None]] = {}
+        self._calendar_entries: dict[uuid.UUID, tuple[int, dict]] = {}
+        self._recommendations: list[dict] | None = None
+
+        # ユーザー名・役職（役職 + 配役名）
+        self._user_names = {
+            m.user_id: (m.display_name or f"User {str(m.user_id)[:8]}") for m in snapshot.members
+        }
+        user_roles = {
+            m.user_id: [m.default_staff_role] if m.default_staff_role else []
+            for m in snapshot.members
+        }
+        self._character_names: dict[uuid.UUID, str] = {}
+        for casting in snapshot.castings:
+            self._character_names[casting.character_id] = casting.character_name
+            if casting.user_id in user_roles:
+                user_roles[casting.user_id].append(casting.character_name)
+        self._user_roles = {
+            user_id: " / ".join(roles) if roles else None for user_id, roles in user_roles.items()
+        }
+
+        # シーンごとの表示情報と、稽古可能な場合の理由（未配役の有無で決まる）
+        self._scene_infos = [_scene_info(scene) for scene in self.engine.scenes]
+        self._possible_reasons: list[tuple[str, bool]] = []
+        for scene in self.engine.scenes:
+            character_ids = snapshot.scene_characters.get(scene.id, [])
+            uncast = [
+                self._character_names.get(c, "Unknown")
+                for c in character_ids
+                if not snapshot.character_users.get(c)
+            ]
+            reason = "全員揃っています" if character_ids else "登場キャラクターなし"
+            if uncast:
+                reason = f"未配役あり({', '.join(uncast[:2])}{'等' if len(uncast) > 2 else ''})"
+            self._possible_reasons.append((reason, bool(uncast)))
+
+    def apply_answer(self, candidate_id: uuid.UUID, user_id: uuid.UUID, status: str) -> bool:
+        """回答の変更を反映する.
+
+        Args:
+            candidate_id: 候補日程ID
+            user_id: ユーザーID
+            status: 回答
+
+        Returns:
+            bool: 反映できたか（候補日程が分析対象にない場合は False）
+        """
+        state = self.states.get(candidate_id)
+        if state is None:
+            return False
+        if self.engine.apply_answer(state, user_id, status):
+            self._recommendations = None
+        return True
+
+    def candidates(self) -> list[PollCandidateSnapshot]:
+        """現在の回答を反映した候補日程."""
+        return [
+            PollCandidateSnapshot(
+                id=state.id,
+                start_datetime=state.start_datetime,
+                end_datetime=state.end_datetime,
+                answers=tuple(
+                    PollAnswerSnapshot(user_id=user_id, status=status)
+                    for user_id, status in state.answers.items()
+                ),
+            )
+            for state in self.states.values()
+        ]
+
+    def recommendations(self) -> list[dict]:
+        """おすすめ日程（スコアの高い順）."""
+        if self._recommendations is None:
+            # 脚本が設定されていない場合のフォールバック（全体出席数に基づく）
+            if self.snapshot.script_id is None:
+                self._recommendations = recommend_by_attendance(self.candidates())
+            else:
+                self._recommendations = top_recommendations(
+                    self._evaluate(state) for state in self.states.values()
+                )
+        return list(self._recommendations)
+
+    def _evaluate(self, state: CandidateAvailability) -> dict | None:
+        cached = self._evaluations.get(state.id)
+        if cached is None or cached[0] != state.version:
+            cached = self._evaluations[state.id] = (
+                state.version,
+                self.engine.evaluate_state(state),
+            )
+        return cached[1]
+
+    def calendar_analysis(self) -> dict:
+        """カレンダー表示用の詳細分析（正引き・リーチ判定込）."""
+        poll_id = self.snapshot.poll_id
+        if self.snapshot.script_id is None:
+            return {"poll_id": poll_id, "analyses": []}
+
+        analyses = []
+        for state in self.states.values():
+            cached = self._calendar_entries.get(state.id)
+            if cached is None or cached[0] != state.version:
+                cached = self._calendar_entries[state.id] = (
+                    state.version,
+                    self._calendar_entry(state),
+                )
+            analyses.append(cached[1])
+        return {
+            "poll_id": poll_id,
+            "all_scenes": [dict(info) for info in self._scene_infos],
+            "analyses": analyses,
+        }
+
+    def _calendar_entry(self, state: CandidateAvailability) -> dict:
+        engine = self.engine
+        user_names = self._user_names
+
+        # 必須役職は、役職の誰かが OK/Maybe なら揃っているとみなす
+        available_mask = state.ok_users | state.maybe_users
+        missing_roles = any(not (mask & available_mask) for _, mask in engine.role_masks)
+
+        possible_scenes = []
+        reach_scenes = []
+        # 必須役職が足りない場合は、役者が揃っていても不可能なのでリーチにも入れない
+        if not missing_roles:
+            for index in iter_bits(state.possible_scenes):
+                reason, uncast_exists = self._possible_reasons[index]
+                possible_scenes.append(
+                    {
+                        **self._scene_infos[index],
+                        "is_possible": True,
+                        "uncast_chars_exist": uncast_exists,
+                        "reason": reason,
+                    }
+                )
+            # リーチ状態（ちょうど1人足りない場合のみ）
+            for index in iter_bits(state.reach_scenes):
+                blocked = engine.scene_masks[index] & state.blocked_characters
+                character_id = engine.character_ids[blocked.bit_length() - 1]
+                character_name = self._character_names.get(character_id, "Unknown")
+                reach_scenes.append(
+                    {
+                        **self._scene_infos[index],
+                        "is_possible": False,
+                        "is_reach": True,
+                        "missing_user_names": [
+                            user_names.get(uid, "未配役")
+                            for uid in self.snapshot.character_users[character_id]
+                        ],
+                        "uncast_chars_exist": self._possible_reasons[index][1],
+                        "reason": f"不足: {character_name}",
+                    }
+                )
+
+        # メンバー詳細情報の構築
+        available_users = [
+            uid for uid, status in state.answers.items() if status in AVAILABLE_STATUSES
+        ]
+        maybe_users = [uid for uid, status in state.answers.items() if status == "maybe"]
+        available_members = []
+        maybe_members = []
+        for uid in available_users:
+            member_info = {
+                "user_id": uid,
+                "name": user_names.get(uid, "Unknown"),
+                "role": self._user_roles.get(uid),
+            }
+            available_members.append(member_info)
+            if state.answers[uid] == "maybe":
+                maybe_members.append(member_info)
+
+        return {
+            "candidate_id": state.id,
+            "start_datetime": state.start_datetime,
+            "end_datetime": state.end_datetime,
+            "possible_scenes": possible_scenes,
+            "reach_scenes": reach_scenes,
+            "available_users": available_users,
+            "maybe_users": maybe_users,
+            "available_user_names": [user_names.get(uid, "Unknown") for uid in available_users],
+            "maybe_user_names": [user_names.get(uid, "Unknown") for uid in maybe_users],
+            "available_members": available_members,
+            "maybe_members": maybe_members,
+        }
+
+
+_ANALYSIS_CACHE_SIZE = 128
+# poll_id → (読み込み時刻, 回答の版, 分析)
+_analysis_cache: OrderedDict[uuid.UUID, tuple[float, tuple, PollAnalysis]] = OrderedDict()
+# 更新のたびに進める。読み込み中に更新された場合は古い可能性があるため保存しない
+_generation = 0
+
+
+async def _load_answer_version(db: AsyncSession, poll_id: uuid.UUID) -> tuple:
+    """日程調整の回答の版（回答の件数と最終更新日時）を取得する."""
+    result = await db.execute(
+        select(func.count(SchedulePollAnswer.id), func.max(SchedulePollAnswer.updated_at))
+        .join(SchedulePollCandidate, SchedulePollAnswer.candidate_id == SchedulePollCandidate.id)
+        .where(SchedulePollCandidate.poll_id == poll_id)
+    )
+    return tuple(result.one())
+
+
+async def load_poll_analysis(db: AsyncSession, poll_id: uuid.UUID) -> PollAnalysis | None:
+    """日程調整の分析を取得する（キャッシュ優先）.
+
+    Args:
+        db: データベースセッション
+        poll_id: 日程調整ID
+
+    Returns:
+        PollAnalysis | None: 分析（日程調整が存在しない場合は None）
+    """
+    ttl = settings.poll_analysis_cache_ttl_seconds
+    if ttl <= 0:
+        snapshot = await _load_snapshot(db, poll_id)
+        return PollAnalysis(snapshot) if snapshot is not None else None
+
+    loaded_at = time.monotonic()
+    generation = _generation
+    # 版はスナップショットより先に読む（間に回答が変わった場合は次の読み出しで検出される）
+    version = await _load_answer_version(db, poll_id)
+    cached = _analysis_cache.get(poll_id)
+    if cached is not None and loaded_at - cached[0] < ttl and cached[1] == version:
+        _analysis_cache.move_to_end(poll_id)
+        return cached[2]
+
+    snapshot = await _load_snapshot(db, poll_id)
+    if snapshot is None:
+        _analysis_cache.pop(poll_id, None)
+        return None
+    analysis = PollAnalysis(snapshot)
+    if generation == _generation:
+        _analysis_cache[poll_id] = (loaded_at, version, analysis)
+        _analysis_cache.move_to_end(poll_id)
+        while len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    return analysis
+
+
+async def apply_poll_answer(
+    db: AsyncSession,
+    poll_id: uuid.UUID,
+    candidate_id: uuid.UUID,
+    user_id: uuid.UUID,
+    status: str,
+) -> None:
+    """キャッシュ済みの分析に回答の変更を反映する（回答のコミット後に呼び出す）.
+
+    反映後の回答の版を記録し、次の読み出しで読み直さずに済むようにする。
+    分析がキャッシュにない場合は何もしない（次の読み出しでDBから読み込む）。
+    """
+    global _generation
+    _generation += 1
+    cached = _analysis_cache.get(poll_id)
+    if cached is None:
+        return
+    loaded_at, _, analysis = cached
+    if not analysis.apply_answer(candidate_id, user_id, status):
+        _analysis_cache.pop(poll_id, None)
+        return
+    version = await _load_answer_version(db, poll_id)
+    # 版を読む間に読み直し・破棄された場合はそちらを優先する
+    if _analysis_cache.get(poll_id) is cached:
+        _analysis_cache[poll_id] = (loaded_at, version, analysis)
+
+
+def invalidate_poll_analysis(poll_id: uuid.UUID) -> None:
+    """日程調整の分析を破棄する（設定の変更・削除時に呼び出す）."""
+    global _generation
+    _generation += 1
+    _analysis_cache.pop(poll_id, None)
@@ -0,0 +1,507 @@
+"""日程調整のレコメンドエンジン.
+
+候補日程ごとの回答と、シーン → 登場人物 → キャストの対応をビット集合（int）で表し、
+候補日程 × シーンの稽古可否とスコアをビット演算でまとめて計算する。
+
+- ユーザー集合: 配役・役職に現れるユーザーにビットを割り当てたマスク
+- 登場人物集合: 香盤表に現れる登場人物にビットを割り当てたマスク
+- シーン集合: 稽古可能なシーン・あと1人で稽古可能なシーン（リーチ）のマスク
+
+候補日程ごとに「OKのキャストがいる登場人物」「Maybeのみの登場人物」「誰も来られない
+登場人物」の3つのマスクを作れば、各シーンの判定は AND と popcount だけで済む。
+これらは CandidateAvailability に保持し、1人の回答が変わったときはその人の配役と
+登場シーンの分だけ差分更新する。
+"""
+
+import heapq
+import uuid
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+# レコメンドとして返す候補日程数・候補日程ごとのシーン数
+RECOMMENDATION_LIMIT = 3
+SCENE_LIMIT = 5
+
+# スコアの重み
+OK_CHARACTER_SCORE = 10
+MAYBE_CHARACTER_SCORE = 5
+OK_PRIORITY_SCORE = 20
+MAYBE_PRIORITY_SCORE = 10
+FALLBACK_OK_SCORE = 5
+
+# 出席とみなす回答
+AVAILABLE_STATUSES = ("ok", "maybe")
+
+# 登場人物の状態（CandidateAvailability の集計先の添字を兼ねる）
+_UNCAST, _BLOCKED, _MAYBE, _OK = range(4)
+
+
+class PollAnswerLike(Protocol):
+    """回答（SchedulePollAnswer 相当）."""
+
+    user_id: uuid.UUID
+    status: str
+
+
+class PollCandidateLike(Protocol):
+    """候補日程（SchedulePollCandidate 相当）."""
+
+    id: uuid.UUID
+    start_datetime: Any
+    end_datetime: Any
+    answers: Sequence[PollAnswerLike]
+
+
+@dataclass(frozen=True)
+class RecommendationScene:
+    """レコメンド対象のシーン."""
+
+    id: uuid.UUID
+    act_number: int | None
+    scene_number: int
+    heading: str
+
+
+class _BitIndex:
+    """キーに通し番号のビットを割り当てる."""
+
+    def __init__(self) -> None:
+        self.bits: dict[uuid.UUID, int] = {}
+
+    def add(self, key: uuid.UUID) -> int:
+        bit = self.bits.get(key)
+        if bit is None:
+            bit = self.bits[key] = 1 << len(self.bits)
+        return bit
+
+    def mask(self, keys: Iterable[uuid.UUID]) -> int:
+        mask = 0
+        for key in keys:
+            mask |= self.add(key)
+        return mask
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """マスクの立っているビット位置を小さい順に返す."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CandidateAvailability:
+    """1つの候補日程の出席状況.
+
+    回答（ユーザーマスク）、登場人物ごとの出席可能なキャスト数、シーンごとの
+    「誰も来られない登場人物」の数などを保持する。PollRecommendationEngine が
+    作成・更新し、version は回答が変わるたびに増える。
+    """
+
+    __slots__ = (
+        "id",
+        "start_datetime",
+        "end_datetime",
+        "answers",
+        "ok_users",
+        "maybe_users",
+        "ng_users",
+        "character_ok",
+        "character_available",
+        "ok_characters",
+        "maybe_characters",
+        "blocked_characters",
+        "scene_blocked",
+        "scene_ok",
+        "scene_maybe",
+        "possible_scenes",
+        "reach_scenes",
+        "version",
+    )
+
+    def __init__(self, candidate: PollCandidateLike) -> None:
+        self.id = candidate.id
+        self.start_datetime = candidate.start_datetime
+        self.end_datetime = candidate.end_datetime
+        # ユーザーID → 回答（回答順）
+        self.answers: dict[uuid.UUID, str] = {a.user_id: a.status for a in candidate.answers}
+        self.ok_users = self.maybe_users = self.ng_users = 0
+        # 登場人物ごとの OK / 出席可能（OK・Maybe）なキャスト数
+        self.character_ok: list[int] = []
+        self.character_available: list[int] = []
+        self.ok_characters = self.maybe_characters = self.blocked_characters = 0
+        # シーンごとの 誰も来られない / Maybeのみ / OKあり の登場人物数
+        self.scene_blocked: list[int] = []
+        self.scene_maybe: list[int] = []
+        self.scene_ok: list[int] = []
+        # 稽古可能なシーン・リーチのシーン（シーン順のビット）
+        self.possible_scenes = self.reach_scenes = 0
+        self.version = 0
+
+    @property
+    def ok_count(self) -> int:
+        """OKと回答した人数."""
+        return sum(1 for status in self.answers.values() if status == "ok")
+
+
+class PollRecommendationEngine:
+    """候補日程 × シーンの稽古可否とスコアを計算する.
+
+    脚本・配役・役職から作る静的な部分（シーン・登場人物・キャストのマスク）は
+    初期化時に一度だけ組み立て、候補日程ごとの回答は CandidateAvailability にする。
+    """
+
+    def __init__(
+        self,
+        scenes: Iterable[RecommendationScene],
+        scene_characters: Mapping[uuid.UUID, Iterable[uuid.UUID]],
+        character_users: Mapping[uuid.UUID, Iterable[uuid.UUID]],
+        required_role_users: Mapping[str, Iterable[uuid.UUID]],
+        priority_user_ids: Iterable[uuid.UUID],
+    ) -> None:
+        """エンジンを初期化.
+
+        Args:
+            scenes: シーン（表示順。あらすじ scene_number <= 0 は除外される）
+            scene_characters: シーンID → 登場人物ID（登場順）
+            character_users: 登場人物ID → キャストのユーザーID（ダブルキャスト可）
+            required_role_users: 必須役職 → その役職のユーザーID（必須役職の順）
+            priority_user_ids: スコアを加点する優先メンバー
+        """
+        self._users = _BitIndex()
+        characters = _BitIndex()
+
+        self.scenes = [scene for scene in scenes if scene.scene_number > 0]
+        self.scene_masks = [
+            characters.mask(scene_characters.get(scene.id, ())) for scene in self.scenes
+        ]
+        # シーン内の登場人物の並び（ビット位置、重複なし）
+        self.scene_character_order = [
+            list(
+                dict.fromkeys(
+                    characters.bits[c].bit_length() - 1 for c in scene_characters.get(scene.id, ())
+                )
+            )
+            for scene in self.scenes
+        ]
+        self.character_ids = list(characters.bits)
+        # 登場人物のビット順に並べたキャスト
+        self.character_users = [
+            list(dict.fromkeys(character_users.get(character_id, ())))
+            for character_id in self.character_ids
+        ]
+        self._cast_masks = [self._users.mask(users) for users in self.character_users]
+        self.uncast_mask = 0
+        for index, cast_mask in enumerate(self._cast_masks):
+            if not cast_mask:
+                self.uncast_mask |= 1 << index
+        self.role_masks = [
+            (role, self._users.mask(user_ids)) for role, user_ids in required_role_users.items()
+        ]
+        self._priority_mask = self._users.mask(priority_user_ids)
+
+        # 差分更新用の逆引き（ユーザー → 配役、登場人物 → 登場シーン）
+        self._user_characters: dict[int, list[int]] = {}
+        for index, users in enumerate(self.character_users):
+            for user_id in users:
+                self._user_characters.setdefault(self._users.bits[user_id], []).append(index)
+        self._character_scenes: list[list[int]] = [[] for _ in self.character_ids]
+        for scene_index, mask in enumerate(self.scene_masks):
+            for character_index in iter_bits(mask):
+                self._character_scenes[character_index].append(scene_index)
+
+    def user_mask(self, user_ids: Iterable[uuid.UUID]) -> int:
+        """ユーザーIDの集合をマスクにする（対象外のユーザーは無視）."""
+        bits = self._users.bits
+        mask = 0
+        for user_id in user_ids:
+            mask |= bits.get(user_id, 0)
+        return mask
+
+    def build(self, candidate: PollCandidateLike) -> CandidateAvailability:
+        """候補日程の回答から出席状況を組み立てる.
+
+        Args:
+            candidate: 回答付きの候補日程
+
+        Returns:
+            CandidateAvailability: 出席状況
+        """
+        state = CandidateAvailability(candidate)
+        bits = self._users.bits
+        for user_id, status in state.answers.items():
+            bit = bits.get(user_id)
+            if bit is None:
+                continue
+            if status == "ok":
+                state.ok_users |= bit
+            elif status == "maybe":
+                state.maybe_users |= bit
+            elif status == "ng":
+                state.ng_users |= bit
+
+        # 登場人物ごとの出席状況（ダブルキャストは1人でも来られればよい）
+        ok, available = state.ok_users, state.ok_users | state.maybe_users
+        for index, cast_mask in enumerate(self._cast_masks):
+            ok_count = (cast_mask & ok).bit_count()
+            available_count = (cast_mask & available).bit_count()
+            state.character_ok.append(ok_count)
+            state.character_available.append(available_count)
+            if not cast_mask:
+                continue
+            if ok_count:
+                state.ok_characters |= 1 << index
+            elif available_count:
+                state.maybe_characters |= 1 << index
+            else:
+                state.blocked_characters |= 1 << index
+
+        for index, mask in enumerate(self.scene_masks):
+            blocked = (mask & state.blocked_characters).bit_count()
+            state.scene_blocked.append(blocked)
+            state.scene_maybe.append((mask & state.maybe_characters).bit_count())
+            state.scene_ok.append((mask & state.ok_characters).bit_count())
+            if blocked == 0:
+                state.possible_scenes |= 1 << index
+            elif blocked == 1:
+                state.reach_scenes |= 1 << index
+        return state
+
+    def _character_state(self, state: CandidateAvailability, index: int) -> int:
+        if not self._cast_masks[index]:
+            return _UNCAST
+        if state.character_ok[index]:
+            return _OK
+        return _MAYBE if state.character_available[index] else _BLOCKED
+
+    def apply_answer(
+        self, state: CandidateAvailability, user_id: uuid.UUID, status: str | None
+    ) -> bool:
+        """1人の回答の変更を出席状況に反映する.
+
+        更新するのはそのユーザーの配役と、その登場人物が出るシーンのみ。
+
+        Args:
+            state: 出席状況
+            user_id: 回答したユーザーID
+            status: 新しい回答（None は回答の取り消し）
+
+        Returns:
+            bool: 変更があったか
+        """
+        previous = state.answers.get(user_id)
+        if previous == status:
+            return False
+        if status is None:
+            del state.answers[user_id]
+        else:
+            state.answers[user_id] = status
+        state.version += 1
+
+        bit = self._users.bits.get(user_id)
+        if bit is None:
+            return True
+        state.ok_users = state.ok_users | bit if status == "ok" else state.ok_users & ~bit
+        state.maybe_users = (
+            state.maybe_users | bit if status == "maybe" else state.maybe_users & ~bit
+        )
+        state.ng_users = state.ng_users | bit if status == "ng" else state.ng_users & ~bit
+
+        ok_delta = (status == "ok") - (previous == "ok")
+        available_delta = (status in AVAILABLE_STATUSES) - (previous in AVAILABLE_STATUSES)
+        if not ok_delta and not available_delta:
+            return True
+
+        # 添字は登場人物の状態（_BLOCKED / _MAYBE / _OK）
+        scene_counters = (None, state.scene_blocked, state.scene_maybe, state.scene_ok)
+        for index in self._user_characters.get(bit, ()):
+            before = self._character_state(state, index)
+            state.character_ok[index] += ok_delta
+            state.character_available[index] += available_delta
+            after = self._character_state(state, index)
+            if before == after:
+                continue
+
+            character_bit = 1 << index
+            state.ok_characters &= ~character_bit
+            state.maybe_characters &= ~character_bit
+            state.blocked_characters &= ~character_bit
+            if after == _OK:
+                state.ok_characters |= character_bit
+            elif after == _MAYBE:
+                state.maybe_characters |= character_bit
+            else:
+                state.blocked_characters |= character_bit
+
+            for scene_index in self._character_scenes[index]:
+                scene_counters[before][scene_index] -= 1
+                scene_counters[after][scene_index] += 1
+                scene_bit = 1 << scene_index
+                blocked = state.scene_blocked[scene_index]
+                state.possible_scenes &= ~scene_bit
+                state.reach_scenes &= ~scene_bit
+                if blocked == 0:
+                    state.possible_scenes |= scene_bit
+                elif blocked == 1:
+                    state.reach_scenes |= scene_bit
+        return True
+
+    def missing_roles(self, state: CandidateAvailability) -> list[str]:
+        """必須役職のうち、役職の全員がNGと回答したもの."""
+        return [role for role, mask in self.role_masks if mask and (mask & ~state.ng_users) == 0]
+
+    def evaluate_state(self, state: CandidateAvailability) -> dict | None:
+        """出席状況からレコメンドを作る.
+
+        Args:
+            state: 出席状況
+
+        Returns:
+            dict | None: レコメンド（スコアが0で回答もある場合は None）
+        """
+        missing_roles = self.missing_roles(state)
+
+        possible_scenes: list[dict] = []
+        if not missing_roles:
+            priority_ok = bool(self._priority_mask & state.ok_users)
+            priority_score = (
+                OK_PRIORITY_SCORE * (self._priority_mask & state.ok_users).bit_count()
+                + MAYBE_PRIORITY_SCORE * (self._priority_mask & state.maybe_users).bit_count()
+            )
+
+            feasible = [
+                (
+                    OK_CHARACTER_SCORE * state.scene_ok[index]
+                    + MAYBE_CHARACTER_SCORE * state.scene_maybe[index]
+                    + priority_score,
+                    index,
+                )
+                for index in iter_bits(state.possible_scenes)
+            ]
+            # スコア降順（同点はシーン順）の上位のみ整形する
+            for score, index in heapq.nlargest(SCENE_LIMIT, feasible, key=lambda x: x[0]):
+                scene = self.scenes[index]
+                mask = self.scene_masks[index]
+                ok_count = state.scene_ok[index]
+
+                reason_parts = []
+                if not mask:
+                    reason_parts.append("キャラクターの登場なし")
+                elif mask & self.uncast_mask:
+                    reason_parts.append("未配役あり(配役済みは全員出席可)")
+                elif ok_count == mask.bit_count():
+                    reason_parts.append("必須キャスト全員出席可能")
+                elif ok_count > 0:
+                    reason_parts.append(f"必須キャスト{ok_count}名出席可能")
+                if priority_ok:
+                    reason_parts.append("演出・制作メンバー出席可能")
+
+                possible_scenes.append(
+                    {
+                        "scene_id": scene.id,
+                        "act_number": scene.act_number,
+                        "scene_number": scene.scene_number,
+                        "scene_heading": (
+                            f"{scene.act_number or 0}-{scene.scene_number}: {scene.heading}"
+                        ),
+                        "score": score,
+                        "reason": " / ".join(reason_parts),
+                    }
+                )
+
+        # 理由とスコアの決定（シーンスコアがあればそれ、なければ全体出席数ベース）
+        if possible_scenes:
+            summary_reason = possible_scenes[0]["reason"] or "稽古可能なシーンあり"
+            total_score = possible_scenes[0]["score"]
+        elif missing_roles:
+            summary_reason = f"不足役職: {', '.join(missing_roles)}"
+            total_score = 0
+        else:
+            ok_count_total = state.ok_count
+            summary_reason = (
+                f"出席可能者: {ok_count_total}名"
+                if ok_count_total > 0
+                else "稽古可能なメンバーがいます"
+            )
+            total_score = ok_count_total * FALLBACK_OK_SCORE
+
+        if total_score <= 0 and state.answers:
+            return None
+        return {
+            "candidate_id": state.id,
+            "start_datetime": state.start_datetime,
+            "end_datetime": state.end_datetime,
+            "possible_scenes": possible_scenes,
+            "reason": summary_reason,
+            "score": total_score,
+        }
+
+    def evaluate(self, candidate: PollCandidateLike) -> dict | None:
+        """1つの候補日程を評価する.
+
+        Args:
+            candidate: 回答付きの候補日程
+
+        Returns:
+            dict | None: レコメンド（スコアが0で回答もある場合は None）
+        """
+        return self.evaluate_state(self.build(candidate))
+
+    def recommend(
+        self, candidates: Iterable[PollCandidateLike], limit: int = RECOMMENDATION_LIMIT
+    ) -> list[dict]:
+        """おすすめ度の高い候補日程を返す.
+
+        Args:
+            candidates: 回答付きの候補日程
+            limit: 返す件数
+
+        Returns:
+            list[dict]: スコア降順のレコメンド（同点は候補日程の順）
+        """
+        return top_recommendations(self.evaluate(candidate) for candidate in candidates)[:limit]
+
+
+def top_recommendations(
+    recommendations: Iterable[dict | None], limit: int = RECOMMENDATION_LIMIT
+) -> list[dict]:
+    """レコメンドをスコア降順（同点は元の順）に並べ、上位を返す."""
+    return heapq.nlargest(
+        limit, (r for r in recommendations if r is not None), key=lambda r: r["score"]
+    )
+
+
+def recommend_by_attendance(
+    candidates: Iterable[PollCandidateLike], limit: int = RECOMMENDATION_LIMIT
+) -> list[dict]:
+    """脚本がない場合のレコメンド（全体の出席可能人数のみで判定）.
+
+    Args:
+        candidates: 回答付きの候補日程
+        limit: 返す件数
+
+    Returns:
+        list[dict]: OK人数の多い順のレコメンド
+    """
+    scored = []
+    for candidate in candidates:
+        ok_count = sum(1 for a in candidate.answers if a.status == "ok")
+        maybe_count = sum(1 for a in candidate.answers if a.status == "maybe")
+        if ok_count * OK_CHARACTER_SCORE + maybe_count * MAYBE_CHARACTER_SCORE > 0 or (
+            not candidate.answers
+        ):
+            scored.append(
+                (
+                    ok_count,
+                    {
+                        "candidate_id": candidate.id,
+                        "start_datetime": candidate.start_datetime,
+                        "end_datetime": candidate.end_datetime,
+                        "possible_scenes": [],
+                        "reason": f"出席可能者: {ok_count}名"
+                        if ok_count > 0
+                        else "稽古可能なメンバーがいます",
+                    },
+                )
+            )
+    return [item for _, item in heapq.nlargest(limit, scored, key=lambda x: x[0])]
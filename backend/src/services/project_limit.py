@@ -1,12 +1,33 @@
+"""プロジェクト作成枠（非公開プロジェクト数の上限）と制限モードの判定.
+
+編集系の権限チェックのたびに制限状態を判定するため、作成者ごとの非公開プロジェクトID
+（作成順）とプロジェクトの作成者をプロセス内にキャッシュする。上限はユーザーのパスワードと
+プレミアム設定から毎回計算するため、パスワード変更や月替わりの更新はそのまま反映される。
+プロジェクトの作成・削除・公開設定の変更時は invalidate_restricted_projects を呼び出す。
+他のワーカープロセスの変更は最大で project_restriction_cache_ttl_seconds 遅れて反映される。
+"""
+
+import time
+from collections import OrderedDict
 from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.cache import get_cached_user
+from src.config import settings
 from src.db.models import TheaterProject, User
 from src.services.premium_config import PremiumConfigService
 
+_CACHE_SIZE = 1024
+# 作成者ID → (読み込み時刻, 非公開プロジェクトIDの作成順リスト)
+_private_projects: OrderedDict[UUID, tuple[float, tuple[UUID, ...]]] = OrderedDict()
+# プロジェクトID → 作成者ID（作成後は変わらないため TTL なし）
+_project_creators: OrderedDict[UUID, UUID | None] = OrderedDict()
+# 無効化のたびに進める。読み込み中に無効化された場合は古い可能性があるため保存しない
+_generation = 0
+
 
 async def get_user_project_limit(user: User) -> int:
     """ユーザーの現在のプロジェクト作成上限数を取得する."""
@@ -28,23 +49,77 @@ async def get_user_project_limit(user: User) -> int:
         return 1
 
 
+async def _get_private_project_ids(user_id: UUID, db: AsyncSession) -> tuple[UUID, ...]:
+    """ユーザーが「枠主」の非公開プロジェクトIDを古い順に取得する（キャッシュ優先）."""
+    ttl = settings.project_restriction_cache_ttl_seconds
+    cached = _private_projects.get(user_id)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        _private_projects.move_to_end(user_id)
+        return cached[1]
+
+    loaded_at = time.monotonic()
+    generation = _generation
+    stmt = (
+        select(TheaterProject.id)
+        .where(TheaterProject.created_by_id == user_id, TheaterProject.is_public == False)
+        .order_by(TheaterProject.created_at.asc())
+    )
+    result = await db.execute(stmt)
+    project_ids = tuple(row[0] for row in result.all())
+
+    if ttl > 0 and generation == _generation:
+        _private_projects[user_id] = (loaded_at, project_ids)
+        _private_projects.move_to_end(user_id)
+        while len(_private_projects) > _CACHE_SIZE:
+            _private_projects.popitem(last=False)
+    return project_ids
+
+
+async def _get_project_creator_id(project_id: UUID, db: AsyncSession) -> UUID | None:
+    """プロジェクトの作成者IDを取得する（キャッシュ優先、存在しない場合は None）."""
+    if project_id in _project_creators:
+        _project_creators.move_to_end(project_id)
+        return _project_creators[project_id]
+
+    generation = _generation
+    project = await db.get(TheaterProject, project_id)
+    if not project:
+        return None
+
+    if settings.project_restriction_cache_ttl_seconds > 0 and generation == _generation:
+        _project_creators[project_id] = project.created_by_id
+        while len(_project_creators) > _CACHE_SIZE:
+            _project_creators.popitem(last=False)
+    return project.created_by_id
+
+
+def invalidate_restricted_projects(user_id: UUID | None, project_id: UUID | None = None) -> None:
+    """制限状態のキャッシュを破棄する.
+
+    プロジェクトの作成・削除・公開設定の変更をコミットした後に呼び出す。
+
+    Args:
+        user_id: プロジェクトの作成者ID
+        project_id: 削除したプロジェクトID
+    """
+    global _generation
+    _generation += 1
+    if user_id is not None:
+        _private_projects.pop(user_id, None)
+    if project_id is not None:
+        _project_creators.pop(project_id, None)
+
+
 async def get_user_restricted_project_ids(user_id: UUID, db: AsyncSession) -> set[UUID]:
     """ユーザーが『枠主（作成者）』である非公開プロジェクトの中で、制限されているIDセットを取得する."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await get_cached_user(db, user_id)
     if not user:
         return set()
 
     limit = await get_user_project_limit(user)
 
     # ユーザーが「枠主」の非公開プロジェクトを古い順に取得
-    stmt = (
-        select(TheaterProject.id)
-        .where(TheaterProject.created_by_id == user_id, TheaterProject.is_public == False)
-        .order_by(TheaterProject.created_at.asc())
-    )
-    result = await db.execute(stmt)
-    project_ids = [row[0] for row in result.all()]
+    project_ids = await _get_private_project_ids(user_id, db)
 
     if len(project_ids) <= limit:
         return set()
@@ -57,15 +132,13 @@ async def is_project_restricted(project_id: UUID, db: AsyncSession) -> bool:
 
     プロジェクトの『枠主（作成者）』のプラン上限に基づいて判定します（他オーナーの枠は消費しない）。
     """
-    project = await db.get(TheaterProject, project_id)
-    if not project or project.is_public:
-        return False
-
-    if not project.created_by_id:
-        return False  # 枠主不明の場合は制限なし
+    creator_id = await _get_project_creator_id(project_id, db)
+    if not creator_id:
+        return False  # プロジェクトが存在しない、または枠主不明の場合は制限なし
 
-    restricted_ids = await get_user_restricted_project_ids(project.created_by_id, db)
-    return project.id in restricted_ids
+    # 公開プロジェクトは枠主の非公開プロジェクトに含まれないため、制限されない
+    restricted_ids = await get_user_restricted_project_ids(creator_id, db)
+    return project_id in restricted_ids
 
 
 async def check_project_limit(
@@ -9,7 +9,7 @@ from sqlalchemy.orm import selectinload
 
 from src.db import async_session_maker
 from src.db.models import Milestone
-from src.services.email import email_service
+from src.services.email import EventReminderRecipient, email_service
 
 logger = logging.getLogger(__name__)
 
@@ -61,45 +61,45 @@ async def _do_check_todays_events(db: AsyncSession, stats: dict[str, int]) -> di
         pending_reservations = [r for r in milestone.reservations if r.reminder_sent_at is None]
 
         stats["checked_reservations"] += len(pending_reservations)
-
-        for reservation in pending_reservations:
-            try:
-                # プロジェクト情報取得
-                project = milestone.project
-                if not project:
-                    logger.warning(f"Project not found for milestone {milestone.id}")
-                    stats["errors"] += 1
-                    continue
-
-                # 日時をJSTに変換
-                start_date_utc = milestone.start_date.replace(tzinfo=UTC)
-                start_date_jst = start_date_utc.astimezone(jst)
-                date_str = start_date_jst.strftime("%Y/%m/%d %H:%M")
-
-                # リマインダーメール送信
-                sent = email_service.send_event_reminder(
-                    to_email=reservation.email,
-                    name=reservation.name,
-                    milestone_title=milestone.title,
-                    date_str=date_str,
-                    count=reservation.count,
-                    project_name=project.name,
-                    location=milestone.location,
-                )
-
-                if sent:
-                    # 送信成功時、送信日時を記録
-                    reservation.reminder_sent_at = datetime.now(UTC)
-                    stats["reminders_sent"] += 1
-                    logger.info(
-                        f"Reminder sent to {reservation.email} for milestone {milestone.title}"
-                    )
-                else:
-                    stats["errors"] += 1
-
-            except Exception as e:
-                logger.error(f"Error sending reminder to {reservation.email}: {e}", exc_info=True)
+        if not pending_reservations:
+            continue
+
+        # プロジェクト情報取得
+        project = milestone.project
+        if not project:
+            logger.warning(f"Project not found for milestone {milestone.id}")
+            stats["errors"] += len(pending_reservations)
+            continue
+
+        # 日時をJSTに変換
+        start_date_utc = milestone.start_date.replace(tzinfo=UTC)
+        start_date_jst = start_date_utc.astimezone(jst)
+        date_str = start_date_jst.strftime("%Y/%m/%d %H:%M")
+
+        # リマインダーメール送信（公演ごとにまとめて送信）
+        results = await email_service.send_event_reminders(
+            recipients=[
+                EventReminderRecipient(to_email=r.email, name=r.name, count=r.count)
+                for r in pending_reservations
+            ],
+            milestone_title=milestone.title,
+            date_str=date_str,
+            project_name=project.name,
+            location=milestone.location,
+        )
+
+        sent_at = datetime.now(UTC)
+        for reservation, sent in zip(pending_reservations, results, strict=True):
+            if sent:
+                # 送信成功時、送信日時を記録
+                reservation.reminder_sent_at = sent_at
+                stats["reminders_sent"] += 1
+            else:
                 stats["errors"] += 1
+        logger.info(
+            f"Reminders sent for milestone {milestone.title}: "
+            f"{sum(results)}/{len(pending_reservations)}"
+        )
 
     # コミット
     await db.commit()
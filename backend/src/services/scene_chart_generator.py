@@ -1,22 +1,38 @@
 """香盤表自動生成サービス."""
 
 import uuid
+from collections.abc import Iterable
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import ORMOption
 
-from src.db.models import SceneCharacterMapping, SceneChart, Script
+from src.config import settings
+from src.db.bulk import bulk_insert_rows
+from src.db.models import Character, Line, Scene, SceneCharacterMapping, SceneChart, Script
 
+# 一括INSERT時の列の並び
+MAPPING_COLUMNS = ("id", "chart_id", "scene_id", "character_id", "is_manual", "line_count")
 
-async def generate_scene_chart(script: Script, db: AsyncSession) -> SceneChart:
+
+async def generate_scene_chart(
+    script: Script,
+    db: AsyncSession,
+    scene_line_counts: dict[uuid.UUID, dict[uuid.UUID, int]] | None = None,
+    bulk: bool | None = None,
+) -> SceneChart:
     """脚本から香盤表を自動生成.
 
     手動マッピング（is_manual=True）は保持し、自動マッピングのみ再生成する。
     SceneChart自体が存在しない場合は新規作成する。
+    マッピングには各登場人物のセリフ数を記録し、シーン別の出演インデックスとして使う。
 
     Args:
         script: 脚本モデル
         db: データベースセッション
+        scene_line_counts: シーンID → {登場人物ID: セリフ数}（解析時に算出済みの場合。
+            省略時は lines テーブルをDB側で集計する）
+        bulk: マッピングを一括INSERTで書き込むか（省略時は設定値 script_bulk_insert に従う）
 
     Returns:
         SceneChart: 生成された香盤表
@@ -50,26 +66,53 @@ async def generate_scene_chart(script: Script, db: AsyncSession) -> SceneChart:
     )
     manual_keys = {(row.scene_id, row.character_id) for row in manual_result.all()}
 
-    # 各シーンに登場する人物を抽出してマッピング（脚本由来のシーンのみ）
-    for scene in script.scenes:
-        # カスタムシーンおよびシーン番号が0以下のもの（あらすじなど）はスキップ
-        if scene.is_custom or scene.scene_number <= 0:
-            continue
-
-        # このシーンに登場する人物を取得（Lineから抽出）
-        character_ids = {line.character_id for line in scene.lines if line.character_id is not None}
-
-        # マッピング作成（手動マッピングと重複しないもののみ）
-        for character_id in character_ids:
-            if (scene.id, character_id) not in manual_keys:
-                mapping = SceneCharacterMapping(
-                    id=uuid.uuid4(),
-                    chart_id=chart.id,
-                    scene_id=scene.id,
-                    character_id=character_id,
-                    is_manual=False,
+    if scene_line_counts is None:
+        scene_line_counts = await _count_scene_lines(script.id, db)
+
+    # マッピング作成（手動マッピングと重複しないもののみ）
+    mapping_rows = [
+        (uuid.uuid4(), chart.id, scene_id, character_id, False, line_count)
+        for scene_id, line_counts in scene_line_counts.items()
+        for character_id, line_count in line_counts.items()
+        if (scene_id, character_id) not in manual_keys
+    ]
+    # 手動マッピングはセリフ数だけ反映する（セリフがなくなったものは0に戻す）
+    if manual_keys:
+        mapping_table = SceneCharacterMapping.__table__
+        await db.execute(
+            update(mapping_table)
+            .where(
+                mapping_table.c.chart_id == chart.id,
+                mapping_table.c.is_manual == True,  # noqa: E712
+            )
+            .values(line_count=0)
+        )
+        manual_counts = [
+            {"b_scene_id": scene_id, "b_character_id": character_id, "b_line_count": line_count}
+            for scene_id, line_counts in scene_line_counts.items()
+            for character_id, line_count in line_counts.items()
+            if (scene_id, character_id) in manual_keys
+        ]
+        if manual_counts:
+            await db.execute(
+                update(mapping_table)
+                .where(
+                    mapping_table.c.chart_id == chart.id,
+                    mapping_table.c.scene_id == bindparam("b_scene_id"),
+                    mapping_table.c.character_id == bindparam("b_character_id"),
                 )
-                db.add(mapping)
+                .values(line_count=bindparam("b_line_count")),
+                manual_counts,
+            )
+    if bulk is None:
+        bulk = settings.script_bulk_insert
+    if bulk:
+        await bulk_insert_rows(db, SceneCharacterMapping.__table__, MAPPING_COLUMNS, mapping_rows)
+    else:
+        db.add_all(
+            SceneCharacterMapping(**dict(zip(MAPPING_COLUMNS, row, strict=True)))
+            for row in mapping_rows
+        )
 
     await db.flush()
     await db.refresh(chart)
@@ -77,6 +120,61 @@ async def generate_scene_chart(script: Script, db: AsyncSession) -> SceneChart:
     return chart
 
 
+async def _count_scene_lines(
+    script_id: uuid.UUID, db: AsyncSession
+) -> dict[uuid.UUID, dict[uuid.UUID, int]]:
+    """脚本由来のシーンごとに登場人物別のセリフ数を集計する（あらすじは除く）."""
+    result = await db.execute(
+        select(Line.scene_id, Line.character_id, func.count())
+        .join(Scene, Line.scene_id == Scene.id)
+        .where(
+            Scene.script_id == script_id,
+            Scene.is_custom == False,  # noqa: E712
+            Scene.scene_number > 0,
+            Line.character_id.is_not(None),
+        )
+        .group_by(Line.scene_id, Line.character_id)
+    )
+    scene_line_counts: dict[uuid.UUID, dict[uuid.UUID, int]] = {}
+    for scene_id, character_id, line_count in result.all():
+        scene_line_counts.setdefault(scene_id, {})[character_id] = line_count
+    return scene_line_counts
+
+
+async def get_scene_characters(
+    scene_ids: Iterable[uuid.UUID], db: AsyncSession, *options: ORMOption
+) -> dict[uuid.UUID, list[Character]]:
+    """出演インデックス（香盤表のマッピング）からシーンごとの登場人物を取得する.
+
+    lines テーブルは参照しない。
+
+    Args:
+        scene_ids: シーンIDの集合
+        db: データベースセッション
+        options: Character に適用するローダーオプション（配役の読み込みなど）
+
+    Returns:
+        dict[UUID, list[Character]]: シーンID → 登場人物（登場人物の並び順）
+    """
+    scene_ids = set(scene_ids)
+    if not scene_ids:
+        return {}
+
+    result = await db.execute(
+        select(SceneCharacterMapping.scene_id, Character)
+        .join(Character, SceneCharacterMapping.character_id == Character.id)
+        .where(SceneCharacterMapping.scene_id.in_(scene_ids))
+        .options(*options)
+        .order_by(Character.order, Character.name)
+    )
+    scene_characters: dict[uuid.UUID, list[Character]] = {}
+    for scene_id, character in result.all():
+        characters = scene_characters.setdefault(scene_id, [])
+        if character not in characters:
+            characters.append(character)
+    return scene_characters
+
+
 async def ensure_scene_chart(script: Script, db: AsyncSession) -> SceneChart:
     """香盤表が存在しなければ空で作成する.
 
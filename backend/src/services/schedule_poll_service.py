@@ -3,7 +3,7 @@
 import uuid
 from datetime import UTC, datetime, timedelta, timezone
 
-from sqlalchemy import select
+from sqlalchemy import exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from structlog import get_logger
@@ -13,8 +13,6 @@ from src.db.models import (
     Character,
     CharacterCasting,
     ProjectMember,
-    Scene,
-    SceneCharacterMapping,
     SchedulePoll,
     SchedulePollAnswer,
     SchedulePollCandidate,
@@ -23,6 +21,11 @@ from src.db.models import (
     User,
 )
 from src.services.discord import DiscordService
+from src.services.poll_analysis import (
+    apply_poll_answer,
+    invalidate_poll_analysis,
+    load_poll_analysis,
+)
 
 logger = get_logger(__name__)
 
@@ -218,6 +221,7 @@ class SchedulePollService:
 
         poll.required_roles = self._serialize_required_roles(required_roles)
         await self.db.commit()
+        invalidate_poll_analysis(poll_id)
         return await self.get_poll_with_details(poll_id)
 
     async def get_poll_with_details(self, poll_id: uuid.UUID) -> SchedulePoll | None:
@@ -302,503 +306,86 @@ class SchedulePollService:
             self.db.add(answer)
 
         await self.db.commit()
+        candidate = await self.db.get(SchedulePollCandidate, candidate_id)
+        if candidate:
+            await apply_poll_answer(self.db, candidate.poll_id, candidate_id, user_id, status)
         await self.db.refresh(answer)
 
     async def get_recommendations(self, poll_id: uuid.UUID):
         """優先度アルゴリズムに基づくレコメンドを取得."""
-        poll = await self.get_poll_with_details(poll_id)
-        if not poll:
+        analysis = await load_poll_analysis(self.db, poll_id)
+        if not analysis:
             return []
+        return analysis.recommendations()
 
-        # プロジェクトの最新の脚本を対象とする
-        script_stmt = (
-            select(Script)
-            .where(Script.project_id == poll.project_id)
-            .order_by(Script.revision.desc())
-            .limit(1)
-        )
-        script_result = await self.db.execute(script_stmt)
-        script = script_result.scalar_one_or_none()
-
-        # 脚本が設定されていない場合のフォールバック（全体出席数に基づく）
-        if not script:
-            recommendations = []
-            for candidate in poll.candidates:
-                ok_count = sum(1 for a in candidate.answers if a.status == "ok")
-                maybe_count = sum(1 for a in candidate.answers if a.status == "maybe")
-                score = ok_count * 10 + maybe_count * 5
-
-                if score > 0 or not candidate.answers:
-                    recommendations.append(
-                        {
-                            "candidate_id": candidate.id,
-                            "start_datetime": candidate.start_datetime,
-                            "end_datetime": candidate.end_datetime,
-                            "possible_scenes": [],
-                            "reason": f"出席可能者: {ok_count}名"
-                            if ok_count > 0
-                            else "稽古可能なメンバーがいます",
-                        }
-                    )
-            recommendations.sort(
-                key=lambda x: (
-                    sum(
-                        1
-                        for a in [c for c in poll.candidates if c.id == x["candidate_id"]][
-                            0
-                        ].answers
-                        if a.status == "ok"
-                    )
-                ),
-                reverse=True,
-            )
-            return recommendations[:3]
-
-        # シーンごとの必須ユーザーIDセットを作成
-        mapping_stmt = (
-            select(SceneCharacterMapping)
-            .join(SceneCharacterMapping.scene)
-            .where(Scene.script_id == script.id)
-        )
-        mapping_result = await self.db.execute(mapping_stmt)
-        mappings = mapping_result.scalars().all()
-
-        # シーンごとの必要キャラクターマップ
-        scene_chars = {}  # {scene_id: [character_id]}
-        for m in mappings:
-            if m.scene_id not in scene_chars:
-                scene_chars[m.scene_id] = []
-            scene_chars[m.scene_id].append(m.character_id)
-
-        # キャラクターごとのキャストマップ
-        casting_stmt = (
-            select(CharacterCasting).join(Character).where(Character.script_id == script.id)
-        )
-        castings = (await self.db.execute(casting_stmt)).scalars().all()
-        char_users = {}  # {character_id: [user_id]}
-        for c in castings:
-            if c.character_id not in char_users:
-                char_users[c.character_id] = []
-            char_users[c.character_id].append(c.user_id)
-
-        # プロジェクトメンバー全員を取得して役職マップを作成
-        all_members_stmt = select(ProjectMember).where(ProjectMember.project_id == poll.project_id)
-        all_members = (await self.db.execute(all_members_stmt)).scalars().all()
-        role_users = {}
-        for m in all_members:
-            if m.default_staff_role:
-                if m.default_staff_role not in role_users:
-                    role_users[m.default_staff_role] = []
-                role_users[m.default_staff_role].append(m.user_id)
-
-        # 必須役職（あれば）
-        required_roles = []
-        if poll.required_roles:
-            required_roles = [r.strip() for r in poll.required_roles.split(",") if r.strip()]
-
-        # 優先メンバー（スコア計算用）
-        if required_roles:
-            priority_user_ids = set()
-            for role in required_roles:
-                priority_user_ids.update(role_users.get(role, []))
-        else:
-            # 従来通りのデフォルト優先メンバー
-            priority_user_ids = {
-                m.user_id
-                for m in all_members
-                if m.default_staff_role in ["演出", "演出助手", "制作"]
-            }
+    async def get_calendar_analysis(self, poll_id: uuid.UUID):
+        """カレンダー表示用の詳細分析（正引き・リーチ判定込）."""
+        analysis = await load_poll_analysis(self.db, poll_id)
+        if not analysis:
+            return None
+        return analysis.calendar_analysis()
 
-        # シーン情報を取得
-        scene_stmt = (
-            select(Scene)
-            .where(Scene.script_id == script.id)
-            .order_by(Scene.act_number, Scene.scene_number)
-        )
-        scene_result = await self.db.execute(scene_stmt)
-        scenes_map = {s.id: s for s in scene_result.scalars().all()}
+    async def get_unanswered_members(self, poll_id: uuid.UUID) -> list[dict]:
+        """未回答メンバーのリストを取得."""
+        unanswered_by_poll = await self._get_unanswered_members_by_poll([poll_id])
+        return unanswered_by_poll.get(poll_id, [])
 
-        recommendations = []
-        for candidate in poll.candidates:
-            user_answers = {a.user_id: a.status for a in candidate.answers}
-            ok_count_total = sum(1 for a in candidate.answers if a.status == "ok")
-            maybe_count_total = sum(1 for a in candidate.answers if a.status == "maybe")
-
-            # 必須役職のNGチェック
-            missing_roles = []
-            for role in required_roles:
-                r_users = role_users.get(role, [])
-                if r_users and all(user_answers.get(uid) == "ng" for uid in r_users):
-                    missing_roles.append(role)
-
-            candidate_possible_scenes = []
-            # character がいないシーンも推薦に含めるため、scenes_map の全シーンをループ対象にする
-            for scene_id, scene in scenes_map.items():
-                if scene.scene_number <= 0:
-                    continue
-
-                # シーンに必要なキャラクターとそのキャストを取得
-                req_chars = scene_chars.get(scene_id, [])
-
-                is_possible = True
-                uncast_exist = False
-                if missing_roles:
-                    is_possible = False
-                else:
-                    # 各キャラクターについて判定
-                    for cid in req_chars:
-                        c_users = char_users.get(cid, [])
-                        if not c_users:
-                            # 未配役のキャラクターがいる場合はフラグを立てるが、稽古可能とはみなす
-                            uncast_exist = True
-                            continue
-                        # ダブルキャスト対応：少なくとも1人のキャストがOK/MaybeであればOK
-                        if not any(user_answers.get(uid) in ["ok", "maybe"] for uid in c_users):
-                            is_possible = False
-                            break
-
-                if is_possible:
-                    score = 0
-                    ok_count = 0
-                    # 加点ロジック：各キャラクターの出席状況を確認
-                    for cid in req_chars:
-                        c_users = char_users.get(cid, [])
-                        # このキャラクターのキャストのうち1人でもOKなら加点
-                        if any(user_answers.get(uid) == "ok" for uid in c_users):
-                            score += 10
-                            ok_count += 1
-                        elif any(user_answers.get(uid) == "maybe" for uid in c_users):
-                            score += 5
-
-                    priority_ok = False
-                    for pid in priority_user_ids:
-                        if user_answers.get(pid) == "ok":
-                            score += 20
-                            priority_ok = True
-                        elif user_answers.get(pid) == "maybe":
-                            score += 10
-
-                    reason_parts = []
-                    if not req_chars:
-                        reason_parts.append("キャラクターの登場なし")
-                    elif uncast_exist:
-                        reason_parts.append("未配役あり(配役済みは全員出席可)")
-                    elif ok_count == len(req_chars):
-                        reason_parts.append("必須キャスト全員出席可能")
-                    elif ok_count > 0:
-                        reason_parts.append(f"必須キャスト{ok_count}名出席可能")
-
-                    if priority_ok:
-                        reason_parts.append("演出・制作メンバー出席可能")
-
-                    candidate_possible_scenes.append(
-                        {
-                            "scene_id": scene_id,
-                            "act_number": scene.act_number,
-                            "scene_number": scene.scene_number,
-                            "scene_heading": f"{scene.act_number or 0}-{scene.scene_number}: {scene.heading}",
-                            "score": score,
-                            "reason": " / ".join(reason_parts),
-                        }
-                    )
-
-            candidate_possible_scenes.sort(key=lambda x: x["score"], reverse=True)
-
-            # 理由の決定
-            if candidate_possible_scenes:
-                top_scene = candidate_possible_scenes[0]
-                summary_reason = top_scene["reason"] or "稽古可能なシーンあり"
-            else:
-                if missing_roles:
-                    summary_reason = f"不足役職: {', '.join(missing_roles)}"
-                else:
-                    summary_reason = (
-                        f"出席可能者: {ok_count_total}名"
-                        if ok_count_total > 0
-                        else "稽古可能なメンバーがいます"
-                    )
-
-            # スコアの決定（シーンスコアがあればそれ、なければ全体出席数ベース）
-            total_score = (
-                candidate_possible_scenes[0]["score"]
-                if candidate_possible_scenes
-                else (ok_count_total * 5)
-            )
-            if missing_roles:
-                total_score = 0
+    async def _get_unanswered_members_by_poll(
+        self, poll_ids: list[uuid.UUID]
+    ) -> dict[uuid.UUID, list[dict]]:
+        """複数の日程調整の未回答メンバーをまとめて取得する.
 
-            if total_score > 0 or not candidate.answers:
-                recommendations.append(
-                    {
-                        "candidate_id": candidate.id,
-                        "start_datetime": candidate.start_datetime,
-                        "end_datetime": candidate.end_datetime,
-                        "possible_scenes": candidate_possible_scenes[:5],
-                        "reason": summary_reason,
-                        "score": total_score,
-                    }
-                )
+        日程調整ごとに、プロジェクトメンバーのうちどの候補日にも回答していない人を
+        1回のクエリで求める（日程調整の数によらずクエリ数は一定）。
 
-        # おすすめ度順にソート（上位3件）
-        recommendations.sort(key=lambda x: x["score"], reverse=True)
-        return recommendations[:3]
+        Args:
+            poll_ids: 日程調整IDのリスト
 
-    async def get_calendar_analysis(self, poll_id: uuid.UUID):
-        """カレンダー表示用の詳細分析（正引き・リーチ判定込）."""
-        poll = await self.get_poll_with_details(poll_id)
-        if not poll:
-            return None
+        Returns:
+            dict[uuid.UUID, list[dict]]: 日程調整IDごとの未回答メンバー
+                （未回答メンバーがいない日程調整は含まない）
+        """
+        if not poll_ids:
+            return {}
 
-        # 1. データの準備
-        script_stmt = (
-            select(Script)
-            .where(Script.project_id == poll.project_id)
-            .order_by(Script.revision.desc())
-            .limit(1)
-        )
-        script = (await self.db.execute(script_stmt)).scalar_one_or_none()
-        if not script:
-            return {"poll_id": poll_id, "analyses": []}
-
-        # シーン一覧
-        scenes_stmt = (
-            select(Scene)
-            .where(Scene.script_id == script.id)
-            .order_by(Scene.act_number, Scene.scene_number)
-        )
-        scenes = (await self.db.execute(scenes_stmt)).scalars().all()
-
-        # シーンごとの必要キャラクター
-        mapping_stmt = select(SceneCharacterMapping).where(
-            SceneCharacterMapping.chart_id.in_(
-                select(Script.id).where(
-                    Script.project_id == poll.project_id
-                )  # 香盤表はScriptに紐付いている前提
+        answered = (
+            exists()
+            .where(
+                SchedulePollCandidate.poll_id == SchedulePoll.id,
+                SchedulePollAnswer.candidate_id == SchedulePollCandidate.id,
+                SchedulePollAnswer.user_id == ProjectMember.user_id,
             )
+            .correlate(SchedulePoll, ProjectMember)
         )
-        # 実際には SceneCharacterMapping は scene_id に紐付いているのでそちらで。
-        mapping_stmt = select(SceneCharacterMapping).join(Scene).where(Scene.script_id == script.id)
-        mappings = (await self.db.execute(mapping_stmt)).scalars().all()
-
-        scene_chars = {}  # {scene_id: [character_id]}
-        for m in mappings:
-            if m.scene_id not in scene_chars:
-                scene_chars[m.scene_id] = []
-            scene_chars[m.scene_id].append(m.character_id)
-
-        # キャラクターごとのキャスト（ユーザーID）
-        casting_stmt = (
-            select(CharacterCasting)
-            .join(Character)
-            .where(Character.script_id == script.id)
-            .options(selectinload(CharacterCasting.character))
-        )
-        castings = (await self.db.execute(casting_stmt)).scalars().all()
-
-        char_users = {}  # {character_id: [user_id]}
-        user_names = {}  # {user_id: name}
-        char_name_map = {}  # {character_id: name}
-
-        # ユーザー名取得用
-        all_member_stmt = select(ProjectMember).where(ProjectMember.project_id == poll.project_id)
-        members = (await self.db.execute(all_member_stmt)).scalars().all()
-        user_names = {m.user_id: (m.display_name or f"User {str(m.user_id)[:8]}") for m in members}
-
-        for c in castings:
-            if c.character_id not in char_users:
-                char_users[c.character_id] = []
-            char_users[c.character_id].append(c.user_id)
-            if c.character:
-                char_name_map[c.character_id] = c.character.name
-
-        # 必須役職の抽出
-        required_roles = []
-        if poll.required_roles:
-            required_roles = [r.strip() for r in poll.required_roles.split(",") if r.strip()]
-
-        # 役職ごとのユーザーマップ
-        role_users = {}  # {role: [user_id]}
-        user_roles = {}  # {user_id: str}
-        for m in members:
-            roles = []
-            if m.default_staff_role:
-                roles.append(m.default_staff_role)
-                if m.default_staff_role not in role_users:
-                    role_users[m.default_staff_role] = []
-                role_users[m.default_staff_role].append(m.user_id)
-            user_roles[m.user_id] = roles
-
-        # 配役情報の追加
-        for c in castings:
-            if c.user_id in user_roles and c.character:
-                user_roles[c.user_id].append(c.character.name)
-
-        # 2. 各候補日程の分析
-        analyses = []
-        for candidate in poll.candidates:
-            # OK/Maybe ユーザーの抽出
-            available_users = {a.user_id for a in candidate.answers if a.status in ["ok", "maybe"]}
-            maybe_users = {a.user_id for a in candidate.answers if a.status == "maybe"}
-
-            # 必須役職のチェック
-            missing_roles = []
-            for role in required_roles:
-                r_users = role_users.get(role, [])
-                if not any(uid in available_users for uid in r_users):
-                    missing_roles.append(role)
-
-            possible_scenes = []
-            reach_scenes = []
-
-            for scene in scenes:
-                if scene.scene_number <= 0:
-                    continue
-                req_chars = scene_chars.get(scene.id, [])
-
-                missing_cast_roles = []  # [(char_name, [missing_user_ids])]
-                uncast_chars = []  # [char_name]
-
-                for char_id in req_chars:
-                    c_users = char_users.get(char_id, [])
-                    char_name = char_name_map.get(char_id, "Unknown")
-
-                    if not c_users:
-                        # 未配役
-                        uncast_chars.append(char_name)
-                        continue
-
-                    # ダブルキャスト対応：1人でも利用可能ならOK
-                    if not any(uid in available_users for uid in c_users):
-                        missing_cast_roles.append((char_name, c_users))
-
-                if not missing_cast_roles and not missing_roles:
-                    # 稽古可能
-                    reason = "全員揃っています" if req_chars else "登場キャラクターなし"
-                    if uncast_chars:
-                        reason = f"未配役あり({', '.join(uncast_chars[:2])}{'等' if len(uncast_chars) > 2 else ''})"
-
-                    possible_scenes.append(
-                        {
-                            "scene_id": str(scene.id),
-                            "act_number": scene.act_number,
-                            "scene_number": scene.scene_number,
-                            "heading": f"{scene.act_number or 0}-{scene.scene_number}: {scene.heading}",
-                            "is_possible": True,
-                            "uncast_chars_exist": len(uncast_chars) > 0,
-                            "reason": reason,
-                        }
-                    )
-
-                elif not missing_roles and len(missing_cast_roles) == 1:
-                    # リーチ状態（ちょうど1人足りない場合のみ）
-                    char_name, m_uids = missing_cast_roles[0]
-                    reason = f"不足: {char_name}"
-
-                    reach_scenes.append(
-                        {
-                            "scene_id": str(scene.id),
-                            "act_number": scene.act_number,
-                            "scene_number": scene.scene_number,
-                            "heading": f"{scene.act_number or 0}-{scene.scene_number}: {scene.heading}",
-                            "is_possible": False,
-                            "is_reach": True,
-                            "missing_user_names": [user_names.get(uid, "未配役") for uid in m_uids]
-                            if m_uids
-                            else ["未配役"],
-                            "uncast_chars_exist": len(uncast_chars) > 0,
-                            "reason": reason,
-                        }
-                    )
-
-                elif missing_roles:
-                    # 必須役職が足りない場合、リーチ判定にも含めないか、理由に役職不足を書く
-                    # 今回は「役職不足」としてリーチには入れない（役者が揃っていても不可能なので）
-                    pass
-
-            # メンバー詳細情報の構築
-            available_members = []
-            maybe_members = []
-            for uid in available_users:
-                name = user_names.get(uid, "Unknown")
-                roles_list = user_roles.get(uid, [])
-                role_str = " / ".join(roles_list) if roles_list else None
-                member_info = {"user_id": uid, "name": name, "role": role_str}
-                available_members.append(member_info)
-                if uid in maybe_users:
-                    maybe_members.append(member_info)
-
-            analyses.append(
-                {
-                    "candidate_id": candidate.id,
-                    "start_datetime": candidate.start_datetime,
-                    "end_datetime": candidate.end_datetime,
-                    "possible_scenes": possible_scenes,
-                    "reach_scenes": reach_scenes,
-                    "available_users": list(available_users),
-                    "maybe_users": list(maybe_users),
-                    "available_user_names": [
-                        user_names.get(uid, "Unknown") for uid in available_users
-                    ],
-                    "maybe_user_names": [user_names.get(uid, "Unknown") for uid in maybe_users],
-                    "available_members": available_members,
-                    "maybe_members": maybe_members,
-                }
-            )
-        all_scenes_info = [
-            {
-                "scene_id": str(s.id),
-                "act_number": s.act_number,
-                "scene_number": s.scene_number,
-                "heading": f"{s.act_number or 0}-{s.scene_number}: {s.heading}",
-            }
-            for s in scenes
-            if s.scene_number > 0
-        ]
-
-        return {"poll_id": poll_id, "all_scenes": all_scenes_info, "analyses": analyses}
-
-    async def get_unanswered_members(self, poll_id: uuid.UUID) -> list[dict]:
-        """未回答メンバーのリストを取得."""
         stmt = (
-            select(SchedulePoll)
-            .where(SchedulePoll.id == poll_id)
-            .options(
-                selectinload(SchedulePoll.candidates).selectinload(SchedulePollCandidate.answers)
+            select(
+                SchedulePoll.id,
+                ProjectMember.user_id,
+                ProjectMember.display_name,
+                ProjectMember.default_staff_role,
+                User.screen_name,
+                User.discord_username,
+                User.discord_id,
             )
+            .join(ProjectMember, ProjectMember.project_id == SchedulePoll.project_id)
+            .outerjoin(User, User.id == ProjectMember.user_id)
+            .where(SchedulePoll.id.in_(poll_ids), ~answered)
         )
         result = await self.db.execute(stmt)
-        poll = result.scalar_one_or_none()
-        if not poll:
-            return []
 
-        # 回答済みのユーザーIDを収集
-        answered_user_ids = set()
-        for candidate in poll.candidates:
-            for answer in candidate.answers:
-                answered_user_ids.add(answer.user_id)
-
-        # プロジェクトメンバー全員を取得
-        member_stmt = (
-            select(ProjectMember)
-            .where(ProjectMember.project_id == poll.project_id)
-            .options(selectinload(ProjectMember.user))
-        )
-        member_result = await self.db.execute(member_stmt)
-        members = member_result.scalars().all()
-
-        unanswered = []
-        for m in members:
-            if m.user_id not in answered_user_ids:
-                unanswered.append(
-                    {
-                        "user_id": m.user_id,
-                        "name": m.display_name or (m.user.display_name if m.user else "Unknown"),
-                        "role": m.default_staff_role,
-                        "discord_id": m.user.discord_id if m.user else None,
-                    }
-                )
-
-        return unanswered
+        unanswered_by_poll: dict[uuid.UUID, list[dict]] = {}
+        for row in result:
+            unanswered_by_poll.setdefault(row.id, []).append(
+                {
+                    "user_id": row.user_id,
+                    "name": (
+                        row.display_name or row.screen_name or row.discord_username or "Unknown"
+                    ),
+                    "role": row.default_staff_role,
+                    "discord_id": row.discord_id,
+                }
+            )
+        return unanswered_by_poll
 
     async def send_reminder(
         self, poll_id: uuid.UUID, target_user_ids: list[uuid.UUID], base_url: str
@@ -815,15 +402,24 @@ class SchedulePollService:
             return
 
         # ターゲットユーザーのDiscord IDを取得
-        user_stmt = select(User).where(User.id.in_(target_user_ids))
-        user_result = await self.db.execute(user_stmt)
-        users = user_result.scalars().all()
+        user_stmt = select(User.discord_id).where(User.id.in_(target_user_ids))
+        discord_ids = (await self.db.scalars(user_stmt)).all()
 
-        mentions = [f"<@{u.discord_id}>" for u in users if u.discord_id]
+        await self._post_reminder(poll, project, discord_ids, base_url)
+
+    async def _post_reminder(
+        self,
+        poll: SchedulePoll,
+        project: TheaterProject,
+        discord_ids: list[str | None],
+        base_url: str,
+    ) -> None:
+        """読み込み済みの日程調整・プロジェクトに対してリマインドを投稿する."""
+        mentions = [f"<@{discord_id}>" for discord_id in discord_ids if discord_id]
         if not mentions:
             return
 
-        web_url = f"{base_url}/projects/{project.id}/polls/{poll_id}"
+        web_url = f"{base_url}/projects/{project.id}/polls/{poll.id}"
 
         content = (
             f"🔔 **【日程調整リマインド】**\n"
@@ -877,13 +473,15 @@ class SchedulePollService:
         polls = result.scalars().all()
         stats["checked_polls"] = len(polls)
 
+        # 全Pollの未回答メンバーを一度に取得し、プロジェクトは読み込み済みのものを使う
+        unanswered_by_poll = await self._get_unanswered_members_by_poll([p.id for p in polls])
+
         for poll in polls:
             try:
-                # 未回答メンバーを取得
-                unanswered = await self.get_unanswered_members(poll.id)
-                if unanswered:
-                    target_user_ids = [u["user_id"] for u in unanswered]
-                    await self.send_reminder(poll.id, target_user_ids, base_url)
+                unanswered = unanswered_by_poll.get(poll.id)
+                if unanswered and poll.project:
+                    discord_ids = [u["discord_id"] for u in unanswered]
+                    await self._post_reminder(poll, poll.project, discord_ids, base_url)
                     stats["reminders_sent"] += 1
 
                 # 送信済みとしてマーク（未回答者がいない場合も、今後送らないようにマーク）
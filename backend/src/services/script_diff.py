@@ -0,0 +1,334 @@
+"""脚本の差分更新サービス.
+
+再アップロード時に新しい解析結果と保存済みの Scene / Line / Character を突き合わせ、
+変更のあった行だけを追加・更新・削除する。既存行のIDを維持するため、配役や稽古との
+紐付けを一度削除して名前で復元する必要がない。
+"""
+
+import difflib
+import uuid
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from structlog import get_logger
+
+from src.config import settings
+from src.db.models import (
+    Character,
+    CharacterCasting,
+    Line,
+    Rehearsal,
+    RehearsalCast,
+    RehearsalScene,
+    Scene,
+    SceneCharacterMapping,
+    Script,
+)
+from src.services.fountain_parser import (
+    CHARACTER_COLUMNS,
+    LINE_COLUMNS,
+    SCENE_COLUMNS,
+    _write_rows,
+    apply_script_metadata,
+)
+from src.services.parsed_script import ParsedCharacter, ParsedScene, ParsedScript
+
+logger = get_logger(__name__)
+
+# 見出しが変わったシーンを同一とみなすセリフの一致率
+SIMILAR_SCENE_RATIO = 0.5
+
+
+@dataclass
+class ScriptDiffResult:
+    """差分適用の結果."""
+
+    # シーンID → {登場人物ID: セリフ数}（あらすじを除く、香盤表生成用）
+    scene_line_counts: dict[uuid.UUID, dict[uuid.UUID, int]] = field(default_factory=dict)
+    # "scene_inserted" / "line_updated" / "character_deleted" などの件数
+    counts: Counter[str] = field(default_factory=Counter)
+
+
+def _match_scenes(existing: list[Scene], parsed_scenes: list[ParsedScene]) -> list[Scene | None]:
+    """解析結果の各シーンに対応する既存シーンを求める.
+
+    見出し+幕+シーン番号の完全一致、見出しのみの一致（並べ替え）の順に対応付け、
+    最後に幕+シーン番号が同じでセリフの半分以上が共通するものを見出しの修正とみなす。
+    """
+    matches: list[Scene | None] = [None] * len(parsed_scenes)
+    unused = list(existing)
+
+    def match(is_same: Callable[[Scene, ParsedScene], bool]) -> None:
+        for index, parsed_scene in enumerate(parsed_scenes):
+            if matches[index] is not None:
+                continue
+            for scene in unused:
+                if is_same(scene, parsed_scene):
+                    matches[index] = scene
+                    unused.remove(scene)
+                    break
+
+    def similar_lines(scene: Scene, parsed_scene: ParsedScene) -> bool:
+        return (
+            difflib.SequenceMatcher(
+                a=[line.content for line in sorted(scene.lines, key=lambda line: line.order)],
+                b=[line.content for line in parsed_scene.lines],
+                autojunk=False,
+            ).ratio()
+            >= SIMILAR_SCENE_RATIO
+        )
+
+    match(
+        lambda s, p: (
+            (s.heading, s.act_number, s.scene_number) == (p.heading, p.act_number, p.scene_number)
+        )
+    )
+    match(lambda s, p: s.heading == p.heading)
+    match(
+        lambda s, p: (
+            (s.act_number, s.scene_number) == (p.act_number, p.scene_number) and similar_lines(s, p)
+        )
+    )
+    return matches
+
+
+def _diff_lines(
+    scene: Scene,
+    desired: list[tuple[uuid.UUID | None, str, int]],
+    result: ScriptDiffResult,
+    line_rows: list[tuple[Any, ...]],
+) -> list[Line]:
+    """シーン内のセリフを差分更新し、削除すべきセリフを返す（削除は呼び出し側で行う）.
+
+    Args:
+        scene: 既存シーン（lines をロード済み）
+        desired: 新しいセリフ (登場人物ID, 内容, 順序) の並び
+        result: 件数の集計先
+        line_rows: 追加するセリフ行の追記先
+
+    Returns:
+        list[Line]: 削除対象のセリフ
+    """
+    current = sorted(scene.lines, key=lambda line: line.order)
+    matcher = difflib.SequenceMatcher(
+        a=[(line.character_id, line.content) for line in current],
+        b=[(character_id, content) for character_id, content, _ in desired],
+        autojunk=False,
+    )
+    removed: list[Line] = []
+    for _tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        old_lines = current[i1:i2]
+        new_lines = desired[j1:j2]
+        # 置換は先頭から順に既存行を書き換え、過不足を追加・削除する
+        for line, (character_id, content, order) in zip(old_lines, new_lines, strict=False):
+            if (line.character_id, line.content, line.order) != (character_id, content, order):
+                line.character_id = character_id
+                line.content = content
+                line.order = order
+                result.counts["line_updated"] += 1
+        for character_id, content, order in new_lines[len(old_lines) :]:
+            line_rows.append((uuid.uuid4(), scene.id, character_id, content, order))
+            result.counts["line_inserted"] += 1
+        removed.extend(old_lines[len(new_lines) :])
+    return removed
+
+
+async def apply_script_diff(
+    script: Script, parsed: ParsedScript, db: AsyncSession, bulk: bool | None = None
+) -> ScriptDiffResult:
+    """新しい解析結果との差分だけを脚本データに反映する.
+
+    カスタムシーン・カスタムキャラクターは対象外（そのまま保持する）。
+    削除されたシーン・登場人物を参照する稽古・配役・手動マッピングのみ削除する。
+
+    Args:
+        script: 脚本モデル
+        parsed: 新しいリビジョンの解析結果
+        db: データベースセッション
+        bulk: 追加行を一括INSERTで書き込むか（省略時は設定値 script_bulk_insert に従う）
+
+    Returns:
+        ScriptDiffResult: 香盤表生成用の対応と変更件数
+    """
+    result = ScriptDiffResult()
+    apply_script_metadata(script, parsed.metadata)
+    if bulk is None:
+        bulk = settings.script_bulk_insert
+
+    # 既存データ（脚本由来のみ）
+    character_result = await db.execute(
+        select(Character)
+        .where(Character.script_id == script.id, Character.is_custom == False)  # noqa: E712
+        .order_by(Character.order)
+    )
+    existing_characters = list(character_result.scalars().all())
+    scene_result = await db.execute(
+        select(Scene)
+        .where(Scene.script_id == script.id, Scene.is_custom == False)  # noqa: E712
+        .options(selectinload(Scene.lines))
+        .order_by(Scene.act_number, Scene.scene_number)
+    )
+    existing_scenes = list(scene_result.scalars().all())
+
+    # 1. 登場人物（名前で対応付け）
+    by_name: dict[str, Character] = {}
+    for character in existing_characters:
+        by_name.setdefault(character.name, character)
+    character_ids: dict[ParsedCharacter, uuid.UUID] = {}
+    character_rows: list[tuple[Any, ...]] = []
+    for parsed_character in parsed.characters:
+        character = by_name.pop(parsed_character.name, None)
+        if character is None:
+            character_id = uuid.uuid4()
+            character_rows.append(
+                (
+                    character_id,
+                    script.id,
+                    parsed_character.name,
+                    parsed_character.description,
+                    parsed_character.order,
+                    False,
+                )
+            )
+            result.counts["character_inserted"] += 1
+        else:
+            character_id = character.id
+            if (character.description, character.order) != (
+                parsed_character.description,
+                parsed_character.order,
+            ):
+                character.description = parsed_character.description
+                character.order = parsed_character.order
+                result.counts["character_updated"] += 1
+        character_ids[parsed_character] = character_id
+    kept_character_ids = set(character_ids.values())
+    removed_characters = [c for c in existing_characters if c.id not in kept_character_ids]
+    # セリフの更新で参照されるため、新しい登場人物は先に書き込む
+    await _write_rows(db, Character, CHARACTER_COLUMNS, character_rows, bulk)
+
+    # 2. シーン
+    scene_rows: list[tuple[Any, ...]] = []
+    line_rows: list[tuple[Any, ...]] = []
+    removed_lines: list[Line] = []
+    matches = _match_scenes(existing_scenes, parsed.scenes)
+    for parsed_scene, scene in zip(parsed.scenes, matches, strict=True):
+        desired = [
+            (
+                character_ids[line.character] if line.character else None,
+                line.content,
+                line.order,
+            )
+            for line in parsed_scene.lines
+        ]
+        if scene is None:
+            scene_id = uuid.uuid4()
+            scene_rows.append(
+                (
+                    scene_id,
+                    script.id,
+                    parsed_scene.scene_number,
+                    parsed_scene.act_number,
+                    parsed_scene.heading,
+                    parsed_scene.description,
+                    False,
+                )
+            )
+            line_rows.extend(
+                (uuid.uuid4(), scene_id, character_id, content, order)
+                for character_id, content, order in desired
+            )
+            result.counts["scene_inserted"] += 1
+            if desired:
+                result.counts["line_inserted"] += len(desired)
+        else:
+            scene_id = scene.id
+            new_values = (
+                parsed_scene.scene_number,
+                parsed_scene.act_number,
+                parsed_scene.heading,
+                parsed_scene.description,
+            )
+            if (scene.scene_number, scene.act_number, scene.heading, scene.description) != (
+                new_values
+            ):
+                scene.scene_number, scene.act_number, scene.heading, scene.description = new_values
+                result.counts["scene_updated"] += 1
+            removed_lines.extend(_diff_lines(scene, desired, result, line_rows))
+
+        # 香盤表の自動生成対象（あらすじ以外）
+        if parsed_scene.scene_number > 0:
+            result.scene_line_counts[scene_id] = dict(
+                Counter(character_id for character_id, _, _ in desired if character_id is not None)
+            )
+
+    matched_ids = {scene.id for scene in matches if scene is not None}
+    removed_scenes = [scene for scene in existing_scenes if scene.id not in matched_ids]
+
+    # 3. 追加（シーンを先に書き込む）
+    await _write_rows(db, Scene, SCENE_COLUMNS, scene_rows, bulk)
+    await _write_rows(db, Line, LINE_COLUMNS, line_rows, bulk)
+    await db.flush()
+
+    # 4. 削除（セリフ → シーン → 登場人物の順）
+    removed_line_ids = [line.id for line in removed_lines]
+    for scene in removed_scenes:
+        removed_line_ids.extend(line.id for line in scene.lines)
+    if removed_line_ids:
+        await db.execute(delete(Line).where(Line.id.in_(removed_line_ids)))
+        result.counts["line_deleted"] += len(removed_line_ids)
+
+    if removed_scenes:
+        scene_ids = [scene.id for scene in removed_scenes]
+        await db.execute(delete(RehearsalScene).where(RehearsalScene.scene_id.in_(scene_ids)))
+        await db.execute(
+            update(Rehearsal).where(Rehearsal.scene_id.in_(scene_ids)).values(scene_id=None)
+        )
+        await db.execute(
+            delete(SceneCharacterMapping).where(SceneCharacterMapping.scene_id.in_(scene_ids))
+        )
+        await db.execute(delete(Scene).where(Scene.id.in_(scene_ids)))
+        result.counts["scene_deleted"] += len(removed_scenes)
+
+    if removed_characters:
+        character_ids_to_delete = [character.id for character in removed_characters]
+        # カスタムシーンのセリフが参照している場合は話者なしにする
+        await db.execute(
+            update(Line)
+            .where(Line.character_id.in_(character_ids_to_delete))
+            .values(character_id=None)
+        )
+        await db.execute(
+            delete(SceneCharacterMapping).where(
+                SceneCharacterMapping.character_id.in_(character_ids_to_delete)
+            )
+        )
+        await db.execute(
+            delete(CharacterCasting).where(
+                CharacterCasting.character_id.in_(character_ids_to_delete)
+            )
+        )
+        await db.execute(
+            delete(RehearsalCast).where(RehearsalCast.character_id.in_(character_ids_to_delete))
+        )
+        await db.execute(delete(Character).where(Character.id.in_(character_ids_to_delete)))
+        result.counts["character_deleted"] += len(removed_characters)
+
+    # Coreで削除した行をセッションから外し、ロード済みのコレクションを破棄する
+    for line in removed_lines:
+        db.expunge(line)
+    for scene in removed_scenes:
+        db.expunge(scene)  # セリフもカスケードで外れる
+    for character in removed_characters:
+        db.expunge(character)
+    for scene in matches:
+        if scene is not None:
+            db.expire(scene, ["lines"])
+    db.expire(script, ["scenes", "characters"])
+
+    logger.info("Script diff applied", script_id=str(script.id), **result.counts)
+    return result
@@ -34,9 +34,11 @@ async def send_script_notification(
     # PDF生成（通知添付用）
     pdf_file = None
     try:
-        from src.services.pdf_generator import generate_script_pdf
+        from src.services.parsed_script import parse_script
+        from src.services.pdf_executor import render_script_pdf
 
-        pdf_bytes = generate_script_pdf(script.content)
+        # アップロード処理での解析結果を再利用する（再パースしない）
+        pdf_bytes = await render_script_pdf(script.content, parsed=parse_script(script.content))
         # DiscordのWebhookは一部のHTTPクライアントが生成する日本語(non-ASCII)ファイル名のマルチパート拡張を
         # 正しくパースできず400エラーとなる場合があるため、固定のASCIIファイル名を使用する。
         pdf_file = {"filename": "script.pdf", "content": pdf_bytes}
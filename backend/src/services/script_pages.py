@@ -0,0 +1,143 @@
+"""脚本のシーン単位の取得（ページング・項目の選択）.
+
+大きな脚本の詳細を一度に返すとシーン・セリフ・登場人物がすべて入った数MBの応答になるため、
+シーンを並び順のカーソルで区切って返し、必要な項目だけを読み込む。
+セリフは fields に lines を指定した場合のみ、登場人物名と一緒に読み込む。
+"""
+
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import Character, Line, Scene
+from src.schemas.script import ScenePageItem, ScenePageLine, ScenePageResponse
+
+# fields で指定できる項目と対応する列（lines はセリフの読み込み）
+SCENE_FIELDS = {
+    "id": Scene.id,
+    "act_number": Scene.act_number,
+    "scene_number": Scene.scene_number,
+    "heading": Scene.heading,
+    "description": Scene.description,
+}
+DEFAULT_SCENE_FIELDS = ("id", "act_number", "scene_number", "heading")
+
+# 並び順（幕番号なしは0幕として扱う。DBによってNULLの並び位置が異なるため）
+_ACT_KEY = func.coalesce(Scene.act_number, 0)
+
+
+def parse_scene_fields(fields: str | None) -> tuple[set[str], bool]:
+    """fields パラメータを解釈する.
+
+    Args:
+        fields: カンマ区切りの項目名（省略時は id, act_number, scene_number, heading）
+
+    Returns:
+        tuple[set[str], bool]: シーンの項目, セリフを含めるか
+
+    Raises:
+        HTTPException: 不明な項目が指定された場合
+    """
+    if not fields:
+        return set(DEFAULT_SCENE_FIELDS), False
+
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - set(SCENE_FIELDS) - {"lines"}
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"不明な項目が指定されています: {', '.join(sorted(unknown))}"
+        )
+    return names - {"lines"}, "lines" in names
+
+
+def _encode_cursor(act_number: int, scene_number: int, scene_id: uuid.UUID) -> str:
+    return f"{act_number}:{scene_number}:{scene_id}"
+
+
+def _decode_cursor(cursor: str) -> tuple[int, int, uuid.UUID]:
+    try:
+        act_number, scene_number, scene_id = cursor.split(":")
+        return int(act_number), int(scene_number), uuid.UUID(scene_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="カーソルが不正です")
+
+
+async def load_scene_page(
+    db: AsyncSession,
+    script_id: uuid.UUID,
+    *,
+    cursor: str | None = None,
+    limit: int = 20,
+    fields: str | None = None,
+) -> ScenePageResponse:
+    """脚本のシーンを並び順に limit 件ずつ取得する.
+
+    Args:
+        db: データベースセッション
+        script_id: 脚本ID
+        cursor: 前のページの next_cursor（省略時は先頭から）
+        limit: 取得するシーン数
+        fields: 返す項目（カンマ区切り。lines を含めるとセリフも返す）
+
+    Returns:
+        ScenePageResponse: シーンと次のページのカーソル
+    """
+    scene_fields, include_lines = parse_scene_fields(fields)
+
+    # 並び順の列（カーソル用）に、指定された項目の列を加える
+    columns = [_ACT_KEY.label("act_key"), Scene.scene_number, Scene.id]
+    columns += [SCENE_FIELDS[f] for f in scene_fields if f not in ("scene_number", "id")]
+    stmt = (
+        select(*columns)
+        .where(Scene.script_id == script_id)
+        .order_by(_ACT_KEY, Scene.scene_number, Scene.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        stmt = stmt.where(
+            tuple_(_ACT_KEY, Scene.scene_number, Scene.id) > tuple_(*_decode_cursor(cursor))
+        )
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last.act_key, last.scene_number, last.id)
+
+    lines_by_scene: dict[uuid.UUID, list[ScenePageLine]] = {}
+    if include_lines and rows:
+        line_result = await db.execute(
+            select(
+                Line.scene_id,
+                Line.id,
+                Line.character_id,
+                Character.name,
+                Line.content,
+                Line.order,
+            )
+            .outerjoin(Character, Line.character_id == Character.id)
+            .where(Line.scene_id.in_([row.id for row in rows]))
+            .order_by(Line.scene_id, Line.order)
+        )
+        for scene_id, line_id, character_id, character_name, content, order in line_result:
+            lines_by_scene.setdefault(scene_id, []).append(
+                ScenePageLine(
+                    id=line_id,
+                    character_id=character_id,
+                    character_name=character_name,
+                    content=content,
+                    order=order,
+                )
+            )
+
+    scenes = []
+    for row in rows:
+        values = {f: row._mapping[f] for f in scene_fields}
+        if include_lines:
+            values["lines"] = lines_by_scene.get(row.id, [])
+        scenes.append(ScenePageItem(**values))
+
+    return ScenePageResponse(scenes=scenes, next_cursor=next_cursor)
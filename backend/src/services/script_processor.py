@@ -1,13 +1,16 @@
 """スクリプト処理サービス."""
 
 from datetime import UTC, datetime
+from typing import NoReturn
 from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
+from structlog import get_logger
 
+from src.config import settings
 from src.db.models import (
     Character,
     CharacterCasting,
@@ -24,6 +27,26 @@ from src.db.models import (
     User,
 )
 
+logger = get_logger(__name__)
+
+
+async def _rollback_and_raise(db: AsyncSession, error: Exception) -> NoReturn:
+    """脚本の保存失敗をログに残し、ロールバックして500エラーを送出する.
+
+    Args:
+        db: データベースセッション
+        error: 発生した例外
+
+    Raises:
+        HTTPException: 常に送出する
+    """
+    await db.rollback()
+    logger.exception("Script upload failed", error=str(error))
+    raise HTTPException(
+        status_code=500,
+        detail=f"脚本の解析またはデータ保存中にエラーが発生しました: {str(error)}",
+    ) from error
+
 
 async def validate_upload_request(
     project_id: UUID,
@@ -347,11 +370,18 @@ async def parse_and_save_fountain(script: Script, fountain_text: str, db: AsyncS
         HTTPException: パース失敗時
     """
     from src.services.fountain_parser import parse_fountain_and_create_models
+    from src.services.parsed_script import parse_script
     from src.services.scene_chart_generator import generate_scene_chart
 
     try:
-        # Fountainパース
-        await parse_fountain_and_create_models(script, fountain_text, db)
+        # Fountainパース（解析結果は通知用PDF生成でも再利用される）
+        parsed = parse_script(fountain_text)
+        scene_line_counts = await parse_fountain_and_create_models(
+            script, fountain_text, db, parsed=parsed
+        )
+
+        # 香盤表の自動生成（解析結果から算出した登場人物を使用するため、セリフの再読込は不要）
+        await generate_scene_chart(script, db, scene_line_counts=scene_line_counts)
 
         # リレーションをロード
         stmt = (
@@ -369,28 +399,58 @@ async def parse_and_save_fountain(script: Script, fountain_text: str, db: AsyncS
         result = await db.execute(stmt)
         script = result.scalar_one()
 
-        # 香盤表の自動生成
-        await generate_scene_chart(script, db)
-
-        # 再取得（確実にロードされた状態にする）
-        result = await db.execute(stmt)
-        script = result.scalar_one()
-
         return script
 
     except Exception as e:
-        await db.rollback()
-        import traceback
+        await _rollback_and_raise(db, e)
 
-        error_msg = traceback.format_exc()
 
-        # デバッグログ出力（console only - Azure is read-only filesystem）
-        print(f"[Script Upload Error] {error_msg}")
+async def update_script_incrementally(
+    script: Script, fountain_text: str, db: AsyncSession
+) -> Script:
+    """既存脚本に新しいリビジョンの差分だけを反映.
 
-        raise HTTPException(
-            status_code=500,
-            detail=f"脚本の解析またはデータ保存中にエラーが発生しました: {str(e)}",
+    シーン・セリフ・登場人物のIDを維持するため、配役や稽古の紐付けはそのまま残る。
+
+    Args:
+        script: スクリプト
+        fountain_text: Fountainテキスト
+        db: データベースセッション
+
+    Returns:
+        Script: リレーションがロードされたスクリプト
+
+    Raises:
+        HTTPException: パース失敗時
+    """
+    from src.services.parsed_script import parse_script
+    from src.services.scene_chart_generator import generate_scene_chart
+    from src.services.script_diff import apply_script_diff
+
+    try:
+        parsed = parse_script(fountain_text)
+        diff = await apply_script_diff(script, parsed, db)
+
+        # 自動マッピングは差分適用後のシーン・登場人物から作り直す（手動マッピングは保持）
+        await generate_scene_chart(script, db, scene_line_counts=diff.scene_line_counts)
+
+        stmt = (
+            select(Script)
+            .where(Script.id == script.id)
+            .options(
+                selectinload(Script.scenes).options(
+                    selectinload(Scene.lines).options(
+                        selectinload(Line.character).selectinload(Character.castings)
+                    )
+                ),
+                selectinload(Script.characters).selectinload(Character.castings),
+            )
         )
+        result = await db.execute(stmt)
+        return result.scalar_one()
+
+    except Exception as e:
+        await _rollback_and_raise(db, e)
 
 
 async def process_script_upload(
@@ -422,7 +482,7 @@ async def process_script_upload(
     Returns:
         tuple[Script, bool]: (処理済みスクリプト, 更新フラグ)
     """
-    from src.services.project_limit import check_project_limit
+    from src.services.project_limit import check_project_limit, invalidate_restricted_projects
 
     # プロジェクト数制限チェック (Loophole Prevention)
     # 脚本の公開/非公開設定によって、プロジェクトが「非公開」としてカウントされるかどうかが変わる
@@ -447,8 +507,11 @@ async def process_script_upload(
         pdf_writing_direction=pdf_writing_direction,
     )
 
+    # 差分更新できる場合は既存データを削除しない
+    incremental = is_update and settings.script_incremental_update
+
     # 更新の場合は関連データを削除
-    if is_update:
+    if is_update and not incremental:
         # Before cleanup, collect data to restore
         associations = await collect_associations(script.id, db)
         await cleanup_related_data(script, db)
@@ -456,24 +519,32 @@ async def process_script_upload(
 
     # プロジェクトの公開設定を同期 (1プロジェクト1脚本のため、脚本の設定=プロジェクトの設定)
     project = await db.get(TheaterProject, project_id)
+    creator_id = None
     if project:
+        creator_id = project.created_by_id
         project.is_public = is_public
         db.add(project)
 
     # Fountainパースと保存
-    script = await parse_and_save_fountain(script, fountain_text, db)
+    if incremental:
+        script = await update_script_incrementally(script, fountain_text, db)
+    else:
+        script = await parse_and_save_fountain(script, fountain_text, db)
 
     # Restore associations
-    if is_update:
+    if is_update and not incremental:
         await restore_associations(script, associations, db)
 
     await db.commit()  # 全て一括で保存
+    invalidate_restricted_projects(creator_id)
 
     # Responseのために再取得 (MissingGreenletエラー回避)
+    # 本文は通知用のPDF生成で使う（全件再解析の refresh で未読み込みに戻っている場合がある）
     stmt = (
         select(Script)
         .where(Script.id == script.id)
         .options(
+            undefer(Script.content),
             selectinload(Script.characters).selectinload(Character.castings),
             selectinload(Script.scenes).options(
                 selectinload(Scene.lines).options(
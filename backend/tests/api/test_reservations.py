@@ -1,23 +1,22 @@
 from datetime import datetime, timedelta
-from unittest.mock import patch
 from uuid import uuid4
 
 import pytest
 from httpx import AsyncClient
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import (
     Character,
     CharacterCasting,
     Milestone,
+    NotificationOutbox,
     ProjectMember,
     Reservation,
     Script,
     TheaterProject,
     User,
 )
-from src.services.email import email_service
 
 
 @pytest.fixture
@@ -91,7 +90,9 @@ async def cast_member(db: AsyncSession, project: TheaterProject) -> User:
 
 
 @pytest.mark.asyncio
-async def test_create_reservation_success(client: AsyncClient, milestone: Milestone):
+async def test_create_reservation_success(
+    client: AsyncClient, db: AsyncSession, milestone: Milestone
+):
     """予約作成成功時テスト."""
     payload = {
         "milestone_id": str(milestone.id),
@@ -100,20 +101,18 @@ async def test_create_reservation_success(client: AsyncClient, milestone: Milest
         "count": 2,
     }
 
-    # SendGridのモック
-    with patch.object(email_service, "send_reservation_confirmation") as mock_send:
-        response = await client.post("/api/public/reservations", json=payload)
+    response = await client.post("/api/public/reservations", json=payload)
 
     assert response.status_code == 200
     data = response.json()
     assert data["name"] == "Guest User"
     assert data["count"] == 2
 
-    # BackgroundTasksの実行を確認
-    mock_send.assert_called()
-    call_args = mock_send.call_args
-    assert call_args is not None
-    _, kwargs = call_args
+    # 確認メールが送信待ちに追加されていること
+    outbox = (await db.execute(select(NotificationOutbox))).scalars().all()
+    assert [row.payload["template"] for row in outbox] == ["reservation_confirmation"]
+    kwargs = outbox[0].payload["params"]
+    assert kwargs["reservation_id"] == data["id"]
     assert kwargs["to_email"] == "guest@example.com"
     assert kwargs["name"] == "Guest User"
     assert kwargs["project_name"] == "Test Project"
@@ -127,6 +126,7 @@ async def test_create_reservation_capacity_error(
     # 既に9名予約済み (定員10名)
     r1 = Reservation(milestone_id=milestone.id, name="Existing", email="e@e.com", count=9)
     db.add(r1)
+    milestone.reserved_count = 9
     await db.commit()
 
     # 2名予約しようとするとオーバー (9+2 > 10)
@@ -141,6 +141,42 @@ async def test_create_reservation_capacity_error(
     assert "capacity exceeded" in response.json()["detail"].lower()
 
 
+@pytest.mark.asyncio
+async def test_reservation_counter_tracks_create_and_cancel(
+    client: AsyncClient, db: AsyncSession, milestone: Milestone
+):
+    """予約済み人数のカウンターは予約作成で加算、キャンセルで減算される."""
+    payload = {
+        "milestone_id": str(milestone.id),
+        "name": "Counter User",
+        "email": "counter@example.com",
+        "count": 4,
+    }
+    response = await client.post("/api/public/reservations", json=payload)
+    assert response.status_code == 200
+    reservation_id = response.json()["id"]
+
+    await db.refresh(milestone)
+    assert milestone.reserved_count == 4
+
+    response = await client.post("/api/public/reservations", json=payload)
+    assert response.status_code == 200
+
+    # 残り2席に3名は入らない
+    response = await client.post("/api/public/reservations", json={**payload, "count": 3})
+    assert response.status_code == 400
+    assert "only 2 tickets remaining" in response.json()["detail"].lower()
+
+    response = await client.post(
+        "/api/public/reservations/cancel",
+        json={"reservation_id": reservation_id, "email": "counter@example.com"},
+    )
+    assert response.status_code == 204
+
+    await db.refresh(milestone)
+    assert milestone.reserved_count == 4
+
+
 @pytest.mark.asyncio
 async def test_get_cast_members_public(
     client: AsyncClient,
@@ -207,6 +243,71 @@ async def test_admin_reservation_list(
         app.dependency_overrides.pop(get_current_user_dep, None)
 
 
+@pytest.mark.asyncio
+async def test_milestone_reservations_resolve_referral_names_in_constant_queries(
+    client: AsyncClient,
+    db: AsyncSession,
+    project: TheaterProject,
+    milestone: Milestone,
+    project_member: User,
+    cast_member: User,
+):
+    """紹介者名の解決は予約の件数によらず一定のクエリ数で行われる."""
+    from src.dependencies.auth import get_current_user_dep
+    from src.main import app
+
+    member = await db.scalar(select(ProjectMember).where(ProjectMember.user_id == cast_member.id))
+    member.display_name = "役者A"
+    outsider = User(discord_id="55555", discord_username="outsider")
+    db.add(outsider)
+    await db.flush()
+
+    async def list_with_query_count() -> tuple[list[dict], int]:
+        queries = []
+
+        def on_execute(*args: object) -> None:
+            queries.append(args)
+
+        engine = db.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", on_execute)
+        try:
+            response = await client.get(f"/api/milestones/{milestone.id}/reservations")
+        finally:
+            event.remove(engine, "before_cursor_execute", on_execute)
+        assert response.status_code == 200
+        return response.json(), len(queries)
+
+    app.dependency_overrides[get_current_user_dep] = lambda: project_member
+    try:
+        db.add(Reservation(milestone_id=milestone.id, name="R0", email="r0@e.com", count=1))
+        await db.commit()
+        _, baseline = await list_with_query_count()
+
+        referrers = [cast_member, outsider, None] * 10
+        for i, referrer in enumerate(referrers, start=1):
+            db.add(
+                Reservation(
+                    milestone_id=milestone.id,
+                    name=f"R{i}",
+                    email=f"r{i}@e.com",
+                    count=1,
+                    referral_user_id=referrer.id if referrer else None,
+                )
+            )
+        await db.commit()
+        data, count = await list_with_query_count()
+    finally:
+        app.dependency_overrides.pop(get_current_user_dep, None)
+
+    # 紹介者の一括取得の1回分だけ増える
+    assert count == baseline + 1
+    names = {r["name"]: r["referral_name"] for r in data}
+    assert len(names) == 31
+    assert names["R1"] == "役者A"
+    assert names["R2"] == "outsider"
+    assert names["R3"] is None
+
+
 @pytest.mark.asyncio
 async def test_update_attendance(
     client: AsyncClient, db: AsyncSession, milestone: Milestone, project_member: User
@@ -258,6 +359,54 @@ async def test_export_csv(
         app.dependency_overrides.pop(get_current_user_dep, None)
 
 
+@pytest.mark.asyncio
+async def test_export_csv_streams_rows_with_referral_names(
+    db: AsyncSession,
+    project: TheaterProject,
+    milestone: Milestone,
+    project_member: User,
+    cast_member: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """CSVエクスポートは読み込んだ行ごとに分けて送られ、紹介者名を解決する."""
+    from src.api import reservations as reservations_api
+
+    pm = await db.scalar(
+        select(ProjectMember).where(
+            ProjectMember.project_id == project.id, ProjectMember.user_id == cast_member.id
+        )
+    )
+    pm.display_name = "劇団での名前"
+    db.add_all(
+        [
+            Reservation(
+                milestone_id=milestone.id,
+                name=f"Guest {i}",
+                email=f"guest{i}@e.com",
+                count=1,
+                referral_user_id=cast_member.id if i % 2 == 0 else None,
+            )
+            for i in range(5)
+        ]
+    )
+    await db.commit()
+    monkeypatch.setattr(reservations_api, "EXPORT_CHUNK_ROWS", 2)
+
+    response = await reservations_api.export_reservations(
+        project_id=project.id, milestone_id=None, db=db, current_user=project_member
+    )
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    # 2行ずつ3回に分けて送られる（ヘッダーは最初のチャンクに含まれる）
+    assert len(chunks) == 3
+    lines = "".join(chunks).splitlines()
+    # viewer なので Email 列は含まない
+    assert lines[0] == "ID,公演名,日時,予約者名,人数,紹介者,出席,予約日時"
+    assert len(lines) == 6
+    assert sum("劇団での名前" in line for line in lines) == 3
+    assert not any("@e.com" in line for line in lines)
+
+
 @pytest.mark.asyncio
 async def test_cancel_reservation(client: AsyncClient, db: AsyncSession, milestone: Milestone):
     """予約キャンセルテスト."""
@@ -268,20 +417,21 @@ async def test_cancel_reservation(client: AsyncClient, db: AsyncSession, milesto
 
     # Discord通知を飛ばすためにWebhook URLを設定
     project = await db.get(TheaterProject, milestone.project_id)
-    project.discord_webhook_url = "http://fake-webhook"
+    project.discord_webhook_url = "https://discord.com/api/webhooks/fake"
     await db.commit()
 
     # 成功
     payload = {"reservation_id": r_id, "email": "cancel@e.com"}
 
-    # Discordのモック
-    with patch("src.services.discord.DiscordService.send_notification") as mock_discord:
-        response = await client.post("/api/public/reservations/cancel", json=payload)
+    response = await client.post("/api/public/reservations/cancel", json=payload)
 
     assert response.status_code == 204
     # DBから消えているか
     assert await db.get(Reservation, r.id) is None
-    mock_discord.assert_called()  # 呼ばれていること
+    # 通知が送信待ちに追加されていること
+    outbox = (await db.execute(select(NotificationOutbox))).scalars().all()
+    assert len(outbox) == 1
+    assert "チケット予約キャンセル" in outbox[0].payload["content"]
 
     # 失敗（存在しない）
     response = await client.post("/api/public/reservations/cancel", json=payload)
@@ -3,6 +3,7 @@ from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.db.models import AttendanceEvent, AttendanceTarget, TheaterProject, User
 from src.services.attendance_tasks import check_deadlines
@@ -300,3 +301,97 @@ async def test_check_deadlines_skip_past_events(mock_db_session, mock_discord_se
     assert event.reminder_2_sent_at is not None
     assert event.reminder_3_sent_at is not None
     mock_db_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_deadlines_failed_send_is_retried_next_run(
+    mock_db_session, mock_discord_service
+):
+    """送信に失敗したイベントは送信済みにならず、他のイベントの送信は続行されること."""
+    now = datetime.now(UTC)
+
+    def make_event(title: str, channel_id: str) -> AttendanceEvent:
+        return AttendanceEvent(
+            id=uuid.uuid4(),
+            title=title,
+            schedule_date=now + timedelta(hours=10),
+            deadline=now + timedelta(hours=5),
+            reminder_1_sent_at=None,
+            reminder_2_sent_at=None,
+            reminder_3_sent_at=None,
+            completed=False,
+            project=TheaterProject(
+                id=uuid.uuid4(),
+                discord_channel_id=channel_id,
+                attendance_reminder_1_hours=48,
+                attendance_reminder_2_hours=24,
+                attendance_reminder_3_hours=12,
+            ),
+            targets=[AttendanceTarget(status="pending", user=User(discord_id="user1"))],
+        )
+
+    failing = make_event("Failing", "111")
+    succeeding = make_event("Succeeding", "222")
+
+    async def send_channel_message(channel_id: str, content: str):
+        # 実際の DiscordService は送信失敗時に例外を送出せず None を返す
+        if channel_id == "111":
+            return None
+        return {"id": "1"}
+
+    mock_discord_service.send_channel_message.side_effect = send_channel_message
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = [failing, succeeding]
+    mock_db_session.execute.return_value = mock_result
+
+    stats = await check_deadlines()
+
+    assert stats["schedule_reminders_sent"] == 1
+    assert stats["errors"] == 1
+    assert mock_discord_service.send_channel_message.await_count == 2
+    assert failing.reminder_1_sent_at is None
+    assert succeeding.reminder_1_sent_at is not None
+    mock_db_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_check_deadlines_loads_only_due_events(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+):
+    """送信時刻を迎えたイベントのみ読み込まれること（判定はSQLで行う）."""
+    now = datetime.now(UTC)
+    test_project.discord_channel_id = "123456789"
+    test_project.attendance_reminder_1_hours = 48
+
+    def make_event(title: str, schedule_date: datetime | None) -> AttendanceEvent:
+        return AttendanceEvent(
+            project_id=test_project.id,
+            message_id="1",
+            channel_id="123456789",
+            title=title,
+            schedule_date=schedule_date,
+            deadline=now,
+            targets=[AttendanceTarget(user_id=test_user.id)],
+        )
+
+    due = make_event("Due", now + timedelta(hours=47))
+    db.add_all(
+        [
+            due,
+            make_event("Not yet", now + timedelta(hours=49)),
+            make_event("Undecided", None),
+        ]
+    )
+    await db.commit()
+
+    discord_service = AsyncMock()
+    session_maker = async_sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False)
+    stats = await check_deadlines(session_maker, discord_service)
+
+    assert stats["checked_events"] == 1
+    assert stats["schedule_reminders_sent"] == 1
+    discord_service.send_channel_message.assert_awaited_once()
+    assert "Due" in discord_service.send_channel_message.call_args.kwargs["content"]
+
+    await db.refresh(due)
+    assert due.reminder_1_sent_at is not None
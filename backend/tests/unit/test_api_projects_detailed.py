@@ -4,9 +4,10 @@ from datetime import UTC, datetime, timedelta
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.models import ProjectMember, TheaterProject, User
+from src.db.models import Milestone, ProjectMember, TheaterProject, User
 
 
 @pytest.fixture
@@ -200,3 +201,44 @@ async def test_remove_owner_self(
 
     # Assert
     assert response.status_code == 400  # エラーになるべき
+
+
+@pytest.mark.asyncio
+async def test_create_milestone_rolls_back_when_enqueue_fails(
+    client: AsyncClient,
+    db: AsyncSession,
+    test_user: User,
+    test_project: TheaterProject,
+    test_user_token: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """通知のキュー登録に失敗した場合はマイルストーンも保存されないことのテスト."""
+    # Arrange
+    project_id = test_project.id
+    test_project.discord_webhook_url = "https://discord.com/api/webhooks/1/token"
+    await db.commit()
+
+    def _fail_enqueue(*args, **kwargs) -> None:
+        raise RuntimeError("outbox unavailable")
+
+    monkeypatch.setattr("src.api.projects.enqueue_discord_notification", _fail_enqueue)
+    milestone_data = {
+        "title": "本番公演",
+        "start_date": (datetime.now(UTC) + timedelta(days=30)).isoformat(),
+        "end_date": (datetime.now(UTC) + timedelta(days=32)).isoformat(),
+        "create_attendance_check": False,
+    }
+
+    # Act
+    with pytest.raises(RuntimeError):
+        await client.post(
+            f"/api/projects/{project_id}/milestones",
+            json=milestone_data,
+            headers={"Authorization": f"Bearer {test_user_token}"},
+        )
+    # リクエスト終了時のセッションクローズと同じくロールバックする
+    await db.rollback()
+
+    # Assert
+    result = await db.execute(select(Milestone).where(Milestone.project_id == project_id))
+    assert result.scalars().all() == []
@@ -1,13 +1,26 @@
 """稽古GoogleカレンダーURL通知のテスト."""
 
 from datetime import UTC
-from unittest.mock import AsyncMock, patch
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.models import Rehearsal, RehearsalSchedule, Script, TheaterProject, User
+from src.db.models import (
+    NotificationOutbox,
+    Rehearsal,
+    RehearsalSchedule,
+    Script,
+    TheaterProject,
+    User,
+)
+
+
+async def _queued_contents(db: AsyncSession) -> list[str]:
+    """送信待ちのDiscord通知の本文."""
+    rows = (await db.execute(select(NotificationOutbox))).scalars().all()
+    return [row.payload["content"] for row in rows if row.kind == "discord_webhook"]
 
 
 @pytest.mark.asyncio
@@ -51,27 +64,23 @@ async def test_update_rehearsal_gcal_notification(
 
     update_data = {"location": "Updated Hall", "notes": "Updated notes"}
 
-    # DiscordService.send_notificationをモック
-    with patch(
-        "src.services.discord.DiscordService.send_notification", new_callable=AsyncMock
-    ) as mock_send:
-        # Act
-        response = await client.put(
-            f"/api/rehearsals/{rehearsal.id}",
-            json=update_data,
-            headers={"Authorization": f"Bearer {test_user_token}"},
-        )
-
-        # Assert
-        assert response.status_code == 200
-
-        # 通知が呼ばれたか確認
-        assert mock_send.called
-        args, kwargs = mock_send.call_args
-        assert "file" not in kwargs
-        assert "calendar.google.com/calendar/render" in kwargs["content"]
-        assert "稽古スケジュールが更新されました" in kwargs["content"]
-        assert "前回登録した予定を手動で削除してください" in kwargs["content"]
+    # Act
+    response = await client.put(
+        f"/api/rehearsals/{rehearsal.id}",
+        json=update_data,
+        headers={"Authorization": f"Bearer {test_user_token}"},
+    )
+
+    # Assert
+    assert response.status_code == 200
+
+    # 通知が送信待ちに追加されたか確認
+    contents = await _queued_contents(db)
+    assert len(contents) == 1
+    content = contents[0]
+    assert "calendar.google.com/calendar/render" in content
+    assert "稽古スケジュールが更新されました" in content
+    assert "前回登録した予定を手動で削除してください" in content
 
 
 @pytest.mark.asyncio
@@ -114,23 +123,19 @@ async def test_finalize_poll_gcal_notification(
 
     finalize_data = {"candidate_id": str(candidate.id), "scene_ids": []}
 
-    # DiscordService.send_notificationをモック
-    with patch(
-        "src.services.discord.DiscordService.send_notification", new_callable=AsyncMock
-    ) as mock_send:
-        # Act
-        response = await client.post(
-            f"/api/projects/{test_project.id}/polls/{poll.id}/finalize",
-            json=finalize_data,
-            headers={"Authorization": f"Bearer {test_user_token}"},
-        )
-
-        # Assert
-        assert response.status_code == 200
-
-        # 通知が呼ばれたか確認
-        assert mock_send.called
-        args, kwargs = mock_send.call_args
-        assert "file" not in kwargs
-        assert "calendar.google.com/calendar/render" in kwargs["content"]
-        assert "稽古が確定しました" in kwargs["content"]
+    # Act
+    response = await client.post(
+        f"/api/projects/{test_project.id}/polls/{poll.id}/finalize",
+        json=finalize_data,
+        headers={"Authorization": f"Bearer {test_user_token}"},
+    )
+
+    # Assert
+    assert response.status_code == 200
+
+    # 通知が送信待ちに追加されたか確認
+    contents = await _queued_contents(db)
+    assert len(contents) == 1
+    content = contents[0]
+    assert "calendar.google.com/calendar/render" in content
+    assert "稽古が確定しました" in content
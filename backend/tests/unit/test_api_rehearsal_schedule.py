@@ -0,0 +1,166 @@
+"""稽古スケジュール取得APIのテスト."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import (
+    Character,
+    CharacterCasting,
+    Rehearsal,
+    RehearsalCast,
+    RehearsalParticipant,
+    RehearsalSchedule,
+    Scene,
+    SceneCharacterMapping,
+    SceneChart,
+    Script,
+    TheaterProject,
+    User,
+)
+
+
+async def create_schedule(
+    db: AsyncSession, project: TheaterProject, user: User, rehearsal_count: int
+) -> tuple[RehearsalSchedule, list[Scene], list[Character]]:
+    """シーン・配役・香盤表付きのスケジュールを作成する."""
+    script = Script(project_id=project.id, uploaded_by=user.id, title="稽古用脚本", content="")
+    db.add(script)
+    await db.flush()
+
+    scenes = [
+        Scene(script_id=script.id, scene_number=i + 1, heading=f"シーン{i + 1}") for i in range(3)
+    ]
+    characters = [
+        Character(script_id=script.id, name=name, order=i)
+        for i, name in enumerate(["太郎", "花子"])
+    ]
+    chart = SceneChart(script_id=script.id)
+    db.add_all([*scenes, *characters, chart])
+    await db.flush()
+
+    db.add_all(
+        [
+            CharacterCasting(character_id=characters[0].id, user_id=user.id),
+            SceneCharacterMapping(
+                chart_id=chart.id, scene_id=scenes[0].id, character_id=characters[0].id
+            ),
+            SceneCharacterMapping(
+                chart_id=chart.id, scene_id=scenes[0].id, character_id=characters[1].id
+            ),
+            SceneCharacterMapping(
+                chart_id=chart.id, scene_id=scenes[1].id, character_id=characters[0].id
+            ),
+        ]
+    )
+
+    schedule = RehearsalSchedule(project_id=project.id, script_id=script.id)
+    db.add(schedule)
+    await db.flush()
+
+    start = datetime.now(UTC) + timedelta(days=1)
+    for i in range(rehearsal_count):
+        rehearsal = Rehearsal(
+            schedule_id=schedule.id,
+            scene_id=scenes[i % len(scenes)].id,
+            date=start + timedelta(days=i),
+        )
+        db.add(rehearsal)
+        await db.flush()
+        db.add(RehearsalParticipant(rehearsal_id=rehearsal.id, user_id=user.id))
+        if i % 2:
+            db.add(
+                RehearsalCast(
+                    rehearsal_id=rehearsal.id, character_id=characters[1].id, user_id=user.id
+                )
+            )
+    await db.commit()
+    return schedule, scenes, characters
+
+
+async def count_queries(db: AsyncSession, client: AsyncClient, url: str, token: str) -> int:
+    """リクエスト中に発行されたSQLの件数を数える."""
+    statements: list[str] = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        response = await client.get(url, headers={"Authorization": f"Bearer {token}"})
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.asyncio
+async def test_get_rehearsal_schedule_default_casts_from_scene_chart(
+    client: AsyncClient,
+    test_user: User,
+    test_project: TheaterProject,
+    test_user_token: str,
+    db: AsyncSession,
+) -> None:
+    """シーンの登場人物は香盤表から求め、デフォルト配役が付くこと."""
+    schedule, scenes, characters = await create_schedule(db, test_project, test_user, 3)
+
+    response = await client.get(
+        f"/api/projects/{test_project.id}/rehearsal-schedule",
+        headers={"Authorization": f"Bearer {test_user_token}"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == str(schedule.id)
+    assert data["script_title"] == "稽古用脚本"
+
+    by_scene = {r["scene_id"]: r for r in data["rehearsals"]}
+    first = by_scene[str(scenes[0].id)]
+    assert first["scene_heading"] == "#1 シーン1"
+    # 太郎のデフォルト配役のみ（花子は配役なし）
+    assert [(c["character_name"], c["user_id"]) for c in first["casts"]] == [
+        ("太郎", str(test_user.id))
+    ]
+    # 稽古ごとの指定キャストは香盤表の登場人物に加えて返る
+    second = by_scene[str(scenes[1].id)]
+    assert {c["character_name"] for c in second["casts"]} == {"花子", "太郎"}
+    assert by_scene[str(scenes[2].id)]["casts"] == []
+    assert all(len(r["participants"]) == 1 for r in data["rehearsals"])
+
+
+@pytest.mark.asyncio
+async def test_get_rehearsal_schedule_query_count_is_constant(
+    client: AsyncClient,
+    test_user: User,
+    test_project: TheaterProject,
+    test_user_token: str,
+    db: AsyncSession,
+) -> None:
+    """稽古が100件を超えてもクエリ数が稽古数に比例しないこと."""
+    url = f"/api/projects/{test_project.id}/rehearsal-schedule"
+    schedule, scenes, _ = await create_schedule(db, test_project, test_user, 3)
+    # 認証ユーザー・メンバーのキャッシュを温めてから計測する
+    await count_queries(db, client, url, test_user_token)
+    small = await count_queries(db, client, url, test_user_token)
+
+    start = datetime.now(UTC) + timedelta(days=30)
+    for i in range(120):
+        rehearsal = Rehearsal(
+            schedule_id=schedule.id,
+            scene_id=scenes[i % len(scenes)].id,
+            date=start + timedelta(days=i),
+        )
+        db.add(rehearsal)
+        await db.flush()
+        db.add(RehearsalParticipant(rehearsal_id=rehearsal.id, user_id=test_user.id))
+    await db.commit()
+    db.expunge_all()
+
+    large = await count_queries(db, client, url, test_user_token)
+
+    assert large == small
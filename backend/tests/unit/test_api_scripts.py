@@ -1,12 +1,14 @@
 """脚本APIのテスト."""
 
 from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.models import Script, TheaterProject, User
+from src.db.models import Character, Line, Scene, Script, TheaterProject, User
 
 
 @pytest.mark.asyncio
@@ -208,3 +210,213 @@ async def test_get_nonexistent_script(
 
     # Assert
     assert response.status_code == 404
+
+
+async def _create_script_with_scenes(
+    db: AsyncSession, project: TheaterProject, user: User, is_public: bool = False
+) -> Script:
+    script = Script(
+        project_id=project.id,
+        uploaded_by=user.id,
+        title="ページング脚本",
+        content="本文",
+        is_public=is_public,
+    )
+    db.add(script)
+    await db.flush()
+    character = Character(script_id=script.id, name="太郎")
+    db.add(character)
+    for number in (3, 1, 2):
+        scene = Scene(script_id=script.id, scene_number=number, heading=f"シーン{number}")
+        db.add(scene)
+        await db.flush()
+        db.add(
+            Line(scene_id=scene.id, character_id=character.id, content=f"セリフ{number}", order=1)
+        )
+    await db.commit()
+    return script
+
+
+@pytest.mark.asyncio
+async def test_get_scripts_returns_summaries(
+    client: AsyncClient,
+    test_user: User,
+    test_project: TheaterProject,
+    test_user_token: str,
+    db: AsyncSession,
+) -> None:
+    """脚本一覧はシーン・登場人物を含まない."""
+    await _create_script_with_scenes(db, test_project, test_user)
+
+    response = await client.get(
+        f"/api/scripts/{test_project.id}",
+        headers={"Authorization": f"Bearer {test_user_token}"},
+    )
+
+    assert response.status_code == 200
+    scripts = response.json()["scripts"]
+    assert scripts[0]["title"] == "ページング脚本"
+    assert "scenes" not in scripts[0]
+    assert "characters" not in scripts[0]
+
+
+@pytest.mark.asyncio
+async def test_get_scene_page(
+    client: AsyncClient,
+    test_user: User,
+    test_project: TheaterProject,
+    test_user_token: str,
+    db: AsyncSession,
+) -> None:
+    """シーンを並び順にカーソルで取得し、セリフは指定時のみ返す."""
+    script = await _create_script_with_scenes(db, test_project, test_user)
+    url = f"/api/scripts/{test_project.id}/{script.id}/scenes/page"
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    response = await client.get(url, params={"limit": 2}, headers=headers)
+    assert response.status_code == 200
+    page = response.json()
+    assert [s["scene_number"] for s in page["scenes"]] == [1, 2]
+    assert "lines" not in page["scenes"][0]
+    assert page["next_cursor"]
+
+    response = await client.get(
+        url,
+        params={"limit": 2, "cursor": page["next_cursor"], "fields": "heading,lines"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert page["next_cursor"] is None
+    assert page["scenes"] == [
+        {
+            "heading": "シーン3",
+            "lines": [
+                {
+                    "id": page["scenes"][0]["lines"][0]["id"],
+                    "character_id": page["scenes"][0]["lines"][0]["character_id"],
+                    "character_name": "太郎",
+                    "content": "セリフ3",
+                    "order": 1,
+                }
+            ],
+        }
+    ]
+
+    response = await client.get(url, params={"fields": "heading,secret"}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_public_scene_page(
+    client: AsyncClient, test_user: User, test_project: TheaterProject, db: AsyncSession
+) -> None:
+    """公開脚本のシーンは認証なしで取得でき、非公開脚本は 403."""
+    public_script = await _create_script_with_scenes(db, test_project, test_user, is_public=True)
+    private_script = await _create_script_with_scenes(db, test_project, test_user)
+
+    response = await client.get(f"/api/public/scripts/{public_script.id}/scenes")
+    assert response.status_code == 200
+    assert [s["heading"] for s in response.json()["scenes"]] == ["シーン1", "シーン2", "シーン3"]
+
+    response = await client.get(f"/api/public/scripts/{private_script.id}/scenes")
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_only_content_endpoints_fetch_script_content(
+    client: AsyncClient,
+    test_user: User,
+    test_project: TheaterProject,
+    test_user_token: str,
+    db: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """脚本の本文 (content) は本文を使うエンドポイントでだけ読み込まれる."""
+    script = await _create_script_with_scenes(db, test_project, test_user, is_public=True)
+    db.expunge_all()
+
+    rendered = []
+
+    async def fake_render(content: str, **kwargs: object) -> bytes:
+        rendered.append(content)
+        return b"%PDF"
+
+    monkeypatch.setattr("src.api.scripts.render_script_pdf", fake_render)
+
+    async def fetches_content(url: str) -> bool:
+        statements = []
+
+        def on_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db.bind.sync_engine
+        event.listen(engine, "before_cursor_execute", on_execute)
+        try:
+            response = await client.get(url, headers={"Authorization": f"Bearer {test_user_token}"})
+        finally:
+            event.remove(engine, "before_cursor_execute", on_execute)
+        assert response.status_code == 200, url
+        db.expunge_all()
+        return any("scripts.content" in statement for statement in statements)
+
+    base = f"/api/scripts/{test_project.id}"
+    assert not await fetches_content(base)
+    assert not await fetches_content(f"{base}/{script.id}")
+    assert not await fetches_content(f"{base}/{script.id}/scenes/page")
+    assert not await fetches_content(f"/api/projects/{test_project.id}/dashboard")
+    assert not await fetches_content("/api/public/scripts")
+    assert not await fetches_content(f"/api/public/scripts/{script.id}")
+
+    assert await fetches_content(f"{base}/{script.id}/pdf")
+    assert rendered == ["本文"]
+
+
+@pytest.mark.asyncio
+async def test_reupload_with_full_reparse_attaches_pdf_to_notification(
+    client: AsyncClient,
+    test_project: TheaterProject,
+    test_user_token: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """差分更新を使わない再アップロードでも、通知に本文からPDFを添付できる."""
+    from src.config import settings
+    from src.main import app
+    from src.services.discord import get_discord_service
+
+    rendered = []
+
+    async def fake_render(content: str, **kwargs: object) -> bytes:
+        rendered.append(content)
+        return b"%PDF"
+
+    monkeypatch.setattr(settings, "script_incremental_update", False)
+    monkeypatch.setattr("src.services.pdf_executor.render_script_pdf", fake_render)
+    discord_service = MagicMock()
+    discord_service.send_notification = AsyncMock()
+    app.dependency_overrides[get_discord_service] = lambda: discord_service
+
+    async def upload(text: str) -> None:
+        response = await client.post(
+            f"/api/scripts/{test_project.id}/upload",
+            files={"script_file": ("test.fountain", BytesIO(text.encode()), "text/plain")},
+            data={
+                "title": "再解析",
+                "is_public": "false",
+                "pdf_orientation": "landscape",
+                "pdf_writing_direction": "vertical",
+            },
+            headers={"Authorization": f"Bearer {test_user_token}"},
+        )
+        assert response.status_code == 200
+
+    try:
+        await upload("INT. ROOM - DAY\n\nTARO\nHello.\n")
+        await upload("INT. ROOM - NIGHT\n\nTARO\nGood night.\n")
+    finally:
+        app.dependency_overrides.pop(get_discord_service, None)
+
+    assert discord_service.send_notification.await_count == 2
+    content = discord_service.send_notification.await_args.kwargs["content"]
+    assert "PDF生成に失敗しました" not in content
+    assert rendered[-1] == "INT. ROOM - NIGHT\n\nTARO\nGood night.\n"
@@ -0,0 +1,106 @@
+"""認証ユーザー・プロジェクトメンバーのキャッシュのテスト."""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth.cache import get_cached_member, get_cached_user, invalidate_user
+from src.auth.jwt import create_access_token
+from src.db.models import ProjectMember, TheaterProject, User
+
+
+class QueryCounter:
+    """発行されたSQLを数える."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.engine = db.bind.sync_engine
+        self.count = 0
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args: object) -> None:
+        self.count += 1
+
+
+@pytest.mark.asyncio
+async def test_warm_cache_resolves_user_and_member_without_queries(
+    db: AsyncSession, test_user: User, test_project: TheaterProject
+) -> None:
+    """キャッシュ済みのユーザー・メンバーはクエリなしでセッションに読み込まれる."""
+    await get_cached_user(db, test_user.id)
+    await get_cached_member(db, test_project.id, test_user.id)
+    db.expunge_all()
+
+    with QueryCounter(db) as counter:
+        user = await get_cached_user(db, test_user.id)
+        member = await get_cached_member(db, test_project.id, test_user.id)
+        # 多対一のリレーションはセッション内のユーザーを使う
+        assert member.user is user
+
+    assert counter.count == 0
+    assert user.discord_username == "testuser"
+    assert member.role == "owner"
+
+
+@pytest.mark.asyncio
+async def test_cached_user_can_be_updated(db: AsyncSession, test_user: User) -> None:
+    """キャッシュから読み込んだユーザーへの変更は保存される."""
+    await get_cached_user(db, test_user.id)
+    db.expunge_all()
+
+    user = await get_cached_user(db, test_user.id)
+    user.screen_name = "新しい名前"
+    await db.commit()
+    invalidate_user(user.id)
+    db.expunge_all()
+
+    saved = (await db.execute(select(User).where(User.id == test_user.id))).scalar_one()
+    assert saved.screen_name == "新しい名前"
+    assert (await get_cached_user(db, test_user.id)).screen_name == "新しい名前"
+
+
+@pytest.mark.asyncio
+async def test_member_role_change_and_removal_take_effect_immediately(
+    client: AsyncClient,
+    db: AsyncSession,
+    test_project: TheaterProject,
+    test_user_token: str,
+) -> None:
+    """ロール変更・削除の直後から、キャッシュ済みのメンバーにも反映される."""
+    member_user = User(discord_id="987654321", discord_username="member")
+    db.add(member_user)
+    await db.flush()
+    db.add(ProjectMember(project_id=test_project.id, user_id=member_user.id, role="viewer"))
+    await db.commit()
+    member_headers = {"Authorization": f"Bearer {create_access_token({'sub': member_user.id})}"}
+    owner_headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    # メンバーとしてアクセスし、キャッシュに載せる
+    response = await client.get(f"/api/projects/{test_project.id}", headers=member_headers)
+    assert response.status_code == 200
+    assert response.json()["role"] == "viewer"
+
+    response = await client.put(
+        f"/api/projects/{test_project.id}/members/{member_user.id}",
+        json={"role": "editor"},
+        headers=owner_headers,
+    )
+    assert response.status_code == 200
+    db.expunge_all()
+    cached = await get_cached_member(db, test_project.id, member_user.id)
+    assert cached.role == "editor"
+
+    response = await client.delete(
+        f"/api/projects/{test_project.id}/members/{member_user.id}", headers=owner_headers
+    )
+    assert response.status_code == 200
+    db.expunge_all()
+
+    response = await client.get(f"/api/projects/{test_project.id}", headers=member_headers)
+    assert response.status_code == 403
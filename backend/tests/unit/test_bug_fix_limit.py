@@ -73,22 +73,14 @@ async def test_import_script_respects_private_limit(db):
     # For simplicity in this targeted test, we'll verify the BEHAVIOR via the service logic check
     # that we intend to add/modify.
 
-    from unittest.mock import MagicMock
-
     from src.api.projects import import_script
 
-    # Mock constraints
-    background_tasks = MagicMock()
-    discord_service = MagicMock()
-
     # 5. Expectation: Should raise HTTPException(400) because it SHOULD try to create a private project
     with pytest.raises(HTTPException) as excinfo:
         await import_script(
             script_id=source_script.id,
-            background_tasks=background_tasks,
             current_user=user,
             db=db,
-            discord_service=discord_service,
         )
 
     assert excinfo.value.status_code == 400
@@ -0,0 +1,123 @@
+"""一括INSERTによる脚本データ保存のテスト."""
+
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.bulk import bulk_insert_rows
+from src.db.models import Character, Line, Scene, Script, TheaterProject, User
+from src.services.fountain_parser import LINE_COLUMNS, parse_fountain_and_create_models
+from src.services.parsed_script import ParsedCharacter, ParsedLine, ParsedScene, ParsedScript
+
+
+def build_parsed_script(scene_count: int, lines_per_scene: int) -> ParsedScript:
+    """Fountainを介さずに解析結果を組み立てる."""
+    characters = [ParsedCharacter(name=f"人物{i}", order=i + 1) for i in range(3)]
+    characters[0].description = "主人公"
+    scenes = [ParsedScene(scene_number=0, act_number=None, heading="あらすじ", description="概要")]
+    for number in range(1, scene_count + 1):
+        scene = ParsedScene(scene_number=number, act_number=1, heading=f"シーン{number}")
+        for order in range(1, lines_per_scene + 1):
+            character = characters[order % len(characters)] if order % 4 else None
+            scene.lines.append(
+                ParsedLine(content=f"台詞{number}-{order}", order=order, character=character)
+            )
+        scenes.append(scene)
+    return ParsedScript(
+        content_hash="test", elements=[], metadata={}, characters=characters, scenes=scenes
+    )
+
+
+async def create_script(db: AsyncSession, project: TheaterProject, user: User) -> Script:
+    script = Script(project_id=project.id, uploaded_by=user.id, title="一括", content="")
+    db.add(script)
+    await db.flush()
+    return script
+
+
+async def snapshot(db: AsyncSession, script: Script) -> tuple:
+    """ID以外の保存内容を比較可能な形で取得する."""
+    characters = (
+        await db.execute(
+            select(Character.name, Character.description, Character.order, Character.is_custom)
+            .where(Character.script_id == script.id)
+            .order_by(Character.order)
+        )
+    ).all()
+    scenes = (
+        await db.execute(
+            select(Scene.scene_number, Scene.act_number, Scene.heading, Scene.description)
+            .where(Scene.script_id == script.id)
+            .order_by(Scene.scene_number)
+        )
+    ).all()
+    lines = (
+        await db.execute(
+            select(Scene.scene_number, Line.order, Line.content, Character.name)
+            .join(Scene, Line.scene_id == Scene.id)
+            .outerjoin(Character, Line.character_id == Character.id)
+            .where(Scene.script_id == script.id)
+            .order_by(Scene.scene_number, Line.order)
+        )
+    ).all()
+    return characters, scenes, lines
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_rows_writes_all_rows(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """SQLiteのバインドパラメータ上限を超える件数でもすべて書き込めること."""
+    script = await create_script(db, test_project, test_user)
+    scene = Scene(script_id=script.id, scene_number=1, heading="INT. 部屋")
+    db.add(scene)
+    await db.flush()
+
+    rows = [(uuid.uuid4(), scene.id, None, f"行{i}", i) for i in range(1, 501)]
+    written = await bulk_insert_rows(db, Line.__table__, LINE_COLUMNS, rows)
+
+    count = await db.scalar(select(func.count()).select_from(Line).where(Line.scene_id == scene.id))
+    assert written == count == 500
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_rows_is_rolled_back_with_session(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """保留中の変更がない状態で書き込んでも、ロールバックで取り消されること."""
+    script = await create_script(db, test_project, test_user)
+    scene = Scene(script_id=script.id, scene_number=1, heading="INT. 部屋")
+    db.add(scene)
+    await db.commit()
+    scene_id = scene.id
+
+    rows = [(uuid.uuid4(), scene_id, None, f"行{i}", i) for i in range(1, 11)]
+    await bulk_insert_rows(db, Line.__table__, LINE_COLUMNS, rows)
+    await db.rollback()
+
+    count = await db.scalar(select(func.count()).select_from(Line).where(Line.scene_id == scene_id))
+    assert count == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_and_orm_modes_store_same_rows(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """一括INSERTとORMで同じ内容が保存され、同じ香盤表用の対応が返ること."""
+    parsed = build_parsed_script(scene_count=3, lines_per_scene=8)
+
+    bulk_script = await create_script(db, test_project, test_user)
+    bulk_mapping = await parse_fountain_and_create_models(
+        bulk_script, "", db, parsed=parsed, bulk=True
+    )
+    orm_script = await create_script(db, test_project, test_user)
+    orm_mapping = await parse_fountain_and_create_models(
+        orm_script, "", db, parsed=parsed, bulk=False
+    )
+    await db.commit()
+
+    assert await snapshot(db, bulk_script) == await snapshot(db, orm_script)
+    assert len(bulk_mapping) == len(orm_mapping) == 3  # あらすじは除く
+    assert [len(ids) for ids in bulk_mapping.values()] == [3, 3, 3]
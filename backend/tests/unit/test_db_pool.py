@@ -0,0 +1,82 @@
+"""DBコネクションプールとリクエストごとのセッションのテスト."""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.db import get_db
+from src.db.pool_metrics import (
+    InstrumentedAsyncQueuePool,
+    get_pool_stats,
+    pool_wait_stats,
+    track_request_pool_wait,
+)
+from src.main import app
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_checkout_wait(tmp_path) -> None:
+    """接続取得の回数・タイムアウトがプロセス全体とリクエストの両方に記録される."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    checkouts_before = pool_wait_stats.checkouts
+    timeouts_before = pool_wait_stats.timeouts
+    request_stats = track_request_pool_wait()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            # 唯一の接続を使用中なので、次の取得は pool_timeout まで待って失敗する
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+    finally:
+        await engine.dispose()
+
+    assert request_stats.checkouts == 2
+    assert request_stats.max_wait_seconds >= 0.1
+    assert pool_wait_stats.checkouts == checkouts_before + 2
+    assert pool_wait_stats.timeouts == timeouts_before + 1
+
+    stats = get_pool_stats(engine.pool)
+    assert stats["pool_class"] == "InstrumentedAsyncQueuePool"
+    assert stats["size"] == 1
+    assert stats["max_wait_ms"] >= 100
+
+
+@pytest.mark.asyncio
+async def test_auth_and_handler_share_one_session(
+    client: AsyncClient, db: AsyncSession, test_user_token: str
+) -> None:
+    """認証の依存関係とエンドポイントで同じセッションが使われる."""
+    opened = []
+
+    async def counting_get_db():
+        opened.append(db)
+        yield db
+
+    app.dependency_overrides[get_db] = counting_get_db
+
+    response = await client.get(
+        "/api/projects/", headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+
+    assert response.status_code == 200
+    assert len(opened) == 1
+
+
+@pytest.mark.asyncio
+async def test_db_pool_health(client: AsyncClient) -> None:
+    """プールのメトリクスを取得できる."""
+    response = await client.get("/api/health/db-pool")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert "pool_class" in data
+    assert "checkouts" in data
+    assert "max_wait_ms" in data
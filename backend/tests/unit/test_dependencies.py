@@ -1,10 +1,18 @@
 """依存性注入（dependencies）のテスト."""
 
 import pytest
+from fastapi import HTTPException
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.models import User
+from src.db.models import Character, Line, Scene, Script, TheaterProject, User
 from src.dependencies.auth import get_current_user_dep, get_optional_current_user_dep
+from src.dependencies.permissions import (
+    SCRIPT_LOAD_CONTENT,
+    SCRIPT_LOAD_FULL,
+    get_script_member,
+    get_script_member_dep,
+)
 
 
 @pytest.mark.asyncio
@@ -86,3 +94,68 @@ async def test_get_optional_current_user_dep_invalid_token(db: AsyncSession) ->
     # Assert
     # オプショナルなので、エラーではなくNoneを返すべき
     assert user is None
+
+
+async def _create_script(db: AsyncSession, project: TheaterProject, user: User) -> Script:
+    script = Script(project_id=project.id, uploaded_by=user.id, title="脚本", content="本文")
+    db.add(script)
+    await db.flush()
+    character = Character(script_id=script.id, name="太郎")
+    scene = Scene(script_id=script.id, scene_number=1, heading="部屋")
+    db.add_all([character, scene])
+    await db.flush()
+    db.add(Line(scene_id=scene.id, character_id=character.id, content="こんにちは", order=1))
+    await db.commit()
+    db.expunge_all()
+    return script
+
+
+@pytest.mark.asyncio
+async def test_get_script_member_dep_loads_metadata_only(
+    test_user: User, test_project: TheaterProject, db: AsyncSession
+) -> None:
+    """権限チェックのみの依存関係は本文・リレーションを読み込まない."""
+    script = await _create_script(db, test_project, test_user)
+
+    member, loaded = await get_script_member_dep(script_id=script.id, current_user=test_user, db=db)
+
+    assert member.role == "owner"
+    assert loaded.title == "脚本"
+    assert {"content", "characters", "scenes"} <= inspect(loaded).unloaded
+
+
+@pytest.mark.asyncio
+async def test_get_script_member_loaders(
+    test_user: User, test_project: TheaterProject, db: AsyncSession
+) -> None:
+    """エンドポイントが指定した範囲だけ脚本を読み込む."""
+    script = await _create_script(db, test_project, test_user)
+
+    _, loaded = await get_script_member(SCRIPT_LOAD_CONTENT)(
+        script_id=script.id, current_user=test_user, db=db
+    )
+    assert loaded.content == "本文"
+    assert {"characters", "scenes"} <= inspect(loaded).unloaded
+    db.expunge_all()
+
+    _, loaded = await get_script_member(SCRIPT_LOAD_FULL)(
+        script_id=script.id, current_user=test_user, db=db
+    )
+    assert "content" in inspect(loaded).unloaded
+    assert not {"characters", "scenes"} & inspect(loaded).unloaded
+    assert loaded.scenes[0].lines[0].character.name == "太郎"
+
+
+@pytest.mark.asyncio
+async def test_get_script_member_dep_rejects_non_member(
+    test_user: User, test_project: TheaterProject, db: AsyncSession
+) -> None:
+    """メンバーでないユーザーは 403."""
+    script = await _create_script(db, test_project, test_user)
+    outsider = User(discord_id="555", discord_username="outsider")
+    db.add(outsider)
+    await db.commit()
+
+    with pytest.raises(HTTPException) as excinfo:
+        await get_script_member(SCRIPT_LOAD_FULL)(script_id=script.id, current_user=outsider, db=db)
+    assert excinfo.value.status_code == 403
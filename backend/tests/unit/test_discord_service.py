@@ -2,10 +2,12 @@
 
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
 from httpx import Response
 
-from src.services.discord import DiscordService
+from src.services.discord import DiscordService, get_discord_http_client
+from src.services.discord_rate_limit import DiscordRateLimiter, route_key
 
 
 @pytest.fixture
@@ -51,3 +53,56 @@ async def test_send_notification_invalid_url(discord_service: DiscordService):
     with patch("httpx.AsyncClient.request", new_callable=AsyncMock) as mock_request:
         await discord_service.send_notification("Test", webhook_url="http://example.com/invalid")
         mock_request.assert_not_called()
+
+
+def test_route_key_keeps_major_parameters():
+    """主要パラメータ以外のIDはまとめてルートキーにすること."""
+    base = "https://discord.com/api/v10"
+    assert route_key("post", f"{base}/channels/123/messages") == (
+        "POST /api/v10/channels/123/messages"
+    )
+    assert route_key("GET", f"{base}/channels/123/messages/456/reactions/ok/@me") == (
+        "GET /api/v10/channels/123/messages/:id/reactions/ok/@me"
+    )
+    assert route_key("POST", f"{base}/webhooks/789/token") == "POST /api/v10/webhooks/789/token"
+
+
+@pytest.mark.asyncio
+async def test_request_waits_for_exhausted_bucket(discord_service: DiscordService):
+    """バケットを使い切った場合は、送信前にリセットまで待機すること."""
+    url = "https://discord.com/api/v10/channels/1/messages"
+    limited = Response(
+        200,
+        headers={
+            "X-RateLimit-Bucket": "abc",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset-After": "2.5",
+        },
+        request=httpx.Request("POST", url),
+    )
+
+    # 待機した分だけ進む時計
+    clock = [100.0]
+
+    async def fake_sleep(seconds: float) -> None:
+        clock[0] += seconds
+
+    with (
+        patch("src.services.discord.rate_limiter", DiscordRateLimiter()),
+        patch("httpx.AsyncClient.request", new_callable=AsyncMock) as mock_request,
+        patch("src.services.discord_rate_limit.time.monotonic", lambda: clock[0]),
+        patch("src.services.discord_rate_limit.asyncio.sleep", side_effect=fake_sleep) as sleep,
+    ):
+        mock_request.return_value = limited
+        await discord_service._request_with_retry("POST", url, json={})
+        sleep.assert_not_called()
+
+        await discord_service._request_with_retry("POST", url, json={})
+        sleep.assert_called_once_with(2.5)
+        assert mock_request.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared():
+    """Discord API用のクライアントが使い回されること."""
+    assert get_discord_http_client() is get_discord_http_client()
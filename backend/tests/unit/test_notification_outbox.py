@@ -0,0 +1,102 @@
+"""通知アウトボックスのテスト."""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.db.models import NotificationOutbox
+from src.services.notification_outbox import (
+    drain_outbox,
+    enqueue_discord_notification,
+    enqueue_email,
+)
+
+WEBHOOK_URL = "https://discord.com/api/webhooks/123/token"
+
+
+def _session_maker(db: AsyncSession) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(db.bind, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _outbox(db: AsyncSession) -> list[NotificationOutbox]:
+    db.expire_all()
+    return list((await db.execute(select(NotificationOutbox))).scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_drain_outbox_sends_and_deletes(db: AsyncSession) -> None:
+    """送信に成功した通知は削除される."""
+    enqueue_discord_notification(db, content="hello", webhook_url=WEBHOOK_URL)
+    email = MagicMock()
+    email.send_reservation_confirmation.return_value = True
+    enqueue_email(db, "reservation_confirmation", to_email="guest@example.com", name="Guest")
+    await db.commit()
+
+    discord_service = AsyncMock()
+    stats = await drain_outbox(_session_maker(db), discord_service, email)
+
+    assert stats == {"claimed": 2, "sent": 2, "retried": 0, "dead": 0}
+    discord_service.post_webhook.assert_awaited_once_with(
+        content="hello", webhook_url=WEBHOOK_URL, embeds=None
+    )
+    email.send_reservation_confirmation.assert_called_once_with(
+        to_email="guest@example.com", name="Guest"
+    )
+    assert await _outbox(db) == []
+
+
+@pytest.mark.asyncio
+async def test_drain_outbox_retries_failed_delivery_later(db: AsyncSession) -> None:
+    """送信に失敗した通知はバックオフ後に再試行される."""
+    enqueue_discord_notification(db, content="hello", webhook_url=WEBHOOK_URL)
+    await db.commit()
+
+    discord_service = AsyncMock()
+    discord_service.post_webhook.side_effect = RuntimeError("Discord is down")
+    before = datetime.now(UTC).replace(tzinfo=None)
+    stats = await drain_outbox(_session_maker(db), discord_service, MagicMock())
+
+    assert stats == {"claimed": 1, "sent": 0, "retried": 1, "dead": 0}
+    [row] = await _outbox(db)
+    assert row.status == "pending"
+    assert row.attempts == 1
+    assert "Discord is down" in row.last_error
+    assert row.next_attempt_at.replace(tzinfo=None) >= before + timedelta(
+        seconds=settings.notification_outbox_retry_base_seconds - 1
+    )
+
+    # 再試行時刻までは取り出されない
+    stats = await drain_outbox(_session_maker(db), discord_service, MagicMock())
+    assert stats["claimed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_outbox_marks_dead_after_max_attempts(db: AsyncSession) -> None:
+    """再試行の上限に達した通知は dead として残る."""
+    row = enqueue_discord_notification(db, content="hello", webhook_url=WEBHOOK_URL)
+    row.attempts = settings.notification_outbox_max_attempts - 1
+    await db.commit()
+
+    discord_service = AsyncMock()
+    discord_service.post_webhook.side_effect = RuntimeError("Discord is down")
+    stats = await drain_outbox(_session_maker(db), discord_service, MagicMock())
+
+    assert stats == {"claimed": 1, "sent": 0, "retried": 0, "dead": 1}
+    [row] = await _outbox(db)
+    assert row.status == "dead"
+    assert row.attempts == settings.notification_outbox_max_attempts
+
+
+@pytest.mark.asyncio
+async def test_enqueue_discord_notification_skips_invalid_url(db: AsyncSession) -> None:
+    """Webhook URL が不正な場合は送信待ちに追加しない."""
+    assert (
+        enqueue_discord_notification(db, content="hello", webhook_url="http://example.com") is None
+    )
+    await db.commit()
+
+    assert await _outbox(db) == []
@@ -0,0 +1,69 @@
+"""脚本中間表現（ParsedScript）のテスト."""
+
+from playscript.conv.fountain import psc_from_fountain
+
+from src.services.parsed_script import parse_script
+from src.utils.fountain_utils import preprocess_fountain
+
+FOUNTAIN = """Title: テスト脚本
+Author: 作者
+
+# 登場人物
+
+太郎: 主人公
+花子
+
+# 第一幕
+
+INT. 部屋
+
+太郎
+こんにちは
+
+次郎
+やあ
+
+花子
+(笑って)
+元気？
+
+INT. 公園
+
+太郎
+またね
+"""
+
+
+def test_parse_script_is_memoized_by_content():
+    """同じ本文は1回だけ解析され、同一の結果が共有されること."""
+    first = parse_script(FOUNTAIN)
+    second = parse_script(FOUNTAIN)
+
+    assert first is second
+    assert parse_script(FOUNTAIN + "\n") is not first
+
+
+def test_parse_script_collects_characters_and_scenes():
+    """登場人物の定義順とシーン別のセリフ数が取れること."""
+    parsed = parse_script(FOUNTAIN)
+
+    assert [c.name for c in parsed.characters] == ["太郎", "花子", "次郎"]
+    assert parsed.characters[0].description == "主人公"
+
+    numbered = [s for s in parsed.scenes if s.scene_number > 0]
+    assert len(numbered) == 2
+    assert numbered[0].character_line_counts() == {"太郎": 1, "次郎": 1, "花子": 1}
+    assert numbered[1].character_line_counts() == {"太郎": 1}
+
+
+def test_to_psc_matches_playscript_conversion():
+    """再パースせずに作ったPScがplayscriptの変換結果と一致すること."""
+    expected = psc_from_fountain(preprocess_fountain(FOUNTAIN))
+    actual = parse_script(FOUNTAIN).to_psc()
+
+    assert actual.title == expected.title
+    assert actual.author == expected.author
+    assert actual.chars == expected.chars
+    assert [(line.type, line.name, line.text) for line in actual.lines] == [
+        (line.type, line.name, line.text) for line in expected.lines
+    ]
@@ -0,0 +1,105 @@
+"""PDFレンダリングキャッシュのユニットテスト."""
+
+import pytest
+
+from src.services import pdf_cache
+from src.services.pdf_cache import (
+    DiskPdfCache,
+    MemoryPdfCache,
+    PdfCacheBackend,
+    TieredPdfCache,
+    make_pdf_cache_key,
+)
+from src.services.pdf_executor import PdfRenderExecutor
+
+
+def test_cache_key_depends_on_all_inputs():
+    """本文・向き・文字方向・生成バージョンのいずれかが変わればキーも変わること."""
+    base = make_pdf_cache_key("INT. ROOM", "landscape", "vertical")
+
+    assert base == make_pdf_cache_key("INT. ROOM", "landscape", "vertical")
+    assert base != make_pdf_cache_key("INT. ROOM2", "landscape", "vertical")
+    assert base != make_pdf_cache_key("INT. ROOM", "portrait", "vertical")
+    assert base != make_pdf_cache_key("INT. ROOM", "landscape", "horizontal")
+
+
+def test_cache_key_changes_with_generator_version(monkeypatch):
+    """生成ロジックのバージョンを上げると別キーになること."""
+    before = make_pdf_cache_key("INT. ROOM", "landscape", "vertical")
+    monkeypatch.setattr(pdf_cache, "PDF_GENERATOR_VERSION", "test-next")
+
+    assert make_pdf_cache_key("INT. ROOM", "landscape", "vertical") != before
+
+
+def test_cache_backend_requires_get_and_set():
+    """get/set を実装しないバックエンドはインスタンス化できないこと."""
+
+    class GetOnlyCache(PdfCacheBackend):
+        def get(self, key: str) -> bytes | None:
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyCache()
+
+
+def test_memory_cache_evicts_least_recently_used_by_bytes():
+    """合計バイト数が上限を超えたら最も古く使われたものから破棄されること."""
+    cache = MemoryPdfCache(max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    assert cache.get("a") == b"1234"  # aを最近使用扱いにする
+
+    cache.set("c", b"1234")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.get("c") == b"1234"
+    assert cache.current_bytes == 8
+
+
+def test_memory_cache_skips_oversized_entry():
+    """上限を超える単体エントリは保持しないこと."""
+    cache = MemoryPdfCache(max_bytes=4)
+    cache.set("big", b"12345")
+
+    assert cache.get("big") is None
+    assert cache.current_bytes == 0
+
+
+def test_tiered_cache_warms_memory_from_shared_tier(tmp_path):
+    """別ワーカーが書き込んだ共有層のPDFでメモリ層が温まること."""
+    shared = DiskPdfCache(tmp_path)
+    TieredPdfCache(MemoryPdfCache(1024), shared).set("key", b"%PDF-shared")
+
+    cold = TieredPdfCache(MemoryPdfCache(1024), DiskPdfCache(tmp_path))
+    assert cold.memory.get("key") is None
+    assert cold.get("key") == b"%PDF-shared"
+    assert cold.memory.get("key") == b"%PDF-shared"
+
+
+@pytest.mark.asyncio
+async def test_render_with_cache_renders_once():
+    """同じリビジョンの2回目以降は生成処理を呼ばないこと."""
+    calls = []
+
+    def fake_generate(content, orientation="landscape", writing_direction="vertical"):
+        calls.append((content, orientation, writing_direction))
+        return b"%PDF-" + content.encode()
+
+    executor = PdfRenderExecutor(
+        max_workers=0,
+        max_queue=1,
+        timeout_seconds=5.0,
+        cache=TieredPdfCache(MemoryPdfCache(1024)),
+        render_func=fake_generate,
+    )
+
+    first = await executor.render("INT. ROOM")
+    second = await executor.render("INT. ROOM")
+    await executor.render("INT. ROOM", orientation="portrait")
+
+    assert first == second == b"%PDF-INT. ROOM"
+    assert calls == [
+        ("INT. ROOM", "landscape", "vertical"),
+        ("INT. ROOM", "portrait", "vertical"),
+    ]
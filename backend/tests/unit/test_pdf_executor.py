@@ -0,0 +1,142 @@
+"""PDF描画プールのユニットテスト."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.services.pdf_cache import MemoryPdfCache, TieredPdfCache
+from src.services.pdf_executor import (
+    PdfRenderExecutor,
+    PdfRenderQueueFullError,
+    PdfRenderTimeoutError,
+)
+
+
+def fake_render(content: str, orientation: str, writing_direction: str) -> bytes:
+    """描画関数のスタブ."""
+    return f"%PDF-{content}-{orientation}-{writing_direction}".encode()
+
+
+def make_executor(render_func=fake_render, max_workers=0, max_queue=2, timeout=5.0):
+    return PdfRenderExecutor(
+        max_workers=max_workers,
+        max_queue=max_queue,
+        timeout_seconds=timeout,
+        cache=TieredPdfCache(MemoryPdfCache(1024 * 1024)),
+        render_func=render_func,
+    )
+
+
+@pytest.mark.asyncio
+async def test_render_uses_cache_on_second_call():
+    """2回目はキャッシュから返り、描画回数が増えないこと."""
+    executor = make_executor()
+
+    first = await executor.render("INT. ROOM")
+    second = await executor.render("INT. ROOM")
+
+    assert first == second == b"%PDF-INT. ROOM-landscape-vertical"
+    stats = executor.get_stats()
+    assert stats["rendered_count"] == 1
+    assert stats["cache_hit_count"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["avg_render_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_render_does_not_block_event_loop():
+    """描画中もイベントループ上の他の処理が進むこと."""
+    release = threading.Event()
+
+    def slow_render(content, orientation, writing_direction):
+        release.wait(timeout=5)
+        return b"%PDF-slow"
+
+    executor = make_executor(render_func=slow_render)
+    task = asyncio.create_task(executor.render("INT. ROOM"))
+
+    await asyncio.sleep(0.05)
+    assert not task.done()
+    assert executor.in_flight == 1
+
+    release.set()
+    assert await task == b"%PDF-slow"
+
+
+@pytest.mark.asyncio
+async def test_render_rejects_when_queue_is_full():
+    """実行中+待機数が上限に達したら受け付けないこと."""
+    release = threading.Event()
+
+    def slow_render(content, orientation, writing_direction):
+        release.wait(timeout=5)
+        return b"%PDF-slow"
+
+    executor = make_executor(render_func=slow_render, max_queue=1)
+    tasks = [asyncio.create_task(executor.render(f"SCENE {i}")) for i in range(2)]
+    await asyncio.sleep(0.05)
+
+    assert executor.queue_length == 1
+    with pytest.raises(PdfRenderQueueFullError):
+        await executor.render("SCENE 3")
+    assert executor.get_stats()["rejected_count"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_render_timeout():
+    """タイムアウトを超えた描画はエラーになり、キャッシュされないこと."""
+
+    def slow_render(content, orientation, writing_direction):
+        time.sleep(0.3)
+        return b"%PDF-slow"
+
+    executor = make_executor(render_func=slow_render, timeout=0.05)
+
+    with pytest.raises(PdfRenderTimeoutError):
+        await executor.render("INT. ROOM")
+
+    assert executor.get_stats()["timeout_count"] == 1
+    assert executor.get_stats()["rendered_count"] == 0
+    # 描画が終わるまでは実行中として数える
+    assert executor.in_flight == 1
+    await asyncio.sleep(0.5)
+    assert executor.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_timed_out_render_still_counts_toward_queue_limit():
+    """タイムアウトした描画も、終わるまでは同時実行数の上限に含まれること."""
+    release = threading.Event()
+
+    def slow_render(content, orientation, writing_direction):
+        release.wait(timeout=5)
+        return b"%PDF-slow"
+
+    executor = make_executor(render_func=slow_render, max_queue=0, timeout=0.05)
+
+    with pytest.raises(PdfRenderTimeoutError):
+        await executor.render("SCENE 1")
+    with pytest.raises(PdfRenderQueueFullError):
+        await executor.render("SCENE 2")
+
+    release.set()
+    await asyncio.sleep(0.1)
+    assert executor.in_flight == 0
+    assert await executor.render("SCENE 2") == b"%PDF-slow"
+
+
+@pytest.mark.asyncio
+async def test_render_in_process_pool():
+    """プロセスプールでも描画できること."""
+    executor = make_executor(max_workers=1)
+    try:
+        pdf_bytes = await executor.render("INT. ROOM", "portrait", "horizontal")
+    finally:
+        executor.shutdown()
+
+    assert pdf_bytes == b"%PDF-INT. ROOM-portrait-horizontal"
@@ -0,0 +1,164 @@
+"""日程調整の分析用スナップショットのテスト."""
+
+from datetime import UTC, datetime
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import (
+    Character,
+    CharacterCasting,
+    ProjectMember,
+    Scene,
+    SceneCharacterMapping,
+    SceneChart,
+    SchedulePoll,
+    SchedulePollAnswer,
+    SchedulePollCandidate,
+    Script,
+    TheaterProject,
+    User,
+)
+from src.services.schedule_poll_service import SchedulePollService
+
+
+async def create_poll(db: AsyncSession, project: TheaterProject, user: User) -> SchedulePoll:
+    """1シーン・1配役・候補日程1件の日程調整を作成する."""
+    script = Script(project_id=project.id, uploaded_by=user.id, title="分析", content="")
+    db.add(script)
+    await db.flush()
+    scene = Scene(script_id=script.id, scene_number=1, heading="部屋")
+    character = Character(script_id=script.id, name="太郎")
+    chart = SceneChart(script_id=script.id)
+    db.add_all([scene, character, chart])
+    await db.flush()
+    db.add_all(
+        [
+            SceneCharacterMapping(chart_id=chart.id, scene_id=scene.id, character_id=character.id),
+            CharacterCasting(character_id=character.id, user_id=user.id),
+            ProjectMember(
+                project_id=project.id, user_id=user.id, role="owner", display_name="役者"
+            ),
+        ]
+    )
+    poll = SchedulePoll(project_id=project.id, title="分析", creator_id=user.id)
+    db.add(poll)
+    await db.flush()
+    now = datetime.now(UTC)
+    db.add(SchedulePollCandidate(poll_id=poll.id, start_datetime=now, end_datetime=now))
+    await db.commit()
+    return poll
+
+
+class QueryCounter:
+    """発行されたSQLを数える."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.engine = db.bind.sync_engine
+        self.count = 0
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args: object) -> None:
+        self.count += 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_shared_between_views(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """おすすめとカレンダー分析が1回の読み込みを共有すること."""
+    poll = await create_poll(db, test_project, test_user)
+    service = SchedulePollService(db, MagicMock())
+
+    with QueryCounter(db) as first:
+        await service.get_recommendations(poll.id)
+    with QueryCounter(db) as second:
+        analysis = await service.get_calendar_analysis(poll.id)
+
+    assert first.count > 1
+    # 2回目は回答の版の確認のみ
+    assert second.count == 1
+    assert [s["heading"] for s in analysis["all_scenes"]] == ["0-1: 部屋"]
+
+
+@pytest.mark.asyncio
+async def test_upsert_answer_updates_cached_analysis(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """回答の登録後は読み直さずに新しい回答で分析されること."""
+    poll = await create_poll(db, test_project, test_user)
+    service = SchedulePollService(db, MagicMock())
+
+    analysis = await service.get_calendar_analysis(poll.id)
+    [candidate] = analysis["analyses"]
+    assert candidate["possible_scenes"] == []
+    assert [s["reason"] for s in candidate["reach_scenes"]] == ["不足: 太郎"]
+
+    await service.upsert_answer(candidate["candidate_id"], test_user.id, "ok")
+
+    with QueryCounter(db) as counter:
+        analysis = await service.get_calendar_analysis(poll.id)
+    # 回答の版は反映時に記録済みのため、版の確認のみで読み直さない
+    assert counter.count == 1
+    [candidate] = analysis["analyses"]
+    assert [s["reason"] for s in candidate["possible_scenes"]] == ["全員揃っています"]
+    assert candidate["available_members"] == [
+        {"user_id": test_user.id, "name": "役者", "role": "太郎"}
+    ]
+    [recommendation] = await service.get_recommendations(poll.id)
+    assert recommendation["score"] == 10
+
+
+@pytest.mark.asyncio
+async def test_answer_from_another_worker_reloads_analysis(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """キャッシュを経由しない回答（他のワーカーでの回答）も次の読み出しで反映されること."""
+    poll = await create_poll(db, test_project, test_user)
+    service = SchedulePollService(db, MagicMock())
+
+    analysis = await service.get_calendar_analysis(poll.id)
+    [candidate] = analysis["analyses"]
+    assert candidate["possible_scenes"] == []
+
+    db.add(
+        SchedulePollAnswer(
+            candidate_id=candidate["candidate_id"], user_id=test_user.id, status="ok"
+        )
+    )
+    await db.commit()
+
+    analysis = await service.get_calendar_analysis(poll.id)
+    [candidate] = analysis["analyses"]
+    assert [s["reason"] for s in candidate["possible_scenes"]] == ["全員揃っています"]
+
+
+@pytest.mark.asyncio
+async def test_discord_button_answer_updates_cached_analysis(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """Discordのボタンからの回答もキャッシュ済みの分析に反映されること."""
+    from src.api.interactions import handle_poll_interaction
+
+    # create_poll がメンバーを追加するため、フィクスチャのメンバーは除いておく
+    await db.execute(delete(ProjectMember).where(ProjectMember.project_id == test_project.id))
+    poll = await create_poll(db, test_project, test_user)
+    service = SchedulePollService(db, MagicMock())
+
+    analysis = await service.get_calendar_analysis(poll.id)
+    [candidate] = analysis["analyses"]
+    assert candidate["possible_scenes"] == []
+
+    await handle_poll_interaction(test_user, candidate["candidate_id"], "ok", db)
+
+    analysis = await service.get_calendar_analysis(poll.id)
+    [candidate] = analysis["analyses"]
+    assert [s["reason"] for s in candidate["possible_scenes"]] == ["全員揃っています"]
@@ -0,0 +1,141 @@
+"""日程調整レコメンドエンジンのテスト."""
+
+import uuid
+from types import SimpleNamespace
+
+from src.services.poll_recommendation import (
+    PollRecommendationEngine,
+    RecommendationScene,
+    recommend_by_attendance,
+)
+
+
+def make_candidate(answers: dict[uuid.UUID, str]) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        start_datetime=None,
+        end_datetime=None,
+        answers=[SimpleNamespace(user_id=u, status=s) for u, s in answers.items()],
+    )
+
+
+def make_scene(number: int, heading: str) -> RecommendationScene:
+    return RecommendationScene(id=uuid.uuid4(), act_number=1, scene_number=number, heading=heading)
+
+
+def test_double_cast_and_uncast_characters() -> None:
+    """ダブルキャストは1人来られれば可、未配役の登場人物は稽古可否に影響しないこと."""
+    taro_a, taro_b, hanako = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    taro, hana, jiro = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    synopsis = make_scene(0, "あらすじ")
+    room = make_scene(1, "部屋")
+    park = make_scene(2, "公園")
+    engine = PollRecommendationEngine(
+        [synopsis, room, park],
+        {synopsis.id: [taro], room.id: [taro, jiro], park.id: [taro, hana]},
+        {taro: [taro_a, taro_b], hana: [hanako]},
+        {},
+        set(),
+    )
+
+    candidate = make_candidate({taro_a: "ng", taro_b: "ok", hanako: "ng"})
+    [recommendation] = engine.recommend([candidate])
+
+    # 公園は花子が来られないため不可、あらすじは対象外
+    assert [s["scene_heading"] for s in recommendation["possible_scenes"]] == ["1-1: 部屋"]
+    assert recommendation["score"] == 10
+    assert recommendation["reason"] == "未配役あり(配役済みは全員出席可)"
+
+
+def test_scenes_and_candidates_are_ranked_by_score() -> None:
+    """シーンはスコア順（同点はシーン順）、候補日程はスコア順の上位3件に絞られること."""
+    actor, director = uuid.uuid4(), uuid.uuid4()
+    character = uuid.uuid4()
+    empty = make_scene(1, "無人")
+    solo = make_scene(2, "独白")
+    engine = PollRecommendationEngine(
+        [empty, solo],
+        {solo.id: [character]},
+        {character: [actor]},
+        {},
+        {director},
+    )
+
+    candidates = [
+        make_candidate({actor: "maybe"}),
+        make_candidate({actor: "ok", director: "ok"}),
+        make_candidate({actor: "ng", director: "ng"}),
+        make_candidate({}),
+        make_candidate({actor: "ok"}),
+    ]
+    recommendations = engine.recommend(candidates)
+
+    assert [r["score"] for r in recommendations] == [30, 10, 5]
+    top = recommendations[0]
+    assert top["candidate_id"] == candidates[1].id
+    assert [s["scene_heading"] for s in top["possible_scenes"]] == ["1-2: 独白", "1-1: 無人"]
+    assert (
+        top["possible_scenes"][0]["reason"]
+        == "必須キャスト全員出席可能 / 演出・制作メンバー出席可能"
+    )
+
+
+def test_missing_required_role_excludes_candidate() -> None:
+    """必須役職の全員がNGの候補日程はシーンなし・スコア0となり、回答があれば除外されること."""
+    director = uuid.uuid4()
+    scene = make_scene(1, "部屋")
+    engine = PollRecommendationEngine([scene], {}, {}, {"演出": [director]}, {director})
+
+    assert engine.evaluate(make_candidate({director: "ng"})) is None
+    unanswered = engine.evaluate(make_candidate({}))
+    assert unanswered is not None
+    assert unanswered["possible_scenes"][0]["score"] == 0
+
+
+def test_apply_answer_matches_rebuilt_state() -> None:
+    """1人の回答の差分更新が、回答全体から作り直した出席状況と一致すること."""
+    taro_a, taro_b, hanako, director = (uuid.uuid4() for _ in range(4))
+    taro, hana = uuid.uuid4(), uuid.uuid4()
+    room = make_scene(1, "部屋")
+    park = make_scene(2, "公園")
+    engine = PollRecommendationEngine(
+        [room, park],
+        {room.id: [taro], park.id: [taro, hana]},
+        {taro: [taro_a, taro_b], hana: [hanako]},
+        {"演出": [director]},
+        {director},
+    )
+
+    answers = {taro_a: "ng", hanako: "ok"}
+    candidate = make_candidate(answers)
+    state = engine.build(candidate)
+    assert state.possible_scenes == 0
+    assert state.reach_scenes == 0b11
+
+    for user_id, status in [(taro_b, "maybe"), (director, "ok"), (taro_b, "ng"), (taro_a, "ok")]:
+        assert engine.apply_answer(state, user_id, status)
+        answers[user_id] = status
+        rebuilt = engine.build(make_candidate(answers))
+        for field in ("possible_scenes", "reach_scenes", "scene_ok", "scene_maybe"):
+            assert getattr(state, field) == getattr(rebuilt, field)
+        assert engine.evaluate_state(state) == {
+            **engine.evaluate_state(rebuilt),
+            "candidate_id": candidate.id,
+        }
+
+    assert state.possible_scenes == 0b11
+    assert not engine.apply_answer(state, taro_a, "ok")
+    assert state.version == 4
+
+
+def test_recommend_by_attendance_orders_by_ok_count() -> None:
+    """脚本がない場合はOK人数の多い順に並ぶこと."""
+    users = [uuid.uuid4() for _ in range(3)]
+    few = make_candidate({users[0]: "ok", users[1]: "maybe"})
+    many = make_candidate(dict.fromkeys(users, "ok"))
+    none = make_candidate({users[0]: "ng"})
+
+    assert [r["candidate_id"] for r in recommend_by_attendance([few, none, many])] == [
+        many.id,
+        few.id,
+    ]
@@ -2,9 +2,14 @@ from uuid import uuid4
 
 import pytest
 from fastapi import HTTPException
+from sqlalchemy import event
 
 from src.db.models import ProjectMember, Script, TheaterProject, User
-from src.services.project_limit import check_project_limit
+from src.services.project_limit import (
+    check_project_limit,
+    invalidate_restricted_projects,
+    is_project_restricted,
+)
 
 
 # Helper functions
@@ -113,3 +118,53 @@ async def test_check_project_limit_loophole_prevention(db):
             user.id, db, project_id_to_exclude=p_public.id, new_project_is_public=False
         )
     assert excinfo.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_is_project_restricted_uses_cache(db):
+    user = await create_user(db)
+    p_first = await create_project(db, user, name="First")
+    p_second = await create_project(db, user, name="Second")  # Over the default limit (1)
+
+    assert await is_project_restricted(p_second.id, db) is True
+    assert await is_project_restricted(p_first.id, db) is False
+    db.expunge_all()
+
+    queries = []
+
+    def count_query(*args):
+        queries.append(args)
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count_query)
+    try:
+        # Warm cache: no project / user / project list queries
+        assert await is_project_restricted(p_second.id, db) is True
+        assert await is_project_restricted(p_first.id, db) is False
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+    assert queries == []
+
+    # Making the first project public frees the slot once invalidated
+    first = await db.get(TheaterProject, p_first.id)
+    first.is_public = True
+    await db.commit()
+    invalidate_restricted_projects(user.id)
+
+    assert await is_project_restricted(p_second.id, db) is False
+
+
+@pytest.mark.asyncio
+async def test_deleting_project_lifts_restriction(client, db, test_user, test_user_token):
+    p_first = await create_project(db, test_user, name="First")
+    p_second = await create_project(db, test_user, name="Second")
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    response = await client.get(f"/api/projects/{p_second.id}", headers=headers)
+    assert response.json()["is_restricted"] is True
+
+    response = await client.delete(f"/api/projects/{p_first.id}", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get(f"/api/projects/{p_second.id}", headers=headers)
+    assert response.json()["is_restricted"] is False
@@ -26,12 +26,6 @@ async def test_api_create_premium_project(db: AsyncSession):
     await db.commit()
     await db.refresh(user)
 
-    # Mocking background tasks and discord service
-    from unittest.mock import MagicMock
-
-    bg_tasks = MagicMock()
-    discord_svc = MagicMock()
-
     # Create 1st project (should succeed)
     project_data = ProjectCreate(
         name="Project 1",
@@ -40,7 +34,7 @@ async def test_api_create_premium_project(db: AsyncSession):
         attendance_reminder_1_hours=48,
         attendance_reminder_2_hours=24,
     )
-    p1 = await create_project(project_data, bg_tasks, user, db, discord_svc)
+    p1 = await create_project(project_data, user, db)
     assert p1 is not None
 
     # Create 2nd project (should succeed for premium 999)
@@ -52,7 +46,7 @@ async def test_api_create_premium_project(db: AsyncSession):
         attendance_reminder_2_hours=24,
     )
     try:
-        p2 = await create_project(project_data2, bg_tasks, user, db, discord_svc)
+        p2 = await create_project(project_data2, user, db)
         print("Success! Created 2nd project via API handler.")
     except Exception as e:
         print(f"Failed to create 2nd project! Exception: {e}")
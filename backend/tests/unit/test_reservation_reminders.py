@@ -1,13 +1,18 @@
 """リマインダーメール関連のテスト."""
 
 from datetime import UTC, datetime, timedelta, timezone
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import Milestone, Reservation, TheaterProject
-from src.services.email import email_service
+from src.services.email import (
+    SENDGRID_MAX_PERSONALIZATIONS,
+    EmailService,
+    EventReminderRecipient,
+    email_service,
+)
 
 
 @pytest.fixture
@@ -74,8 +79,8 @@ async def test_check_todays_events_basic(
     db.add(r)
     await db.commit()
 
-    with patch.object(email_service, "send_event_reminder") as mock_send:
-        mock_send.return_value = True
+    with patch.object(email_service, "send_event_reminders", new_callable=AsyncMock) as mock_send:
+        mock_send.return_value = [True]
 
         stats = await check_todays_events(db=db)
 
@@ -84,4 +89,40 @@ async def test_check_todays_events_basic(
         assert stats["reminders_sent"] >= 1
 
         # メール送信が呼ばれたか
-        mock_send.assert_called()
+        mock_send.assert_awaited_once()
+        recipients = mock_send.call_args.kwargs["recipients"]
+        assert recipients == [EventReminderRecipient("test@example.com", "Test User", 2)]
+
+    await db.refresh(r)
+    assert r.reminder_sent_at is not None
+
+
+@pytest.mark.asyncio
+async def test_send_event_reminders_batches_personalizations():
+    """リマインダーは personalizations にまとめて送信される."""
+    service = EmailService()
+    service.client = MagicMock()
+    service.client.send.return_value = MagicMock(status_code=202)
+    recipients = [
+        EventReminderRecipient(f"user{i}@example.com", f"User{i}", i % 3 + 1)
+        for i in range(SENDGRID_MAX_PERSONALIZATIONS + 1)
+    ]
+
+    results = await service.send_event_reminders(
+        recipients,
+        milestone_title="Test Event",
+        date_str="2025/12/29 12:00",
+        project_name="Test Project",
+        location="Test Venue",
+    )
+
+    assert results == [True] * len(recipients)
+    assert service.client.send.call_count == 2
+    first, second = (call.args[0].get() for call in service.client.send.call_args_list)
+    assert len(first["personalizations"]) == SENDGRID_MAX_PERSONALIZATIONS
+    assert len(second["personalizations"]) == 1
+    assert second["personalizations"][0] == {
+        "to": [{"email": recipients[-1].to_email}],
+        "substitutions": {"-name-": recipients[-1].name, "-count-": str(recipients[-1].count)},
+    }
+    assert "-name- 様" in first["content"][0]["value"]
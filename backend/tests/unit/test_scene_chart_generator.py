@@ -1,12 +1,20 @@
 """香盤表生成サービスのテスト."""
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.db.models import Character, Line, Scene, Script, TheaterProject, User
-from src.services.scene_chart_generator import generate_scene_chart
+from src.db.models import (
+    Character,
+    Line,
+    Scene,
+    SceneCharacterMapping,
+    Script,
+    TheaterProject,
+    User,
+)
+from src.services.scene_chart_generator import generate_scene_chart, get_scene_characters
 
 
 @pytest.mark.asyncio
@@ -188,3 +196,169 @@ async def test_regenerate_scene_chart(
     # Assert: 新しい香盤表が作成されている
     assert chart2.id is not None
     assert chart2.script_id == script.id
+
+
+@pytest.mark.asyncio
+async def test_generate_scene_chart_with_precomputed_mapping(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """パーサーが返したシーン別登場人物を渡した場合はセリフを走査しないこと."""
+    script = Script(
+        project_id=test_project.id,
+        uploaded_by=test_user.id,
+        title="事前計算脚本",
+        content="",
+    )
+    db.add(script)
+    await db.flush()
+
+    scene = Scene(script_id=script.id, scene_number=1, heading="INT. 部屋 - DAY")
+    char1 = Character(script_id=script.id, name="太郎")
+    char2 = Character(script_id=script.id, name="花子")
+    db.add_all([scene, char1, char2])
+    await db.flush()
+
+    # セリフは読み込まず、事前計算済みの対応だけで生成する
+    chart = await generate_scene_chart(
+        script, db, scene_line_counts={scene.id: {char1.id: 3, char2.id: 1}}
+    )
+    await db.commit()
+    await db.refresh(chart, ["mappings"])
+
+    assert {(m.scene_id, m.character_id, m.line_count) for m in chart.mappings} == {
+        (scene.id, char1.id, 3),
+        (scene.id, char2.id, 1),
+    }
+
+
+@pytest.mark.asyncio
+async def test_generate_scene_chart_counts_lines_per_character(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """セリフ数がマッピングに記録され、あらすじ・ト書きは集計されないこと."""
+    script = Script(
+        project_id=test_project.id, uploaded_by=test_user.id, title="集計テスト", content=""
+    )
+    db.add(script)
+    await db.flush()
+
+    synopsis = Scene(script_id=script.id, scene_number=0, heading="あらすじ")
+    scene = Scene(script_id=script.id, scene_number=1, heading="INT. 部屋 - DAY")
+    char1 = Character(script_id=script.id, name="太郎")
+    char2 = Character(script_id=script.id, name="花子")
+    db.add_all([synopsis, scene, char1, char2])
+    await db.flush()
+
+    db.add_all(
+        [
+            Line(scene_id=synopsis.id, character_id=char1.id, content="前回", order=1),
+            Line(scene_id=scene.id, character_id=char1.id, content="A", order=1),
+            Line(scene_id=scene.id, character_id=None, content="ト書き", order=2),
+            Line(scene_id=scene.id, character_id=char1.id, content="B", order=3),
+            Line(scene_id=scene.id, character_id=char2.id, content="C", order=4),
+        ]
+    )
+    await db.commit()
+
+    chart = await generate_scene_chart(script, db)
+    await db.commit()
+    await db.refresh(chart, ["mappings"])
+
+    assert {(m.scene_id, m.character_id, m.line_count) for m in chart.mappings} == {
+        (scene.id, char1.id, 2),
+        (scene.id, char2.id, 1),
+    }
+
+
+@pytest.mark.asyncio
+async def test_regenerate_updates_manual_mapping_line_counts(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """手動マッピングのセリフ数が更新され、セリフがなくなったものは0に戻ること."""
+    script = Script(
+        project_id=test_project.id, uploaded_by=test_user.id, title="手動マッピング", content=""
+    )
+    db.add(script)
+    await db.flush()
+
+    scene = Scene(script_id=script.id, scene_number=1, heading="INT. 部屋 - DAY")
+    char1 = Character(script_id=script.id, name="太郎")
+    char2 = Character(script_id=script.id, name="花子")
+    db.add_all([scene, char1, char2])
+    await db.flush()
+    chart = await generate_scene_chart(script, db, scene_line_counts={scene.id: {}})
+    db.add_all(
+        [
+            SceneCharacterMapping(
+                chart_id=chart.id,
+                scene_id=scene.id,
+                character_id=char1.id,
+                is_manual=True,
+                line_count=4,
+            ),
+            SceneCharacterMapping(
+                chart_id=chart.id,
+                scene_id=scene.id,
+                character_id=char2.id,
+                is_manual=True,
+                line_count=2,
+            ),
+        ]
+    )
+    await db.commit()
+
+    # 花子のセリフが削除され、太郎のセリフ数が変わった
+    await generate_scene_chart(script, db, scene_line_counts={scene.id: {char1.id: 3}})
+    await db.commit()
+
+    result = await db.execute(
+        select(
+            SceneCharacterMapping.character_id,
+            SceneCharacterMapping.is_manual,
+            SceneCharacterMapping.line_count,
+        ).where(SceneCharacterMapping.chart_id == chart.id)
+    )
+    assert set(result.all()) == {(char1.id, True, 3), (char2.id, True, 0)}
+
+
+@pytest.mark.asyncio
+async def test_get_scene_characters_uses_index_only(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """シーンの登場人物は出演インデックスから求め、lines テーブルを読まないこと."""
+    script = Script(
+        project_id=test_project.id, uploaded_by=test_user.id, title="インデックス", content=""
+    )
+    db.add(script)
+    await db.flush()
+
+    scene1 = Scene(script_id=script.id, scene_number=1, heading="INT. 部屋 - DAY")
+    scene2 = Scene(script_id=script.id, scene_number=2, heading="EXT. 公園 - DAY")
+    char1 = Character(script_id=script.id, name="太郎", order=2)
+    char2 = Character(script_id=script.id, name="花子", order=1)
+    db.add_all([scene1, scene2, char1, char2])
+    await db.flush()
+    await generate_scene_chart(
+        script,
+        db,
+        scene_line_counts={scene1.id: {char1.id: 1, char2.id: 1}, scene2.id: {char1.id: 2}},
+    )
+    await db.commit()
+
+    statements: list[str] = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        scene_characters = await get_scene_characters(
+            [scene1.id, scene2.id], db, selectinload(Character.castings)
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    assert [c.name for c in scene_characters[scene1.id]] == ["花子", "太郎"]
+    assert [c.name for c in scene_characters[scene2.id]] == ["太郎"]
+    assert not any("lines" in statement for statement in statements)
@@ -178,3 +178,125 @@ async def test_send_reminder(db, mock_discord_service, test_project, test_user):
     call_args = mock_discord_service.send_channel_message.call_args[1]
     assert call_args["channel_id"] == "12345"
     assert "Reminder Test" in call_args["content"]
+
+
+@pytest.mark.asyncio
+async def test_check_poll_deadlines_batches_unanswered_members(
+    db, mock_discord_service, test_project, test_user
+):
+    from sqlalchemy import event
+
+    from src.db.models import ProjectMember, User
+
+    test_project.discord_channel_id = "12345"
+    user2 = User(discord_id="uid2", discord_username="user2")
+    db.add(user2)
+    await db.flush()
+    db.add(ProjectMember(project_id=test_project.id, user_id=user2.id, role="editor"))
+    await db.commit()
+
+    past = datetime.now(UTC) - timedelta(hours=1)
+
+    async def add_due_poll(title: str, answered_by: list) -> SchedulePoll:
+        poll = SchedulePoll(
+            project_id=test_project.id, title=title, creator_id=test_user.id, deadline=past
+        )
+        db.add(poll)
+        await db.flush()
+        candidate = SchedulePollCandidate(poll_id=poll.id, start_datetime=past, end_datetime=past)
+        db.add(candidate)
+        await db.flush()
+        for user in answered_by:
+            db.add(SchedulePollAnswer(candidate_id=candidate.id, user_id=user.id, status="ok"))
+        await db.commit()
+        return poll
+
+    service = SchedulePollService(db, mock_discord_service)
+    engine = db.bind.sync_engine
+    queries = []
+
+    def on_execute(*args):
+        queries.append(args)
+
+    async def run_with_query_count() -> tuple[dict, int]:
+        queries.clear()
+        event.listen(engine, "before_cursor_execute", on_execute)
+        try:
+            stats = await service.check_poll_deadlines("http://localhost")
+        finally:
+            event.remove(engine, "before_cursor_execute", on_execute)
+        return stats, len(queries)
+
+    await add_due_poll("Poll 1", answered_by=[test_user])
+    stats, single_poll_queries = await run_with_query_count()
+    assert stats == {"checked_polls": 1, "reminders_sent": 1, "errors": 0}
+    content = mock_discord_service.send_channel_message.call_args[1]["content"]
+    assert "<@uid2>" in content
+    assert "<@123456789>" not in content
+
+    # 期限切れのPollが増えてもクエリ数は変わらない
+    mock_discord_service.send_channel_message.reset_mock()
+    for i in range(3):
+        await add_due_poll(f"Poll {i + 2}", answered_by=[test_user, user2] if i == 0 else [])
+    stats, many_poll_queries = await run_with_query_count()
+    assert stats == {"checked_polls": 3, "reminders_sent": 2, "errors": 0}
+    assert mock_discord_service.send_channel_message.call_count == 2
+    assert many_poll_queries == single_poll_queries
+
+    # 送信済みのPollは次回のチェック対象にならない
+    stats, _ = await run_with_query_count()
+    assert stats["checked_polls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_recommendations(db, test_project, test_user):
+    from src.db.models import (
+        Character,
+        CharacterCasting,
+        ProjectMember,
+        Scene,
+        SceneCharacterMapping,
+        SceneChart,
+        Script,
+    )
+
+    script = Script(project_id=test_project.id, uploaded_by=test_user.id, title="Reco", content="")
+    db.add(script)
+    await db.flush()
+    scene = Scene(script_id=script.id, scene_number=1, heading="Room")
+    character = Character(script_id=script.id, name="Hero")
+    chart = SceneChart(script_id=script.id)
+    db.add_all([scene, character, chart])
+    await db.flush()
+    db.add_all(
+        [
+            SceneCharacterMapping(chart_id=chart.id, scene_id=scene.id, character_id=character.id),
+            CharacterCasting(character_id=character.id, user_id=test_user.id),
+            ProjectMember(project_id=test_project.id, user_id=test_user.id, role="owner"),
+        ]
+    )
+
+    poll = SchedulePoll(project_id=test_project.id, title="Reco", creator_id=test_user.id)
+    db.add(poll)
+    await db.flush()
+    now = datetime.now(UTC)
+    available = SchedulePollCandidate(poll_id=poll.id, start_datetime=now, end_datetime=now)
+    absent = SchedulePollCandidate(poll_id=poll.id, start_datetime=now, end_datetime=now)
+    db.add_all([available, absent])
+    await db.flush()
+    db.add_all(
+        [
+            SchedulePollAnswer(candidate_id=available.id, user_id=test_user.id, status="ok"),
+            SchedulePollAnswer(candidate_id=absent.id, user_id=test_user.id, status="ng"),
+        ]
+    )
+    await db.commit()
+
+    service = SchedulePollService(db, MagicMock())
+    recommendations = await service.get_recommendations(poll.id)
+
+    assert [r["candidate_id"] for r in recommendations] == [available.id]
+    [possible] = recommendations[0]["possible_scenes"]
+    assert possible["scene_id"] == scene.id
+    assert possible["score"] == 10
+    assert recommendations[0]["reason"] == "必須キャスト全員出席可能"
@@ -0,0 +1,181 @@
+"""脚本の差分更新のテスト."""
+
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.db.models import (
+    Character,
+    CharacterCasting,
+    Line,
+    Rehearsal,
+    RehearsalScene,
+    RehearsalSchedule,
+    Scene,
+    Script,
+    TheaterProject,
+    User,
+)
+from src.services.fountain_parser import parse_fountain_and_create_models
+from src.services.parsed_script import ParsedCharacter, ParsedLine, ParsedScene, ParsedScript
+from src.services.script_diff import apply_script_diff
+
+
+def build_parsed_script(scenes: dict[str, list[tuple[str | None, str]]]) -> ParsedScript:
+    """見出し → (話者, 内容) の並びから解析結果を組み立てる."""
+    characters: dict[str, ParsedCharacter] = {}
+    parsed_scenes = []
+    for number, (heading, lines) in enumerate(scenes.items(), start=1):
+        scene = ParsedScene(scene_number=number, act_number=None, heading=heading)
+        for order, (name, content) in enumerate(lines, start=1):
+            character = None
+            if name is not None:
+                character = characters.setdefault(
+                    name, ParsedCharacter(name=name, order=len(characters) + 1)
+                )
+            scene.lines.append(ParsedLine(content=content, order=order, character=character))
+        parsed_scenes.append(scene)
+    return ParsedScript(
+        content_hash="test",
+        elements=[],
+        metadata={},
+        characters=list(characters.values()),
+        scenes=parsed_scenes,
+    )
+
+
+ORIGINAL = {
+    "部屋": [("太郎", "こんにちは"), (None, "二人が座る"), ("花子", "元気？")],
+    "公園": [("太郎", "さようなら"), ("次郎", "またね")],
+}
+
+
+async def create_script(db: AsyncSession, project: TheaterProject, user: User) -> Script:
+    script = Script(project_id=project.id, uploaded_by=user.id, title="差分", content="")
+    db.add(script)
+    await db.flush()
+    await parse_fountain_and_create_models(script, "", db, parsed=build_parsed_script(ORIGINAL))
+    await db.commit()
+    return script
+
+
+async def load_ids(db: AsyncSession, script: Script) -> tuple[dict, dict, dict]:
+    scenes = (await db.execute(select(Scene).where(Scene.script_id == script.id))).scalars()
+    characters = (
+        await db.execute(select(Character).where(Character.script_id == script.id))
+    ).scalars()
+    lines = (
+        await db.execute(
+            select(Line.id, Line.content).join(Scene).where(Scene.script_id == script.id)
+        )
+    ).all()
+    return (
+        {s.heading: s.id for s in scenes},
+        {c.name: c.id for c in characters},
+        {content: line_id for line_id, content in lines},
+    )
+
+
+@pytest.mark.asyncio
+async def test_typo_fix_keeps_ids(
+    db: AsyncSession, test_project: TheaterProject, test_user: User
+) -> None:
+    """1行の修正ではその行だけが更新され、すべてのIDが維持されること."""
+    script = await create_script(db, test_project, test_user)
+    scene_ids, character_ids, line_ids = await load_ids(db, script)
+    db.add(CharacterCasting(character_id=character_ids["太郎"], user_id=test_user.id))
+    await db.commit()
+
+    revised = {**ORIGINAL, "部屋": [("太郎", "こんにちは！"), *ORIGINAL["部屋"][1:]]}
+    result = await apply_script_diff(script, build_parsed_script(revised), db)
+    await db.commit()
+
+    assert dict(result.counts) == {"line_updated": 1}
+    new_scene_ids, new_character_ids, new_line_ids = await load_ids(db, script)
+    assert new_scene_ids == scene_ids
+    assert new_character_ids == character_ids
+    assert new_line_ids["こんにちは！"] == line_ids["こんにちは"]
+    casting = await db.scalar(
+        select(CharacterCasting).where(CharacterCasting.character_id == character_ids["太郎"])
+    )
+    assert casting is not None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("bulk", [True, False])
+async def test_removed_scene_and_character_are_deleted(
+    db: AsyncSession, test_project: TheaterProject, test_user: User, bulk: bool
+) -> None:
+    """消えたシーン・登場人物と、その紐付けだけが削除されること."""
+    script = await create_script(db, test_project, test_user)
+    scene_ids, character_ids, _ = await load_ids(db, script)
+
+    schedule = RehearsalSchedule(project_id=test_project.id, script_id=script.id)
+    db.add(schedule)
+    await db.flush()
+    rehearsal = Rehearsal(
+        schedule_id=schedule.id, scene_id=scene_ids["公園"], date=datetime.now(UTC)
+    )
+    db.add(rehearsal)
+    await db.flush()
+    db.add_all(
+        [
+            RehearsalScene(rehearsal_id=rehearsal.id, scene_id=scene_ids["部屋"]),
+            RehearsalScene(rehearsal_id=rehearsal.id, scene_id=scene_ids["公園"]),
+            CharacterCasting(character_id=character_ids["次郎"], user_id=test_user.id),
+            CharacterCasting(character_id=character_ids["花子"], user_id=test_user.id),
+        ]
+    )
+    await db.commit()
+
+    revised = {
+        "部屋": [("太郎", "こんにちは"), ("花子", "元気？")],
+        "駅": [("三郎", "到着")],
+    }
+    result = await apply_script_diff(script, build_parsed_script(revised), db, bulk=bulk)
+    await db.commit()
+
+    assert result.counts["scene_inserted"] == 1
+    assert result.counts["scene_deleted"] == 1
+    assert result.counts["character_inserted"] == 1
+    assert result.counts["character_deleted"] == 1
+    assert result.counts["line_deleted"] == 3  # ト書き1行 + 公園の2行
+
+    new_scene_ids, new_character_ids, _ = await load_ids(db, script)
+    assert new_scene_ids["部屋"] == scene_ids["部屋"]
+    assert "公園" not in new_scene_ids
+    assert set(new_character_ids) == {"太郎", "花子", "三郎"}
+    assert new_character_ids["花子"] == character_ids["花子"]
+
+    linked = (
+        await db.execute(
+            select(RehearsalScene.scene_id).where(RehearsalScene.rehearsal_id == rehearsal.id)
+        )
+    ).scalars()
+    assert set(linked) == {scene_ids["部屋"]}
+    await db.refresh(rehearsal)
+    assert rehearsal.scene_id is None
+
+    castings = (await db.execute(select(CharacterCasting.character_id))).scalars()
+    assert set(castings) == {character_ids["花子"]}
+
+    assert result.scene_line_counts[scene_ids["部屋"]] == {
+        character_ids["太郎"]: 1,
+        character_ids["花子"]: 1,
+    }
+
+    # セッション内のロード済みオブジェクトが古い状態のまま残らないこと
+    reloaded = await db.scalar(
+        select(Script)
+        .where(Script.id == script.id)
+        .options(selectinload(Script.scenes).selectinload(Scene.lines))
+    )
+    room = next(scene for scene in reloaded.scenes if scene.heading == "部屋")
+    assert [line.content for line in sorted(room.lines, key=lambda line: line.order)] == [
+        "こんにちは",
+        "元気？",
+    ]
+    assert {scene.heading for scene in reloaded.scenes} == {"部屋", "駅"}
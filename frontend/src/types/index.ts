@@ -62,6 +62,7 @@ export interface CharacterInScene {
     order: number;
     is_custom: boolean;
     is_manual: boolean;
+    line_count: number;
 }
 
 export interface SceneInChart {